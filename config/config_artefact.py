@@ -0,0 +1,352 @@
+# ════════════════════════════════════════════════════════════════════
+#  config/config_artefact.py – precompiled config artefact (mmap-loaded)
+# ════════════════════════════════════════════════════════════════════
+"""
+Compile the prompt / alias / safety configuration once, load it everywhere.
+
+Boot used to parse every config file and compile every structure in every
+worker. `get_compiled_config()` instead hashes the source files (plus the
+tokenizer id), and
+
+• loads ``<cache_dir>/config-<key>.bin`` with `mmap` when it exists, or
+• compiles the sources, writes that file atomically and loads it.
+
+An edit to any source – or to the code that compiles and defines the
+pickled objects – changes the key, so the next boot rebuilds automatically;
+stale artefacts are pruned.
+
+File layout
+-----------
+``header``  magic, format version, key, index length, ids offset
+``index``   pickled: validated settings file, aliases (+ pre-split tokens),
+            base / specialised prompts, the compiled `SafetyEngine`, and
+            (offset, length) of every prompt's token ids
+``ids``     every prompt's token ids as one native int32 array – read
+            straight from the mapping (`prompt_ids()` returns a zero-copy
+            `memoryview`), never unpickled
+
+Example
+-------
+>>> cfg = get_compiled_config(tokenizer=tokenizer)
+>>> cfg.base_prompt, cfg.token_count("base_prompt")
+>>> list(cfg.prompt_ids("summarise"))
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import functools
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Final, List, NamedTuple, Optional, Tuple
+
+from config.settings_loader import DEFAULT_SETTINGS_PATH, FALLBACK_SETTINGS, read_settings_file
+from utils.aliases import PROMPT_ALIAS_PATH, load_prompt_aliases
+from utils.safety_filters import SafetyEngine, get_safety_engine, preload_safety_engine
+
+# ───────────────────────────────────────────── Paths & defaults ──
+DEFAULT_ARTEFACT_DIR: str = os.getenv("CONFIG_ARTEFACT_DIR", ".cache/config")
+BASE_PROMPT_PATH: str = "config/prompt_template.txt"
+SPECIALIZED_PROMPTS_PATH: str = "config/specialized_prompts.json"
+
+FORMAT_VERSION = 1
+_MAGIC = b"CBCFG\x00"
+_HEADER = struct.Struct("<6sH32sQQ")  # magic, version, key, index len, ids offset
+_ID_TYPE: Final = "i"  # native int32; byte order / width are part of the key
+_KEEP_ARTEFACTS = 4  # newest files kept per directory (several tokenizers)
+# modules that compile the index or define the objects pickled into it
+_CODE_MODULES = (
+    "config.config_artefact",
+    "config.settings_loader",
+    "utils.aliases",
+    "utils.safety_filters",
+)
+
+
+class ConfigSources(NamedTuple):
+    """Files an artefact is compiled from."""
+
+    settings: str = DEFAULT_SETTINGS_PATH
+    aliases: str = str(PROMPT_ALIAS_PATH)
+    prompts: str = SPECIALIZED_PROMPTS_PATH
+    template: str = BASE_PROMPT_PATH
+
+
+# ─────────────────────────────────────────── Keys ──
+def tokenizer_id(tokenizer: Any) -> str:
+    """Stable identity of a tokenizer ('' for none): class, name, vocab size."""
+    if tokenizer is None:
+        return ""
+    name = getattr(tokenizer, "name_or_path", "") or ""
+    try:
+        vocab = len(tokenizer)
+    except TypeError:
+        vocab = -1
+    return f"{type(tokenizer).__name__}:{name}:{vocab}"
+
+
+@functools.lru_cache(maxsize=1)
+def code_fingerprint() -> str:
+    """
+    Hash of the code behind the artefact (`_CODE_MODULES`) – the index pickles
+    live objects such as `SafetyEngine`, so an upgrade must never map an
+    artefact built by the old classes.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for name in _CODE_MODULES:
+        path = getattr(sys.modules.get(name), "__file__", None)
+        h.update(b"\x00" + name.encode() + b"\x00")
+        try:
+            h.update(Path(path).read_bytes() if path else b"<unknown>")
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def source_key(sources: ConfigSources, tok_id: str = "") -> str:
+    """Content hash of every source file, the tokenizer, the format and the code."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(
+        f"{FORMAT_VERSION}|{code_fingerprint()}|{sys.byteorder}|"
+        f"{array(_ID_TYPE).itemsize}|{tok_id}".encode()
+    )
+    for field, path in zip(sources._fields, sources):
+        h.update(b"\x00" + field.encode() + b"\x00")
+        try:
+            h.update(Path(path).read_bytes())
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+# ─────────────────────────────────────────── Compiled config ──
+class CompiledConfig:
+    """
+    A loaded artefact. Everything is validated and compiled; only the token
+    id array stays in the (read-only) mapping.
+    """
+
+    def __init__(self, key: str, index: Dict[str, Any], ids: memoryview, path: str) -> None:
+        self.key = key
+        self.path = path
+        self.tokenizer_id: str = index["tokenizer_id"]
+        self.settings: Dict[str, Any] = index["settings"]
+        self.aliases: Tuple[Tuple[str, str], ...] = index["aliases"]
+        self.alias_tokens: Tuple[Tuple[str, ...], ...] = index["alias_tokens"]
+        self.base_prompt: str = index["base_prompt"]
+        self.specialized_prompts: Dict[str, str] = index["specialized_prompts"]
+        self.safety_engine: SafetyEngine = index["safety_engine"]
+        self._spans: Dict[str, Tuple[int, int]] = index["spans"]
+        self._ids = ids
+
+    def prompt_ids(self, name: str) -> Optional[memoryview]:
+        """
+        Token ids of ``"base_prompt"`` or a specialised prompt's concept (no
+        special tokens), or None when compiled without a tokenizer.
+        """
+        span = self._spans.get(name)
+        if span is None:
+            return None
+        start, length = span
+        return self._ids[start : start + length]
+
+    def token_count(self, name: str) -> Optional[int]:
+        span = self._spans.get(name)
+        return None if span is None else span[1]
+
+    def __repr__(self) -> str:
+        return (
+            f"CompiledConfig(key={self.key[:12]}…, prompts={len(self.specialized_prompts)}, "
+            f"aliases={len(self.aliases)}, tokenized={bool(self._spans)})"
+        )
+
+
+# ─────────────────────────────────────────── Compile ──
+def _read_prompts(path: str) -> Dict[str, str]:
+    with open(path, encoding="utf-8") as fh:
+        data: Any = json.load(fh)
+    if not isinstance(data, dict) or not all(
+        isinstance(k, str) and isinstance(v, str) for k, v in data.items()
+    ):
+        raise ValueError(f"{path} must be a JSON object of str→str")
+    return data
+
+
+def compile_config(
+    sources: ConfigSources = ConfigSources(), tokenizer: Any = None
+) -> Dict[str, Any]:
+    """
+    Validate and compile `sources`; returns the artefact index plus the flat
+    id list under ``"ids"``. Raises on invalid prompt files.
+    """
+    try:
+        settings = read_settings_file(sources.settings)
+    except FileNotFoundError:
+        settings = json.loads(json.dumps(FALLBACK_SETTINGS))
+    prompts = _read_prompts(sources.prompts)
+    with open(sources.template, encoding="utf-8") as fh:
+        base_prompt = fh.read().strip()
+
+    aliases: List[Tuple[str, str]] = []
+    for alias, concept in load_prompt_aliases(sources.aliases).items():
+        if concept not in prompts:
+            LOGGER.warning("[Config] alias '%s' → unknown prompt '%s' (dropped)", alias, concept)
+            continue
+        aliases.append((alias.lower(), concept))
+
+    ids: List[int] = []
+    spans: Dict[str, Tuple[int, int]] = {}
+    if tokenizer is not None:
+        for name, text in [("base_prompt", base_prompt), *prompts.items()]:
+            tok_ids = list(tokenizer(text, add_special_tokens=False)["input_ids"])
+            spans[name] = (len(ids), len(tok_ids))
+            ids.extend(tok_ids)
+
+    return {
+        "tokenizer_id": tokenizer_id(tokenizer),
+        "settings": settings,
+        "aliases": tuple(aliases),
+        "alias_tokens": tuple(tuple(a.split()) for a, _ in aliases),
+        "base_prompt": base_prompt,
+        "specialized_prompts": prompts,
+        "safety_engine": get_safety_engine(settings),
+        "spans": spans,
+        "ids": ids,
+    }
+
+
+def write_artefact(path: str, key: str, compiled: Dict[str, Any]) -> None:
+    """Serialise `compiled` to `path` atomically (temp file + rename)."""
+    index = {k: v for k, v in compiled.items() if k != "ids"}
+    blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    ids = array(_ID_TYPE, compiled["ids"]).tobytes()
+    ids_off = _HEADER.size + len(blob)
+    ids_off += -ids_off % 8  # aligned for the int view
+
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, key.encode(), len(blob), ids_off))
+            fh.write(blob)
+            fh.write(b"\x00" * (ids_off - _HEADER.size - len(blob)))
+            fh.write(ids)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ─────────────────────────────────────────── Load ──
+def load_artefact(path: str, key: Optional[str] = None) -> Optional[CompiledConfig]:
+    """
+    Map `path` read-only; None when missing, corrupt, of another format or
+    (with `key`) compiled from different sources.
+    """
+    try:
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, raw_key, index_len, ids_off = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError("foreign or outdated artefact")
+        file_key = raw_key.decode()
+        if key is not None and file_key != key:
+            raise ValueError("stale artefact")
+        view = memoryview(mm)
+        index = pickle.loads(view[_HEADER.size : _HEADER.size + index_len])
+        ids = view[ids_off:].cast(_ID_TYPE)
+    except Exception as exc:
+        LOGGER.debug("[Config] ignoring artefact %s (%s)", path, exc)
+        mm.close()
+        return None
+    return CompiledConfig(file_key, index, ids, path)
+
+
+def _prune(folder: str, keep: str) -> None:
+    """Drop all but the newest `_KEEP_ARTEFACTS` artefacts (never `keep`)."""
+    try:
+        files = sorted(Path(folder).glob("config-*.bin"), key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for old in files[_KEEP_ARTEFACTS:]:
+        if str(old) != keep:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+# ─────────────────────────────────────────── Process-wide entry ──
+_LOADED: Dict[str, CompiledConfig] = {}
+_LOCK = threading.Lock()
+
+
+def get_compiled_config(
+    sources: ConfigSources = ConfigSources(),
+    *,
+    tokenizer: Any = None,
+    cache_dir: str = DEFAULT_ARTEFACT_DIR,
+    force: bool = False,
+) -> CompiledConfig:
+    """
+    The artefact for the current content of `sources` (and `tokenizer`):
+    loaded from `cache_dir` when present, compiled and written otherwise.
+    Also registers the compiled safety engine with `get_safety_engine`.
+    """
+    key = source_key(sources, tokenizer_id(tokenizer))
+    path = os.path.join(cache_dir, f"config-{key}.bin")
+    with _LOCK:
+        cfg = None if force else _LOADED.get(key) or load_artefact(path, key)
+        if cfg is None:
+            t0 = time.perf_counter()
+            compiled = compile_config(sources, tokenizer)
+            try:
+                write_artefact(path, key, compiled)
+                cfg = load_artefact(path, key)
+                _prune(cache_dir, path)
+            except OSError as exc:
+                LOGGER.warning("[Config] cannot write artefact %s (%s) – using in-memory build", path, exc)
+            if cfg is None:
+                ids = memoryview(array(_ID_TYPE, compiled.pop("ids")).tobytes()).cast(_ID_TYPE)
+                cfg = CompiledConfig(key, compiled, ids, "")
+            LOGGER.info("[Config] compiled %s in %.1f ms", path, (time.perf_counter() - t0) * 1000)
+        else:
+            LOGGER.debug("[Config] loaded artefact %s", cfg.path or key)
+        _LOADED[key] = cfg
+    preload_safety_engine(cfg.settings, cfg.safety_engine)
+    return cfg
+
+
+__all__ = [
+    "CompiledConfig",
+    "ConfigSources",
+    "code_fingerprint",
+    "compile_config",
+    "get_compiled_config",
+    "load_artefact",
+    "source_key",
+    "tokenizer_id",
+    "write_artefact",
+]
@@ -0,0 +1,117 @@
+# ════════════════════════════════════════════════════════════════════
+#  config/request_context.py – per-request settings (snapshot + UI overrides)
+# ════════════════════════════════════════════════════════════════════
+"""
+Request-scoped configuration.
+
+A `RequestContext` is built once per incoming message from the current
+settings snapshot plus whatever the caller chose for *this* request (UI
+safety dropdown, generation sliders, fuzzy toggle). It is immutable and is
+passed explicitly down the pipeline – safety → context → generation – so
+concurrent requests never read or write shared state for their knobs.
+
+• Overrides are folded into the snapshot with `with_overrides()`: helpers
+  that already take `settings` (`evaluate_safety`, `apply_profanity_filter`,
+  `prepare_context`) see the request's values without new parameters, and
+  untouched sections stay the shared objects (identity caches keep hitting).
+• `None` means "use the configured default" for every override.
+
+Example
+-------
+>>> req = request_context(current_settings(), safety="strict", temperature=0.2)
+>>> req.safety_level, req.generation_kwargs()["temperature"]
+('strict', 0.2)
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+from config.settings_service import SettingsSnapshot, as_snapshot
+
+_REQUEST_IDS = itertools.count(1)
+
+
+# ─────────────────────────────────────────────────── Context ──
+@dataclass(frozen=True)
+class RequestContext:
+    """Everything one request is configured with; never shared or mutated."""
+
+    settings: SettingsSnapshot
+    session_id: str = "default"
+    request_id: int = 0
+    started: float = field(default_factory=time.monotonic, compare=False)  # deadline origin
+
+    @property
+    def safety_level(self) -> str:
+        return str(self.settings.section("safety").get("sensitivity_level", "moderate"))
+
+    @property
+    def fuzzy(self) -> bool:
+        pm = self.settings.section("prompt_matching")
+        return bool(pm.get("fuzzy_matching_enabled", True))
+
+    def generation_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for `model.generate()` (typed)."""
+        gen = self.settings.section("generation")
+        return {
+            "max_new_tokens": int(gen.get("max_new_tokens", 100)),
+            "do_sample": bool(gen.get("do_sample", True)),
+            "temperature": float(gen.get("temperature", 0.5)),
+            "top_p": float(gen.get("top_p", 0.9)),
+        }
+
+    @property
+    def deadline_s(self) -> float:
+        """Wall-clock budget for the whole turn, counted from `started` (0 = none)."""
+        return float(self.settings.section("generation").get("deadline_s", 0) or 0)
+
+
+def request_context(
+    base: Mapping[str, Any],
+    *,
+    safety: Optional[str] = None,
+    fuzzy: Optional[bool] = None,
+    max_new_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    top_p: Optional[float] = None,
+    do_sample: Optional[bool] = None,
+    session_id: str = "default",
+) -> RequestContext:
+    """
+    Build the context for one request from `base` (a snapshot or plain
+    settings dict) and the per-request overrides; `None` keeps the default.
+    """
+    changes: Dict[str, Dict[str, Any]] = {}
+    if safety is not None:
+        changes["safety"] = {"sensitivity_level": safety}
+    if fuzzy is not None:
+        changes["prompt_matching"] = {"fuzzy_matching_enabled": bool(fuzzy)}
+    gen = {
+        k: v
+        for k, v in (
+            ("max_new_tokens", None if max_new_tokens is None else int(max_new_tokens)),
+            ("temperature", None if temperature is None else float(temperature)),
+            ("top_p", None if top_p is None else float(top_p)),
+            ("do_sample", None if do_sample is None else bool(do_sample)),
+        )
+        if v is not None
+    }
+    if gen:
+        changes["generation"] = gen
+
+    snap = as_snapshot(base)
+    # skip overrides that equal the configured value – keeps shared sections
+    changes = {
+        name: values
+        for name, values in changes.items()
+        if any(snap.section(name).get(k) != v for k, v in values.items())
+    }
+    return RequestContext(snap.with_overrides(changes), session_id, next(_REQUEST_IDS))
+
+
+__all__ = ["RequestContext", "request_context"]
@@ -32,6 +32,18 @@ FALLBACK_SETTINGS: Dict[str, Any] = {
         "sensitivity_level": "moderate",
         "log_triggered_filters": True,
         "blocked_response_template": "I'm unable to respond to that request due to safety policies.",
+        # optional local model stage (utils/safety_classifier.py)
+        "classifier": {
+            "enabled": False,
+            "model": "",  # path / hub id, or "pkg.module:callable"
+            "label": None,  # unsafe class index or name (default: last)
+            "threshold": 0.8,
+            "timeout_ms": 50,
+            "workers": 1,
+            "max_batch": 16,
+            "batch_window_ms": 2,
+            "cache_size": 4096,
+        },
     },
     "memory": {  # ← new default block
         "backend": "none",  # "in_memory", "redis", …
@@ -42,11 +54,54 @@ FALLBACK_SETTINGS: Dict[str, Any] = {
         "fuzzy_cutoff": 0.7,
         "enable_alias_diagnostics": True,
     },
+    "model": {
+        "name": "google/flan-t5-base",
+        "revision": "main",  # pin a commit sha for reproducible deploys
+        "cache_dir": ".cache/models",  # pinned, verified local copies
+        "device": "auto",  # auto | cpu | cuda | mps
+        "precision": "fp32",  # fp32 | bf16 (autocast) | int8 (dynamic, CPU)
+        "engine": "torch",  # torch | onnx (ONNX Runtime, CPU) | fake (tests)
+        "onnx_threads": 0,  # ORT intra-op threads, 0 → default
+        "prefix_cache": False,  # torch: encode system / specialised prompts once (FiD-style)
+        "draft_model": "",  # torch: assisted decoding draft, e.g. google/flan-t5-small ("" = off)
+        "draft_revision": "main",
+        "draft_lookahead": 5,  # tokens the draft proposes per verification pass
+        "draft_schedule": "constant",  # constant | heuristic (adapts the lookahead)
+        "offline": None,  # None → MODEL_OFFLINE / HF_HUB_OFFLINE env
+        "verify": "size",  # size | full (sha256) | none
+    },
+    "routing": {  # concept → model tier (specialised prompts from get_specialized_prompt)
+        "enabled": False,
+        "tiers": {  # tier → overrides of the `model` section; unset keys follow `model`
+            "small": {"name": "google/flan-t5-small"},
+            "base": {},  # the main model
+        },
+        "concepts": {
+            "funny_response": "small",
+            "fun_fact": "small",
+            "motivational_quote": "small",
+            "historical_quote": "small",
+            "science_fact": "small",
+        },
+        "default_tier": "base",
+        "fallback_tier": "small",  # takes requests while a tier runs `max_queue` generations
+        "max_queue": 4,  # 0 → never fall back
+        "max_loaded": 2,  # models kept in memory (LRU tiers unloaded; main model stays)
+    },
+    "response_cache": {  # greedy (do_sample=False) generations only
+        "enabled": True,
+        "max_entries": 1024,
+        "ttl_s": 3600,
+        "redis_url": "",  # shared tier, e.g. redis://localhost:6379/1
+        "key_prefix": "chatbot:resp:",
+    },
     "generation": {
         "max_new_tokens": 100,
         "temperature": 0.5,
         "top_p": 0.9,
         "do_sample": True,
+        "deadline_s": 0,  # wall-clock budget per turn; past it the partial answer is returned (0 = none)
+        "stop_markers": ["User:", "Assistant:"],  # decoding stops when the reply starts a new turn
     },
     "logging": {
         "debug_mode": True,
@@ -63,35 +118,43 @@ FALLBACK_SETTINGS: Dict[str, Any] = {
         "max_history_turns": 5,
         "max_prompt_tokens": 512,
     },
+    "settings": {
+        "hot_reload": True,  # watch settings.json and swap snapshots live
+        "watch_interval_s": 2.0,
+    },
+    "summarisation": {
+        "enabled": True,
+        "strategy": "brief",  # "brief" | "bullet" | "extractive" | "abstractive"
+        "min_turns": 8,
+        "max_chars": 512,
+        "max_tokens": 128,  # extractive only – exact tokenizer budget
+        "trigger_by_tokens": False,
+        "max_context_tokens": 2000,
+        # abstractive only – background model summaries
+        "worker": "thread",  # "thread" | "process"
+        "abstractive_refresh_every": 4,
+        "abstractive_max_new_tokens": 96,
+    },
 }
 
 
 # ───────────────────────────────────────────────────────── Loader ──
-def load_settings(filepath: str = DEFAULT_SETTINGS_PATH) -> Dict[str, Any]:
-    """Load settings from JSON and apply .env overrides."""
-    load_dotenv()  # make .env variables available via os.getenv
-
-    # ── read file or fall back ───────────────────────────────────────
-    try:
-        if not os.path.exists(filepath):
-            LOGGER.warning("[Settings] %s not found – using defaults", filepath)
-            settings: Dict[str, Any] = dict(FALLBACK_SETTINGS)
-        else:
-            with open(filepath, "r", encoding="utf-8") as f:
-                data: Any = json.load(f)
-
-            if not isinstance(data, dict):
-                raise ValueError("settings.json must contain a JSON object")
-
-            # Shallow copy to ensure a real Dict[str, Any]
-            settings = dict(data)
-            LOGGER.info("[Settings] Loaded from %s", filepath)
-
-    except Exception as exc:
-        LOGGER.error("[Settings] Failed to load %s: %s – using defaults", filepath, exc)
-        settings = dict(FALLBACK_SETTINGS)
+def read_settings_file(filepath: str = DEFAULT_SETTINGS_PATH) -> Dict[str, Any]:
+    """
+    Parse `filepath` (no fallback, no .env) – raises on a missing, unreadable
+    or non-object file. `load_settings` and the settings service build on it.
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        data: Any = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("settings.json must contain a JSON object")
+    # Shallow copy to ensure a real Dict[str, Any]
+    return dict(data)
+
+
+def apply_env_overrides(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the documented environment overrides in place; returns `settings`."""
 
-    # ── .env overrides ───────────────────────────────────────────────
     def env_bool(name: str, default: bool) -> bool:
         val = os.getenv(name)
         return default if val is None else val.lower() == "true"
@@ -106,12 +169,54 @@ def load_settings(filepath: str = DEFAULT_SETTINGS_PATH) -> Dict[str, Any]:
     if (v := os.getenv("MAX_HISTORY_TURNS")) is not None:
         settings.setdefault("context", {})["max_history_turns"] = int(v)
 
+    # model device / offline start
+    model_cfg = settings.setdefault("model", {})
+    if device := os.getenv("MODEL_DEVICE"):
+        model_cfg["device"] = device
+    if precision := os.getenv("MODEL_PRECISION"):
+        model_cfg["precision"] = precision
+    if engine := os.getenv("MODEL_ENGINE"):
+        model_cfg["engine"] = engine
+    if cache_dir := os.getenv("MODEL_CACHE_DIR"):
+        model_cfg["cache_dir"] = cache_dir
+    if cache_url := os.getenv("RESPONSE_CACHE_URL"):
+        settings.setdefault("response_cache", {})["redis_url"] = cache_url
+    if (offline := os.getenv("MODEL_OFFLINE")) is not None:
+        model_cfg["offline"] = offline.lower() in {"1", "true", "yes"}
+
     # memory backend / enable
     mem_cfg = settings.setdefault("memory", {})
     if mem_backend := os.getenv("MEMORY_BACKEND"):
         mem_cfg["backend"] = mem_backend
     if (mem_enabled := os.getenv("MEMORY_ENABLED")) is not None:
         mem_cfg["enabled"] = mem_enabled.lower() == "true"
+    return settings
+
+
+def load_settings(filepath: str = DEFAULT_SETTINGS_PATH) -> Dict[str, Any]:
+    """
+    Load settings from JSON and apply .env overrides.
+
+    Every call re-reads the file and the .env; long-running code should take
+    snapshots from `config.settings_service` instead.
+    """
+    load_dotenv()  # make .env variables available via os.getenv
+
+    # ── read file or fall back ───────────────────────────────────────
+    try:
+        if not os.path.exists(filepath):
+            LOGGER.warning("[Settings] %s not found – using defaults", filepath)
+            settings: Dict[str, Any] = dict(FALLBACK_SETTINGS)
+        else:
+            settings = read_settings_file(filepath)
+            LOGGER.info("[Settings] Loaded from %s", filepath)
+
+    except Exception as exc:
+        LOGGER.error("[Settings] Failed to load %s: %s – using defaults", filepath, exc)
+        settings = dict(FALLBACK_SETTINGS)
+
+    # ── .env overrides ───────────────────────────────────────────────
+    apply_env_overrides(settings)
 
     # ── debug prints ─────────────────────────────────────────────────
     LOGGER.debug("[Settings] DEBUG_MODE = %s", settings["logging"]["debug_mode"])
@@ -0,0 +1,406 @@
+# ════════════════════════════════════════════════════════════════════
+#  config/settings_service.py – versioned, read-only settings snapshots
+# ════════════════════════════════════════════════════════════════════
+"""
+Load settings once, hand out immutable snapshots, swap them on change.
+
+• `SettingsService.current()` is a plain attribute read – no file access, no
+  `load_dotenv()`, no copying on the request path. The snapshot is deeply
+  read-only (`FrozenDict` / tuples), so no caller can leak a change into
+  another request; per-request variations use `snapshot.with_overrides()`.
+• `watch()` polls the settings file and `reload()`s on change; a new
+  snapshot is published atomically with `version + 1`. A file that fails to
+  parse keeps the last good snapshot. Sections whose content did not change
+  are carried over as the *same* objects, so identity-keyed caches (e.g. the
+  compiled safety engine) survive unrelated edits.
+• `derived(name, builder, sections=…)` caches artefacts per digest of the
+  sections they depend on – they are rebuilt only when those sections change.
+
+Example
+-------
+>>> service = get_settings_service()
+>>> snap = service.current()
+>>> snap.version, snap["context"]["max_prompt_tokens"]
+>>> service.watch()                      # hot reload from now on
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from dotenv import load_dotenv
+
+from config.settings_loader import (
+    DEFAULT_SETTINGS_PATH,
+    FALLBACK_SETTINGS,
+    apply_env_overrides,
+    read_settings_file,
+)
+
+Listener = Callable[["SettingsSnapshot", "SettingsSnapshot", Tuple[str, ...]], None]
+
+_ARTEFACT_VERSIONS = 4  # cached builds per artefact (global + a few overrides)
+
+
+# ─────────────────────────────────────────── Read-only values ──
+class FrozenDict(dict):  # type: ignore[type-arg]
+    """A `dict` that refuses mutation (still JSON-serialisable and picklable)."""
+
+    __slots__ = ()
+
+    def _readonly(self, *_: Any, **__: Any) -> Any:
+        raise TypeError("settings snapshots are read-only – use with_overrides() or patch()")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "FrozenDict":
+        return self
+
+
+def freeze(value: Any) -> Any:
+    """Deep read-only copy: dicts → FrozenDict, lists → tuples."""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Deep mutable copy of a frozen value (dicts and lists again)."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _merge(base: Mapping[str, Any], changes: Mapping[str, Any]) -> Dict[str, Any]:
+    """Recursive dict merge; `changes` wins, nested mappings are merged."""
+    out = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, Mapping) and isinstance(out.get(key), Mapping):
+            out[key] = _merge(out[key], value)
+        else:
+            out[key] = value
+    return out
+
+
+# ─────────────────────────────────────────────────── Snapshot ──
+@dataclass(frozen=True, eq=False)
+class SettingsSnapshot(Mapping[str, Any]):
+    """One immutable settings version; reads like the old settings dict."""
+
+    version: int
+    data: FrozenDict
+    digests: FrozenDict  # top-level section → content digest
+    source: str
+    loaded_at: float
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def section(self, name: str) -> FrozenDict:
+        """Top-level section (empty when absent)."""
+        return self.data.get(name) or FrozenDict()
+
+    def with_overrides(self, changes: Mapping[str, Any]) -> "SettingsSnapshot":
+        """
+        A variant for one request (e.g. the UI's safety level). Same version;
+        only the touched sections get new objects and digests.
+        """
+        if not changes:
+            return self
+        return _snapshot(
+            _merge(self.data, changes), self.version, "override", reuse=self, touched=changes.keys()
+        )
+
+    def thaw(self) -> Dict[str, Any]:
+        """Mutable deep copy (legacy callers that edit their settings)."""
+        return cast(Dict[str, Any], thaw(self.data))
+
+
+def _snapshot(
+    data: Mapping[str, Any],
+    version: int,
+    source: str,
+    *,
+    reuse: Optional[SettingsSnapshot] = None,
+    touched: Optional[Iterable[str]] = None,
+) -> SettingsSnapshot:
+    """
+    Freeze `data`; sections identical to `reuse` keep their objects. With
+    `touched`, every other section is taken from `reuse` without hashing.
+    """
+    sections: Dict[str, Any] = {}
+    digests: Dict[str, str] = {}
+    dirty = None if touched is None else set(touched)
+    for name, value in data.items():
+        if reuse is not None and dirty is not None and name not in dirty and name in reuse.digests:
+            sections[name] = reuse.data[name]
+            digests[name] = reuse.digests[name]
+            continue
+        digest = _digest(value)
+        if reuse is not None and reuse.digests.get(name) == digest:
+            sections[name] = reuse.data[name]
+        else:
+            sections[name] = freeze(value)
+        digests[name] = digest
+    return SettingsSnapshot(
+        version=version,
+        data=FrozenDict(sections),
+        digests=FrozenDict(digests),
+        source=source,
+        loaded_at=time.time(),
+    )
+
+
+def as_snapshot(settings: Mapping[str, Any]) -> SettingsSnapshot:
+    """`settings` itself if it is a snapshot, else a frozen copy (version 0)."""
+    if isinstance(settings, SettingsSnapshot):
+        return settings
+    return _snapshot(settings, 0, "dict")
+
+
+# ──────────────────────────────────────────────────── Service ──
+class SettingsService:
+    """
+    Owner of the current snapshot for one settings file.
+
+    • `current()`   – the live snapshot (lock-free read).
+    • `reload()`    – re-read the file; publish only if something changed.
+    • `patch()`     – publish current + changes (tests, admin hooks).
+    • `subscribe()` – `listener(old, new, changed_sections)` after each swap.
+    • `derived()`   – artefact cache keyed by section digests.
+    • `watch()`     – background polling of the file (hot reload).
+    """
+
+    def __init__(self, path: str = DEFAULT_SETTINGS_PATH, *, dotenv: bool = True) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._listeners: List[Listener] = []
+        self._artefacts: Dict[str, OrderedDict[Tuple[str, ...], Any]] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.stats: Dict[str, int] = {"reloads": 0, "published": 0, "errors": 0, "builds": 0}
+
+        if dotenv:
+            load_dotenv()  # once per service, not per read
+        self._stat = self._file_stat()
+        try:
+            data = read_settings_file(path)
+            LOGGER.info("[Settings] Loaded from %s", path)
+        except FileNotFoundError:
+            LOGGER.warning("[Settings] %s not found – using defaults", path)
+            data = copy.deepcopy(FALLBACK_SETTINGS)
+        except Exception as exc:
+            LOGGER.error("[Settings] Failed to load %s: %s – using defaults", path, exc)
+            data = copy.deepcopy(FALLBACK_SETTINGS)
+        self._snapshot = _snapshot(apply_env_overrides(data), 1, path)
+
+    # ─────────────────────────────────────────── internals ──
+    def _file_stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _publish(self, data: Dict[str, Any], source: str) -> SettingsSnapshot:
+        with self._lock:
+            old = self._snapshot
+            new = _snapshot(data, old.version + 1, source, reuse=old)
+            changed = tuple(
+                sorted(
+                    name
+                    for name in set(old.digests) | set(new.digests)
+                    if old.digests.get(name) != new.digests.get(name)
+                )
+            )
+            if not changed:
+                return old
+            self._snapshot = new
+            self.stats["published"] += 1
+            listeners = list(self._listeners)
+        LOGGER.info(
+            "[Settings] v%d → v%d from %s (changed: %s)",
+            old.version, new.version, source, ", ".join(changed),
+        )
+        for listener in listeners:
+            try:
+                listener(old, new, changed)
+            except Exception as exc:  # one bad listener must not block the swap
+                LOGGER.error("[Settings] listener failed (%s)", exc)
+        return new
+
+    # ─────────────────────────────────────────── public API ──
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def current(self) -> SettingsSnapshot:
+        """The live snapshot (never mutated; replaced on reload)."""
+        return self._snapshot
+
+    def reload(self) -> bool:
+        """Re-read the file; True if a new version was published."""
+        self.stats["reloads"] += 1
+        self._stat = self._file_stat()
+        try:
+            data = apply_env_overrides(read_settings_file(self._path))
+        except Exception as exc:
+            self.stats["errors"] += 1
+            LOGGER.error(
+                "[Settings] reload of %s failed (%s) – keeping v%d",
+                self._path, exc, self._snapshot.version,
+            )
+            return False
+        before = self._snapshot
+        return self._publish(data, self._path) is not before
+
+    def replace(self, data: Mapping[str, Any], *, source: str = "replace") -> SettingsSnapshot:
+        """Publish `data` as the next version (no env overrides applied)."""
+        return self._publish(thaw(data), source)
+
+    def patch(self, changes: Mapping[str, Any]) -> SettingsSnapshot:
+        """Publish the current snapshot merged with `changes`."""
+        return self._publish(_merge(self._snapshot.thaw(), thaw(changes)), "patch")
+
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """Call `listener(old, new, changed)` after every swap; returns unsubscribe."""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def derived(
+        self,
+        name: str,
+        builder: Callable[[SettingsSnapshot], Any],
+        *,
+        sections: Sequence[str],
+        snapshot: Optional[SettingsSnapshot] = None,
+    ) -> Any:
+        """
+        `builder(snapshot)` cached under `name` until one of `sections`
+        changes. Pass `snapshot` for a per-request override.
+        """
+        snap = snapshot or self._snapshot
+        key = tuple(snap.digests.get(s, "") for s in sections)
+        with self._lock:
+            cache = self._artefacts.setdefault(name, OrderedDict())
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        value = builder(snap)
+        with self._lock:
+            self.stats["builds"] += 1
+            cache[key] = value
+            while len(cache) > _ARTEFACT_VERSIONS:
+                cache.popitem(last=False)
+        return value
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Start polling the file every `interval` s (idempotent)."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="settings-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            stat = self._file_stat()
+            if stat is not None and stat != self._stat:
+                self.reload()
+
+    def stop(self) -> None:
+        """Stop the watcher thread."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+# ─────────────────────────────────────────── Process-wide service ──
+_SERVICES: Dict[str, SettingsService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def get_settings_service(path: str = DEFAULT_SETTINGS_PATH) -> SettingsService:
+    """The shared service for `path` (created – and the file read – once)."""
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(path)
+        if service is None:
+            service = _SERVICES[path] = SettingsService(path)
+        return service
+
+
+def current_settings(path: str = DEFAULT_SETTINGS_PATH) -> SettingsSnapshot:
+    """Shortcut for `get_settings_service(path).current()`."""
+    return get_settings_service(path).current()
+
+
+__all__ = [
+    "FrozenDict",
+    "as_snapshot",
+    "SettingsService",
+    "SettingsSnapshot",
+    "current_settings",
+    "freeze",
+    "get_settings_service",
+    "thaw",
+]
@@ -0,0 +1,22 @@
+"""
+Headless chat engine: safety → routing → memory → context → generate → persist.
+
+Importing the package is cheap – no torch / transformers / gradio; the model
+loads on first generation through the configured `InferenceEngine`
+(`engine.inference`: torch, onnx or fake) and the UI lives in `engine.ui`,
+imported only by `main.py`.
+"""
+
+from .inference import FakeEngine, InferenceEngine, create_engine, get_engine
+from .model import ModelRuntime, get_runtime
+from .pipeline import (
+    SETTINGS_SERVICE,
+    base_prompt,
+    boot,
+    chat,
+    count_tokens,
+    get_specialized_prompt,
+    handle_request,
+    prepare_context,
+    specialized_prompts,
+)
@@ -0,0 +1,148 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/assisted.py – speculative (assisted) decoding with a draft model
+# ════════════════════════════════════════════════════════════════════
+"""
+Assisted generation.
+
+A small draft model from the same family (e.g. flan-t5-small next to
+flan-t5-base – same vocabulary) proposes `lookahead` tokens greedily; the
+main model scores all of them in **one** forward pass and keeps the longest
+prefix it agrees with plus its own next token. Under greedy decoding the
+output is exactly the main model's; only the number of sequential main-model
+passes drops. This is `generate(..., assistant_model=draft)` in transformers.
+
+Configured by `settings['model']` (`draft_model` empty = off):
+
+    draft_model / draft_revision   local store entry, like the main model
+    draft_lookahead                tokens proposed per round
+    draft_schedule                 "constant" | "heuristic" (adapt lookahead)
+
+`AssistedDecoding.stats` counts rounds (main-model decoder passes), draft
+proposals and accepted drafts via forward hooks, from which
+`acceptance_rate` and `tokens_per_round` follow. Beam search, batches and the
+prefix-cache path (no input ids for the draft encoder) decode without the
+draft.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import contextlib
+import threading
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from engine.model import ModelRuntime
+
+
+def assistable(gen_cfg: Mapping[str, Any]) -> bool:
+    """Assisted decoding applies to single-beam generation only."""
+    return int(gen_cfg.get("num_beams", 1) or 1) == 1
+
+
+class AssistedDecoding:
+    """Draft model (loaded on first use) plus acceptance metrics."""
+
+    def __init__(self, draft: ModelRuntime, *, lookahead: int = 5, schedule: str = "constant") -> None:
+        self.draft = draft
+        self.lookahead = max(1, int(lookahead))
+        self.schedule = schedule if schedule in {"constant", "heuristic"} else "constant"
+        self._lock = threading.Lock()
+        self._local = threading.local()  # counts of the call running on this thread
+        self._hooked: set[int] = set()  # id() of models carrying our forward hook
+        self.stats: Dict[str, int] = {"calls": 0, "rounds": 0, "proposed": 0, "accepted": 0, "tokens": 0}
+
+    @property
+    def model(self) -> Any:
+        mdl = self.draft.model
+        cfg = mdl.generation_config
+        cfg.num_assistant_tokens = self.lookahead
+        cfg.num_assistant_tokens_schedule = self.schedule
+        return mdl
+
+    def generate_kwargs(self) -> Dict[str, Any]:
+        return {"assistant_model": self.model}
+
+    # ─────────────────────────────────────────── metrics ──
+    def _hook(self, model: Any, name: str) -> None:
+        """Permanent forward hook counting into the current thread's call, if any."""
+        if id(model) in self._hooked:
+            return
+
+        def count(*_: Any) -> None:
+            counts = getattr(self._local, "counts", None)
+            if counts is not None:
+                counts[name] += 1
+
+        model.register_forward_hook(count)
+        self._hooked.add(id(model))
+
+    @contextlib.contextmanager
+    def measure(self, main_model: Any) -> Iterator[Dict[str, int]]:
+        """
+        Count decoder passes of both models during one `generate()` call on
+        this thread (encoders run through `get_encoder()` and are not
+        counted). The caller stores the generated token count in the dict.
+        """
+        with self._lock:
+            self._hook(main_model, "main")
+            self._hook(self.draft.model, "draft")
+        counts = self._local.counts = {"main": 0, "draft": 0, "tokens": 0}
+        try:
+            yield counts
+        finally:
+            self._local.counts = None
+            self._record(counts)
+
+    def _record(self, counts: Mapping[str, int]) -> None:
+        rounds, tokens = counts["main"], counts["tokens"]
+        if not rounds or not tokens:
+            return
+        with self._lock:
+            s = self.stats
+            s["calls"] += 1
+            s["rounds"] += rounds
+            s["proposed"] += counts["draft"]
+            # every verification round yields the accepted drafts + one main-model token
+            s["accepted"] += max(0, min(counts["draft"], tokens - rounds))
+            s["tokens"] += tokens
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.stats["accepted"] / self.stats["proposed"] if self.stats["proposed"] else 0.0
+
+    @property
+    def tokens_per_round(self) -> float:
+        return self.stats["tokens"] / self.stats["rounds"] if self.stats["rounds"] else 0.0
+
+    def describe(self) -> str:
+        """One line for the Diagnostics box."""
+        return (
+            f"{self.draft.model_name} × {self.lookahead}: {self.acceptance_rate:.0%} accepted, "
+            f"{self.tokens_per_round:.2f} tokens / pass"
+        )
+
+
+def assisted_from_settings(cfg: Mapping[str, Any], main: ModelRuntime) -> Optional[AssistedDecoding]:
+    """Assisted decoding for a `model` settings section, or None when no draft is set."""
+    name = str(cfg.get("draft_model") or "")
+    if not name:
+        return None
+    draft = ModelRuntime(
+        name,
+        str(cfg.get("draft_revision", "main")),
+        store=main.store,
+        device=main.preferred_device,
+    )
+    return AssistedDecoding(
+        draft,
+        lookahead=int(cfg.get("draft_lookahead", 5)),
+        schedule=str(cfg.get("draft_schedule", "constant")),
+    )
+
+
+__all__ = ["AssistedDecoding", "assistable", "assisted_from_settings"]
@@ -0,0 +1,54 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/eval_prompts.py – fixed prompt set & output agreement (benchmarks)
+# ════════════════════════════════════════════════════════════════════
+"""
+Shared by the model benchmarks in ``scripts/`` (precision, prefix cache,
+assisted decoding): the built-in prompt set, the app's first-turn contexts
+for it, and exact / positional token agreement against a reference run.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+from typing import Dict, List, Sequence
+
+PROMPTS: List[str] = [
+    "Translate to German: The weather is nice today.",
+    "Summarize: The meeting was moved to Thursday because the projector broke.",
+    "Who wrote Romeo and Juliet?",
+    "Explain photosynthesis in one sentence.",
+    "Share a fun and interesting fact about octopuses.",
+    "What is the capital of Australia?",
+    "Give a famous historical quote and who said it.",
+    "Is a tomato a fruit or a vegetable? Answer briefly.",
+]
+
+
+def build_contexts(messages: Sequence[str]) -> List[str]:
+    """Contexts as the app builds them for a first turn (no history)."""
+    from engine.pipeline import get_specialized_prompt, load_base_prompt, load_specialized_prompts
+
+    base, prompts = load_base_prompt(), load_specialized_prompts()
+    contexts = []
+    for msg in messages:
+        spec, _, _ = get_specialized_prompt(msg, prompts, False)
+        contexts.append(f"{spec or base}\nUser: {msg}\nAssistant:")
+    return contexts
+
+
+def agreement(reference: Sequence[Sequence[int]], candidate: Sequence[Sequence[int]]) -> Dict[str, float]:
+    """Exact-match rate and mean positional token agreement vs. the reference."""
+    exact = 0
+    token_scores: List[float] = []
+    for ref, cand in zip(reference, candidate):
+        exact += list(ref) == list(cand)
+        longest = max(len(ref), len(cand)) or 1
+        token_scores.append(sum(a == b for a, b in zip(ref, cand)) / longest)
+    n = len(token_scores) or 1
+    return {
+        "exact_match": round(exact / n, 4),
+        "token_agreement": round(sum(token_scores) / n, 4),
+    }
+
+
+__all__ = ["PROMPTS", "agreement", "build_contexts"]
@@ -0,0 +1,511 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/inference.py – one interface over PyTorch, ONNX Runtime & a fake
+# ════════════════════════════════════════════════════════════════════
+"""
+Inference engines.
+
+The pipeline never touches a tokenizer or `model.generate()` itself; it calls
+an `InferenceEngine`:
+
+    generate(prompt, stop=None, **gen_cfg) -> str
+    stream(prompt, stop=None, **gen_cfg)   -> Iterator[str]   (text pieces)
+    generate_batch(prompts, **gen_cfg) -> list[str]
+
+┌────────┬──────────────────────────────────────────────────────────────┐
+│ torch  │ `ModelRuntime` (eager PyTorch, precision modes) – default     │
+│ onnx   │ ONNX Runtime on CPU: the seq2seq graph is exported once into  │
+│        │ ``<model dir>/onnx/``; encoder + decoder(-with-past) sessions │
+│        │ reuse the KV cache between decoding steps                     │
+│ fake   │ deterministic echo engine, no model (tests, UI development)   │
+└────────┴──────────────────────────────────────────────────────────────┘
+
+The engine is picked by `settings['model']['engine']` (env `MODEL_ENGINE`).
+`prefix_cache` makes the torch engine encode the static prompt prefixes
+once (`engine.prefix_cache`); `draft_model` turns on assisted decoding
+(`engine.assisted`). A `StopCondition` (`engine.stopping`) ends decoding at
+role markers or a wall-clock deadline. An engine whose packages are missing falls
+back to torch with a warning –
+the same way an unavailable memory backend falls back to in-memory.
+
+Nothing heavy is imported here: engines load on first use like the runtime.
+
+Example
+-------
+>>> eng = create_engine("fake")
+>>> eng.generate("Base prompt\\nUser: hello there\\nAssistant:")
+'echo: hello there'
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    runtime_checkable,
+)
+
+from engine.assisted import AssistedDecoding, assistable, assisted_from_settings
+from engine.model import ModelRuntime, get_runtime
+from engine.model_store import weights_fingerprint
+from engine.prefix_cache import PrefixCache
+from engine.stopping import StopCondition
+from engine.token_context import prompt_ids
+
+ENGINES = ("torch", "onnx", "fake")
+ONNX_SUBDIR = "onnx"
+ONNX_MARKER = "export.json"
+
+
+# ─────────────────────────────────────────── Interface ──
+@runtime_checkable
+class InferenceEngine(Protocol):
+    name: str
+
+    @property
+    def fingerprint(self) -> str: ...
+    @property
+    def tokenizer(self) -> Any: ...
+    @property
+    def ready(self) -> bool: ...
+    def load(self) -> "InferenceEngine": ...
+    def unload(self) -> bool: ...
+    def count_tokens(self, text: str) -> int: ...
+    def generate(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> str: ...
+    def stream(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> Iterator[str]: ...
+    def generate_batch(self, prompts: Sequence[str], **gen_cfg: Any) -> List[str]: ...
+
+
+# ─────────────────────────────────────────── Hugging Face generate() ──
+class _HFEngine(ABC):
+    """
+    Shared generate / stream / batch over any model with the Hugging Face
+    `generate()` API; subclasses provide `model`, `device` and `_context()`.
+    """
+
+    name = "hf"
+    prefix_cache: Optional[PrefixCache] = None  # torch only (encoder states reused)
+    assisted: Optional[AssistedDecoding] = None  # torch only (draft model proposes tokens)
+
+    def __init__(self, runtime: ModelRuntime) -> None:
+        self.runtime = runtime
+
+    @property
+    def fingerprint(self) -> str:
+        """Everything besides the prompt that decides the output (response-cache key)."""
+        rt = self.runtime
+        return "|".join([
+            self.name, f"{rt.model_name}@{rt.revision}", rt.precision, rt.preferred_device,
+            "prefix-cache" if self.prefix_cache is not None else "full",
+        ])
+
+    @property
+    def tokenizer(self) -> Any:
+        return self.runtime.tokenizer
+
+    @property
+    @abstractmethod
+    def model(self) -> Any:
+        """The loaded model (lazily, on first use)."""
+
+    @property
+    def device(self) -> str:
+        return "cpu"
+
+    def _context(self) -> Any:
+        import contextlib
+
+        return contextlib.nullcontext()
+
+    def count_tokens(self, text: str) -> int:
+        return self.runtime.count_tokens(text)
+
+    def _inputs(self, prompt: str) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+        """
+        `generate()` inputs: cached prefix + encoded tail when possible, else
+        input ids – taken from a `TokenPrompt` without tokenising again.
+        """
+        tok = self.tokenizer
+        if self.prefix_cache is not None:
+            cached = self.prefix_cache.encoder_inputs(prompt, tok, self.model, self.device)
+            if cached is not None:
+                return (), cached
+        ids = prompt_ids(prompt, tok)
+        if ids is None:
+            ids = tok(prompt, return_tensors="pt").input_ids
+        return (ids.to(self.device),), {}
+
+    def _generate(self, mdl: Any, args: Tuple[Any, ...], inputs: Dict[str, Any], gen_cfg: Dict[str, Any]) -> Any:
+        """`mdl.generate()`, assisted by the draft model when configured and applicable."""
+        if self.assisted is None or not args or not assistable(gen_cfg):
+            return mdl.generate(*args, **inputs, **gen_cfg)
+        with self.assisted.measure(mdl) as counts:
+            out = mdl.generate(*args, **inputs, **self.assisted.generate_kwargs(), **gen_cfg)
+            counts["tokens"] = int(out.shape[-1]) - 1  # minus the decoder start token
+        return out
+
+    def generate(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> str:
+        tok, mdl = self.tokenizer, self.model
+        if stop is not None:
+            gen_cfg = {**gen_cfg, "stopping_criteria": stop.criteria(tok)}
+        with self._context():
+            args, inputs = self._inputs(prompt)
+            out = self._generate(mdl, args, inputs, gen_cfg)
+        text: str = tok.decode(out[0], skip_special_tokens=True).strip()
+        if stop is None:
+            return text
+        return stop.finish(text, len(out[0]) - 1, gen_cfg.get("max_new_tokens"))  # minus decoder start
+
+    def generate_batch(self, prompts: Sequence[str], **gen_cfg: Any) -> List[str]:
+        """One padded `generate()` call for all prompts (encoder runs batched)."""
+        if not prompts:
+            return []
+        tok, mdl = self.tokenizer, self.model
+        enc = tok(list(prompts), return_tensors="pt", padding=True).to(self.device)
+        with self._context():
+            out = mdl.generate(**enc, **gen_cfg)
+        return [t.strip() for t in tok.batch_decode(out, skip_special_tokens=True)]
+
+    def stream(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> Iterator[str]:
+        """Text pieces as they are decoded (generation runs on a helper thread)."""
+        from transformers import TextIteratorStreamer
+
+        tok, mdl = self.tokenizer, self.model
+        streamer = TextIteratorStreamer(tok, skip_prompt=True, skip_special_tokens=True)
+        if stop is not None:
+            gen_cfg = {**gen_cfg, "stopping_criteria": stop.criteria(tok)}
+        errors: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                with self._context():
+                    args, inputs = self._inputs(prompt)
+                    self._generate(mdl, args, inputs, {**gen_cfg, "streamer": streamer})
+            except BaseException as exc:  # surfaced in the caller's thread
+                errors.append(exc)
+                streamer.end()
+
+        worker = threading.Thread(target=run, name=f"{self.name}-stream", daemon=True)
+        worker.start()
+        pieces = (piece for piece in streamer if piece)
+        yield from (stop.filter(pieces) if stop is not None else pieces)
+        worker.join()
+        if errors:
+            raise errors[0]
+
+
+class TorchEngine(_HFEngine):
+    """Eager PyTorch through the shared `ModelRuntime` (precision modes apply)."""
+
+    name = "torch"
+
+    def __init__(
+        self,
+        runtime: ModelRuntime,
+        *,
+        prefix_cache: Optional[PrefixCache] = None,
+        assisted: Optional[AssistedDecoding] = None,
+    ) -> None:
+        super().__init__(runtime)
+        self.prefix_cache = prefix_cache
+        self.assisted = assisted
+
+    @property
+    def model(self) -> Any:
+        return self.runtime.model
+
+    @property
+    def device(self) -> str:
+        return self.runtime.device
+
+    @property
+    def ready(self) -> bool:
+        return self.runtime.ready
+
+    def load(self) -> "TorchEngine":
+        self.runtime.load()
+        return self
+
+    def unload(self) -> bool:
+        return self.runtime.unload()
+
+    def _context(self) -> Any:
+        return self.runtime.inference_context()
+
+
+# ─────────────────────────────────────────── ONNX Runtime ──
+def onnx_available() -> bool:
+    return all(importlib.util.find_spec(m) is not None for m in ("onnxruntime", "optimum"))
+
+
+def _export_fingerprint() -> Dict[str, str]:
+    import onnxruntime
+    import optimum.version
+
+    return {"onnxruntime": onnxruntime.__version__, "optimum": optimum.version.__version__}
+
+
+def export_onnx(model_dir: str, *, force: bool = False) -> Path:
+    """
+    ``<model_dir>/onnx/`` holding encoder, decoder and decoder-with-past
+    graphs; exported from the local weights on first call (atomic), reused
+    afterwards unless the weights or the exporter versions changed, or `force`.
+    """
+    target = Path(model_dir) / ONNX_SUBDIR
+    fingerprint = _export_fingerprint()
+    weights = weights_fingerprint(model_dir)
+    try:
+        marker = json.loads((target / ONNX_MARKER).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        marker = None
+    if (
+        not force
+        and marker is not None
+        and marker.get("versions") == fingerprint
+        and marker.get("weights") == weights
+    ):
+        return target
+
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    LOGGER.info("[Model] exporting %s to ONNX (once)", model_dir)
+    t0 = time.perf_counter()
+    tmp = Path(tempfile.mkdtemp(dir=model_dir, prefix=".onnx-"))
+    try:
+        ORTModelForSeq2SeqLM.from_pretrained(
+            model_dir, export=True, use_cache=True, local_files_only=True
+        ).save_pretrained(tmp)
+        elapsed = time.perf_counter() - t0
+        (tmp / ONNX_MARKER).write_text(
+            json.dumps(
+                {"versions": fingerprint, "weights": weights, "export_s": round(elapsed, 3)},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    LOGGER.info("[Model] ONNX export → %s (%.1f s)", target, elapsed)
+    return target
+
+
+class OnnxEngine(_HFEngine):
+    """
+    ONNX Runtime on CPU. The tokenizer comes from the runtime (no torch
+    weights are loaded); the graph is exported once per model directory.
+    """
+
+    name = "onnx"
+
+    def __init__(self, runtime: ModelRuntime, *, threads: int = 0) -> None:
+        super().__init__(runtime)
+        self.threads = threads  # 0 → onnxruntime default
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_sessions()
+        return self._model
+
+    def _load_sessions(self) -> Any:
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        if self.runtime.precision != "fp32":
+            LOGGER.warning("[Model] precision '%s' is ignored by the onnx engine", self.runtime.precision)
+        t0 = time.perf_counter()
+        onnx_dir = export_onnx(self.runtime.path)
+        t1 = time.perf_counter()
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads:
+            opts.intra_op_num_threads = self.threads
+        mdl = ORTModelForSeq2SeqLM.from_pretrained(
+            onnx_dir,
+            use_cache=True,  # decoder-with-past: KV cache reused per step
+            provider="CPUExecutionProvider",
+            session_options=opts,
+            local_files_only=True,
+        )
+        self.timings.update({"export": t1 - t0, "sessions": time.perf_counter() - t1})
+        LOGGER.info(
+            "[Model] %s (onnx) ready: %s",
+            self.runtime.model_name,
+            ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in self.timings.items()),
+        )
+        return mdl
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> "OnnxEngine":
+        self.model  # noqa: B018
+        return self
+
+    def unload(self) -> bool:
+        with self._lock:
+            loaded, self._model = self._model is not None, None
+        return loaded
+
+
+# ─────────────────────────────────────────── Fake ──
+class FakeTokenizer:
+    """Whitespace tokenizer: ids are stable CRC32 buckets of the words."""
+
+    name_or_path = "fake/whitespace"
+    vocab_size = 32_000
+
+    def __len__(self) -> int:
+        return self.vocab_size
+
+    def __call__(self, text: str, add_special_tokens: bool = True, **_: Any) -> Dict[str, List[int]]:
+        ids = [zlib.crc32(w.encode("utf-8")) % self.vocab_size for w in text.split()]
+        return {"input_ids": ids + [1] if add_special_tokens else ids}
+
+
+class FakeEngine:
+    """
+    Deterministic engine without a model: replies ``echo: <last user line>``
+    (cut to `max_new_tokens` words) and records every call's settings.
+    """
+
+    name = "fake"
+
+    def __init__(self, reply: Optional[Callable[[str], str]] = None) -> None:
+        self._reply = reply
+        self._tokenizer = FakeTokenizer()
+        self.calls: List[Dict[str, Any]] = []
+
+    @property
+    def fingerprint(self) -> str:
+        return f"fake|{id(self)}"
+
+    @property
+    def tokenizer(self) -> FakeTokenizer:
+        return self._tokenizer
+
+    @property
+    def ready(self) -> bool:
+        return True
+
+    def load(self) -> "FakeEngine":
+        return self
+
+    def unload(self) -> bool:
+        return False
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._tokenizer(text)["input_ids"])
+
+    def generate(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> str:
+        self.calls.append(dict(gen_cfg))
+        if self._reply is not None:
+            text = self._reply(prompt)
+        else:
+            user = prompt.rsplit("User: ", 1)[-1].split("\n", 1)[0].strip()
+            words = f"echo: {user}".split()
+            text = " ".join(words[: int(gen_cfg.get("max_new_tokens", len(words)))])
+        if stop is None:
+            return text
+        kept: List[str] = []
+        for word in text.split(" "):  # one "decoding step" per word
+            if stop.expired() or stop.hit(" ".join(kept)):
+                break
+            kept.append(word)
+        return stop.finish(" ".join(kept), len(kept), gen_cfg.get("max_new_tokens"))
+
+    def stream(self, prompt: str, *, stop: Optional[StopCondition] = None, **gen_cfg: Any) -> Iterator[str]:
+        words = self.generate(prompt, stop=stop, **gen_cfg).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else f" {word}"
+
+    def generate_batch(self, prompts: Sequence[str], **gen_cfg: Any) -> List[str]:
+        return [self.generate(p, **gen_cfg) for p in prompts]
+
+
+# ─────────────────────────────────────────── Factory ──
+def create_engine(
+    name: str,
+    runtime: Optional[ModelRuntime] = None,
+    cfg: Optional[Mapping[str, Any]] = None,
+) -> InferenceEngine:
+    """Engine `name` over `runtime` (default: the shared one); nothing is loaded."""
+    key = str(name or "torch").lower()
+    cfg = cfg or {}
+    if key == "fake":
+        return FakeEngine()
+    runtime = runtime or get_runtime()
+    prefix_cache = bool(cfg.get("prefix_cache", False))
+    if key == "onnx":
+        if onnx_available():
+            if prefix_cache or cfg.get("draft_model"):
+                LOGGER.warning("[Model] prefix_cache / draft_model are supported by the torch engine only")
+            return OnnxEngine(runtime, threads=int(cfg.get("onnx_threads", 0) or 0))
+        LOGGER.warning("[Model] onnx engine needs `onnxruntime` and `optimum` – using torch")
+    elif key != "torch":
+        LOGGER.error("[Model] unknown engine '%s' – using torch", name)
+    return TorchEngine(
+        runtime,
+        prefix_cache=PrefixCache() if prefix_cache else None,
+        assisted=assisted_from_settings(cfg, runtime),
+    )
+
+
+_ENGINE: Optional[InferenceEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine() -> InferenceEngine:
+    """The shared engine picked by `settings['model']['engine']` (created once)."""
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            from config.settings_service import current_settings
+
+            cfg = current_settings().section("model")
+            _ENGINE = create_engine(str(cfg.get("engine", "torch")), get_runtime(), cfg)
+        return _ENGINE
+
+
+__all__ = [
+    "ENGINES",
+    "FakeEngine",
+    "InferenceEngine",
+    "OnnxEngine",
+    "TorchEngine",
+    "create_engine",
+    "export_onnx",
+    "get_engine",
+    "onnx_available",
+]
@@ -0,0 +1,266 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/model.py – lazily loaded tokenizer / model / device
+# ════════════════════════════════════════════════════════════════════
+"""
+Model layer of the engine.
+
+Nothing here imports torch or transformers at module level: a
+`ModelRuntime` loads the tokenizer on first `.tokenizer` access and the
+model (plus device choice) on first `.model` / `.device` access. Importing
+the engine therefore costs milliseconds; only the code path that really
+tokenises or generates pays for the heavy stack – once per process.
+
+Both come from the pinned local directory of `engine.model_store`
+(`local_files_only`); weights are loaded as mmap'd safetensors with
+`low_cpu_mem_usage`, straight onto the device when accelerate is available.
+`timings` records resolve / tokenizer / weights / device_move seconds.
+
+Example
+-------
+>>> rt = get_runtime()
+>>> rt.ready            # False – nothing loaded yet
+>>> rt.count_tokens("hello world")   # loads the tokenizer only
+>>> rt.model            # loads FLAN-T5 and moves it to the best device
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import gc
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from engine.model_store import ModelStore
+from engine.precision import (
+    apply_precision,
+    inference_context,
+    load_quantized,
+    normalise_precision,
+)
+
+DEFAULT_MODEL_NAME = "google/flan-t5-base"
+
+
+# ─────────────────────────────────────────── Loaders ──
+def pick_device(preferred: str = "auto") -> str:
+    """`preferred` unless "auto"; else the best available device: cuda → mps → cpu."""
+    if preferred and preferred != "auto":
+        return preferred
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def load_tokenizer(model_name: str = DEFAULT_MODEL_NAME, **kwargs: Any) -> Any:
+    from transformers import AutoTokenizer
+
+    tok = AutoTokenizer.from_pretrained(model_name, **kwargs)
+    tok.pad_token = tok.eos_token
+    return tok
+
+
+def initialize_model(model_name: str = DEFAULT_MODEL_NAME) -> Tuple[Any, Any, str]:
+    """Load tokenizer/model (via the local model store) onto the best device."""
+    rt = ModelRuntime(model_name).load()
+    return rt.tokenizer, rt.model, rt.device
+
+
+def load_weights(path: str, device: str, precision: str = "fp32") -> Tuple[Any, Dict[str, float]]:
+    """
+    Model from a local directory: safetensors (mmap'd), low CPU memory, and
+    placed directly on `device` when accelerate can do it; then converted
+    for `precision` (int8 comes from its on-disk cache when present).
+    Returns the model and the weights / device_move / quantize timings.
+    """
+    from transformers import AutoModelForSeq2SeqLM
+
+    if precision == "int8":
+        t0 = time.perf_counter()
+        cached = load_quantized(path)
+        if cached is not None:
+            return cached, {"weights": time.perf_counter() - t0, "device_move": 0.0, "quantize": 0.0}
+
+    kwargs: Dict[str, Any] = {
+        "local_files_only": True,
+        "use_safetensors": True,
+        "low_cpu_mem_usage": True,
+    }
+    direct = device != "cpu" and importlib.util.find_spec("accelerate") is not None
+    if direct:
+        kwargs["device_map"] = {"": device}
+    t0 = time.perf_counter()
+    mdl = AutoModelForSeq2SeqLM.from_pretrained(path, **kwargs)
+    t1 = time.perf_counter()
+    if not direct:
+        mdl.to(device)
+    mdl.eval()
+    t2 = time.perf_counter()
+    mdl = apply_precision(mdl, precision, path)
+    return mdl, {
+        "weights": t1 - t0,
+        "device_move": t2 - t1,
+        "quantize": time.perf_counter() - t2,
+    }
+
+
+# ─────────────────────────────────────────── Runtime ──
+class ModelRuntime:
+    """Tokenizer, model and device for one model, each loaded once on demand."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        revision: str = "main",
+        *,
+        store: Optional[ModelStore] = None,
+        device: str = "auto",
+        precision: str = "fp32",
+    ) -> None:
+        self.model_name = model_name
+        self.revision = revision
+        self.store = store or ModelStore()
+        self.preferred_device = device
+        self.precision = precision  # effective mode once the model is loaded
+        self._path: Optional[str] = None
+        self._tokenizer: Any = None
+        self._model: Any = None
+        self._device: Optional[str] = None
+        self._lock = threading.RLock()
+        self.timings: Dict[str, float] = {}  # stage → seconds
+
+    # ─────────────────────────────────────────── lazy parts ──
+    @property
+    def path(self) -> str:
+        """Verified local model directory (fetched on first use when online)."""
+        if self._path is None:
+            with self._lock:
+                if self._path is None:
+                    self._path = str(self.store.ensure(self.model_name, self.revision))
+                    self.timings.update(self.store.timings)
+        return self._path
+
+    @property
+    def tokenizer(self) -> Any:
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    path = self.path
+                    t0 = time.perf_counter()
+                    self._tokenizer = load_tokenizer(path, local_files_only=True)
+                    self.timings["tokenizer"] = time.perf_counter() - t0
+        return self._tokenizer
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self.tokenizer  # noqa: B018 – tokenizer first, same lock
+                    device = pick_device(self.preferred_device)
+                    self.precision = normalise_precision(self.precision, device)
+                    mdl, phases = load_weights(self.path, device, self.precision)
+                    self.timings.update(phases)
+                    LOGGER.debug("[System] Torch device → %s", device)
+                    LOGGER.info(
+                        "[Model] %s (%s) ready: %s",
+                        self.model_name,
+                        self.precision,
+                        ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in self.timings.items()),
+                    )
+                    self._device, self._model = device, mdl
+        return self._model
+
+    @property
+    def device(self) -> str:
+        if self._device is None:
+            self.model  # noqa: B018 – loads model + device
+        assert self._device is not None  # narrow for type-checkers
+        return self._device
+
+    @property
+    def ready(self) -> bool:
+        """True once the model is loaded (the tokenizer comes with it)."""
+        return self._model is not None
+
+    def load(self) -> "ModelRuntime":
+        """Load everything now (warm-up at boot instead of on the first request)."""
+        self.model  # noqa: B018
+        return self
+
+    def set(self, tokenizer: Any, model: Any = None, device: str = "cpu") -> None:
+        """Install already-loaded objects (tests, custom boots)."""
+        with self._lock:
+            self._tokenizer, self._model = tokenizer, model
+            self._device = device if model is not None else None
+
+    def unload(self) -> bool:
+        """Drop the model weights (the tokenizer stays); True when one was loaded."""
+        with self._lock:
+            if self._model is None:
+                return False
+            self._model, self._device = None, None
+        gc.collect()
+        LOGGER.info("[Model] %s unloaded", self.model_name)
+        return True
+
+    # ─────────────────────────────────────────── helpers ──
+    def inference_context(self) -> Any:
+        """Context to run `generate()` in for the loaded precision mode."""
+        return inference_context(self.precision, self._device or "cpu")
+
+    def count_tokens(self, text: str) -> int:
+        """Return #tokens a string yields with the tokenizer (special tokens included)."""
+        return len(self.tokenizer(text)["input_ids"])
+
+
+# ─────────────────────────────────────────── Process-wide runtime ──
+_RUNTIME: Optional[ModelRuntime] = None
+_RUNTIME_LOCK = threading.Lock()
+
+
+def runtime_from_settings(cfg: Mapping[str, Any]) -> ModelRuntime:
+    """Runtime for a `model` settings section (nothing is loaded yet)."""
+    return ModelRuntime(
+        str(cfg.get("name", DEFAULT_MODEL_NAME)),
+        str(cfg.get("revision", "main")),
+        store=ModelStore(
+            str(cfg.get("cache_dir", ".cache/models")),
+            offline=cfg.get("offline"),
+            verify=str(cfg.get("verify", "size")),
+        ),
+        device=str(cfg.get("device", "auto")),
+        precision=str(cfg.get("precision", "fp32")),
+    )
+
+
+def get_runtime() -> ModelRuntime:
+    """The shared runtime, configured from `settings['model']` (created – not loaded – once)."""
+    global _RUNTIME
+    with _RUNTIME_LOCK:
+        if _RUNTIME is None:
+            from config.settings_service import current_settings
+
+            _RUNTIME = runtime_from_settings(current_settings().section("model"))
+        return _RUNTIME
+
+
+__all__ = [
+    "DEFAULT_MODEL_NAME",
+    "ModelRuntime",
+    "get_runtime",
+    "initialize_model",
+    "load_weights",
+    "pick_device",
+    "runtime_from_settings",
+]
@@ -0,0 +1,257 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/model_router.py – route concepts to model tiers, LRU-loaded
+# ════════════════════════════════════════════════════════════════════
+"""
+Latency-aware model routing.
+
+A joke or a motivational quote does not need the model that explains code.
+`settings['routing']` names model *tiers* and maps the concepts picked by
+`get_specialized_prompt()` onto them:
+
+    tiers          tier → overrides of the `model` section (name, revision,
+                   engine, precision …); a tier equal to the main model
+                   reuses the main engine
+    concepts       concept → tier; anything else → `default_tier`
+    fallback_tier  takes a request when its tier already runs `max_queue`
+                   generations (0 = never fall back)
+    max_loaded     models kept in memory; the least recently used idle tier
+                   is unloaded before another one loads (the main engine is
+                   never unloaded)
+
+`ModelRouter.route()` picks the tier and its engine; `running(route)` wraps
+the generation so per-tier in-flight counts, latency and usage are tracked
+for the Diagnostics box (`describe()`).
+
+Example
+-------
+>>> policy = policy_from_settings({"enabled": True, "tiers": {"small": {"name": "google/flan-t5-small"}},
+...                                "concepts": {"fun_fact": "small"}})
+>>> picked = router.route(policy, "fun_fact", settings.section("model"))
+>>> with router.running(picked):
+...     text = picked.engine.generate(ctx, max_new_tokens=64)
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import contextlib
+import json
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterator, Mapping, NamedTuple, Optional
+
+from engine.inference import InferenceEngine, create_engine
+from engine.model import runtime_from_settings
+
+# model-section keys that decide which weights a tier runs
+_IDENTITY = ("engine", "name", "revision", "precision", "device")
+
+
+class RoutingPolicy(NamedTuple):
+    enabled: bool
+    tiers: Mapping[str, Mapping[str, Any]]  # tier → `model` overrides
+    concepts: Mapping[str, str]             # concept → tier
+    default_tier: str
+    fallback_tier: str
+    max_queue: int
+    max_loaded: int
+
+    def tier_for(self, concept: Optional[str]) -> str:
+        tier = self.concepts.get(concept or "", self.default_tier)
+        return tier if tier in self.tiers else self.default_tier
+
+
+def policy_from_settings(cfg: Mapping[str, Any]) -> RoutingPolicy:
+    """Policy for a `routing` settings section (disabled when absent)."""
+    tiers = {str(k): dict(v or {}) for k, v in (cfg.get("tiers") or {}).items()}
+    default = str(cfg.get("default_tier", "base"))
+    tiers.setdefault(default, {})  # the default tier always exists (main model)
+    fallback = str(cfg.get("fallback_tier", "") or "")
+    if fallback and fallback not in tiers:
+        LOGGER.warning("[Route] unknown fallback tier '%s' – queue fallback off", fallback)
+        fallback = ""
+    concepts = {str(k): str(v) for k, v in (cfg.get("concepts") or {}).items()}
+    for concept, tier in concepts.items():
+        if tier not in tiers:
+            LOGGER.warning("[Route] concept '%s' → unknown tier '%s' (uses '%s')", concept, tier, default)
+    return RoutingPolicy(
+        enabled=bool(cfg.get("enabled", False)),
+        tiers=tiers,
+        concepts=concepts,
+        default_tier=default,
+        fallback_tier=fallback,
+        max_queue=max(0, int(cfg.get("max_queue", 0) or 0)),
+        max_loaded=max(1, int(cfg.get("max_loaded", 2) or 1)),
+    )
+
+
+class Route(NamedTuple):
+    tier: str
+    engine: InferenceEngine
+    key: str        # engine identity in the registry
+    fallback: bool  # moved off a saturated tier
+
+
+def _tier_model_cfg(model_cfg: Mapping[str, Any], overrides: Mapping[str, Any]) -> Dict[str, Any]:
+    """The main `model` section with a tier's overrides; draft / prefix cache stay opt-in."""
+    return {**model_cfg, "prefix_cache": False, "draft_model": "", **overrides}
+
+
+def _engine_from_cfg(cfg: Mapping[str, Any]) -> InferenceEngine:
+    return create_engine(str(cfg.get("engine", "torch")), runtime_from_settings(cfg), cfg)
+
+
+class ModelRouter:
+    """Tier engines (created on first use, LRU-unloaded) plus per-tier metrics."""
+
+    def __init__(
+        self,
+        main: InferenceEngine,
+        *,
+        factory: Callable[[Mapping[str, Any]], InferenceEngine] = _engine_from_cfg,
+        window: int = 256,
+    ) -> None:
+        self.main = main
+        self._factory = factory
+        self._window = max(1, int(window))
+        self._engines: OrderedDict[str, InferenceEngine] = OrderedDict()  # key → engine, LRU first
+        self._busy: Dict[str, int] = {}       # engine key → running generations
+        self._in_flight: Dict[str, int] = {}  # tier → running generations
+        self._latency: Dict[str, Deque[float]] = {}
+        self._owner: Dict[str, str] = {}      # engine key → tier that last ran it
+        self._max_loaded = 2                  # from the last routed policy
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}  # tier → requests / fallbacks / errors / loads / unloads
+
+    # ─────────────────────────────────────────── routing ──
+    def route(
+        self, policy: RoutingPolicy, concept: Optional[str], model_cfg: Mapping[str, Any]
+    ) -> Route:
+        """Tier and engine for a request on `concept` (nothing is loaded yet)."""
+        tier = policy.tier_for(concept)
+        fallback = False
+        with self._lock:
+            self._max_loaded = policy.max_loaded
+            if (
+                policy.max_queue
+                and policy.fallback_tier
+                and tier != policy.fallback_tier
+                and self._in_flight.get(tier, 0) >= policy.max_queue
+            ):
+                LOGGER.debug("[Route] '%s' saturated (%d running) → '%s'",
+                             tier, self._in_flight[tier], policy.fallback_tier)
+                tier, fallback = policy.fallback_tier, True
+        key, engine = self._engine(model_cfg, policy.tiers.get(tier, {}))
+        LOGGER.debug("[Route] %s → %s", concept, tier)
+        return Route(tier, engine, key, fallback)
+
+    def _engine(self, model_cfg: Mapping[str, Any], overrides: Mapping[str, Any]) -> tuple[str, InferenceEngine]:
+        cfg = _tier_model_cfg(model_cfg, overrides)
+        if all(cfg.get(k) == model_cfg.get(k) for k in _IDENTITY):
+            return "main", self.main
+        key = json.dumps([cfg.get(k) for k in _IDENTITY], default=str)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._engines[key] = self._factory(cfg)
+        return key, engine
+
+    # ─────────────────────────────────────────── running ──
+    @contextlib.contextmanager
+    def running(self, route: Route) -> Iterator[InferenceEngine]:
+        """Count the generation against its tier, reserve room for its model, time it."""
+        tier, key = route.tier, route.key
+        with self._lock:
+            s = self.stats.setdefault(tier, dict.fromkeys(("requests", "fallbacks", "errors", "loads", "unloads"), 0))
+            s["requests"] += 1
+            s["fallbacks"] += int(route.fallback)
+            # not loaded (or unloaded since route()) and no other request holds
+            # its slot yet: reserve one in the same critical section that picks
+            # the victims, so concurrent first requests cannot both see room
+            if not route.engine.ready and not self._busy.get(key, 0):
+                self._make_room(self._max_loaded, keep=key)
+                s["loads"] += 1
+            self._in_flight[tier] = self._in_flight.get(tier, 0) + 1
+            self._busy[key] = self._busy.get(key, 0) + 1  # busy → never a victim
+            self._owner[key] = tier
+            if key in self._engines:
+                self._engines.move_to_end(key)
+        t0 = time.perf_counter()
+        try:
+            yield route.engine
+        except BaseException:
+            with self._lock:
+                s["errors"] += 1
+            raise
+        else:
+            with self._lock:
+                self._latency.setdefault(tier, deque(maxlen=self._window)).append(time.perf_counter() - t0)
+        finally:
+            with self._lock:
+                self._in_flight[tier] -= 1
+                self._busy[key] -= 1
+
+    def _make_room(self, max_loaded: int, *, keep: str) -> None:
+        """
+        Unload least recently used idle tier engines until one more model fits.
+        Caller holds `_lock`; busy engines (loading or generating) count as
+        loaded and are never unloaded – unloading only drops references.
+        """
+        held = [k for k, e in self._engines.items() if k != keep and (e.ready or self._busy.get(k, 0))]
+        main = keep != "main" and (self.main.ready or self._busy.get("main", 0) > 0)
+        total = len(held) + int(main) + 1  # + the model about to load
+        for k in held:  # LRU first
+            if total <= max_loaded:
+                break
+            if self._busy.get(k, 0):
+                continue
+            if self._engines[k].unload():
+                tier = self._owner.get(k)
+                if tier in self.stats:
+                    self.stats[tier]["unloads"] += 1
+            total -= 1
+        if total > max_loaded:
+            LOGGER.warning("[Route] %d models loaded, max_loaded=%d (all busy)", total, max_loaded)
+
+    # ─────────────────────────────────────────── metrics ──
+    def loaded(self) -> list[str]:
+        """Registry keys of the tier engines currently holding a model."""
+        with self._lock:
+            return [k for k, e in self._engines.items() if e.ready]
+
+    def in_flight(self, tier: str) -> int:
+        with self._lock:
+            return self._in_flight.get(tier, 0)
+
+    def latency_ms(self, tier: str) -> Dict[str, float]:
+        """Mean / p50 / p95 of the tier's recent generations (empty before the first)."""
+        with self._lock:
+            samples = sorted(self._latency.get(tier, ()))
+        if not samples:
+            return {}
+        p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+        return {
+            "mean": round(statistics.mean(samples) * 1000, 1),
+            "p50": round(statistics.median(samples) * 1000, 1),
+            "p95": round(p95 * 1000, 1),
+        }
+
+    def describe(self) -> str:
+        """One line for the Diagnostics box."""
+        parts = []
+        for tier, s in sorted(self.stats.items()):
+            lat = self.latency_ms(tier)
+            timing = f", p50 {lat['p50']:.0f} ms / p95 {lat['p95']:.0f} ms" if lat else ""
+            extra = f", {s['fallbacks']} fallback" if s["fallbacks"] else ""
+            parts.append(f"{tier}: {s['requests']} req{timing}{extra}")
+        return " · ".join(parts) or "no routed requests"
+
+
+__all__ = ["ModelRouter", "Route", "RoutingPolicy", "policy_from_settings"]
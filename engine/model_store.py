@@ -0,0 +1,223 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/model_store.py – pinned, verified local model directories
+# ════════════════════════════════════════════════════════════════════
+"""
+Model artefact manager.
+
+`from_pretrained("google/flan-t5-base")` consults the hub on every start,
+may pick `.bin` weights (unpickled into RAM) and only then moves them to the
+device. `ModelStore.ensure()` instead resolves a model to a local directory
+
+    <root>/<name with '/' → '--'>@<revision>/
+        config.json, tokenizer files, *.safetensors, manifest.json
+
+fetched once (safetensors only; `.bin`-only repos are converted once) and
+verified on every start against `manifest.json` – file sizes by default,
+SHA-256 with `verify="full"`. The runtime then loads from that directory
+with `local_files_only=True`, `use_safetensors=True` (weights are mmap'd)
+and `low_cpu_mem_usage=True`.
+
+Offline (`offline=True`, `MODEL_OFFLINE=1`, `HF_HUB_OFFLINE=1` or
+`TRANSFORMERS_OFFLINE=1`) a missing or damaged directory raises
+`ModelUnavailableError` at once, naming the directory and the command that
+fills it – no retries against an unreachable hub.
+
+Example
+-------
+>>> store = ModelStore(".cache/models")
+>>> path = store.ensure("google/flan-t5-base", "main")
+>>> store.timings
+{'resolve': 0.002}
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_MODEL_DIR: str = os.getenv("MODEL_CACHE_DIR", ".cache/models")
+MANIFEST = "manifest.json"
+
+# what a seq2seq checkpoint needs – no .bin / .h5 / .msgpack duplicates
+_ALLOW_PATTERNS = ["*.json", "*.safetensors", "*.model", "*.txt", "spiece.*"]
+_OFFLINE_ENV = ("MODEL_OFFLINE", "HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE")
+
+
+class ModelUnavailableError(RuntimeError):
+    """The model is not available locally and cannot be fetched."""
+
+
+# ─────────────────────────────────────────── Helpers ──
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _download(repo_id: str, revision: str, local_dir: str, allow_patterns: list[str]) -> None:
+    """Fetch a hub snapshot into `local_dir` (module-level so tests can swap it)."""
+    try:
+        from huggingface_hub import snapshot_download
+    except ImportError as exc:
+        raise ModelUnavailableError("huggingface_hub is required to fetch models") from exc
+    snapshot_download(
+        repo_id=repo_id, revision=revision, local_dir=local_dir, allow_patterns=allow_patterns
+    )
+
+
+def _convert_to_safetensors(local_dir: str, repo_id: str, revision: str) -> None:
+    """One-off conversion for repos that publish only `.bin` weights."""
+    from transformers import AutoModelForSeq2SeqLM
+
+    LOGGER.info("[Model] %s@%s has no safetensors – converting once", repo_id, revision)
+    model = AutoModelForSeq2SeqLM.from_pretrained(repo_id, revision=revision)
+    model.save_pretrained(local_dir, safe_serialization=True)
+
+
+def offline_requested(flag: Optional[bool] = None) -> bool:
+    if flag is not None:
+        return flag
+    return any(os.getenv(name, "").lower() in {"1", "true", "yes"} for name in _OFFLINE_ENV)
+
+
+def weights_fingerprint(model_dir: str) -> str:
+    """
+    Identity of the weights in `model_dir`, for caches derived from them
+    (int8 pickle, ONNX graphs): the manifest's SHA-256s for a store directory;
+    name, size and mtime of the top-level files for a user-supplied one.
+    """
+    path = Path(model_dir)
+    h = hashlib.blake2b(digest_size=8)
+    try:
+        files = json.loads((path / MANIFEST).read_text(encoding="utf-8"))["files"]
+        for rel in sorted(files):
+            h.update(f"{rel}:{files[rel]['sha256']}\n".encode())
+        return h.hexdigest()
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    # derived caches live in sub-directories, so they never feed back in
+    for f in sorted(path.iterdir()) if path.is_dir() else ():
+        if f.is_file():
+            st = f.stat()
+            h.update(f"{f.name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+# ─────────────────────────────────────────── Store ──
+class ModelStore:
+    """Local directory per (model, revision), fetched once and verified on use."""
+
+    def __init__(
+        self,
+        root: str = DEFAULT_MODEL_DIR,
+        *,
+        offline: Optional[bool] = None,
+        verify: str = "size",  # "size" | "full" | "none"
+    ) -> None:
+        self.root = Path(root)
+        self.offline = offline_requested(offline)
+        self.verify_mode = verify
+        self.timings: Dict[str, float] = {}
+
+    def local_dir(self, name: str, revision: str = "main") -> Path:
+        return self.root / f"{name.replace('/', '--')}@{revision}"
+
+    # ─────────────────────────────────────────── verify ──
+    def verify(self, path: Path, *, full: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+        """
+        The manifest if every listed file is present with the recorded size
+        (and SHA-256 when `full`); None otherwise.
+        """
+        full = self.verify_mode == "full" if full is None else full
+        try:
+            manifest: Dict[str, Any] = json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if self.verify_mode == "none" and not full:
+            return manifest
+        for rel, meta in manifest.get("files", {}).items():
+            f = path / rel
+            try:
+                if f.stat().st_size != meta["size"]:
+                    return None
+            except OSError:
+                return None
+            if full and _sha256(f) != meta["sha256"]:
+                return None
+        return manifest
+
+    # ─────────────────────────────────────────── resolve ──
+    def ensure(self, name: str, revision: str = "main") -> Path:
+        """
+        Verified local directory for `name@revision`; fetches it when online.
+        A `name` that is already a local directory is used as-is.
+        """
+        t0 = time.perf_counter()
+        if os.path.isdir(name):
+            self.timings["resolve"] = time.perf_counter() - t0
+            return Path(name)
+
+        path = self.local_dir(name, revision)
+        if self.verify(path) is None:
+            if self.offline:
+                raise ModelUnavailableError(
+                    f"model {name}@{revision} is not available in {path} and offline mode is on; "
+                    f"run `python scripts/fetch_model.py {name} --revision {revision}` with network "
+                    f"access (or copy the directory) first"
+                )
+            self.timings["fetch"] = self._fetch(name, revision, path)
+        self.timings["resolve"] = time.perf_counter() - t0
+        return path
+
+    def _fetch(self, name: str, revision: str, path: Path) -> float:
+        t0 = time.perf_counter()
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".fetch-"))
+        try:
+            try:
+                _download(name, revision, str(tmp), _ALLOW_PATTERNS)
+            except ModelUnavailableError:
+                raise
+            except Exception as exc:  # network, auth, unknown repo / revision …
+                raise ModelUnavailableError(f"cannot fetch model {name}@{revision}: {exc}") from exc
+            if not any(tmp.glob("*.safetensors")):
+                _convert_to_safetensors(str(tmp), name, revision)
+            shutil.rmtree(tmp / ".cache", ignore_errors=True)  # hub download metadata
+
+            files = {
+                str(f.relative_to(tmp)): {"size": f.stat().st_size, "sha256": _sha256(f)}
+                for f in sorted(tmp.rglob("*"))
+                if f.is_file()
+            }
+            manifest = {"name": name, "revision": revision, "fetched_at": time.time(), "files": files}
+            (tmp / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+            shutil.rmtree(path, ignore_errors=True)  # damaged previous copy
+            os.replace(tmp, path)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        LOGGER.info("[Model] fetched %s@%s → %s", name, revision, path)
+        return time.perf_counter() - t0
+
+
+__all__ = [
+    "DEFAULT_MODEL_DIR",
+    "ModelStore",
+    "ModelUnavailableError",
+    "offline_requested",
+    "weights_fingerprint",
+]
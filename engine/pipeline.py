@@ -0,0 +1,691 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/pipeline.py – headless chat pipeline (no UI, model on demand)
+# ════════════════════════════════════════════════════════════════════
+"""
+The request pipeline without Gradio:
+
+    safety → prompt routing → memory → context (+ summary) → model tier → generate → persist
+
+`handle_request()` runs one turn for a `RequestContext`; `prepare_context()`
+and `get_specialized_prompt()` are the reusable stages. Importing this
+module loads no model and starts no thread:
+
+• tokenizer and generation go through the configured `InferenceEngine`
+  (`engine.inference`), which loads on first use (`count_tokens` needs only
+  the tokenizer, `generate` the model);
+• prompts, aliases and the safety automaton come from the compiled config
+  artefact on first use (`compiled()`);
+• with `settings['routing']` enabled, the request's concept picks a model
+  tier (`engine.model_router`) – cheap concepts never wait for the big model;
+• `boot()` is the app's explicit start: settings watcher, eager warm-up.
+
+Example
+-------
+>>> from engine import prepare_context, base_prompt, specialized_prompts
+>>> ctx, src = prepare_context("hi", [], base_prompt(), specialized_prompts(), False)
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import difflib
+import json
+import threading
+import time
+from typing import Any, Iterator, Mapping, NamedTuple, Tuple, Union
+
+from config.config_artefact  import CompiledConfig, ConfigSources, get_compiled_config, tokenizer_id
+from config.request_context  import RequestContext, request_context
+from config.settings_service import SettingsSnapshot, as_snapshot, get_settings_service
+from engine.inference        import InferenceEngine, get_engine
+from engine.model            import ModelRuntime, get_runtime
+from engine.model_router     import ModelRouter, Route, RoutingPolicy, policy_from_settings
+from engine.response_cache   import ResponseCache, cache_from_settings, is_deterministic
+from engine.single_flight    import SingleFlight
+from engine.stopping         import ROLE_MARKERS, Generated, StopCondition, StopStats
+from engine.token_context    import SegmentTokenizer, TokenPrompt, tail_text, turn_text
+from utils.prompt_utils      import alias_in_message
+from utils.safety_filters    import apply_profanity_filter, evaluate_safety
+from utils.memory            import memory
+from utils.summariser        import fold_bullets, rolling_summaries
+from utils.summary_worker    import SummaryWorker, create_summary_worker
+
+DEBUG_MODE: bool = True
+
+# ────────────── Globals (settings; model & config load lazily) ──────────────
+# Loaded once; every request reads the current immutable snapshot and
+# settings.json edits are picked up by the watcher (see `boot()`).
+SETTINGS_SERVICE = get_settings_service()
+RUNTIME: ModelRuntime = get_runtime()
+ENGINE: InferenceEngine = get_engine()  # torch | onnx | fake – settings['model']['engine']
+IN_FLIGHT = SingleFlight()  # identical concurrent greedy generations run once
+ROUTER = ModelRouter(ENGINE)  # concept → model tier (settings['routing'])
+STOPS = StopStats()  # why generations ended (eos / length / marker / deadline / cached)
+
+BASE_PROMPT_PATH: str = "config/prompt_template.txt"
+SPECIALIZED_PROMPTS_PATH: str = "config/specialized_prompts.json"
+
+memory.add_clear_hook(rolling_summaries.invalidate)
+
+# what request-path helpers accept as `settings=`
+SettingsArg = Union[RequestContext, Mapping[str, Any], None]
+
+
+def _settings(settings: SettingsArg) -> SettingsSnapshot:
+    """Snapshot for one request: the caller's, or the current global one."""
+    if isinstance(settings, RequestContext):
+        return settings.settings
+    return SETTINGS_SERVICE.current() if settings is None else as_snapshot(settings)
+
+
+def count_tokens(text: str) -> int:
+    """Return #tokens a string yields with current tokenizer."""
+    return ENGINE.count_tokens(text)
+
+
+def load_base_prompt(path: str = BASE_PROMPT_PATH) -> str:
+    with open(path, encoding="utf-8") as fh:
+        return fh.read().strip()
+
+def load_specialized_prompts(path: str = SPECIALIZED_PROMPTS_PATH) -> dict[str, str]:
+    with open(path, encoding="utf-8") as fh:
+        data: dict[str, str] = json.load(fh)
+    LOGGER.info("[Prompt] Loaded %d specialised prompts", len(data))
+    return data
+
+# ─────────────── Compiled config (lazy) ───────────────
+
+_COMPILED: CompiledConfig | None = None
+_COMPILED_LOCK = threading.Lock()
+
+
+def _sources() -> ConfigSources:
+    return ConfigSources(prompts=SPECIALIZED_PROMPTS_PATH, template=BASE_PROMPT_PATH)
+
+
+def compiled() -> CompiledConfig:
+    """
+    Prompts, aliases and safety tables from the config artefact. Built without
+    a tokenizer – routing must not load the model; prompt token ids are
+    attached to the segmenter once the tokenizer is loaded (`_seed_prompts`).
+    """
+    global _COMPILED
+    with _COMPILED_LOCK:
+        if _COMPILED is None:
+            _COMPILED = get_compiled_config(_sources())
+            LOGGER.info("[Prompt] Loaded %d specialised prompts (%r)",
+                        len(_COMPILED.specialized_prompts), _COMPILED)
+            _register_prefixes(_COMPILED)
+            if _SEGMENTER is not None:
+                _seed_prompts(_SEGMENTER, _COMPILED)
+        return _COMPILED
+
+
+def _register_prefixes(cfg: CompiledConfig) -> None:
+    """Static prompt heads whose encoder states the engine may cache."""
+    cache = getattr(ENGINE, "prefix_cache", None)
+    if cache is not None:
+        cache.register([cfg.base_prompt, *cfg.specialized_prompts.values()])
+
+
+def base_prompt() -> str:
+    return compiled().base_prompt
+
+
+def specialized_prompts() -> dict[str, str]:
+    return compiled().specialized_prompts
+
+# ─────────────── Segment tokenizer (token-id assembly) ───────────────
+
+_SEGMENTER: SegmentTokenizer | None = None
+_SEGMENTER_LOCK = threading.Lock()
+
+
+def _seed_prompts(seg: SegmentTokenizer, cfg: CompiledConfig | None = None) -> None:
+    """Seed `seg` with the prompt token ids of the artefact built for its (loaded) tokenizer."""
+    if cfg is None or cfg.tokenizer_id != tokenizer_id(seg.tokenizer):
+        cfg = get_compiled_config(_sources(), tokenizer=seg.tokenizer)
+    for name, text in [("base_prompt", cfg.base_prompt), *cfg.specialized_prompts.items()]:
+        ids = cfg.prompt_ids(name)
+        if ids is not None:
+            seg.seed(text, ids)
+
+
+def segmenter() -> SegmentTokenizer | None:
+    """
+    Cached per-segment tokenisation for the engine's tokenizer, or None when
+    concatenated segment ids would differ from tokenising the whole string.
+    """
+    global _SEGMENTER
+    tok = ENGINE.tokenizer
+    seg = _SEGMENTER
+    if seg is None or seg.tokenizer is not tok:
+        with _SEGMENTER_LOCK:
+            seg = _SEGMENTER
+            if seg is None or seg.tokenizer is not tok:
+                seg = SegmentTokenizer(tok)
+                if not seg.equivalent:
+                    LOGGER.warning("[Context] tokenizer is not segment-additive – using the string path")
+                _seed_prompts(seg, _COMPILED)
+                _SEGMENTER = seg
+    return seg if seg.equivalent else None
+
+# ─────────────── Summary worker (lazy) ───────────────
+
+_SUMMARY_WORKER: SummaryWorker | None = None
+_WORKER_LOCK = threading.Lock()
+
+
+def summary_worker(settings: SettingsArg = None) -> SummaryWorker | None:
+    """Background abstractive summariser – built on first need, None unless configured."""
+    global _SUMMARY_WORKER
+    summ = _settings(settings).section("summarisation")
+    if str(summ.get("strategy", "")) not in {"abstractive", "llm"}:
+        return None
+    with _WORKER_LOCK:
+        if _SUMMARY_WORKER is None:
+            in_process = str(summ.get("worker", "thread")) != "process"
+            _SUMMARY_WORKER = create_summary_worker(
+                dict(summ),
+                tokenizer=RUNTIME.tokenizer if in_process else None,
+                model=RUNTIME.model if in_process else None,
+                device=RUNTIME.device if in_process else "cpu",
+                model_settings=_settings(settings).section("model"),
+            )
+            memory.add_clear_hook(_SUMMARY_WORKER.invalidate)
+        return _SUMMARY_WORKER
+
+# ─────────────── Memory Helper ───────────────
+
+def _memory_turns(
+    max_turns: int, session: str = "default", settings: SettingsArg = None
+) -> list[dict[str, Any]]:
+    """Return last `max_turns` messages from Memory (or [])."""
+    if not _settings(settings)["memory"]["enabled"]:
+        return []
+    return memory.load(session)[-max_turns:]
+
+# ─────────────── Derived settings artefacts ───────────────
+# Built from a snapshot and cached by SETTINGS_SERVICE.derived() until one of
+# their sections changes – never re-derived per request.
+
+class AliasMatcher(NamedTuple):
+    aliases: tuple[tuple[str, str], ...]  # (alias, concept)
+    tokens: tuple[tuple[str, ...], ...]   # pre-split alias words
+    fuzzy_cutoff: float
+
+
+def _alias_matcher(cfg: SettingsSnapshot) -> AliasMatcher:
+    pm = cfg.section("prompt_matching")
+    return AliasMatcher(
+        compiled().aliases, compiled().alias_tokens, float(pm.get("fuzzy_cutoff", 0.7))
+    )
+
+
+class ContextBudget(NamedTuple):
+    max_turns: int
+    max_tokens: int
+    summ_enabled: bool
+    min_summary_turns: int
+    strategy: str
+    heuristic_style: str
+    abstractive: bool
+    max_summary_chars: int
+    max_summary_tokens: int
+    trigger_by_tokens: bool
+    max_context_tokens: int
+
+
+def _context_budget(cfg: SettingsSnapshot) -> ContextBudget:
+    ctx, summ = cfg.section("context"), cfg.section("summarisation")
+    strategy = str(summ.get("strategy", "brief"))
+    abstractive = strategy in {"abstractive", "llm"}
+    heuristic_style = "brief" if abstractive else strategy
+    if heuristic_style not in {"brief", "bullet", "extractive"}:
+        LOGGER.warning("[Summary] Unknown strategy '%s', falling back to 'brief'", strategy)
+        heuristic_style = "brief"
+    return ContextBudget(
+        max_turns=int(ctx["max_history_turns"]),
+        max_tokens=int(ctx["max_prompt_tokens"]),
+        summ_enabled=bool(summ.get("enabled", True)),
+        min_summary_turns=int(summ.get("min_turns", 8)),
+        strategy=strategy,
+        heuristic_style=heuristic_style,
+        abstractive=abstractive,
+        max_summary_chars=int(summ.get("max_chars", 512)),
+        max_summary_tokens=int(summ.get("max_tokens", 128)),
+        trigger_by_tokens=bool(summ.get("trigger_by_tokens", False)),
+        max_context_tokens=int(summ.get("max_context_tokens", 2000)),
+    )
+
+# ─────────────── Prompt Selection ───────────────
+
+def get_specialized_prompt(
+    msg: str,
+    prompts: dict[str, str],
+    fuzzy: bool,
+    settings: SettingsArg = None,
+) -> Tuple[str, str, float | None]:
+    """
+    Return (prompt_text, concept, match_score|None).
+    If no match → ("", "base_prompt", None)
+    """
+    matcher: AliasMatcher = SETTINGS_SERVICE.derived(
+        "alias_matcher", _alias_matcher, sections=("prompt_matching",), snapshot=_settings(settings)
+    )
+    norm: str = msg.lower().replace("’", "'")
+    tokens: list[str] = norm.split()
+
+    # direct alias
+    for (alias, concept), words in zip(matcher.aliases, matcher.tokens):
+        if alias_in_message(words, tokens) and concept in prompts:
+            LOGGER.debug("[Prompt] Direct '%s' → %s", alias, concept)
+            return prompts[concept], concept, None
+
+    # fuzzy alias
+    if fuzzy:
+        best: tuple[str, str] | None = None
+        score: float = 0.0
+        for alias, concept in matcher.aliases:
+            sim = difflib.SequenceMatcher(None, norm, alias).ratio()
+            if sim > score and sim >= matcher.fuzzy_cutoff:
+                best, score = (alias, concept), sim
+        if best and best[1] in prompts:
+            alias, concept = best
+            LOGGER.debug("[Prompt] Fuzzy '%s' (%.2f) → %s", alias, score, concept)
+            return prompts[concept], concept, score
+
+    LOGGER.debug("[Prompt] No prompt match")
+    return "", "base_prompt", None
+
+# ─────────────── Context Preparation ───────────────
+
+def prepare_context(
+    msg: str,
+    history: list[dict[str, Any]],
+    base_prompt: str,
+    spec_prompts: dict[str, str],
+    fuzzy: bool,
+    settings: SettingsArg = None,
+) -> Tuple[str, str]:
+    """
+    Build the full prompt string that is passed to the model.
+    `settings` is the request's context or snapshot (default: current).
+    The string is a `TokenPrompt` carrying its token ids (assembled from
+    cached segment tokenisations) unless the tokenizer is not segment-additive.
+    """
+    cfg = _settings(settings)
+    budget: ContextBudget = SETTINGS_SERVICE.derived(
+        "context_budget", _context_budget, sections=("context", "summarisation"), snapshot=cfg
+    )
+    max_turns: int = budget.max_turns
+    max_tokens: int = budget.max_tokens
+
+    spec_prompt, src, _ = get_specialized_prompt(msg, spec_prompts, fuzzy, cfg)
+
+    session_id: str = settings.session_id if isinstance(settings, RequestContext) else "default"
+    mem_turns: list[dict[str, Any]] = _memory_turns(max_turns, session_id, settings=cfg)
+    live_turns: list[dict[str, Any]] = history[-max_turns:]
+    stream: list[dict[str, Any]] = mem_turns + history
+    combined: list[dict[str, Any]] = stream[-max_turns:]
+
+    # ── Summarisation trigger & injection (replace oldest with a single summary) ──
+    summ_enabled: bool = budget.summ_enabled
+    min_summary_turns: int = budget.min_summary_turns
+    max_summary_chars: int = budget.max_summary_chars
+
+    abstractive: bool = budget.abstractive
+    total_context_str: str = " ".join(t.get("content", "") for t in combined)
+    trigger_by_turns: bool = len(combined) >= min_summary_turns
+    over_tokens: bool = (
+        budget.trigger_by_tokens or abstractive
+    ) and count_tokens(total_context_str) > budget.max_context_tokens
+    trigger_by_tokens: bool = budget.trigger_by_tokens and over_tokens
+
+    summary_text: str | None = None
+    if summ_enabled and (trigger_by_turns or trigger_by_tokens):
+        heuristic_style = budget.heuristic_style
+
+        # Keep a compressed tail (e.g., half the turns); everything older is
+        # "evicted" and folded into the per-session rolling summary
+        keep_count = max(1, len(combined) // 2)
+        evicted = stream[:-keep_count]
+        produced = ""
+        worker = summary_worker(cfg) if abstractive else None
+        if worker is not None:
+            # model summary if a background job already finished; never wait
+            ready = worker.lookup(session_id, evicted)
+            if ready is not None:
+                produced, covered = ready
+                # turns evicted after that job ran: bullets until the next refresh
+                gap = fold_bullets(evicted[covered:], max_summary_chars)
+                if gap:
+                    produced = f"{produced}\n{gap}"
+            if over_tokens:
+                worker.schedule(session_id, evicted)
+        if not produced:
+            produced = rolling_summaries.summarise(
+                session_id,
+                evicted,
+                style=heuristic_style,
+                max_chars=max_summary_chars,
+                max_tokens=budget.max_summary_tokens,
+                count_tokens=count_tokens,
+            ).strip()
+        if produced:
+            summary_text = produced
+            summary_turn = {"role": "summary", "content": summary_text}
+            tail = combined[-keep_count:]
+            combined = [summary_turn] + tail
+            LOGGER.debug(
+                "[Summary] Injected summary (trigger: %s), turns=%d, chars=%d",
+                "turns" if trigger_by_turns else "tokens", len(combined), len(summary_text)
+            )
+
+    if DEBUG_MODE:
+        LOGGER.debug(
+            "[Memory] session=%s | injected=%d | live=%d | combined=%d",
+            session_id, len(mem_turns), len(live_turns), len(combined),
+        )
+
+    header: str = spec_prompt or base_prompt
+    tail_str: str = tail_text(msg)
+    texts: list[str] = [turn_text(t) for t in combined]
+
+    def drop_oldest() -> None:
+        # preserve the summary at index 0, drop the next-oldest turn
+        nonlocal combined, texts
+        keep = 1 if summary_text is not None and combined[0].get("role") == "summary" else 0
+        combined, texts = combined[:keep] + combined[keep + 1:], texts[:keep] + texts[keep + 1:]
+
+    seg = segmenter()
+    if seg is None:
+        # string path: re-tokenise the whole context after every trim
+        context: str = header + "".join(texts) + tail_str
+        tok_ct: int = count_tokens(context)
+        while tok_ct > max_tokens and len(combined) > 1:
+            drop_oldest()
+            context = header + "".join(texts) + tail_str
+            tok_ct = count_tokens(context)
+    else:
+        # token-id path: every segment tokenised once (cached across requests)
+        head_ids, tail_ids = seg.ids(header), seg.ids(tail_str)
+        turn_ids = [seg.ids(t) for t in texts]
+        tok_ct = seg.count([head_ids, *turn_ids, tail_ids])
+        while tok_ct > max_tokens and len(combined) > 1:
+            keep = 1 if summary_text is not None and combined[0].get("role") == "summary" else 0
+            tok_ct -= len(turn_ids.pop(keep))
+            drop_oldest()
+        context = TokenPrompt(
+            header + "".join(texts) + tail_str,
+            seg.assemble([head_ids, *turn_ids, tail_ids]),
+            header_chars=len(header),
+            header_tokens=len(seg.prefix) + len(head_ids),
+            source=seg.source,
+        )
+
+    if DEBUG_MODE:
+        LOGGER.debug("[Context] kept=%d tokens=%d", len(combined), tok_ct)
+
+    return context, src
+
+# ─────────────── Chat Generation ───────────────
+
+def response_cache(settings: SettingsArg = None) -> ResponseCache | None:
+    """The greedy-response cache for `settings` (None when disabled)."""
+    cache: ResponseCache | None = SETTINGS_SERVICE.derived(
+        "response_cache",
+        lambda cfg: cache_from_settings(cfg.section("response_cache")),
+        sections=("response_cache",),
+        snapshot=_settings(settings),
+    )
+    return cache
+
+
+def route(concept: str | None = None, settings: SettingsArg = None) -> Route | None:
+    """Model tier for a request on `concept`; None when routing is off (→ `ENGINE`)."""
+    cfg = _settings(settings)
+    policy: RoutingPolicy = SETTINGS_SERVICE.derived(
+        "routing_policy", lambda c: policy_from_settings(c.section("routing")),
+        sections=("routing",), snapshot=cfg,
+    )
+    if not policy.enabled:
+        return None
+    return ROUTER.route(policy, concept, cfg.section("model"))
+
+
+def stop_condition(settings: SettingsArg = None) -> StopCondition:
+    """Role markers and the turn's deadline (from the request's start) for one generation."""
+    gen = _settings(settings).section("generation")
+    return StopCondition.within(
+        float(gen.get("deadline_s", 0) or 0),
+        gen.get("stop_markers", ROLE_MARKERS),
+        start=settings.started if isinstance(settings, RequestContext) else None,
+    )
+
+
+def _greedy_key(
+    ctx: str,
+    gen_cfg: Mapping[str, Any],
+    cache: ResponseCache | None,
+    engine: InferenceEngine,
+    stop: StopCondition,
+) -> str | None:
+    """Cache / coalescing key for a greedy request; None (counted) when sampled."""
+    if not is_deterministic(gen_cfg):
+        if cache is not None:
+            cache.bypass()
+        return None
+    return ResponseCache.key(engine.fingerprint, ctx, {**gen_cfg, "stop_markers": list(stop.markers)})
+
+
+def generate(
+    ctx: str,
+    gen_cfg: Mapping[str, Any],
+    settings: SettingsArg = None,
+    concept: str | None = None,
+) -> str:
+    """
+    Run the engine on a prompt string (loads the model on first call).
+    Greedy generations are served from / stored in the response cache, and
+    identical ones in flight at the same time share a single `generate()`.
+    With routing on, `concept` picks the model tier that runs it. Decoding
+    stops at role markers or the request's deadline (`stop_reason` on the
+    returned text; partial results are never cached).
+    """
+    picked = route(concept, settings)
+    engine = picked.engine if picked is not None else ENGINE
+    stop = stop_condition(settings)
+
+    def call() -> str:
+        if picked is None:
+            text = engine.generate(ctx, stop=stop, **gen_cfg)
+        else:
+            with ROUTER.running(picked):
+                text = engine.generate(ctx, stop=stop, **gen_cfg)
+        STOPS.record(getattr(text, "stop_reason", "eos"))
+        return text
+
+    cache = response_cache(settings)
+    key = _greedy_key(ctx, gen_cfg, cache, engine, stop)
+    if key is None:
+        return call()
+    if cache is not None:
+        text = cache.get(key)
+        if text is not None:
+            LOGGER.debug("[Gen] response cache hit")
+            STOPS.record("cached")
+            return Generated(text, "cached")
+
+    def run() -> str:
+        text = call()
+        if cache is None or getattr(text, "partial", False):
+            return text
+        return cache.put(key, text)
+
+    result, _ = IN_FLIGHT.do(key, run)
+    return result
+
+
+def generate_stream(
+    ctx: str,
+    gen_cfg: Mapping[str, Any],
+    settings: SettingsArg = None,
+    concept: str | None = None,
+) -> Iterator[str]:
+    """
+    Like `generate()`, yielding text pieces as they are decoded; concurrent
+    identical greedy streams read one shared generation.
+    """
+    picked = route(concept, settings)
+    engine = picked.engine if picked is not None else ENGINE
+    stop = stop_condition(settings)
+
+    def pieces() -> Iterator[str]:
+        if picked is None:
+            yield from engine.stream(ctx, stop=stop, **gen_cfg)
+        else:
+            with ROUTER.running(picked):
+                yield from engine.stream(ctx, stop=stop, **gen_cfg)
+        STOPS.record(stop.reason or "eos")
+
+    cache = response_cache(settings)
+    key = _greedy_key(ctx, gen_cfg, cache, engine, stop)
+    if key is None:
+        return pieces()
+    if cache is not None:
+        text = cache.get(key)
+        if text is not None:
+            STOPS.record("cached")
+            return iter([text])
+
+    def on_done(text: str) -> None:
+        if cache is not None and stop.reason != "deadline":
+            cache.put(key, text.strip())
+
+    return IN_FLIGHT.stream(key, pieces, on_done)
+
+
+def handle_request(
+    msg: str,
+    history: list[dict[str, Any]],
+    req: RequestContext,
+) -> Tuple[list[dict[str, Any]], str, str | None]:
+    """
+    One chat turn configured entirely by `req` – safety, context building and
+    generation all read the request's snapshot, never a shared global.
+    Returns (history, prompt source, stop reason – None when blocked).
+    """
+    cfg = req.settings
+    allowed, block_msg = evaluate_safety(msg, cfg)
+    if not allowed:
+        LOGGER.debug("[Safety] blocked input (request %d)", req.request_id)
+        history += [{"role": "user", "content": msg},
+                    {"role": "assistant", "content": block_msg}]
+        return history, "blocked", None
+
+    ctx, src = prepare_context(msg, history, base_prompt(), specialized_prompts(), req.fuzzy, req)
+
+    gen_cfg: dict[str, Any] = req.generation_kwargs()
+    LOGGER.debug("[Gen] request=%d %s", req.request_id, gen_cfg)
+
+    text = generate(ctx, gen_cfg, req, concept=src)
+    reason: str = getattr(text, "stop_reason", "eos")
+    if reason == "deadline":
+        LOGGER.info("[Gen] request=%d hit its %.1f s deadline – partial answer", req.request_id, req.deadline_s)
+
+    if req.safety_level == "moderate":
+        text = apply_profanity_filter(text, settings=cfg)
+
+    memory.save({"role": "user", "content": msg}, session_id=req.session_id)
+    memory.save({"role": "assistant", "content": text}, session_id=req.session_id)
+
+    history += [{"role": "user", "content": msg},
+                {"role": "assistant", "content": text}]
+    return history, src, reason
+
+
+def chat(
+    msg: str,
+    history: list[dict[str, Any]],
+    mx: int,
+    temp: float,
+    top_p: float,
+    sample: bool,
+    fuzzy: bool,
+    settings: SettingsArg = None,
+) -> Tuple[list[dict[str, Any]], str]:
+    """Positional front-end for `handle_request()` (UI slider values)."""
+    req = request_context(
+        _settings(settings),
+        fuzzy=fuzzy,
+        max_new_tokens=mx,
+        temperature=temp,
+        top_p=top_p,
+        do_sample=sample,
+        session_id=settings.session_id if isinstance(settings, RequestContext) else "default",
+    )
+    history, src, _ = handle_request(msg, history, req)
+    return history, src
+
+# ─────────────── Boot ───────────────
+
+def boot(*, warm: bool = True) -> float:
+    """
+    Start the app side of the engine: settings watcher (if `hot_reload`) and,
+    with `warm`, model + compiled config + summary worker now rather than on
+    the first request. Returns the seconds it took (time-to-ready).
+    """
+    t0 = time.perf_counter()
+    cfg = SETTINGS_SERVICE.current()
+    mem_cfg = cfg.section("memory")
+    LOGGER.debug(
+        "[Memory] Enabled=%s | Backend=%s",
+        mem_cfg.get("enabled", False),
+        mem_cfg.get("backend", "none"),
+    )
+    boot_cfg = cfg.section("settings")
+    if boot_cfg.get("hot_reload", True):
+        SETTINGS_SERVICE.watch(float(boot_cfg.get("watch_interval_s", 2.0)))
+    if warm:
+        ENGINE.load()
+        compiled()
+        summary_worker(cfg)
+    elapsed = time.perf_counter() - t0
+    LOGGER.info("[System] engine ready in %.2f s", elapsed)
+    return elapsed
+
+
+__all__ = [
+    "BASE_PROMPT_PATH",
+    "ENGINE",
+    "IN_FLIGHT",
+    "SETTINGS_SERVICE",
+    "SPECIALIZED_PROMPTS_PATH",
+    "STOPS",
+    "ROUTER",
+    "RUNTIME",
+    "base_prompt",
+    "boot",
+    "chat",
+    "compiled",
+    "count_tokens",
+    "generate",
+    "generate_stream",
+    "segmenter",
+    "get_specialized_prompt",
+    "handle_request",
+    "load_base_prompt",
+    "load_specialized_prompts",
+    "prepare_context",
+    "response_cache",
+    "route",
+    "specialized_prompts",
+    "stop_condition",
+    "summary_worker",
+]
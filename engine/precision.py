@@ -0,0 +1,149 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/precision.py – fp32 / bf16 / int8 inference modes
+# ════════════════════════════════════════════════════════════════════
+"""
+Precision modes for CPU inference, chosen by `settings['model']['precision']`.
+
+┌────────┬──────────────────────────────────────────────────────────────┐
+│ fp32   │ as loaded (reference)                                        │
+│ bf16   │ fp32 weights, matmuls under `torch.autocast(bfloat16)`        │
+│ int8   │ `quantize_dynamic` of every `nn.Linear` (int8 weights, fp32   │
+│        │ activations) – CPU only                                       │
+└────────┴──────────────────────────────────────────────────────────────┘
+
+Modes are applied once at load time (`load_quantized` / `apply_precision`);
+`inference_context(mode)` wraps each `generate()` call. The int8 model is
+cached as ``<model dir>/precision/int8-dynamic-torch<ver>-<weights>.pt`` so
+later cold starts skip both the fp32 weight load and the quantisation pass;
+``<weights>`` is `weights_fingerprint()` of the directory, so replacing the
+weights never loads the old int8 module.
+
+torch is imported inside the functions only – the engine stays light.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, ContextManager, Optional
+
+from engine.model_store import weights_fingerprint
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def normalise_precision(mode: Any, device: str = "cpu") -> str:
+    """Validated mode; int8 on a non-CPU device falls back to fp32 (logged)."""
+    m = str(mode or "fp32").lower()
+    if m not in PRECISIONS:
+        LOGGER.warning("[Model] unknown precision '%s', using fp32", mode)
+        return "fp32"
+    if m == "int8" and device != "cpu":
+        LOGGER.warning("[Model] int8 dynamic quantisation is CPU-only (device=%s) – using fp32", device)
+        return "fp32"
+    return m
+
+
+# ─────────────────────────────────────────── int8 ──
+def quantize_int8(model: Any) -> Any:
+    """Dynamic int8 quantisation of every Linear layer, in place (no fp32 copy kept)."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def quantized_cache_path(model_dir: str, weights: Optional[str] = None) -> Path:
+    import torch
+
+    version = torch.__version__.split("+")[0]
+    weights = weights_fingerprint(model_dir) if weights is None else weights
+    return Path(model_dir) / "precision" / f"int8-dynamic-torch{version}-{weights}.pt"
+
+
+def load_quantized(model_dir: str) -> Optional[Any]:
+    """The cached int8 model for the current weights in `model_dir`, or None."""
+    import torch
+
+    weights = weights_fingerprint(model_dir)
+    path = quantized_cache_path(model_dir, weights)
+    if not path.exists():
+        return None
+    try:
+        # our own file inside the model directory – a full module pickle
+        payload = torch.load(path, map_location="cpu", weights_only=False)
+    except Exception as exc:
+        LOGGER.warning("[Model] ignoring int8 cache %s (%s)", path, exc)
+        return None
+    if not isinstance(payload, dict) or payload.get("weights") != weights:
+        LOGGER.warning("[Model] ignoring int8 cache %s (built from other weights)", path)
+        return None
+    model = payload["model"]
+    model.eval()
+    return model
+
+
+def save_quantized(model: Any, model_dir: str) -> None:
+    """Write the int8 model next to its weights (atomic; best effort); drop stale ones."""
+    import torch
+
+    weights = weights_fingerprint(model_dir)
+    path = quantized_cache_path(model_dir, weights)
+    tmp: Optional[str] = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        torch.save({"weights": weights, "model": model}, tmp)
+        os.replace(tmp, path)
+    except Exception as exc:
+        LOGGER.warning("[Model] cannot cache int8 model at %s (%s)", path, exc)
+        if tmp is not None and os.path.exists(tmp):
+            os.unlink(tmp)
+        return
+    for old in path.parent.glob("int8-dynamic-*.pt"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def apply_precision(model: Any, mode: str, model_dir: Optional[str] = None) -> Any:
+    """
+    Convert a freshly loaded fp32 model for `mode`. int8 results are cached
+    under `model_dir` when given; bf16 needs no conversion (autocast).
+    """
+    if mode == "int8":
+        model = quantize_int8(model)
+        if model_dir is not None:
+            save_quantized(model, model_dir)
+    return model
+
+
+# ─────────────────────────────────────────── Inference ──
+def inference_context(mode: str, device: str = "cpu") -> ContextManager[Any]:
+    """bf16 autocast for the bf16 mode; a no-op otherwise (`generate` is already no-grad)."""
+    if mode != "bf16":
+        return contextlib.nullcontext()
+    import torch
+
+    autocast: ContextManager[Any] = torch.autocast(device_type=device.split(":")[0], dtype=torch.bfloat16)
+    return autocast
+
+
+__all__ = [
+    "PRECISIONS",
+    "apply_precision",
+    "inference_context",
+    "load_quantized",
+    "normalise_precision",
+    "quantize_int8",
+    "quantized_cache_path",
+]
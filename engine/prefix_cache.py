@@ -0,0 +1,123 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/prefix_cache.py – encode static prompt prefixes once (FiD-style)
+# ════════════════════════════════════════════════════════════════════
+"""
+Cached encoder states for the fixed part of the prompt.
+
+Every context starts with the base prompt or one specialised prompt; only
+the history and the user turn after it change. With
+`settings['model']['prefix_cache']` on, each registered prefix is run
+through the encoder **once** and its hidden states are kept. A request then
+encodes only the dynamic tail and hands the decoder the concatenation:
+
+    [ cached prefix states | fresh tail states ]  → decoder cross-attention
+
+as in Fusion-in-Decoder, where passages are encoded independently and fused
+in the decoder. The two segments do not attend to each other in the
+encoder (T5's relative positions restart at the tail), so outputs can differ
+from full encoding. `scripts/bench_prefix_cache.py` measures the speed-up
+and the agreement with full encoding on a fixed prompt set.
+
+A prompt that does not start with a registered prefix is encoded in full.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from engine.token_context import TokenPrompt, prompt_ids
+
+
+class PrefixCache:
+    """Encoder hidden states per static prefix; computed on first use."""
+
+    def __init__(self) -> None:
+        self._prefixes: Tuple[str, ...] = ()  # longest first
+        self._states: Dict[str, Any] = {}  # prefix → (1, L, d) tensor
+        self._model_id: Optional[int] = None  # states belong to this model object
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ─────────────────────────────────────────── prefixes ──
+    def register(self, prefixes: Iterable[str]) -> None:
+        """Set the static prefixes; states of prefixes no longer listed are dropped."""
+        unique = {p for p in prefixes if p}
+        with self._lock:
+            self._prefixes = tuple(sorted(unique, key=len, reverse=True))
+            self._states = {p: s for p, s in self._states.items() if p in unique}
+
+    @property
+    def prefixes(self) -> Tuple[str, ...]:
+        return self._prefixes
+
+    def split(self, prompt: str) -> Optional[Tuple[str, str]]:
+        """(prefix, tail) for the longest registered prefix of `prompt`, else None."""
+        for prefix in self._prefixes:
+            if prompt.startswith(prefix) and len(prompt) > len(prefix):
+                return prefix, prompt[len(prefix):]
+        return None
+
+    # ─────────────────────────────────────────── encoding ──
+    def _prefix_states(self, prefix: str, tokenizer: Any, encoder: Any, device: str, ids: Any = None) -> Any:
+        state = self._states.get(prefix)
+        if state is not None:
+            self.hits += 1
+            return state
+        self.misses += 1
+        if ids is None:
+            ids = tokenizer(prefix, return_tensors="pt", add_special_tokens=False).input_ids
+        ids = ids.to(device)
+        state = encoder(input_ids=ids).last_hidden_state
+        with self._lock:
+            if prefix in self._prefixes:
+                self._states[prefix] = state
+        LOGGER.debug("[Model] cached encoder states for a %d-token prefix", ids.shape[1])
+        return state
+
+    def encoder_inputs(self, prompt: str, tokenizer: Any, model: Any, device: str) -> Optional[Dict[str, Any]]:
+        """
+        `generate()` kwargs (`encoder_outputs`, `attention_mask`) with the
+        prefix taken from the cache, or None when `prompt` has no known prefix.
+        Call inside the engine's inference context (no-grad / autocast).
+        """
+        parts = self.split(prompt)
+        if parts is None:
+            return None
+        import torch
+        from transformers.modeling_outputs import BaseModelOutput
+
+        if self._model_id != id(model):  # model reloaded → old states are invalid
+            with self._lock:
+                self._states.clear()
+                self._model_id = id(model)
+
+        prefix, tail = parts
+        head_ids = ids = None
+        all_ids = prompt_ids(prompt, tokenizer)
+        if all_ids is not None and isinstance(prompt, TokenPrompt) and prompt.header_chars == len(prefix):
+            # pre-assembled ids: split at the header instead of tokenising again
+            head_ids, ids = all_ids[:, : prompt.header_tokens], all_ids[:, prompt.header_tokens :]
+        if ids is None:
+            ids = tokenizer(tail, return_tensors="pt").input_ids
+        encoder = model.get_encoder()
+        with torch.no_grad():
+            head = self._prefix_states(prefix, tokenizer, encoder, device, head_ids)
+            rest = encoder(input_ids=ids.to(device)).last_hidden_state
+        hidden = torch.cat([head.to(rest.dtype), rest], dim=1)
+        mask = torch.ones(hidden.shape[:2], dtype=torch.long, device=hidden.device)
+        return {"encoder_outputs": BaseModelOutput(last_hidden_state=hidden), "attention_mask": mask}
+
+    def stats(self) -> Dict[str, int]:
+        return {"prefixes": len(self._prefixes), "cached": len(self._states),
+                "hits": self.hits, "misses": self.misses}
+
+
+__all__ = ["PrefixCache"]
@@ -0,0 +1,189 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/response_cache.py – reuse greedy generations for repeat prompts
+# ════════════════════════════════════════════════════════════════════
+"""
+Deterministic response cache.
+
+Without sampling, a generation is a pure function of the model, its
+precision and the prompt ids plus generation parameters. `ResponseCache`
+stores the decoded text under a BLAKE2b key of exactly those inputs:
+
+• local tier  – LRU bounded by `max_entries`, entries expire after `ttl_s`;
+• shared tier – optional Redis (`redis_url`), ``SET … EX ttl``; a local miss
+  that hits Redis is copied into the local tier. Redis errors are counted
+  and skipped – the cache never fails a request.
+
+Sampled generations (`do_sample=True`) are never looked up or stored.
+`stats` / `describe()` feed the Diagnostics box.
+
+Example
+-------
+>>> cache = ResponseCache(max_entries=256, ttl_s=600)
+>>> key = cache.key("torch|google/flan-t5-base@main|fp32", ctx, {"do_sample": False})
+>>> cache.get(key) or cache.put(key, engine.generate(ctx, do_sample=False))
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, cast
+
+from engine.token_context import TokenPrompt
+
+
+# ignored by greedy / beam decoding – must not split cache entries
+_SAMPLING_ONLY = frozenset({"temperature", "top_p", "top_k", "typical_p"})
+
+
+def is_deterministic(gen_cfg: Mapping[str, Any]) -> bool:
+    """True when `generate()` with these kwargs is reproducible (no sampling)."""
+    return not bool(gen_cfg.get("do_sample", False))
+
+
+class ResponseCache:
+    """Size- and TTL-bounded map of generation key → text, with an optional Redis tier."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        ttl_s: float = 3600.0,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "chatbot:resp:",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._local: OrderedDict[str, Tuple[float, str]] = OrderedDict()  # key → (expires, text)
+        self._lock = threading.Lock()
+        self._redis: Any = self._connect(redis_url) if redis_url else None
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "shared_hits": 0, "stores": 0,
+            "evictions": 0, "expired": 0, "bypassed": 0, "redis_errors": 0,
+        }
+
+    @staticmethod
+    def _connect(url: str) -> Any:
+        try:
+            import redis
+
+            client: Any = cast(Any, redis).from_url(url, decode_responses=True, socket_timeout=0.05)
+            client.ping()
+            LOGGER.debug("[Cache] shared response tier → %s", url)
+            return client
+        except Exception as exc:  # missing redis-py or unreachable server
+            LOGGER.warning("[Cache] Redis tier unavailable (%s) – local cache only", exc)
+            return None
+
+    # ─────────────────────────────────────────── keys ──
+    @staticmethod
+    def key(model_key: str, prompt: str, gen_cfg: Mapping[str, Any]) -> str:
+        """Hash of model identity, prompt token ids (text if none) and generation params."""
+        payload = prompt.ids if isinstance(prompt, TokenPrompt) else str(prompt)
+        params = sorted((k, v) for k, v in gen_cfg.items() if k not in _SAMPLING_ONLY)
+        raw = json.dumps([model_key, payload, params], default=str)
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+    # ─────────────────────────────────────────── get / put ──
+    def get(self, key: str) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._local.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._local[key]
+                self.stats["expired"] += 1
+        text = self._shared_get(key)
+        with self._lock:
+            if text is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["shared_hits"] += 1
+        self._store_local(key, text, now)
+        return text
+
+    def put(self, key: str, text: str) -> str:
+        self._store_local(key, text, self._clock())
+        with self._lock:
+            self.stats["stores"] += 1
+        if self._redis is not None:
+            try:
+                self._redis.set(self.key_prefix + key, text, ex=max(1, int(self.ttl_s)))
+            except Exception as exc:
+                self._redis_error(exc)
+        return text
+
+    def bypass(self) -> None:
+        """Count a sampled generation that skipped the cache."""
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+    # ─────────────────────────────────────────── helpers ──
+    def _store_local(self, key: str, text: str, now: float) -> None:
+        with self._lock:
+            self._local[key] = (now + self.ttl_s, text)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _shared_get(self, key: str) -> Optional[str]:
+        if self._redis is None:
+            return None
+        try:
+            value = self._redis.get(self.key_prefix + key)
+        except Exception as exc:
+            self._redis_error(exc)
+            return None
+        return None if value is None else str(value)
+
+    def _redis_error(self, exc: Exception) -> None:
+        with self._lock:
+            self.stats["redis_errors"] += 1
+        LOGGER.debug("[Cache] Redis tier error: %s", exc)
+
+    def describe(self) -> str:
+        """One line for the Diagnostics box."""
+        s = self.stats
+        looked_up = s["hits"] + s["misses"]
+        rate = f"{s['hits'] / looked_up:.0%}" if looked_up else "n/a"
+        shared = f", {s['shared_hits']} shared" if self._redis is not None else ""
+        return f"{s['hits']} hits{shared} / {s['misses']} misses ({rate}), {len(self)} cached"
+
+
+def cache_from_settings(cfg: Mapping[str, Any]) -> Optional[ResponseCache]:
+    """Cache for a `response_cache` settings section, or None when disabled."""
+    if not cfg.get("enabled", True):
+        return None
+    return ResponseCache(
+        max_entries=int(cfg.get("max_entries", 1024)),
+        ttl_s=float(cfg.get("ttl_s", 3600)),
+        redis_url=str(cfg.get("redis_url") or "") or None,
+        key_prefix=str(cfg.get("key_prefix", "chatbot:resp:")),
+    )
+
+
+__all__ = ["ResponseCache", "cache_from_settings", "is_deterministic"]
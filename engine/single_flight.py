@@ -0,0 +1,170 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/single_flight.py – coalesce identical in-flight generations
+# ════════════════════════════════════════════════════════════════════
+"""
+Single-flight request coalescing.
+
+The response cache helps once a generation has finished; a burst of the
+same greedy request arriving *together* would still run `generate()` once
+per request. `SingleFlight` keys each in-flight computation (the response
+cache key: model identity, prompt ids, params):
+
+• `do(key, fn)`         – the first caller (leader) runs `fn`; callers with
+                          the same key arriving meanwhile wait for and share
+                          its result (or its exception);
+• `stream(key, factory)` – the first caller starts the source on a pump
+                          thread; every caller – early or late – iterates the
+                          same pieces from the beginning.
+
+`stats` counts leaders and coalesced followers for the Diagnostics box.
+Only deterministic (greedy) requests may be coalesced – the caller decides.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Broadcast:
+    """Append-only piece list that any number of readers replay and follow."""
+
+    def __init__(self) -> None:
+        self.pieces: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def push(self, piece: str) -> None:
+        with self._cond:
+            self.pieces.append(piece)
+            self._cond.notify_all()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self.done, self.error = True, error
+            self._cond.notify_all()
+
+    def __iter__(self) -> Iterator[str]:
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.pieces) and not self.done:
+                    self._cond.wait()
+                if i < len(self.pieces):
+                    piece = self.pieces[i]
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+            i += 1
+            yield piece
+
+
+class SingleFlight:
+    """At most one computation per key at a time; concurrent callers share it."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, Future[Any]] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"leaders": 0, "coalesced": 0, "errors": 0}
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """(result, shared) – `shared` is True when another caller computed it."""
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        assert fut is not None  # narrow for type-checkers
+        if not leader:
+            LOGGER.debug("[Gen] coalesced with an in-flight generation")
+            return fut.result(), True
+        try:
+            result = fn()
+        except BaseException as exc:
+            with self._lock:
+                self.stats["errors"] += 1
+            fut.set_exception(exc)
+            raise
+        else:
+            fut.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(
+        self,
+        key: str,
+        factory: Callable[[], Iterable[str]],
+        on_done: Optional[Callable[[str], None]] = None,
+    ) -> Iterator[str]:
+        """
+        Pieces of the one in-flight stream for `key`; the first caller starts
+        `factory()` on a pump thread, so a slow or abandoned reader never
+        stalls the others. `on_done(full_text)` runs once after a clean finish.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        assert broadcast is not None
+        if leader:
+            threading.Thread(
+                target=self._pump, args=(key, broadcast, factory, on_done),
+                name="single-flight-stream", daemon=True,
+            ).start()
+        return iter(broadcast)
+
+    def _pump(
+        self,
+        key: str,
+        broadcast: _Broadcast,
+        factory: Callable[[], Iterable[str]],
+        on_done: Optional[Callable[[str], None]],
+    ) -> None:
+        error: Optional[BaseException] = None
+        try:
+            for piece in factory():
+                broadcast.push(piece)
+            if on_done is not None:
+                on_done("".join(broadcast.pieces))
+        except BaseException as exc:  # handed to every reader
+            error = exc
+            with self._lock:
+                self.stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            broadcast.close(error)
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._streams)
+
+    def describe(self) -> str:
+        """One line for the Diagnostics box."""
+        s = self.stats
+        return f"{s['coalesced']} coalesced / {s['leaders']} generated"
+
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,207 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/stopping.py – stop decoding at role markers or a wall-clock deadline
+# ════════════════════════════════════════════════════════════════════
+"""
+Stopping criteria.
+
+`model.generate()` runs to `max_new_tokens` unless the model emits EOS, and
+flan-t5 sometimes carries on with the next "User:" / "Assistant:" turn.
+A `StopCondition` ends decoding early:
+
+• marker   – the generated text contains a role marker (a marker the reply
+             *starts* with is dropped, not stopped at); the text is cut there;
+• deadline – the request's wall-clock deadline passed; the text decoded so far
+             is returned as a *partial* result.
+
+Engines take it as ``generate(prompt, stop=…)`` – the torch / onnx engines
+pass `criteria()` to `generate(stopping_criteria=…)`, which checks it after
+every decoding step – and return a `Generated` string carrying the
+`stop_reason` (eos | length | marker | deadline). `StopStats` counts the
+reasons for the Diagnostics box; the reason of one reply is read from the
+reply itself, never from shared state.
+
+Example
+-------
+>>> stop = StopCondition.within(2.0)           # 2 s from now, default markers
+>>> text = engine.generate(ctx, stop=stop, max_new_tokens=100)
+>>> text.stop_reason, text.partial
+('marker', False)
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+ROLE_MARKERS: Tuple[str, ...] = ("User:", "Assistant:")
+STOP_REASONS: Tuple[str, ...] = ("eos", "length", "marker", "deadline", "cached")
+
+
+class Generated(str):
+    """Generated text plus why decoding stopped."""
+
+    stop_reason: str = "eos"
+
+    def __new__(cls, text: str, stop_reason: str = "eos") -> "Generated":
+        obj = super().__new__(cls, text)
+        obj.stop_reason = stop_reason
+        return obj
+
+    @property
+    def partial(self) -> bool:
+        """Cut off by the deadline – not the model's complete answer."""
+        return self.stop_reason == "deadline"
+
+
+def trim_at_markers(text: str, markers: Sequence[str]) -> Tuple[str, bool]:
+    """(text up to the first role marker, whether one was found); a leading marker is dropped."""
+    body = text.lstrip()
+    for marker in markers:
+        if body.startswith(marker):
+            body = body[len(marker):].lstrip()
+            break
+    cuts = [i for i in (body.find(m) for m in markers) if i >= 0]
+    if not cuts:
+        return body, False
+    return body[: min(cuts)].rstrip(), True
+
+
+def _held_back(text: str, markers: Sequence[str]) -> int:
+    """Length of the longest suffix of `text` that could still become a marker."""
+    longest = 0
+    for marker in markers:
+        for n in range(min(len(marker) - 1, len(text)), longest, -1):
+            if marker.startswith(text[-n:]):
+                longest = n
+                break
+    return longest
+
+
+class StopCondition:
+    """Role markers and an optional deadline (`clock()` time) for one generation."""
+
+    def __init__(
+        self,
+        markers: Iterable[str] = ROLE_MARKERS,
+        *,
+        deadline: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.markers: Tuple[str, ...] = tuple(m for m in markers if m)
+        self.deadline = deadline
+        self._clock = clock
+        self.reason: Optional[str] = None  # set once decoding was cut short
+
+    @classmethod
+    def within(
+        cls,
+        seconds: float,
+        markers: Iterable[str] = ROLE_MARKERS,
+        *,
+        start: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> "StopCondition":
+        """Deadline `seconds` after `start` (default: now); 0 → no deadline."""
+        deadline = (clock() if start is None else start) + seconds if seconds > 0 else None
+        return cls(markers, deadline=deadline, clock=clock)
+
+    def expired(self) -> bool:
+        if self.deadline is not None and self._clock() >= self.deadline:
+            self.reason = "deadline"
+            return True
+        return False
+
+    def hit(self, text: str) -> bool:
+        """True (and recorded) when generated `text` reached a role marker."""
+        if self.markers and trim_at_markers(text, self.markers)[1]:
+            self.reason = "marker"
+            return True
+        return False
+
+    # ─────────────────────────────────────────── Hugging Face ──
+    def criteria(self, tokenizer: Any) -> List[Callable[..., bool]]:
+        """`stopping_criteria=` for `generate()` (decoder ids are decoded each step)."""
+        return [_Criterion(self, tokenizer)]
+
+    # ─────────────────────────────────────────── results ──
+    def finish(self, text: str, tokens: Optional[int] = None, max_new_tokens: Optional[int] = None) -> Generated:
+        """Final text (cut at a marker) and the reason decoding ended."""
+        clean, hit = trim_at_markers(text, self.markers) if self.markers else (text, False)
+        reason = self.reason or ("marker" if hit else None)
+        if reason is None:
+            reason = "length" if max_new_tokens and tokens is not None and tokens >= max_new_tokens else "eos"
+        if reason == "deadline":
+            LOGGER.info("[Gen] deadline reached – partial result (%d chars)", len(clean))
+        return Generated(clean, reason)
+
+    def filter(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Pieces up to the first marker; a possible marker prefix (and trailing space) waits."""
+        text, sent = "", 0
+        for piece in pieces:
+            text += piece
+            clean, hit = trim_at_markers(text, self.markers)
+            if hit:
+                self.reason = self.reason or "marker"
+                if len(clean) > sent:
+                    yield clean[sent:]
+                return
+            ready = len(clean[: len(clean) - _held_back(clean, self.markers)].rstrip())
+            if ready > sent:
+                yield clean[sent:ready]
+                sent = ready
+        clean = trim_at_markers(text, self.markers)[0]
+        if len(clean) > sent:
+            yield clean[sent:]
+
+
+class _Criterion:
+    """Stopping criterion: any callable `(input_ids, scores) -> bool` works in `generate()`."""
+
+    def __init__(self, stop: StopCondition, tokenizer: Any) -> None:
+        self.stop = stop
+        self.tokenizer = tokenizer
+
+    def __call__(self, input_ids: Any, scores: Any, **_: Any) -> bool:
+        if self.stop.expired():
+            return True
+        if not self.stop.markers:
+            return False
+        return self.stop.hit(self.tokenizer.decode(input_ids[0], skip_special_tokens=True))
+
+
+class StopStats:
+    """Stop reasons counted over all generations."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[str, int] = dict.fromkeys(STOP_REASONS, 0)
+        self._lock = threading.Lock()
+
+    def record(self, reason: str) -> None:
+        with self._lock:
+            self.counts[reason] = self.counts.get(reason, 0) + 1
+
+    def describe(self, reason: Optional[str] = None) -> str:
+        """One line for the Diagnostics box: `reason` of this reply, then the totals."""
+        last = reason or "n/a"
+        if last == "deadline":
+            last += " – partial answer"
+        with self._lock:
+            seen = ", ".join(f"{k} {v}" for k, v in self.counts.items() if v)
+        return f"{last} ({seen})" if seen else last
+
+
+__all__ = [
+    "Generated",
+    "ROLE_MARKERS",
+    "STOP_REASONS",
+    "StopCondition",
+    "StopStats",
+    "trim_at_markers",
+]
@@ -0,0 +1,141 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/token_context.py – prompt assembly at the token-id level
+# ════════════════════════════════════════════════════════════════════
+"""
+The context is a header (base / specialised prompt), one segment per turn
+and a tail:
+
+    <header>  "\\n<Role>: <content>" …  "\\nUser: <msg>\\nAssistant:"
+
+Each segment is tokenised once and kept in an LRU (`SegmentTokenizer`);
+history turns repeat on every request, so a turn costs a dict lookup after
+its first appearance. `prepare_context()` counts tokens, trims and builds the
+input ids from these segments, and returns a `TokenPrompt` – the prompt
+string that also carries its ids – which the engine feeds to the model as a
+tensor without tokenising again.
+
+Segments start at a newline, i.e. at a word boundary, so for whitespace
+pre-tokenising tokenizers (SentencePiece / T5, BPE) the concatenated ids
+equal the ids of the concatenated string. `SegmentTokenizer.equivalent`
+checks this once per tokenizer; when it does not hold the pipeline keeps
+the plain string path.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+Ids = Tuple[int, ...]
+
+# probe for `equivalent`: header + turns + tail, as prepare_context joins them
+_PROBE: Tuple[str, ...] = (
+    "You are a helpful assistant. Answer briefly.",
+    "\nUser: what's the capital of France?",
+    "\nAssistant: Paris – it has been since 987.",
+    "\n• earlier: greetings, small-talk",
+    "\nUser: and Germany?\nAssistant:",
+)
+
+
+def turn_text(turn: Dict[str, Any]) -> str:
+    """One history turn as it appears in the context."""
+    if turn["role"] == "summary":
+        # Summary content is already formatted with bullets, include directly
+        return f"\n{turn['content']}"
+    return f"\n{turn['role'].capitalize()}: {turn['content']}"
+
+
+def tail_text(msg: str) -> str:
+    return f"\nUser: {msg}\nAssistant:"
+
+
+class TokenPrompt(str):
+    """
+    A prompt string that carries its token ids (special tokens included).
+    `header_chars` / `header_tokens` give the length of the static prompt head.
+    """
+
+    ids: Ids
+    header_chars: int
+    header_tokens: int
+    source: int  # id() of the tokenizer that produced `ids`
+
+    def __new__(cls, text: str, ids: Ids, *, header_chars: int, header_tokens: int, source: int) -> "TokenPrompt":
+        obj = super().__new__(cls, text)
+        obj.ids, obj.header_chars, obj.header_tokens, obj.source = ids, header_chars, header_tokens, source
+        return obj
+
+
+class SegmentTokenizer:
+    """Token ids per text segment (LRU) and id assembly for one tokenizer."""
+
+    def __init__(self, tokenizer: Any, maxsize: int = 4096) -> None:
+        self.tokenizer = tokenizer
+        self.source = id(tokenizer)
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, Ids] = OrderedDict()
+        self._lock = threading.Lock()
+        self.prefix, self.suffix = self._special_tokens()
+        self.equivalent = self._check_equivalence()
+
+    # ─────────────────────────────────────────── setup ──
+    def _encode(self, text: str, special: bool) -> Ids:
+        return tuple(int(i) for i in self.tokenizer(text, add_special_tokens=special)["input_ids"])
+
+    def _special_tokens(self) -> Tuple[Ids, Ids]:
+        """Ids the tokenizer adds before / after a text (T5: none / `</s>`)."""
+        bare, full = self._encode("probe", False), self._encode("probe", True)
+        for start in range(len(full) - len(bare) + 1):
+            if full[start:start + len(bare)] == bare:
+                return full[:start], full[start + len(bare):]
+        return (), ()
+
+    def _check_equivalence(self) -> bool:
+        return self.assemble([self.ids(s) for s in _PROBE]) == self._encode("".join(_PROBE), True)
+
+    # ─────────────────────────────────────────── segments ──
+    def ids(self, text: str) -> Ids:
+        """Ids of one segment (no special tokens), cached."""
+        with self._lock:
+            ids = self._cache.get(text)
+            if ids is not None:
+                self._cache.move_to_end(text)
+                return ids
+        ids = self._encode(text, False)
+        self.seed(text, ids)
+        return ids
+
+    def seed(self, text: str, ids: Iterable[int]) -> None:
+        """Add a known tokenisation (e.g. prompt ids from the config artefact)."""
+        with self._lock:
+            self._cache[text] = tuple(ids)
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def count(self, segments: Sequence[Ids]) -> int:
+        """Token count of the assembled prompt (special tokens included)."""
+        return len(self.prefix) + sum(len(s) for s in segments) + len(self.suffix)
+
+    def assemble(self, segments: Sequence[Ids]) -> Ids:
+        out = list(self.prefix)
+        for seg in segments:
+            out.extend(seg)
+        out.extend(self.suffix)
+        return tuple(out)
+
+
+def prompt_ids(prompt: str, tokenizer: Any) -> Any:
+    """
+    `prompt`'s ids as a (1, n) tensor when it is a `TokenPrompt` of this
+    tokenizer (converted by the tokenizer's own `pad`), else None.
+    """
+    if not isinstance(prompt, TokenPrompt) or prompt.source != id(tokenizer) or not hasattr(tokenizer, "pad"):
+        return None
+    return tokenizer.pad({"input_ids": [list(prompt.ids)]}, return_tensors="pt")["input_ids"]
+
+
+__all__ = ["SegmentTokenizer", "TokenPrompt", "prompt_ids", "tail_text", "turn_text"]
@@ -0,0 +1,169 @@
+# ════════════════════════════════════════════════════════════════════
+#  engine/ui.py – Gradio front-end over the headless engine
+# ════════════════════════════════════════════════════════════════════
+"""
+The only engine module that imports gradio. `build_demo()` creates the
+Blocks app; the callbacks turn widget values into a `RequestContext` and call
+the pipeline.
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+from typing import Any, Tuple
+
+import gradio as gr
+
+from config.request_context import request_context
+from engine.pipeline import (
+    ENGINE,
+    IN_FLIGHT,
+    ROUTER,
+    SETTINGS_SERVICE,
+    STOPS,
+    base_prompt,
+    generate,
+    get_specialized_prompt,
+    handle_request,
+    response_cache,
+    specialized_prompts,
+)
+
+# ─────────────── Gradio Wrappers ───────────────
+
+def _session_id(request: gr.Request | None) -> str:
+    """One memory session per browser tab (gradio's session hash)."""
+    return getattr(request, "session_hash", None) or "default"
+
+
+def respond(
+    msg: str,
+    history: list[dict[str, Any]],
+    mx: int,
+    temp: float,
+    top_p: float,
+    sample: bool,
+    fuzzy: bool,
+    safety: str,
+    request: gr.Request | None = None,
+) -> Tuple[str, list[dict[str, Any]], str]:
+    # every UI control applies to this request only – shared state is untouched
+    req = request_context(
+        SETTINGS_SERVICE.current(),
+        safety=safety,
+        fuzzy=fuzzy,
+        max_new_tokens=mx,
+        temperature=temp,
+        top_p=top_p,
+        do_sample=sample,
+        session_id=_session_id(request),
+    )
+    history = history or []
+    new_hist, src, stop = handle_request(msg, history, req)
+    diag = f"Prompt source: {src}"
+    if stop is not None:
+        diag += f" | Stop: {STOPS.describe(stop)}"
+    cache = response_cache(req)
+    if cache is not None:
+        diag += f" | Response cache: {cache.describe()}"
+    diag += f" | In-flight: {IN_FLIGHT.describe()}"
+    assisted = getattr(ENGINE, "assisted", None)
+    if assisted is not None:
+        diag += f" | Draft: {assisted.describe()}"
+    if ROUTER.stats:
+        diag += f" | Tiers: {ROUTER.describe()}"
+    return "", new_hist, diag
+
+
+# ─────────────── Playground Helper ───────────────
+
+def run_playground(
+    test_in: str,
+    mx: int,
+    temp: float,
+    top_p: float,
+    sample: bool,
+    fuzzy: bool,
+    force: bool,
+    request: gr.Request | None = None,
+) -> Tuple[str, str, str]:
+    if not force:
+        return "", "", ""
+    req = request_context(
+        SETTINGS_SERVICE.current(),
+        fuzzy=fuzzy, max_new_tokens=mx, temperature=temp, top_p=top_p, do_sample=sample,
+        session_id=_session_id(request),
+    )
+    ptxt, concept, score = get_specialized_prompt(test_in, specialized_prompts(), req.fuzzy, req)
+    prompt = ptxt or base_prompt()
+    ctx    = f"{prompt}\nUser: {test_in}\nAssistant:"
+    preview = generate(ctx, req.generation_kwargs(), req, concept=concept)
+    score_s = f"{score:.2f}" if score else "N/A"
+    return f"{concept} (conf {score_s})", prompt, preview
+
+# ─────────────── Gradio UI ───────────────
+
+def build_demo() -> gr.Blocks:
+    """Assemble the chat UI (no model is loaded here)."""
+    with gr.Blocks() as demo:
+        gr.Markdown("# Chatbot with Tunable Generation Parameters")
+
+        chatbot   = gr.Chatbot(type="messages")
+        state     = gr.State([])
+        diag_box  = gr.Textbox(label="Diagnostics", interactive=False)
+
+        with gr.Row():
+            txt = gr.Textbox(show_label=False,
+                             placeholder="Enter your message and press Enter")
+
+        # sliders & toggles
+        with gr.Row():
+            mx_slider   = gr.Slider(50, 200, value=100, label="Max New Tokens")
+            t_slider    = gr.Slider(0.1, 1.0, value=0.5, label="Temperature")
+            top_p_slider= gr.Slider(0.5, 1.0, value=0.9, label="Top-p")
+            sample_chk  = gr.Checkbox(True, label="Do Sample")
+            fuzzy_chk   = gr.Checkbox(True, label="Enable Fuzzy")
+            auto_chk    = gr.Checkbox(False, label="Auto-run Playground")
+
+        # playground
+        with gr.Accordion("Developer Prompt Playground", open=False):
+            test_in   = gr.Textbox(label="Test Input")
+            run_btn   = gr.Button("Run Test")
+
+            matched   = gr.Textbox(label="Matched Concept", interactive=False)
+            prompt_p  = gr.Textbox(label="Resolved Prompt", lines=6, interactive=False)
+            gen_prev  = gr.Textbox(label="Generated Preview", lines=6, interactive=False)
+
+            safety_dd = gr.Dropdown(
+                ["strict", "moderate", "relaxed"],
+                value=SETTINGS_SERVICE.current()["safety"]["sensitivity_level"],
+                label="Safety Mode (Dev)"
+            )
+
+            # manual run
+            run_btn.click(
+                run_playground,
+                [test_in, mx_slider, t_slider, top_p_slider,
+                 sample_chk, fuzzy_chk, gr.State(True)],
+                [matched, prompt_p, gen_prev]
+            )
+
+            # auto preview
+            test_in.input(
+                run_playground,
+                [test_in, mx_slider, t_slider, top_p_slider,
+                 sample_chk, fuzzy_chk, auto_chk],
+                [matched, prompt_p, gen_prev]
+            )
+
+        # main submit
+        txt.submit(
+            respond,
+            [txt, state, mx_slider, t_slider, top_p_slider,
+             sample_chk, fuzzy_chk, safety_dd],
+            [txt, chatbot, diag_box]
+        )
+    return demo
+
+
+__all__ = ["build_demo", "respond", "run_playground"]
@@ -13,24 +13,23 @@ Usage
 >>> set_memory_enabled(False)  # disable completely
 """
 
-from config.settings_loader import load_settings
+from config.settings_service import SettingsSnapshot, get_settings_service
 from utils.memory           import memory, MemoryBackend
-from main                    import SETTINGS
 
 
-def set_memory_enabled(flag: bool, backend: str = "in_memory") -> dict:
+def set_memory_enabled(flag: bool, backend: str = "in_memory") -> SettingsSnapshot:
     """
     Toggle conversation-memory ON / OFF for the **current** Python process.
 
-    • Updates the shared SETTINGS dict
+    • Publishes a new settings snapshot with the memory block changed
     • Switches the live singleton backend
     • Clears stored turns so tests start clean
 
-    Returns the mutated SETTINGS for convenience.
+    Returns the new snapshot for convenience.
     """
-    SETTINGS.setdefault("memory", {})
-    SETTINGS["memory"]["enabled"] = flag
-    SETTINGS["memory"]["backend"] = backend if flag else "none"
+    snapshot = get_settings_service().patch(
+        {"memory": {"enabled": flag, "backend": backend if flag else "none"}}
+    )
 
     # swap the active backend on the singleton in real time
     memory.backend = (
@@ -42,4 +41,4 @@ def set_memory_enabled(flag: bool, backend: str = "in_memory") -> dict:
 
     state = "ON" if flag else "OFF"
     print(f"[Test Helper] Memory toggle → {state} (backend={memory.backend.value})")
-    return SETTINGS
+    return snapshot
@@ -22,9 +22,9 @@ import random
 from pathlib import Path
 
 from utils.summariser import summarise_context          # scaffold function
-from config.settings_loader import load_settings        # just to demo import
+from config.settings_service import current_settings   # just to demo import
 
-settings = load_settings()      # not used yet but handy for future tweaks
+settings = current_settings()   # not used yet but handy for future tweaks
 
 # ───────────────────────── Fake chat-history generator ─────────────────────────
 USERS = ["Alice", "Bob"]   # (future: per-user summaries)
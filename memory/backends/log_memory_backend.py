@@ -0,0 +1,492 @@
+# ════════════════════════════════════════════════════════════════════
+#  log_memory_backend.py – append-only, memory-mapped Memory backend
+# ════════════════════════════════════════════════════════════════════
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Mapping, Optional, Tuple, final, override
+
+from memory.backends.redis_memory_backend import BaseMemoryBackend, InMemoryBackend
+
+# ───────────────────────────────────────────────────────── Logging ──
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────── Record format ──
+# [kind:u8][cid_len:u16][role_len:u16][content_len:u32] cid role content
+_HDR = struct.Struct("<BHHI")
+_KIND_TURN = 1
+_KIND_CLEAR = 2  # tombstone – session flushed
+# summary of a compacted prefix: the role slot carries the number of newest
+# turns it was written in front of (ASCII), so replay can redo the swap
+_KIND_SUMMARY = 3
+
+
+class _Shard:
+    """One append-only log file plus the per-session offset index over it."""
+
+    __slots__ = ("path", "lock", "fh", "mm", "mapped", "size", "live", "index")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.fh: Optional[BinaryIO] = None
+        self.mm: Optional[mmap.mmap] = None
+        self.mapped = 0  # bytes covered by `mm`
+        self.size = 0  # bytes appended so far (== file size)
+        self.live = 0  # bytes still referenced by the index
+        # cid → (record offsets, record lengths), oldest → newest
+        self.index: Dict[str, Tuple[array[int], array[int]]] = {}
+
+    # ─────────────────────────────────────────────── mmap helpers ──
+    def remap(self) -> None:
+        """(Re)map the file so every appended byte is readable."""
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.mapped = 0
+        if self.size:
+            with open(self.path, "rb") as fh:
+                self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped = len(self.mm)
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.fh is not None:
+            self.fh.close()
+            self.fh = None
+
+
+@final
+class LogMemoryBackend(BaseMemoryBackend):
+    """
+    Single-node chat-turn store built on append-only log files.
+
+    Notes
+    -----
+    • Sessions are hashed (crc32) onto `shards` log files; each shard has its
+      own lock so writers on different shards never contend.
+    • `add_turn` is one buffered append – no read-modify-write, no B-tree.
+    • Every shard keeps a compact per-session index (two `array`s: offsets +
+      lengths, 12 bytes / turn). `get_recent` maps the file and decodes the
+      tail records straight out of the mapping.
+    • `max_turns` retention is applied to the index immediately; the bytes it
+      leaves behind are reclaimed by compaction (background thread, or
+      `compact()` on demand), which rewrites a shard with live records only.
+    • `flush` appends a tombstone so a restart replays the log correctly;
+      `compact_prefix` likewise appends one summary record that replay puts
+      back in front of the turns it did not cover. `rewrite_turns` re-appends
+      the whole session after a tombstone (records are never edited).
+    • Any I/O failure flips `_using_fallback` and delegates to RAM, exactly
+      like the SQLite / Redis backends.
+    """
+
+    def __init__(
+        self,
+        *,
+        log_dir: str | Path | None = None,
+        shards: int = 4,
+        max_turns: int = 10_000,
+        fsync: bool = False,
+        compact_ratio: float = 0.5,
+        compact_min_bytes: int = 1 << 20,
+        compact_interval: float = 5.0,
+        background_compaction: bool = True,
+        fallback: Optional[BaseMemoryBackend] = None,
+    ) -> None:
+        # ─────────────────────────────────────────── Fields ──
+        self._dir: Path = Path(
+            log_dir if log_dir is not None else os.getenv("MEMORY_LOG_DIR", "data/memory_log")
+        )
+        self._max: int = max_turns
+        # trim the in-RAM index in batches, not on every append
+        self._slack: int = max(64, max_turns // 8)
+        self._fsync = fsync
+        self._compact_ratio = compact_ratio
+        self._compact_min_bytes = compact_min_bytes
+        self._fallback: BaseMemoryBackend = fallback or InMemoryBackend()
+        self._shards: List[_Shard] = []
+        self._using_fallback: bool = True  # default until setup succeeds
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+
+        # ───────────────────────────────────────── Open / replay ──
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            for i in range(max(1, shards)):
+                shard = _Shard(self._dir / f"shard-{i:03d}.log")
+                self._replay(shard)
+                shard.fh = open(shard.path, "ab")
+                shard.remap()
+                self._shards.append(shard)
+            self._using_fallback = False
+            LOGGER.debug("[Log] Opened %d shard(s) → %s", len(self._shards), self._dir)
+        except Exception as exc:
+            LOGGER.warning("Log backend unavailable (%s) – falling back to RAM", exc)
+            for shard in self._shards:
+                shard.close()
+            self._shards = []
+            self._using_fallback = True
+            return
+
+        if background_compaction:
+            self._compactor = threading.Thread(
+                target=self._compact_loop,
+                args=(compact_interval,),
+                name="log-memory-compactor",
+                daemon=True,
+            )
+            self._compactor.start()
+
+    # ───────────────────────────────────────────── helpers ──
+    def _shard(self, cid: str) -> _Shard:
+        return self._shards[zlib.crc32(cid.encode("utf-8")) % len(self._shards)]
+
+    @staticmethod
+    def _encode(kind: int, cid: str, role: str = "", content: str = "") -> bytes:
+        c, r, t = cid.encode("utf-8"), role.encode("utf-8"), content.encode("utf-8")
+        return _HDR.pack(kind, len(c), len(r), len(t)) + c + r + t
+
+    def _trim(self, shard: _Shard, cid: str, keep: int) -> None:
+        """Drop all but the newest `keep` index entries of a session."""
+        offs, lens = shard.index[cid]
+        drop = len(offs) - keep
+        if drop <= 0:
+            return
+        shard.live -= sum(lens[:drop])
+        del offs[:drop]
+        del lens[:drop]
+
+    def _prepend(self, shard: _Shard, cid: str, keep: int, off: int, length: int) -> None:
+        """Keep the newest `keep` entries and put record `off` in front of them."""
+        offs, lens = shard.index.setdefault(cid, (array("Q"), array("I")))
+        self._trim(shard, cid, keep)
+        offs.insert(0, off)
+        lens.insert(0, length)
+        shard.live += length
+
+    def _replay(self, shard: _Shard) -> None:
+        """Rebuild the offset index from disk; cut off a torn trailing record."""
+        if not shard.path.exists() or shard.path.stat().st_size == 0:
+            shard.path.touch()
+            return
+        with open(shard.path, "rb") as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                pos, end = self._scan(shard, data)
+
+        if pos != end:
+            LOGGER.warning("[Log] %s: dropping %d torn byte(s) at tail", shard.path, end - pos)
+            with open(shard.path, "r+b") as fh:
+                fh.truncate(pos)
+        shard.size = pos
+        for cid in list(shard.index):
+            self._trim(shard, cid, self._max)
+
+    def _scan(self, shard: _Shard, data: mmap.mmap) -> Tuple[int, int]:
+        """Index every complete record in `data`; return (good_end, file_end)."""
+        pos, end = 0, len(data)
+        while pos + _HDR.size <= end:
+            kind, cl, rl, tl = _HDR.unpack_from(data, pos)
+            rec_len = _HDR.size + cl + rl + tl
+            if kind not in (_KIND_TURN, _KIND_CLEAR, _KIND_SUMMARY) or pos + rec_len > end:
+                break
+            cid = data[pos + _HDR.size : pos + _HDR.size + cl].decode("utf-8")
+            if kind == _KIND_CLEAR:
+                if cid in shard.index:
+                    shard.live -= sum(shard.index.pop(cid)[1])
+            elif kind == _KIND_SUMMARY:
+                r0 = pos + _HDR.size + cl
+                self._prepend(shard, cid, int(data[r0 : r0 + rl]), pos, rec_len)
+            else:
+                offs, lens = shard.index.setdefault(cid, (array("Q"), array("I")))
+                offs.append(pos)
+                lens.append(rec_len)
+                shard.live += rec_len
+                if len(offs) > self._max + self._slack:
+                    self._trim(shard, cid, self._max)
+            pos += rec_len
+        return pos, end
+
+    def _append(self, shard: _Shard, rec: bytes) -> int:
+        """Append one record (caller holds the shard lock); return its offset."""
+        assert shard.fh is not None  # narrow for type-checkers
+        off = shard.size
+        shard.fh.write(rec)
+        shard.fh.flush()
+        if self._fsync:
+            os.fsync(shard.fh.fileno())
+        shard.size += len(rec)
+        return off
+
+    def _read(
+        self, shard: _Shard, entry: Tuple[array[int], array[int]], n: int
+    ) -> List[Dict[str, str]]:
+        """Decode the newest `n` records of an index entry, newest-first (lock held)."""
+        offs, _ = entry
+        if shard.mapped < shard.size:
+            shard.remap()
+        assert shard.mm is not None  # narrow for type-checkers
+
+        out: List[Dict[str, str]] = []
+        with memoryview(shard.mm) as view:
+            for i in range(len(offs) - 1, max(-1, len(offs) - 1 - n), -1):
+                pos = offs[i]
+                kind, cl, rl, tl = _HDR.unpack_from(view, pos)
+                r0 = pos + _HDR.size + cl
+                t0 = r0 + rl
+                out.append(
+                    {
+                        "role": (
+                            "summary"
+                            if kind == _KIND_SUMMARY
+                            else str(view[r0:t0], "utf-8")
+                        ),
+                        "content": str(view[t0 : t0 + tl], "utf-8"),
+                    }
+                )
+        return out
+
+    def _switch_to_fallback(self, op: str, exc: Exception) -> None:
+        LOGGER.error("Log %s failed (%s) – switching to fallback", op, exc)
+        self._using_fallback = True
+
+    # ───────────────────────────────────────── add_turn ──
+    @override
+    def add_turn(self, role: str, content: str, *, cid: str = "default") -> None:
+        """Append a single chat turn to its shard (or delegate to RAM)."""
+        if self._using_fallback:
+            self._fallback.add_turn(role, content, cid=cid)
+            return
+
+        cid = str(cid)  # façade callers occasionally pass ints
+        rec = self._encode(_KIND_TURN, cid, role, content)
+        shard = self._shard(cid)
+        try:
+            with shard.lock:
+                off = self._append(shard, rec)
+                offs, lens = shard.index.setdefault(cid, (array("Q"), array("I")))
+                offs.append(off)
+                lens.append(len(rec))
+                shard.live += len(rec)
+                if len(offs) > self._max + self._slack:
+                    self._trim(shard, cid, self._max)
+                    self._wake.set()
+        except Exception as exc:
+            self._switch_to_fallback("add_turn", exc)
+            self._fallback.add_turn(role, content, cid=cid)
+
+    # ───────────────────────────────────────── get_recent ──
+    @override
+    def get_recent(
+        self, *, limit: int = 50, cid: str = "default"
+    ) -> List[Dict[str, str]]:
+        """
+        Return the most-recent `limit` turns (newest-first).
+        """
+        if self._using_fallback:
+            return self._fallback.get_recent(limit=limit, cid=cid)
+
+        cid = str(cid)
+        shard = self._shard(cid)
+        try:
+            with shard.lock:
+                entry = shard.index.get(cid)
+                n = min(limit, self._max)
+                if entry is None or n <= 0:
+                    return []
+                return self._read(shard, entry, n)
+        except Exception as exc:
+            self._switch_to_fallback("get_recent", exc)
+            return self._fallback.get_recent(limit=limit, cid=cid)
+
+    # ───────────────────────────────────────────── flush ──
+    @override
+    def flush(self, *, cid: str = "default") -> None:
+        """Forget all stored turns for a conversation id (tombstone append)."""
+        if self._using_fallback:
+            self._fallback.flush(cid=cid)
+            return
+
+        cid = str(cid)
+        shard = self._shard(cid)
+        try:
+            with shard.lock:
+                entry = shard.index.pop(cid, None)
+                if entry is None:
+                    return
+                shard.live -= sum(entry[1])
+                self._append(shard, self._encode(_KIND_CLEAR, cid))
+            self._wake.set()
+        except Exception as exc:
+            self._switch_to_fallback("flush", exc)
+            self._fallback.flush(cid=cid)
+
+    # ──────────────────────────────────────── compact_prefix ──
+    @override
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        """Replace the oldest `drop` turns with one summary record (one append)."""
+        if self._using_fallback:
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+            return
+
+        cid = str(cid)
+        shard = self._shard(cid)
+        try:
+            with shard.lock:
+                offs, _ = shard.index.get(cid, (array("Q"), array("I")))
+                keep = max(0, len(offs) - max(0, drop))
+                rec = self._encode(_KIND_SUMMARY, cid, str(keep), summary)
+                off = self._append(shard, rec)
+                self._prepend(shard, cid, keep, off, len(rec))
+            self._wake.set()
+        except Exception as exc:
+            self._switch_to_fallback("compact_prefix", exc)
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+
+    # ───────────────────────────────────────── rewrite_turns ──
+    @override
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        """
+        Append a tombstone plus the session's turns with the replacements
+        applied, as one write, and repoint the index; the old records become
+        dead bytes for compaction. Sessions with no match write nothing.
+        """
+        if self._using_fallback:
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+
+        cid = str(cid)
+        shard = self._shard(cid)
+        try:
+            with shard.lock:
+                entry = shard.index.get(cid)
+                if entry is None:
+                    return 0
+                turns = list(reversed(self._read(shard, entry, len(entry[0]))))
+                changed = 0
+                recs = [self._encode(_KIND_CLEAR, cid)]
+                for turn in turns:
+                    new = replacements.get((turn["role"], turn["content"]))
+                    if new is not None and new != turn["content"]:
+                        turn["content"] = new
+                        changed += 1
+                    # a summary stored as a plain turn still reads back as "summary"
+                    recs.append(self._encode(_KIND_TURN, cid, turn["role"], turn["content"]))
+                if not changed:
+                    return 0
+
+                base = self._append(shard, b"".join(recs))
+                offs, lens = array("Q"), array("I")
+                pos = base + len(recs[0])
+                for rec in recs[1:]:
+                    offs.append(pos)
+                    lens.append(len(rec))
+                    pos += len(rec)
+                shard.live += sum(lens) - sum(entry[1])
+                shard.index[cid] = (offs, lens)
+            self._wake.set()
+            return changed
+        except Exception as exc:
+            self._switch_to_fallback("rewrite_turns", exc)
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+
+    # ───────────────────────────────────────── list_sessions ──
+    @override
+    def list_sessions(self) -> List[str]:
+        """Conversation ids with at least one live turn, across all shards."""
+        if self._using_fallback:
+            return self._fallback.list_sessions()
+        out: List[str] = []
+        for shard in self._shards:
+            with shard.lock:
+                out.extend(cid for cid, (offs, _) in shard.index.items() if offs)
+        return sorted(out)
+
+    # ─────────────────────────────────────────── compaction ──
+    def _needs_compaction(self, shard: _Shard) -> bool:
+        dead = shard.size - shard.live
+        return dead >= self._compact_min_bytes and dead >= self._compact_ratio * shard.size
+
+    def compact(self, *, force: bool = False) -> int:
+        """
+        Rewrite every shard whose dead-byte ratio crossed the threshold (or all
+        shards when `force`). Returns the number of bytes reclaimed.
+        """
+        if self._using_fallback:
+            return 0
+        reclaimed = 0
+        for shard in self._shards:
+            with shard.lock:
+                if force or self._needs_compaction(shard):
+                    reclaimed += self._compact_shard(shard)
+        return reclaimed
+
+    def _compact_shard(self, shard: _Shard) -> int:
+        """Copy live records into a fresh file and swap it in (lock held)."""
+        assert shard.fh is not None  # narrow for type-checkers
+        before = shard.size
+        if shard.mapped < shard.size:
+            shard.remap()
+
+        tmp = shard.path.with_suffix(".log.compact")
+        new_index: Dict[str, Tuple[array[int], array[int]]] = {}
+        pos = 0
+        with open(tmp, "wb") as out:
+            if shard.mm is not None:
+                for cid, (offs, lens) in shard.index.items():
+                    new_offs, new_lens = array("Q"), array("I")
+                    for off, ln in zip(offs, lens):
+                        out.write(shard.mm[off : off + ln])
+                        new_offs.append(pos)
+                        new_lens.append(ln)
+                        pos += ln
+                    new_index[cid] = (new_offs, new_lens)
+            out.flush()
+            os.fsync(out.fileno())
+
+        shard.fh.close()
+        if shard.mm is not None:
+            shard.mm.close()
+            shard.mm = None
+        os.replace(tmp, shard.path)
+        shard.fh = open(shard.path, "ab")
+        shard.index = new_index
+        shard.size = shard.live = pos
+        shard.remap()
+        LOGGER.debug("[Log] Compacted %s: %d → %d bytes", shard.path.name, before, pos)
+        return before - pos
+
+    def _compact_loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.compact()
+            except Exception as exc:  # never let the daemon die silently
+                LOGGER.error("[Log] background compaction failed (%s)", exc)
+
+    # ───────────────────────────────────────────── close ──
+    def close(self) -> None:
+        """Stop the compactor and release file handles / mappings."""
+        self._stop.set()
+        self._wake.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        for shard in self._shards:
+            with shard.lock:
+                shard.close()
@@ -12,6 +12,7 @@ from typing import (
     Any,
     Dict,
     List,
+    Mapping,
     Optional,
     cast,
     Protocol,
@@ -26,10 +27,14 @@ try:
     import redis as _redis_mod
 
     redis = _redis_mod
-    _REDIS_AVAILABLE: bool = True
+    _redis_available: bool = True
+    _WatchError: Any = _redis_mod.WatchError
 except Exception:
     _redis_available = False
 
+    class _WatchError(Exception):  # type: ignore[no-redef]
+        """Placeholder – never raised without redis-py."""
+
 # ─────────────────────────────── Logging ───────────────────────────────
 LOGGER = logging.getLogger(__name__)
 
@@ -49,6 +54,24 @@ class BaseMemoryBackend:
     def flush(self, *, cid: str = "default") -> None:
         raise NotImplementedError
 
+    def list_sessions(self) -> List[str]:
+        """Every conversation id that currently has stored turns."""
+        raise NotImplementedError
+
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        """Replace the oldest `drop` turns with one `summary`-role turn."""
+        raise NotImplementedError
+
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        """
+        Give every stored turn whose ``(role, content)`` is a key of
+        `replacements` the mapped content (order and roles untouched).
+        Returns the number of turns changed.
+        """
+        raise NotImplementedError
+
 
 # A tiny protocol for the subset of redis-py we use.
 @runtime_checkable
@@ -58,6 +81,8 @@ class _RedisClient(Protocol):
     def ltrim(self, name: str, start: int, end: int) -> Any: ...
     def lrange(self, name: str, start: int, end: int) -> List[str]: ...
     def delete(self, name: str) -> Any: ...
+    def scan_iter(self, match: str) -> Any: ...
+    def pipeline(self, transaction: bool = True) -> Any: ...
 
 
 # ────────────────────────────── Fallback ───────────────────────────────
@@ -82,6 +107,28 @@ class InMemoryBackend(BaseMemoryBackend):
     def flush(self, *, cid: str = "default") -> None:
         self._store.pop(cid, None)
 
+    @override
+    def list_sessions(self) -> List[str]:
+        return [cid for cid, turns in self._store.items() if turns]
+
+    @override
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        turns = self._store.get(cid, [])
+        self._store[cid] = [("summary", summary)] + turns[max(0, drop) :]
+
+    @override
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        turns = self._store.get(cid, [])
+        changed = 0
+        for i, (role, content) in enumerate(turns):
+            new = replacements.get((role, content))
+            if new is not None and new != content:
+                turns[i] = (role, new)
+                changed += 1
+        return changed
+
 
 # ─────────────────────────────── Backend ───────────────────────────────
 class RedisMemoryBackend(BaseMemoryBackend):
@@ -91,6 +138,7 @@ class RedisMemoryBackend(BaseMemoryBackend):
     """
 
     _KEY_TMPL = "chat:{cid}:turns"  # namespaced key template
+    _REWRITE_RETRIES = 5  # WATCH conflicts tolerated per rewrite_turns call
 
     # ─────────────────────────── ctor / connect ──────────────────────────
     def __init__(
@@ -203,3 +251,87 @@ class RedisMemoryBackend(BaseMemoryBackend):
             LOGGER.error("Redis flush failed (%s) – switching to fallback", exc)
             self._using_fallback = True
             self._fallback.flush(cid=cid)
+
+    # ─────────────────────────── list_sessions ──────────────────────────
+    @override
+    def list_sessions(self) -> List[str]:
+        """Conversation ids found by a non-blocking SCAN over our key space."""
+        if self._using_fallback or not self._client:
+            return self._fallback.list_sessions()
+
+        head, tail = self._key("\0").split("\0")
+        try:
+            keys = self._client.scan_iter(match=f"{head}*{tail}")
+            return sorted(str(k)[len(head) : len(str(k)) - len(tail)] for k in keys)
+        except Exception as exc:
+            LOGGER.error("Redis list_sessions failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            return self._fallback.list_sessions()
+
+    # ─────────────────────────── compact_prefix ─────────────────────────
+    @override
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        """
+        Swap the oldest `drop` turns for a single summary turn.
+        The list is newest-first, so LTRIM cuts from the tail and RPUSH puts
+        the summary where the oldest turn was – both inside one MULTI, and
+        indexed from the tail so concurrent LPUSHes are never touched.
+        """
+        if self._using_fallback or not self._client:
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+            return
+
+        key = self._key(cid)
+        payload = json.dumps({"role": "summary", "content": summary})
+        try:
+            pipe = self._client.pipeline(transaction=True)
+            pipe.ltrim(key, 0, -(max(0, drop) + 1))
+            pipe.rpush(key, payload)
+            pipe.execute()
+        except Exception as exc:
+            LOGGER.error("Redis compact_prefix failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+
+    # ─────────────────────────── rewrite_turns ──────────────────────────
+    @override
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        """
+        Rewrite matching turns in place with LSET inside a WATCH/MULTI block,
+        so a concurrent LPUSH/LTRIM makes us re-read instead of clobbering
+        the wrong index (a few retries, then give up for this session).
+        """
+        if self._using_fallback or not self._client:
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+
+        key = self._key(cid)
+        try:
+            for _ in range(self._REWRITE_RETRIES):
+                pipe = self._client.pipeline(transaction=True)
+                try:
+                    pipe.watch(key)
+                    edits: List[Tuple[int, str]] = []
+                    for i, raw in enumerate(pipe.lrange(key, 0, -1)):
+                        turn = json.loads(raw)
+                        new = replacements.get((turn["role"], turn["content"]))
+                        if new is not None and new != turn["content"]:
+                            edits.append((i, json.dumps({"role": turn["role"], "content": new})))
+                    if not edits:
+                        return 0
+                    pipe.multi()
+                    for i, payload in edits:
+                        pipe.lset(key, i, payload)
+                    pipe.execute()
+                    return len(edits)
+                except _WatchError:
+                    continue
+                finally:
+                    pipe.reset()
+            LOGGER.warning("Redis rewrite_turns: %s kept changing – skipped", key)
+            return 0
+        except Exception as exc:
+            LOGGER.error("Redis rewrite_turns failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            return self._fallback.rewrite_turns(replacements, cid=cid)
@@ -0,0 +1,425 @@
+# ════════════════════════════════════════════════════════════════════
+#  sharded_sqlite_memory_backend.py – N SQLite files, one writer each
+# ════════════════════════════════════════════════════════════════════
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    final,
+    override,
+)
+
+from memory.backends.redis_memory_backend import BaseMemoryBackend, InMemoryBackend
+from memory.backends.sqlite_memory_backend import TURNS_DDL, SQLiteMemoryBackend
+
+# ───────────────────────────────────────────── Paths & defaults ──
+DEFAULT_DB_DIR: str = "data/memory_shards"
+DEFAULT_SHARDS: int = 4
+MANIFEST_NAME: str = "manifest.json"
+
+
+def shard_for(cid: str, shards: int) -> int:
+    """Stable (cross-process) shard number for a conversation id."""
+    return zlib.crc32(str(cid).encode("utf-8")) % shards
+
+
+def shard_path(db_dir: Path, generation: int, index: int) -> Path:
+    return db_dir / f"gen{generation:04d}-shard-{index:03d}.sqlite"
+
+
+def read_manifest(db_dir: Path) -> Optional[Dict[str, int]]:
+    """Return {"generation": g, "shards": n} or None when not initialised."""
+    try:
+        with open(db_dir / MANIFEST_NAME, encoding="utf-8") as fh:
+            data: Any = json.load(fh)
+        return {"generation": int(data["generation"]), "shards": int(data["shards"])}
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(db_dir: Path, *, generation: int, shards: int) -> None:
+    """Atomically publish a new layout (write tmp → rename)."""
+    tmp = db_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps({"generation": generation, "shards": shards}), encoding="utf-8")
+    os.replace(tmp, db_dir / MANIFEST_NAME)
+
+
+class _Layout:
+    """One generation's shard connections and the calls still using them."""
+
+    def __init__(
+        self, generation: int, shards: List[Tuple[SQLiteMemoryBackend, threading.Lock]]
+    ) -> None:
+        self.generation = generation
+        self.shards = shards
+        self.users = 0  # calls in flight – guarded by the backend's layout lock
+        self.retired = False
+
+    def close(self) -> None:
+        for shard, lock in self.shards:
+            with lock:
+                shard.close()
+
+
+@final
+class ShardedSQLiteMemoryBackend(BaseMemoryBackend):
+    """
+    Chat-turn store that spreads sessions over N SQLite files.
+
+    Notes
+    -----
+    • A session id is hashed (crc32) to exactly one shard, so every shard has
+      its own database file, connection and write lock – writers for
+      different sessions no longer queue behind one file-level lock.
+    • The layout lives in `<db_dir>/manifest.json` (`generation`, `shards`).
+      An existing manifest always wins over the `shards` argument; use
+      `reshard()` (or scripts/sqlite_shards.py) to change the count.
+    • The manifest is re-checked at most every `reload_interval` seconds, so
+      running processes follow an online re-shard without a restart; the old
+      generation's connections are closed once no call is using them.
+    • Each shard is a plain `SQLiteMemoryBackend`; fallback behaviour and
+      retention (`max_rows_per_session`) are inherited per shard.
+    """
+
+    def __init__(
+        self,
+        *,
+        db_dir: str | Path | None = None,
+        shards: Optional[int] = None,
+        max_rows_per_session: int = 10_000,
+        fallback: Optional[BaseMemoryBackend] = None,
+        persist: bool = True,
+        reload_interval: float = 1.0,
+    ) -> None:
+        # ─────────────────────────────────────────── Fields ──
+        self._dir: Path = Path(
+            db_dir if db_dir is not None else os.getenv("MEMORY_DB_DIR", DEFAULT_DB_DIR)
+        )
+        self._max = max_rows_per_session
+        self._persist = persist
+        self._fallback: BaseMemoryBackend = fallback or InMemoryBackend()
+        self._reload_interval = reload_interval
+        self._checked_at = 0.0
+        self._layout = _Layout(-1, [])
+        self._layout_lock = threading.Lock()  # guards the swap and `_Layout.users`
+        self._using_fallback: bool = True  # default until setup succeeds
+
+        requested = shards or int(os.getenv("MEMORY_SQLITE_SHARDS", DEFAULT_SHARDS))
+
+        # ───────────────────────────────────────── Connect ──
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            manifest = read_manifest(self._dir)
+            if manifest is None:
+                write_manifest(self._dir, generation=0, shards=max(1, requested))
+            elif shards is not None and manifest["shards"] != shards:
+                LOGGER.warning(
+                    "[Shards] %s already has %d shard(s); ignoring shards=%d (reshard instead)",
+                    self._dir, manifest["shards"], shards,
+                )
+            self._layout = self._open(
+                read_manifest(self._dir) or {"generation": 0, "shards": requested}
+            )
+            self._checked_at = time.monotonic()
+            self._using_fallback = not persist
+            LOGGER.debug(
+                "[Shards] Connected → %s (shards=%d, persist=%s)",
+                self._dir, self.shard_count, persist,
+            )
+        except Exception as exc:
+            LOGGER.warning("Sharded SQLite unavailable (%s) – falling back to RAM", exc)
+            self._using_fallback = True
+
+    # ───────────────────────────────────────────── layout ──
+    @property
+    def shard_count(self) -> int:
+        return len(self._layout.shards)
+
+    def _open(self, manifest: Dict[str, int]) -> _Layout:
+        gen, n = manifest["generation"], manifest["shards"]
+        return _Layout(gen, [
+            (
+                SQLiteMemoryBackend(
+                    db_path=shard_path(self._dir, gen, i),
+                    max_rows_per_session=self._max,
+                    fallback=self._fallback,
+                    persist=self._persist,
+                ),
+                threading.Lock(),
+            )
+            for i in range(n)
+        ])
+
+    def _poll_manifest(self) -> Optional[Dict[str, int]]:
+        """The manifest, read at most every `reload_interval` seconds (else None)."""
+        now = time.monotonic()
+        if now - self._checked_at < self._reload_interval:
+            return None
+        self._checked_at = now
+        return read_manifest(self._dir)
+
+    def _acquire(self) -> _Layout:
+        """
+        The current layout, pinned until `_release()`. Follows a re-shard
+        published by another process (cheap, rate-limited); exactly one
+        caller opens the new generation.
+        """
+        manifest = self._poll_manifest()
+        stale: Optional[_Layout] = None
+        with self._layout_lock:
+            if manifest is not None and manifest["generation"] != self._layout.generation:
+                LOGGER.info(
+                    "[Shards] layout changed → generation %d (%d shards)",
+                    manifest["generation"], manifest["shards"],
+                )
+                old, self._layout = self._layout, self._open(manifest)
+                old.retired = True
+                stale = old if old.users == 0 else None
+            layout = self._layout
+            layout.users += 1
+        if stale is not None:
+            stale.close()
+        return layout
+
+    def _release(self, layout: _Layout) -> None:
+        with self._layout_lock:
+            layout.users -= 1
+            if not (layout.retired and layout.users == 0):
+                return
+        layout.close()  # last call on a replaced generation
+
+    @contextmanager
+    def _shard(self, cid: str) -> Iterator[SQLiteMemoryBackend]:
+        """The session's shard, under its write lock, for one call."""
+        layout = self._acquire()
+        try:
+            shard, lock = layout.shards[shard_for(cid, len(layout.shards))]
+            with lock:
+                yield shard
+        finally:
+            self._release(layout)
+
+    # ───────────────────────────────────────── add_turn ──
+    @override
+    def add_turn(self, role: str, content: str, *, cid: str = "default") -> None:
+        """Persist a single chat turn in the session's shard."""
+        if self._using_fallback:
+            self._fallback.add_turn(role, content, cid=cid)
+            return
+        with self._shard(cid) as shard:
+            shard.add_turn(role, content, cid=cid)
+
+    # ───────────────────────────────────────── get_recent ──
+    @override
+    def get_recent(
+        self, *, limit: int = 50, cid: str = "default"
+    ) -> List[Dict[str, str]]:
+        """
+        Return the most-recent `limit` turns (newest-first).
+        """
+        if self._using_fallback:
+            return self._fallback.get_recent(limit=limit, cid=cid)
+        with self._shard(cid) as shard:
+            return shard.get_recent(limit=limit, cid=cid)
+
+    # ───────────────────────────────────────────── flush ──
+    @override
+    def flush(self, *, cid: str = "default") -> None:
+        """Delete all stored turns for a conversation id."""
+        if self._using_fallback:
+            self._fallback.flush(cid=cid)
+            return
+        with self._shard(cid) as shard:
+            shard.flush(cid=cid)
+
+    @override
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        """Replace the oldest `drop` turns with a summary (inside one shard)."""
+        if self._using_fallback:
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+            return
+        with self._shard(cid) as shard:
+            shard.compact_prefix(drop, summary, cid=cid)
+
+    @override
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        """Rewrite matching turns in place (inside one shard)."""
+        if self._using_fallback:
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+        with self._shard(cid) as shard:
+            return shard.rewrite_turns(replacements, cid=cid)
+
+    # ───────────────────────────────────── cross-shard iteration ──
+    @override
+    def list_sessions(self) -> List[str]:
+        """Every conversation id, across all shards (sorted)."""
+        if self._using_fallback:
+            return self._fallback.list_sessions()
+        layout = self._acquire()
+        out: List[str] = []
+        try:
+            for shard, lock in layout.shards:
+                with lock:
+                    out.extend(shard.list_sessions())
+        finally:
+            self._release(layout)
+        return sorted(out)
+
+    def close(self) -> None:
+        """Close every shard connection (tests / CLI tools)."""
+        self._layout.close()
+
+    def iter_turns(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        Yield `(cid, turn)` for every stored turn, session by session and
+        oldest → newest inside a session (export / migration order).
+        """
+        for cid in self.list_sessions():
+            for turn in reversed(self.get_recent(limit=self._max, cid=cid)):
+                yield cid, turn
+
+
+# ─────────────────────────────────────────────── Online re-shard ──
+def _session_marks(conn: sqlite3.Connection) -> Dict[str, Tuple[int, int, int]]:
+    """{session: (count, min_ts, max_ts)} – a cheap change detector."""
+    rows = conn.execute(
+        "SELECT session, COUNT(*), MIN(ts), MAX(ts) FROM turns GROUP BY session"
+    ).fetchall()
+    return {s: (c, lo, hi) for s, c, lo, hi in rows}
+
+
+def reshard(
+    db_dir: str | Path,
+    shards: int,
+    *,
+    max_passes: int = 5,
+    settle: float = 2.0,
+    keep_old: bool = False,
+    progress: Callable[[str], None] = LOGGER.info,
+) -> Dict[str, int]:
+    """
+    Re-distribute every session onto `shards` new files while the app keeps
+    serving from the current generation.
+
+    1) Copy each session (original timestamps) into generation g+1.
+    2) Repeat for sessions whose (count, min_ts, max_ts) changed meanwhile,
+       until a pass copies nothing (or `max_passes`).
+    3) Publish the new manifest; running backends switch within their
+       `reload_interval`.
+    4) Wait `settle` seconds, then append any rows that still landed on the
+       old generation (ts > last copied) – flushes in that window are not
+       replayed.
+
+    Returns counters for the CLI report.
+    """
+    root = Path(db_dir)
+    manifest = read_manifest(root)
+    if manifest is None:
+        raise FileNotFoundError(f"no {MANIFEST_NAME} in {root}")
+    old_gen, old_n = manifest["generation"], manifest["shards"]
+    new_gen = old_gen + 1
+
+    src = [sqlite3.connect(shard_path(root, old_gen, i)) for i in range(old_n)]
+    dst = [sqlite3.connect(shard_path(root, new_gen, i)) for i in range(shards)]
+    for con in src + dst:
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute(TURNS_DDL)
+
+    copied: Dict[str, Tuple[int, int, int]] = {}
+    stats = {"sessions": 0, "rows": 0, "passes": 0, "late_rows": 0}
+
+    def copy_session(con: sqlite3.Connection, cid: str) -> int:
+        rows = con.execute(
+            "SELECT session, ts, role, content FROM turns WHERE session = ? ORDER BY ts",
+            (cid,),
+        ).fetchall()
+        target = dst[shard_for(cid, shards)]
+        with target:
+            target.execute("DELETE FROM turns WHERE session = ?", (cid,))
+            target.executemany(
+                "INSERT OR IGNORE INTO turns (session, ts, role, content) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    try:
+        # ── 1 + 2) snapshot passes until quiet ─────────────────────────
+        for _ in range(max_passes):
+            stats["passes"] += 1
+            changed = 0
+            seen: set[str] = set()
+            for con in src:
+                for cid, mark in _session_marks(con).items():
+                    seen.add(cid)
+                    if copied.get(cid) != mark:
+                        stats["rows"] += copy_session(con, cid)
+                        copied[cid] = mark
+                        changed += 1
+            for cid in set(copied) - seen:  # flushed while we were copying
+                target = dst[shard_for(cid, shards)]
+                with target:
+                    target.execute("DELETE FROM turns WHERE session = ?", (cid,))
+                del copied[cid]
+                changed += 1
+            progress(f"pass {stats['passes']}: {changed} session(s) copied")
+            if not changed:
+                break
+
+        # ── 3) publish ──────────────────────────────────────────────────
+        write_manifest(root, generation=new_gen, shards=shards)
+        progress(f"manifest → generation {new_gen} ({shards} shards)")
+
+        # ── 4) late writers on the old generation ──────────────────────
+        time.sleep(settle)
+        for con in src:
+            for cid, (_, _, hi) in _session_marks(con).items():
+                last = copied.get(cid, (0, 0, -1))[2]
+                if hi <= last:
+                    continue
+                rows = con.execute(
+                    "SELECT session, ts, role, content FROM turns "
+                    "WHERE session = ? AND ts > ? ORDER BY ts",
+                    (cid, last),
+                ).fetchall()
+                target = dst[shard_for(cid, shards)]
+                with target:
+                    target.executemany(
+                        "INSERT OR IGNORE INTO turns (session, ts, role, content) "
+                        "VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                stats["late_rows"] += len(rows)
+        stats["sessions"] = len(copied)
+    finally:
+        for con in src + dst:
+            con.close()
+
+    if not keep_old:
+        for i in range(old_n):
+            for suffix in ("", "-wal", "-shm"):
+                Path(str(shard_path(root, old_gen, i)) + suffix).unlink(missing_ok=True)
+    return stats
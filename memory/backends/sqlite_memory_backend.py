@@ -10,13 +10,24 @@ import os
 import sqlite3
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, final, override
+from typing import Dict, List, Mapping, Optional, Tuple, final, override
 
 from memory.backends.redis_memory_backend import BaseMemoryBackend, InMemoryBackend
 
 # ───────────────────────────────────────────────────────── Logging ──
 LOGGER = logging.getLogger(__name__)
 
+# schema of every turn store file (shared with the sharded backend's re-shard)
+TURNS_DDL = """
+CREATE TABLE IF NOT EXISTS turns (
+    session  TEXT    NOT NULL,
+    ts       INTEGER NOT NULL,
+    role     TEXT    NOT NULL,
+    content  TEXT    NOT NULL,
+    PRIMARY KEY (session, ts)
+);
+"""
+
 
 @final
 class SQLiteMemoryBackend(BaseMemoryBackend):
@@ -33,16 +44,6 @@ class SQLiteMemoryBackend(BaseMemoryBackend):
       to the in-memory fallback store instead of touching the DB file.
     """
 
-    _DDL = """
-    CREATE TABLE IF NOT EXISTS turns (
-        session  TEXT    NOT NULL,
-        ts       INTEGER NOT NULL,
-        role     TEXT    NOT NULL,
-        content  TEXT    NOT NULL,
-        PRIMARY KEY (session, ts)
-    );
-    """
-
     def __init__(
         self,
         *,
@@ -54,8 +55,11 @@ class SQLiteMemoryBackend(BaseMemoryBackend):
         persist: bool = True,
     ) -> None:
         # ─────────────────────────────────────────── Fields ──
+        # an explicit path wins; $MEMORY_DB_PATH only replaces the default
         self._db_path: Path = Path(
-            os.getenv("MEMORY_DB_PATH", str(db_path or "data/memory.sqlite"))
+            db_path
+            if db_path is not None
+            else os.getenv("MEMORY_DB_PATH", "data/memory.sqlite")
         )
         self._max: int = max_rows if max_rows is not None else max_rows_per_session
         self._fallback: BaseMemoryBackend = fallback or InMemoryBackend()
@@ -67,7 +71,7 @@ class SQLiteMemoryBackend(BaseMemoryBackend):
             self._db_path.parent.mkdir(parents=True, exist_ok=True)
             self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
             self._conn.execute("PRAGMA journal_mode=WAL;")
-            self._conn.execute(self._DDL)
+            self._conn.execute(TURNS_DDL)
             # Default to RAM fallback unless explicitly told to persist.
             self._using_fallback = not persist
             LOGGER.debug("[SQLite] Connected → %s (persist=%s)", self._db_path, persist)
@@ -158,10 +162,107 @@ class SQLiteMemoryBackend(BaseMemoryBackend):
         try:
             assert self._conn is not None  # narrow for type-checkers
             # Ensure table exists even if flush is the first call made.
-            self._conn.execute(self._DDL)
+            self._conn.execute(TURNS_DDL)
             with self._conn:
                 self._conn.execute("DELETE FROM turns WHERE session = ?", (cid,))
         except Exception as exc:
             LOGGER.error("SQLite flush failed (%s) – switching to fallback", exc)
             self._using_fallback = True
             self._fallback.flush(cid=cid)
+
+    # ───────────────────────────────────────── list_sessions ──
+    @override
+    def list_sessions(self) -> List[str]:
+        """Distinct conversation ids stored in this file."""
+        if self._using_fallback:
+            return self._fallback.list_sessions()
+
+        try:
+            assert self._conn is not None  # narrow for type-checkers
+            rows = self._conn.execute(
+                "SELECT DISTINCT session FROM turns ORDER BY session"
+            ).fetchall()
+            return [r for (r,) in rows]
+        except Exception as exc:
+            LOGGER.error("SQLite list_sessions failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            return self._fallback.list_sessions()
+
+    # ──────────────────────────────────────── compact_prefix ──
+    @override
+    def compact_prefix(self, drop: int, summary: str, *, cid: str = "default") -> None:
+        """
+        Replace the oldest `drop` rows with one `summary` row in a single
+        transaction. The summary reuses the newest dropped timestamp, so it
+        sorts exactly where the covered turns were; rows written concurrently
+        always carry later timestamps and are left alone.
+        """
+        if self._using_fallback:
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+            return
+
+        try:
+            assert self._conn is not None  # narrow for type-checkers
+            with self._conn:
+                (cutoff,) = self._conn.execute(
+                    """
+                    SELECT MAX(ts) FROM (
+                        SELECT ts FROM turns
+                        WHERE session = ?
+                        ORDER BY ts ASC
+                        LIMIT ?
+                    )
+                    """,
+                    (cid, max(0, drop)),
+                ).fetchone()
+                if cutoff is None:  # nothing to drop → summary goes first
+                    (oldest,) = self._conn.execute(
+                        "SELECT MIN(ts) FROM turns WHERE session = ?", (cid,)
+                    ).fetchone()
+                    cutoff = time.time_ns() if oldest is None else oldest - 1
+                self._conn.execute(
+                    "DELETE FROM turns WHERE session = ? AND ts <= ?", (cid, cutoff)
+                )
+                self._conn.execute(
+                    "INSERT INTO turns (session, ts, role, content) VALUES (?, ?, ?, ?)",
+                    (cid, cutoff, "summary", summary),
+                )
+        except Exception as exc:
+            LOGGER.error("SQLite compact_prefix failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            self._fallback.compact_prefix(drop, summary, cid=cid)
+
+    # ───────────────────────────────────────── rewrite_turns ──
+    @override
+    def rewrite_turns(
+        self, replacements: Mapping[Tuple[str, str], str], *, cid: str = "default"
+    ) -> int:
+        """One UPDATE per replacement, all inside a single transaction."""
+        if self._using_fallback:
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+
+        try:
+            assert self._conn is not None  # narrow for type-checkers
+            before = self._conn.total_changes
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE turns SET content = ? WHERE session = ? AND role = ? AND content = ?",
+                    [
+                        (new, cid, role, old)
+                        for (role, old), new in replacements.items()
+                        if new != old
+                    ],
+                )
+            return self._conn.total_changes - before
+        except Exception as exc:
+            LOGGER.error("SQLite rewrite_turns failed (%s) – switching to fallback", exc)
+            self._using_fallback = True
+            return self._fallback.rewrite_turns(replacements, cid=cid)
+
+    # ───────────────────────────────────────────── close ──
+    def close(self) -> None:
+        """Release the connection (further calls go to the RAM fallback)."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._using_fallback = True
@@ -0,0 +1,198 @@
+# ════════════════════════════════════════════════════════════════════
+#  memory/compaction.py – offline "summarise the cold prefix" job
+# ════════════════════════════════════════════════════════════════════
+"""
+Bulk session compaction.
+
+Every backend keeps up to `max_rows_per_session` / `max_turns` raw turns and
+`Memory.load()` reads them back on every request. `compact_sessions()` walks
+all sessions of a backend and, for each one with a long enough *cold* prefix
+(everything but the newest `keep` turns), replaces that prefix with a single
+`summary`-role turn via `backend.compact_prefix()`.
+
+• Reading and writing stay in the calling process (backend handles are not
+  picklable); only the summarisation – the CPU-heavy part – is fanned out to
+  a process pool, with a bounded number of sessions in flight.
+• A summary turn left by an earlier run is folded into the next one, so
+  repeated runs keep condensing instead of stacking summaries.
+• `dry_run=True` computes every summary but writes nothing.
+• A session holding more than `max_read` turns is skipped (and counted in
+  `too_long`): `compact_prefix()` drops from the session's oldest turn, so
+  only a session read in full can be compacted safely.
+
+Example
+-------
+>>> report = compact_sessions(SQLiteMemoryBackend(), keep=200, workers=4)
+>>> report["turns_pruned"], report["sessions_per_s"]
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from memory.backends.redis_memory_backend import BaseMemoryBackend
+from memory.jobs import JobPool, add_rates
+from utils.summariser import NO_USER_MSG, PLACEHOLDER, summarise_context
+
+STRATEGIES = ("heuristic", "abstractive")
+
+
+# ─────────────────────────────────────────── Summary jobs ──
+def _merge(prior: Optional[str], new: str, max_chars: int) -> str:
+    """Previous summary lines + new bullets, keeping the newest that fit."""
+    lines = (prior.splitlines() if prior else []) + new.splitlines()
+    kept: List[str] = []
+    size = 0
+    for line in reversed(lines):
+        if kept and size + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    return "\n".join(reversed(kept))[:max_chars]
+
+
+def summarise_cold(
+    turns: List[Dict[str, str]],
+    *,
+    strategy: str = "heuristic",
+    max_chars: int = 512,
+    model: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """
+    Summary text for a cold prefix (oldest → newest), or "" when there is
+    nothing worth keeping. Module-level so a process pool can pickle it.
+    """
+    prior = next((t["content"] for t in turns if t.get("role") == "summary"), None)
+    raw = [t for t in turns if t.get("role") != "summary"]
+
+    if strategy == "abstractive":
+        from utils.summary_worker import ProcessModelSummariser
+
+        return ProcessModelSummariser(model)(prior, raw)[:max_chars]
+
+    new = summarise_context(raw, max_chars=max_chars)
+    if new in (PLACEHOLDER, NO_USER_MSG):
+        return prior or ""
+    return _merge(prior, new, max_chars)
+
+
+# ───────────────────────────────────────────────────── Job ──
+def _cold_prefix(
+    backend: BaseMemoryBackend, cid: str, *, keep: int, min_cold: int, max_read: int
+) -> Tuple[int, List[Dict[str, str]], bool]:
+    """
+    (stored turns read, cold prefix oldest → newest, whole session read).
+    The prefix is empty when there is too little to compact or the session
+    is longer than `max_read` (its true oldest turns were not read).
+    """
+    turns = list(reversed(backend.get_recent(limit=max_read + 1, cid=cid)))
+    if len(turns) > max_read:
+        return max_read, [], False
+    cold = turns[: max(0, len(turns) - keep)]
+    # a lone summary (or almost nothing) in front is not worth a rewrite
+    if sum(t.get("role") != "summary" for t in cold) < min_cold:
+        cold = []
+    return len(turns), cold, True
+
+
+def compact_sessions(
+    backend: BaseMemoryBackend,
+    *,
+    keep: int = 200,
+    min_cold: int = 100,
+    max_read: int = 10_000,
+    strategy: str = "heuristic",
+    max_chars: int = 512,
+    model: Optional[Mapping[str, Any]] = None,
+    workers: int = 0,
+    dry_run: bool = False,
+    executor: Optional[Executor] = None,
+    progress: Optional[Callable[[str, int, str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Compact every session of `backend`; return a throughput report.
+
+    Parameters
+    ----------
+    keep : int
+        Newest turns left untouched in every session (the hot window).
+    min_cold : int
+        Sessions with fewer raw turns than this beyond `keep` are skipped.
+    model : mapping | None
+        `model` settings section for ``strategy="abstractive"`` – resolved
+        through the model store like the chat model (default: the configured one).
+    workers : int
+        Process-pool size; 0 summarises inline (tests, tiny stores).
+    progress : callable
+        Called as `progress(cid, turns_covered, summary)` per compacted session.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r} – expected one of {STRATEGIES}")
+    if strategy == "abstractive" and model is None:
+        from config.settings_service import current_settings
+
+        model = dict(current_settings().section("model"))
+
+    report: Dict[str, Any] = {
+        "sessions": 0,
+        "compacted": 0,
+        "skipped": 0,
+        "too_long": 0,
+        "failed": 0,
+        "turns_read": 0,
+        "turns_pruned": 0,
+        "chars_before": 0,
+        "chars_after": 0,
+        "dry_run": dry_run,
+    }
+
+    def finish(job: Tuple[str, List[Dict[str, str]]], fut: Future[str]) -> None:
+        cid, cold = job
+        try:
+            summary = fut.result()
+        except Exception as exc:
+            report["failed"] += 1
+            LOGGER.warning("[Compact] %s: summarisation failed (%s)", cid, exc)
+            return
+        if not summary:
+            report["skipped"] += 1
+            return
+        if not dry_run:
+            backend.compact_prefix(len(cold), summary, cid=cid)
+        report["compacted"] += 1
+        report["turns_pruned"] += len(cold) - 1
+        report["chars_before"] += sum(len(t["content"]) for t in cold)
+        report["chars_after"] += len(summary)
+        if progress is not None:
+            progress(cid, len(cold), summary)
+
+    t0 = time.perf_counter()
+    # sessions in flight → bounded memory
+    with JobPool(finish, workers=workers, executor=executor, window=max(1, workers) * 4) as jobs:
+        for cid in backend.list_sessions():
+            report["sessions"] += 1
+            n, cold, whole = _cold_prefix(
+                backend, cid, keep=keep, min_cold=min_cold, max_read=max_read
+            )
+            report["turns_read"] += n
+            if not whole:
+                report["too_long"] += 1
+                LOGGER.warning("[Compact] %s: more than max_read=%d turns – skipped", cid, max_read)
+            if not cold:
+                report["skipped"] += 1
+                continue
+            jobs.submit(
+                (cid, cold), summarise_cold, cold, strategy=strategy, max_chars=max_chars, model=model
+            )
+
+    return add_rates(report, time.perf_counter() - t0, turns="turns_read")
+
+__all__ = ["compact_sessions", "summarise_cold", "STRATEGIES"]
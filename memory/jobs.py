@@ -0,0 +1,140 @@
+# ════════════════════════════════════════════════════════════════════
+#  memory/jobs.py – shared scaffolding for offline jobs over stored sessions
+# ════════════════════════════════════════════════════════════════════
+"""
+Offline session jobs.
+
+`compact_sessions()` and `moderate_sessions()` have the same shape: read
+sessions in the calling process (backend handles are not picklable), run the
+CPU-heavy part inline or on a process pool with a bounded number of tasks in
+flight, and apply the results in submit order. `JobPool` is that loop and
+`add_rates()` the common tail of their reports.
+
+`add_backend_arguments()` / `open_backend()` are the CLI side shared by the
+scripts in ``scripts/`` that run these jobs against a persistent store.
+
+Example
+-------
+>>> with JobPool(finish, workers=4, window=16) as jobs:
+...     for cid in backend.list_sessions():
+...         jobs.submit(cid, summarise, backend.get_recent(cid=cid))
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Generic, Optional, Tuple, TypeVar
+
+from memory.backends.redis_memory_backend import BaseMemoryBackend
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BACKENDS: Tuple[str, ...] = ("sqlite", "sharded_sqlite", "redis", "log")
+
+
+# ─────────────────────────────────────────── Pool ──
+class JobPool(Generic[T, R]):
+    """
+    `fn(*args, **kwargs)` per item – inline when there is neither `workers`
+    nor an `executor`, on the pool otherwise – with at most `window` tasks in
+    flight (bounded memory). `finish(item, future)` sees every result in
+    submit order; a failed task arrives as a future holding the exception.
+    """
+
+    def __init__(
+        self,
+        finish: Callable[[T, Future[R]], None],
+        *,
+        workers: int = 0,
+        executor: Optional[Executor] = None,
+        window: int = 1,
+    ) -> None:
+        self._finish = finish
+        self._owned = executor is None and workers > 0
+        self._pool = executor or (ProcessPoolExecutor(max_workers=workers) if workers > 0 else None)
+        self._window = max(1, window)
+        self._inflight: Deque[Tuple[T, Future[R]]] = deque()
+
+    def submit(self, item: T, fn: Callable[..., R], *args: Any, **kwargs: Any) -> None:
+        if self._pool is None:
+            fut: Future[R] = Future()
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except Exception as exc:
+                fut.set_exception(exc)
+            self._finish(item, fut)
+            return
+        self._inflight.append((item, self._pool.submit(fn, *args, **kwargs)))
+        if len(self._inflight) >= self._window:
+            self._finish(*self._inflight.popleft())
+
+    def close(self) -> None:
+        """Finish every task still in flight; shut down a pool created here."""
+        while self._inflight:
+            self._finish(*self._inflight.popleft())
+        if self._owned and self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self) -> "JobPool[T, R]":
+        return self
+
+    def __exit__(self, exc_type: Any, *_: Any) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # the job failed – apply nothing more, drop what is still queued
+        self._inflight.clear()
+        if self._owned and self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def add_rates(report: Dict[str, Any], elapsed: float, *, turns: str) -> Dict[str, Any]:
+    """Add elapsed_s, sessions_per_s and turns_per_s (from ``report[turns]``)."""
+    report["elapsed_s"] = round(elapsed, 3)
+    report["sessions_per_s"] = round(report["sessions"] / elapsed, 1) if elapsed else 0.0
+    report["turns_per_s"] = round(report[turns] / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+# ─────────────────────────────────────────── CLI ──
+def add_backend_arguments(ap: argparse.ArgumentParser, *, purpose: str) -> None:
+    """`--backend` (help: "Store to `purpose`") and the per-backend location flags."""
+    ap.add_argument("--backend", choices=BACKENDS, default="sqlite",
+                    help=f"Store to {purpose} (default: %(default)s)")
+    ap.add_argument("--db-path", help="SQLite file (default: $MEMORY_DB_PATH or data/memory.sqlite)")
+    ap.add_argument("--db-dir", help="Sharded SQLite directory (default: $MEMORY_DB_DIR)")
+    ap.add_argument("--log-dir", help="Log backend directory (default: $MEMORY_LOG_DIR)")
+    ap.add_argument("--redis-url", help="Redis URL (default: $REDIS_URL)")
+
+
+def open_backend(args: argparse.Namespace) -> BaseMemoryBackend:
+    """Build the backend in persistent mode (never the façade's RAM default)."""
+    if args.backend == "sqlite":
+        from memory.backends.sqlite_memory_backend import SQLiteMemoryBackend
+
+        return SQLiteMemoryBackend(
+            db_path=args.db_path or os.getenv("MEMORY_DB_PATH", "data/memory.sqlite"),
+            persist=True,
+        )
+    if args.backend == "sharded_sqlite":
+        from memory.backends.sharded_sqlite_memory_backend import (
+            ShardedSQLiteMemoryBackend,
+        )
+
+        return ShardedSQLiteMemoryBackend(db_dir=args.db_dir)
+    if args.backend == "log":
+        from memory.backends.log_memory_backend import LogMemoryBackend
+
+        return LogMemoryBackend(log_dir=args.log_dir, background_compaction=False)
+
+    from memory.backends.redis_memory_backend import RedisMemoryBackend
+
+    return RedisMemoryBackend(redis_url=args.redis_url)
+
+
+__all__ = ["BACKENDS", "JobPool", "add_backend_arguments", "add_rates", "open_backend"]
@@ -0,0 +1,166 @@
+# ════════════════════════════════════════════════════════════════════
+#  memory/moderation.py – re-check stored turns against the safety policy
+# ════════════════════════════════════════════════════════════════════
+"""
+Bulk history moderation.
+
+When the term lists in ``settings['safety']`` change, turns already stored
+in a backend were checked (and masked) against the *old* policy.
+`moderate_sessions()` streams every session of a backend through
+`evaluate_safety_batch()` and reports what the current policy flags; with
+`apply=True` it also re-masks the flagged turns in place via
+`backend.rewrite_turns()`.
+
+• Reading and writing stay in the calling process (backend handles are not
+  picklable); scanning is fanned out to a process pool in batches of about
+  `batch_turns` turns, with a bounded number of batches in flight. Each
+  worker compiles the engine once – `get_safety_engine` caches by content.
+• Only turns whose role is in `mask_roles` are rewritten (model output and
+  summaries by default – the same text `chat()` masks live); every role is
+  counted in the report.
+
+Example
+-------
+>>> report = moderate_sessions(SQLiteMemoryBackend(), load_settings(), workers=4)
+>>> report["flagged_turns"], report["top_terms"]
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import time
+from collections import Counter
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from memory.backends.redis_memory_backend import BaseMemoryBackend
+from memory.jobs import JobPool, add_rates
+from utils.safety_filters import evaluate_safety_batch
+
+MASK_ROLES = ("assistant", "summary")
+
+# (turn index, matched terms, allowed?, strict?, masked content or None)
+Finding = Tuple[int, Tuple[str, ...], bool, bool, Optional[str]]
+
+
+# ─────────────────────────────────────────── Scan jobs ──
+def moderate_batch(
+    sessions: List[Tuple[str, List[Dict[str, str]]]],
+    safety: Dict[str, Any],
+    mask_roles: Sequence[str] = MASK_ROLES,
+) -> List[Tuple[str, List[Finding]]]:
+    """
+    Findings for a batch of sessions (turns oldest → newest); only flagged
+    turns are returned. Module-level so a process pool can pickle it.
+    """
+    contents = [t["content"] for _, turns in sessions for t in turns]
+    verdicts = iter(evaluate_safety_batch(contents, {"safety": safety}))
+    out: List[Tuple[str, List[Finding]]] = []
+    for cid, turns in sessions:
+        found: List[Finding] = []
+        for i, turn in enumerate(turns):
+            v = next(verdicts)
+            if not v.scan.profane:
+                continue
+            masked = v.masked(turn["content"]) if turn["role"] in mask_roles else None
+            found.append((i, v.scan.terms, v.allowed, v.scan.strict, masked))
+        out.append((cid, found))
+    return out
+
+
+# ───────────────────────────────────────────────────── Job ──
+def moderate_sessions(
+    backend: BaseMemoryBackend,
+    settings: Dict[str, Any],
+    *,
+    max_read: int = 10_000,
+    mask_roles: Sequence[str] = MASK_ROLES,
+    apply: bool = False,
+    workers: int = 0,
+    batch_turns: int = 2_000,
+    executor: Optional[Executor] = None,
+    progress: Optional[Callable[[str, List[Finding]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Check every stored turn of `backend` against `settings['safety']`;
+    return a report (and re-mask flagged turns when `apply`).
+
+    Parameters
+    ----------
+    mask_roles : sequence of str
+        Roles whose flagged turns are rewritten masked when `apply`.
+    workers : int
+        Process-pool size; 0 scans inline (tests, tiny stores).
+    batch_turns : int
+        Turns per pool task – many small sessions share one round-trip.
+    progress : callable
+        Called as `progress(cid, findings)` for every session with findings.
+    """
+    safety = dict(settings.get("safety", {}))
+    roles = tuple(mask_roles)
+
+    report: Dict[str, Any] = {
+        "sessions": 0,
+        "turns_scanned": 0,
+        "flagged_sessions": 0,
+        "flagged_turns": 0,
+        "blocked_turns": 0,
+        "strict_turns": 0,
+        "remasked": 0,
+        "failed": 0,
+        "apply": apply,
+    }
+    terms: Counter[str] = Counter()
+    Batch = List[Tuple[str, List[Dict[str, str]]]]
+
+    def finish(batch: Batch, fut: Future[List[Tuple[str, List[Finding]]]]) -> None:
+        try:
+            results = fut.result()
+        except Exception as exc:
+            report["failed"] += len(batch)
+            LOGGER.warning("[Moderate] batch of %d session(s) failed (%s)", len(batch), exc)
+            return
+        for (cid, turns), (_, found) in zip(batch, results):
+            if not found:
+                continue
+            report["flagged_sessions"] += 1
+            report["flagged_turns"] += len(found)
+            edits: Dict[Tuple[str, str], str] = {}
+            for i, matched, allowed, strict, masked in found:
+                terms.update(matched)
+                report["blocked_turns"] += not allowed
+                report["strict_turns"] += strict
+                if masked is not None and masked != turns[i]["content"]:
+                    edits[(turns[i]["role"], turns[i]["content"])] = masked
+            if apply and edits:
+                report["remasked"] += backend.rewrite_turns(edits, cid=cid)
+            if progress is not None:
+                progress(cid, found)
+
+    t0 = time.perf_counter()
+    # batches in flight → bounded memory
+    with JobPool(finish, workers=workers, executor=executor, window=max(1, workers) * 2) as jobs:
+        batch: Batch = []
+        size = 0
+        for cid in backend.list_sessions():
+            turns = list(reversed(backend.get_recent(limit=max_read, cid=cid)))
+            report["sessions"] += 1
+            report["turns_scanned"] += len(turns)
+            batch.append((cid, turns))
+            size += len(turns)
+            if size >= batch_turns:
+                jobs.submit(batch, moderate_batch, batch, safety, roles)
+                batch, size = [], 0
+        if batch:
+            jobs.submit(batch, moderate_batch, batch, safety, roles)
+
+    report["top_terms"] = dict(terms.most_common(10))
+    return add_rates(report, time.perf_counter() - t0, turns="turns_scanned")
+
+
+__all__ = ["moderate_sessions", "moderate_batch", "MASK_ROLES"]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_assisted.py – assisted (speculative) decoding vs plain generate
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Load the main model (``settings['model']``) and the draft model
+   (``--draft``, default ``settings['model']['draft_model']`` or
+   google/flan-t5-small) from the local model store.
+2) Build the app's contexts for the fixed prompt set and decode each one
+   greedily with plain ``generate`` and then assisted, once per
+   ``--lookahead`` value (after one untimed warm-up pass).
+3) Report mean / median latency, tokens per second, draft acceptance rate,
+   tokens per main-model pass, the speed-up over plain decoding, and
+   whether the outputs are identical (greedy decoding must not change them).
+
+Typical usage
+-------------
+$ python scripts/bench_assisted.py
+$ python scripts/bench_assisted.py --draft google/flan-t5-small --lookahead 3,5,8 --out bench/assisted.json
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from config.settings_service import current_settings  # noqa: E402
+from engine.assisted import AssistedDecoding  # noqa: E402
+from engine.eval_prompts import PROMPTS, agreement, build_contexts  # noqa: E402
+from engine.inference import TorchEngine  # noqa: E402
+from engine.model import ModelRuntime, runtime_from_settings  # noqa: E402
+
+
+def _run(engine: TorchEngine, contexts: Sequence[str], repeats: int, gen: Dict[str, Any]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    outputs: List[str] = []
+    tokens = 0
+    for ctx in contexts:
+        runs = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            text = engine.generate(ctx, **gen)
+            runs.append(time.perf_counter() - t0)
+        latencies.append(statistics.mean(runs))
+        outputs.append(text)
+        tokens += len(engine.tokenizer(text)["input_ids"])
+    total = sum(latencies)
+    return {
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "median": round(statistics.median(latencies) * 1000, 2),
+        },
+        "tokens_per_s": round(tokens / total, 2) if total else 0.0,
+        "outputs": outputs,
+    }
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    cfg = current_settings().section("model")
+    ap = argparse.ArgumentParser(
+        prog="bench_assisted.py",
+        description="Latency of assisted decoding with a draft model vs plain greedy generate",
+    )
+    ap.add_argument("--draft", default=cfg.get("draft_model") or "google/flan-t5-small",
+                    help="Draft model (default: %(default)s)")
+    ap.add_argument("--lookahead", default="3,5,8", help="Comma list of draft tokens per round (default: %(default)s)")
+    ap.add_argument("--schedule", choices=("constant", "heuristic"), default="constant",
+                    help="(default: %(default)s)")
+    ap.add_argument("--max-new-tokens", type=int, default=64, help="(default: %(default)s)")
+    ap.add_argument("--repeats", type=int, default=2, help="Timed runs per context (default: %(default)s)")
+    ap.add_argument("--out", help="Write JSON here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    main_rt = runtime_from_settings(cfg).load()
+    draft_rt = ModelRuntime(args.draft, "main", store=main_rt.store, device=main_rt.preferred_device).load()
+    contexts = build_contexts(PROMPTS)
+    gen = {"max_new_tokens": args.max_new_tokens, "do_sample": False, "num_beams": 1}
+    repeats = max(1, args.repeats)
+
+    plain = TorchEngine(main_rt)
+    for ctx in contexts:  # warm-up
+        plain.generate(ctx, **gen)
+    baseline = _run(plain, contexts, repeats, gen)
+    reference = [main_rt.tokenizer(o)["input_ids"] for o in baseline.pop("outputs")]
+
+    results: List[Dict[str, Any]] = [{"mode": "plain", **baseline}]
+    for lookahead in [int(n) for n in args.lookahead.split(",") if n.strip()]:
+        assisted = AssistedDecoding(draft_rt, lookahead=lookahead, schedule=args.schedule)
+        engine = TorchEngine(main_rt, assisted=assisted)
+        engine.generate(contexts[0], **gen)  # warm-up
+        assisted.stats = dict.fromkeys(assisted.stats, 0)
+        row = _run(engine, contexts, repeats, gen)
+        outputs = [main_rt.tokenizer(o)["input_ids"] for o in row.pop("outputs")]
+        row.update(agreement(reference, outputs))
+        row.update({
+            "mode": "assisted",
+            "lookahead": lookahead,
+            "acceptance_rate": round(assisted.acceptance_rate, 4),
+            "tokens_per_main_pass": round(assisted.tokens_per_round, 3),
+            "speedup": round(baseline["latency_ms"]["mean"] / row["latency_ms"]["mean"], 3)
+            if row["latency_ms"]["mean"] else 0.0,
+        })
+        results.append(row)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": main_rt.model_name,
+            "draft": args.draft,
+            "device": main_rt.device,
+            "contexts": len(contexts),
+            "max_new_tokens": args.max_new_tokens,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+    doc = json.dumps(report, indent=2)
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(doc + "\n", encoding="utf-8")
+        print(f"Wrote {len(results)} results  →  {out_path}", file=sys.stderr)
+    else:
+        print(doc)
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,531 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_memory.py – latency / throughput benchmark for memory back-ends
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) For every combination of *backend × sessions × turns × content size ×
+   threads* we build a **fresh** backend in a temp directory.
+2) We time each call of ``add_turn``, ``get_recent``, ``flush`` and the
+   façade’s ``Memory.save`` / ``Memory.load`` (with the same backend wired in).
+3) Per operation we report latency percentiles (µs) and throughput (ops/s),
+   all written as a single JSON document.
+4) With ``--baseline`` a previous JSON run is compared key-by-key and any
+   p99 / throughput regression beyond ``--tolerance`` is flagged.
+
+Back-ends
+---------
+• in_memory – ``InMemoryBackend`` (volatile list store)
+• sqlite    – ``SQLiteMemoryBackend`` with ``persist=True`` on a temp file
+              (one connection per bench thread, as separate workers would have)
+• redis     – ``RedisMemoryBackend`` wired to a **fakeredis** server
+• log       – ``LogMemoryBackend`` (append-only shards) in a temp directory
+• sharded_sqlite – ``ShardedSQLiteMemoryBackend`` (4 files) in a temp directory
+
+Typical usage
+-------------
+$ python scripts/bench_memory.py                              # quick preset → stdout
+$ python scripts/bench_memory.py --preset scale --out bench/scale.json
+$ python scripts/bench_memory.py --backends sqlite --turns 10,1000000 --threads 1,8
+$ python scripts/bench_memory.py --baseline bench/main.json --fail-on-regression
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, TypedDict
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from memory.backends import redis_memory_backend as _redis_mod  # noqa: E402
+from memory.backends.redis_memory_backend import (  # noqa: E402
+    BaseMemoryBackend,
+    InMemoryBackend,
+    RedisMemoryBackend,
+)
+from memory.backends.sqlite_memory_backend import SQLiteMemoryBackend  # noqa: E402
+from memory.backends.log_memory_backend import LogMemoryBackend  # noqa: E402
+from memory.backends.sharded_sqlite_memory_backend import (  # noqa: E402
+    ShardedSQLiteMemoryBackend,
+)
+from utils.memory import Memory, MemoryBackend  # noqa: E402
+
+
+# ─────────────────────────────────────────── Data shapes ────────────
+class Latency(TypedDict):
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+    max: float
+    mean: float
+
+
+class OpResult(TypedDict):
+    backend: str
+    op: str
+    sessions: int
+    turns: int
+    content_size: int
+    threads: int
+    count: int
+    wall_s: float
+    throughput_ops_s: float
+    latency_us: Latency
+    fell_back: bool
+
+
+# ───────────────────────────────────────────────────────── Constants ──
+BACKENDS: Tuple[str, ...] = ("in_memory", "sqlite", "redis", "log", "sharded_sqlite")
+OPS: Tuple[str, ...] = ("add_turn", "get_recent", "save", "load", "flush")
+
+PRESETS: Dict[str, Dict[str, List[int]]] = {
+    # CI-sized sanity pass (seconds)
+    "quick": {
+        "sessions": [1, 4],
+        "turns": [10, 1_000],
+        "content_sizes": [64, 1_024],
+        "threads": [1, 4],
+    },
+    # capacity planning (minutes → hours); big combos are capped by --max-total-turns
+    "scale": {
+        "sessions": [1, 16, 128],
+        "turns": [10, 1_000, 100_000, 1_000_000],
+        "content_sizes": [64, 1_024, 16_384],
+        "threads": [1, 4, 16],
+    },
+}
+
+_COMPARE_FIELDS: Tuple[str, ...] = ("backend", "op", "sessions", "turns", "content_size", "threads")
+
+
+# ─────────────────────────────────────────── Helpers ─────────────────
+def _int_list(raw: str) -> List[int]:
+    """Parse "10,1_000,1e6" → [10, 1000, 1000000]."""
+    return [int(float(x.replace("_", ""))) for x in raw.split(",") if x.strip()]
+
+
+def _percentiles(samples_ns: Sequence[int]) -> Latency:
+    """Nearest-rank percentiles in **micro-seconds**."""
+    if not samples_ns:
+        return Latency(p50=0.0, p90=0.0, p99=0.0, p999=0.0, max=0.0, mean=0.0)
+    ordered = sorted(samples_ns)
+    n = len(ordered)
+
+    def rank(q: float) -> float:
+        idx = min(n - 1, max(0, math.ceil(q * n) - 1))
+        return round(ordered[idx] / 1_000, 3)
+
+    return Latency(
+        p50=rank(0.50),
+        p90=rank(0.90),
+        p99=rank(0.99),
+        p999=rank(0.999),
+        max=round(ordered[-1] / 1_000, 3),
+        mean=round(sum(ordered) / n / 1_000, 3),
+    )
+
+
+@contextlib.contextmanager
+def _fake_redis_module() -> Iterator[None]:
+    """
+    Point `redis_memory_backend.redis` at a fakeredis server for the duration
+    of the block (same trick as tests/conftest.py, without pytest).
+    """
+    try:
+        import fakeredis
+    except ImportError as exc:  # requirements-dev.txt lists it
+        raise SystemExit("fakeredis is required for the redis benchmark") from exc
+
+    server = fakeredis.FakeServer()
+    original = _redis_mod.redis
+    _redis_mod.redis = SimpleNamespace(
+        from_url=lambda *_, **kw: fakeredis.FakeRedis(server=server, **kw),
+        Redis=lambda *_, **kw: fakeredis.FakeRedis(server=server, decode_responses=True),
+    )
+    try:
+        yield
+    finally:
+        _redis_mod.redis = original
+
+
+class _PerThreadBackend(BaseMemoryBackend):
+    """
+    One backend per thread on the same store. `SQLiteMemoryBackend` keeps a
+    single unlocked connection; shared across bench threads it would switch to
+    its RAM fallback under contention and the rows would not measure SQLite.
+    """
+
+    def __init__(self, make: Callable[[], BaseMemoryBackend]) -> None:
+        self._make = make
+        self._local = threading.local()
+        self._opened: List[BaseMemoryBackend] = []
+        self._lock = threading.Lock()
+        self._mine()  # create the schema before the threads start
+
+    def _mine(self) -> BaseMemoryBackend:
+        impl: BaseMemoryBackend | None = getattr(self._local, "impl", None)
+        if impl is None:
+            impl = self._local.impl = self._make()
+            with self._lock:
+                self._opened.append(impl)
+        return impl
+
+    @property
+    def _using_fallback(self) -> bool:
+        with self._lock:
+            return any(getattr(b, "_using_fallback", False) for b in self._opened)
+
+    def add_turn(self, role: str, content: str, *, cid: str = "default") -> None:
+        self._mine().add_turn(role, content, cid=cid)
+
+    def get_recent(self, *, limit: int = 50, cid: str = "default") -> List[Dict[str, str]]:
+        return self._mine().get_recent(limit=limit, cid=cid)
+
+    def flush(self, *, cid: str = "default") -> None:
+        self._mine().flush(cid=cid)
+
+    def close(self) -> None:
+        with self._lock:
+            opened, self._opened = self._opened, []
+        for impl in opened:
+            close = getattr(impl, "close", None)
+            if callable(close):
+                close()
+
+
+def _make_backend(name: str, workdir: Path) -> BaseMemoryBackend:
+    """Build a fresh backend that really persists (no silent RAM fallback)."""
+    if name == "in_memory":
+        return InMemoryBackend()
+    if name == "sqlite":
+        fd, path = tempfile.mkstemp(suffix=".sqlite", dir=workdir)
+        os.close(fd)
+        return _PerThreadBackend(lambda: SQLiteMemoryBackend(db_path=path, persist=True))
+    if name == "redis":
+        with _fake_redis_module():
+            return RedisMemoryBackend(redis_url="redis://bench/0")
+    if name == "log":
+        return LogMemoryBackend(log_dir=tempfile.mkdtemp(dir=workdir))
+    if name == "sharded_sqlite":
+        return ShardedSQLiteMemoryBackend(db_dir=tempfile.mkdtemp(dir=workdir))
+    raise SystemExit(f"unknown backend '{name}' (choose from {', '.join(BACKENDS)})")
+
+
+def _facade_for(name: str, impl: BaseMemoryBackend) -> Memory:
+    """Return the Memory singleton re-pointed at `impl` (bench only)."""
+    Memory._instance = None
+    mem = Memory(backend=MemoryBackend.NONE)
+    if name == "in_memory":
+        # IN_MEMORY lives inside the façade itself (class-level dict)
+        mem.backend = MemoryBackend.IN_MEMORY
+        Memory._store = {}
+    else:
+        mem.backend = MemoryBackend(name)
+        mem._impl = impl
+    return mem
+
+
+def _run_threads(
+    threads: int, work: Callable[[int], List[int]]
+) -> Tuple[List[int], float]:
+    """
+    Run `work(tid)` on N threads; return (merged latencies ns, wall seconds).
+    An exception in any thread is re-raised here – a thread that died must
+    not just leave its latencies out of an optimistic report.
+    """
+    results: List[List[int]] = [[] for _ in range(threads)]
+    errors: List[BaseException] = []
+    barrier = threading.Barrier(threads)
+
+    def runner(tid: int) -> None:
+        barrier.wait()
+        try:
+            results[tid] = work(tid)
+        except BaseException as exc:
+            errors.append(exc)
+
+    pool = [threading.Thread(target=runner, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return list(itertools.chain.from_iterable(results)), wall
+
+
+# ─────────────────────────────────────────── Benchmark core ─────────
+def bench_combo(
+    backend: str,
+    *,
+    sessions: int,
+    turns: int,
+    content_size: int,
+    threads: int,
+    reads: int,
+    facade_ops: int,
+    workdir: Path,
+) -> List[OpResult]:
+    """Benchmark one grid point; return one OpResult per operation."""
+    impl = _make_backend(backend, workdir)
+    payload = "x" * content_size
+    cids = [f"bench-{i}" for i in range(sessions)]
+    total = sessions * turns
+    out: List[OpResult] = []
+
+    def record(op: str, samples: List[int], wall: float) -> None:
+        out.append(
+            OpResult(
+                backend=backend,
+                op=op,
+                sessions=sessions,
+                turns=turns,
+                content_size=content_size,
+                threads=threads,
+                count=len(samples),
+                wall_s=round(wall, 6),
+                throughput_ops_s=round(len(samples) / wall, 1) if wall else 0.0,
+                latency_us=_percentiles(samples),
+                fell_back=bool(getattr(impl, "_using_fallback", False)),
+            )
+        )
+
+    # 1) add_turn – op k goes to session k % sessions, thread k % threads
+    def writer(tid: int) -> List[int]:
+        lat: List[int] = []
+        clock = time.perf_counter_ns
+        for k in range(tid, total, threads):
+            role = "user" if k % 2 == 0 else "assistant"
+            t0 = clock()
+            impl.add_turn(role, payload, cid=cids[k % sessions])
+            lat.append(clock() - t0)
+        return lat
+
+    record("add_turn", *_run_threads(threads, writer))
+
+    # 2) get_recent – the façade's default window (50)
+    def reader(tid: int) -> List[int]:
+        lat: List[int] = []
+        clock = time.perf_counter_ns
+        for k in range(reads):
+            t0 = clock()
+            impl.get_recent(cid=cids[(tid + k) % sessions])
+            lat.append(clock() - t0)
+        return lat
+
+    record("get_recent", *_run_threads(threads, reader))
+
+    # 3) façade – Memory.save / Memory.load on a dedicated session
+    mem = _facade_for(backend, impl)
+
+    def facade_save(tid: int) -> List[int]:
+        lat: List[int] = []
+        clock = time.perf_counter_ns
+        for k in range(facade_ops):
+            t0 = clock()
+            mem.save({"role": "user", "content": payload}, session_id=f"facade-{tid}")
+            lat.append(clock() - t0)
+        return lat
+
+    def facade_load(tid: int) -> List[int]:
+        lat: List[int] = []
+        clock = time.perf_counter_ns
+        for _ in range(facade_ops):
+            t0 = clock()
+            mem.load(f"facade-{tid}")
+            lat.append(clock() - t0)
+        return lat
+
+    record("save", *_run_threads(threads, facade_save))
+    record("load", *_run_threads(threads, facade_load))
+
+    # 4) flush – every bench session once, split across threads
+    def flusher(tid: int) -> List[int]:
+        lat: List[int] = []
+        clock = time.perf_counter_ns
+        for cid in cids[tid::threads]:
+            t0 = clock()
+            impl.flush(cid=cid)
+            lat.append(clock() - t0)
+        return lat
+
+    record("flush", *_run_threads(threads, flusher))
+
+    for tid in range(threads):
+        mem.clear(f"facade-{tid}")
+    Memory._instance = None
+    close = getattr(impl, "close", None)
+    if callable(close):
+        close()
+    return out
+
+
+# ─────────────────────────────────────────── Baseline compare ───────
+def _key(r: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(r[f] for f in _COMPARE_FIELDS)
+
+
+def compare(
+    current: List[OpResult], baseline: List[Dict[str, Any]], *, tolerance: float
+) -> List[Dict[str, Any]]:
+    """
+    Match rows on (backend, op, sessions, turns, content_size, threads) and
+    return one delta row per match; `regression` is True when p99 grew or
+    throughput shrank by more than `tolerance` (fraction).
+    """
+    base = {_key(r): r for r in baseline}
+    rows: List[Dict[str, Any]] = []
+    for r in current:
+        old = base.get(_key(dict(r)))
+        if old is None:
+            continue
+        p99_old = float(old["latency_us"]["p99"])
+        tput_old = float(old["throughput_ops_s"])
+        p99_delta = (r["latency_us"]["p99"] - p99_old) / p99_old if p99_old else 0.0
+        tput_delta = (r["throughput_ops_s"] - tput_old) / tput_old if tput_old else 0.0
+        rows.append(
+            {
+                **{f: r[f] for f in _COMPARE_FIELDS},  # type: ignore[literal-required]
+                "p99_us": [p99_old, r["latency_us"]["p99"]],
+                "throughput_ops_s": [tput_old, r["throughput_ops_s"]],
+                "p99_delta": round(p99_delta, 4),
+                "throughput_delta": round(tput_delta, 4),
+                "regression": p99_delta > tolerance or tput_delta < -tolerance,
+            }
+        )
+    return rows
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="bench_memory.py",
+        description="Benchmark memory back-ends and the Memory façade",
+    )
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="quick",
+                    help="Grid preset; explicit flags override (default: %(default)s)")
+    ap.add_argument("--backends", default=",".join(BACKENDS),
+                    help="Comma list (default: %(default)s)")
+    ap.add_argument("--sessions", type=_int_list, help="Comma list of session counts")
+    ap.add_argument("--turns", type=_int_list, help="Comma list of turns per session")
+    ap.add_argument("--content-sizes", type=_int_list, help="Comma list of content sizes (chars)")
+    ap.add_argument("--threads", type=_int_list, help="Comma list of thread counts")
+    ap.add_argument("--reads", type=int, default=200,
+                    help="get_recent calls per thread (default: %(default)s)")
+    ap.add_argument("--facade-ops", type=int, default=200,
+                    help="Memory.save / Memory.load calls per thread (default: %(default)s)")
+    ap.add_argument("--max-total-turns", type=int, default=2_000_000,
+                    help="Skip grid points with sessions×turns above this (default: %(default)s)")
+    ap.add_argument("--out", help="Write JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="Previous JSON run to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.20,
+                    help="Allowed p99 / throughput drift as a fraction (default: %(default)s)")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help="Exit 1 if the baseline comparison flags any regression")
+    args = ap.parse_args(argv)
+
+    # keep backend chatter (fallback warnings stay visible) off the JSON stream
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    grid = dict(PRESETS[args.preset])
+    for field in ("sessions", "turns", "content_sizes", "threads"):
+        if getattr(args, field) is not None:
+            grid[field] = getattr(args, field)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    results: List[OpResult] = []
+    skipped: List[Dict[str, int | str]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-memory-") as tmp:
+        workdir = Path(tmp)
+        for backend, sessions, turns, size, threads in itertools.product(
+            backends, grid["sessions"], grid["turns"], grid["content_sizes"], grid["threads"]
+        ):
+            point = {"backend": backend, "sessions": sessions, "turns": turns,
+                     "content_size": size, "threads": threads}
+            if sessions * turns > args.max_total_turns:
+                skipped.append(point)
+                continue
+            print(f"▶ {point}", file=sys.stderr)
+            results.extend(
+                bench_combo(
+                    backend,
+                    sessions=sessions,
+                    turns=turns,
+                    content_size=size,
+                    threads=threads,
+                    reads=args.reads,
+                    facade_ops=args.facade_ops,
+                    workdir=workdir,
+                )
+            )
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "grid": grid,
+            "backends": backends,
+            "reads": args.reads,
+            "facade_ops": args.facade_ops,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+    regressions = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline_doc: Dict[str, Any] = json.load(fh)
+        rows = compare(results, baseline_doc.get("results", []), tolerance=args.tolerance)
+        regressions = sum(1 for r in rows if r["regression"])
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "tolerance": args.tolerance,
+            "regressions": regressions,
+            "rows": rows,
+        }
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else "ok"
+            print(
+                f"{flag:>10}  {r['backend']:<9} {r['op']:<10} s={r['sessions']} t={r['turns']} "
+                f"c={r['content_size']} th={r['threads']}  "
+                f"p99 {r['p99_delta']:+.1%}  tput {r['throughput_delta']:+.1%}",
+                file=sys.stderr,
+            )
+
+    doc = json.dumps(report, indent=2)
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(doc + "\n", encoding="utf-8")
+        print(f"Wrote {len(results)} results  →  {out_path}", file=sys.stderr)
+    else:
+        print(doc)
+
+    return 1 if (args.fail_on_regression and regressions) else 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_precision.py – fp32 vs bf16 vs int8: speed, memory, agreement
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Each precision mode runs in its **own interpreter** (so peak RSS is that
+   mode's alone): load the model through `ModelRuntime` – the same code path
+   as the app, int8 cache included – then greedily decode a fixed prompt set
+   (``--prompts`` file, one prompt per line, or the built-in set).
+2) The child reports load timings, generated tokens / second and peak RSS
+   (``ru_maxrss``) plus the generated token ids.
+3) The parent compares every mode's outputs with fp32: exact-match rate and
+   mean positional token agreement, and prints one JSON document.
+
+Typical usage
+-------------
+$ python scripts/bench_precision.py
+$ python scripts/bench_precision.py --modes fp32,int8 --max-new-tokens 64 --out bench/precision.json
+$ python scripts/bench_precision.py --prompts data/eval_prompts.txt --threads 4
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from engine.eval_prompts import PROMPTS, agreement  # noqa: E402
+from engine.precision import PRECISIONS  # noqa: E402
+
+
+# ─────────────────────────────────────────── Child (one mode) ───────
+def run_mode(mode: str, prompts: Sequence[str], max_new_tokens: int) -> Dict[str, Any]:
+    """Load with `mode`, decode `prompts` greedily; runs inside the child."""
+    from config.settings_service import current_settings
+    from engine.model import ModelRuntime
+    from engine.model_store import ModelStore
+
+    cfg = current_settings().section("model")
+    rt = ModelRuntime(
+        str(cfg.get("name", "google/flan-t5-base")),
+        str(cfg.get("revision", "main")),
+        store=ModelStore(str(cfg.get("cache_dir", ".cache/models"))),
+        device="cpu",
+        precision=mode,
+    )
+    t0 = time.perf_counter()
+    rt.load()
+    load_s = time.perf_counter() - t0
+    tok, mdl = rt.tokenizer, rt.model
+
+    outputs: List[List[int]] = []
+    generated = 0
+    t0 = time.perf_counter()
+    for prompt in prompts:
+        ids = tok(prompt, return_tensors="pt").input_ids
+        with rt.inference_context():
+            out = mdl.generate(ids, max_new_tokens=max_new_tokens, do_sample=False, num_beams=1)
+        seq = [int(t) for t in out[0].tolist()]
+        outputs.append(seq)
+        generated += len(seq)
+    gen_s = time.perf_counter() - t0
+
+    return {
+        "mode": rt.precision,
+        "load_s": round(load_s, 3),
+        "load_phases_ms": {k: round(v * 1000, 1) for k, v in rt.timings.items()},
+        "generate_s": round(gen_s, 3),
+        "tokens": generated,
+        "tokens_per_s": round(generated / gen_s, 2) if gen_s else 0.0,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            1,
+        ),
+        "outputs": outputs,
+    }
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="bench_precision.py",
+        description="Tokens/s, peak RSS and fp32 agreement per precision mode",
+    )
+    ap.add_argument("--modes", default=",".join(PRECISIONS),
+                    help="Comma list of fp32, bf16, int8 (default: %(default)s)")
+    ap.add_argument("--prompts", help="Text file, one prompt per line (default: built-in set)")
+    ap.add_argument("--max-new-tokens", type=int, default=48, help="(default: %(default)s)")
+    ap.add_argument("--threads", type=int, help="torch intra-op threads (OMP_NUM_THREADS)")
+    ap.add_argument("--out", help="Write JSON here (default: stdout)")
+    ap.add_argument("--child", help=argparse.SUPPRESS)  # internal: run one mode
+    args = ap.parse_args(argv)
+
+    prompts = PROMPTS
+    if args.prompts:
+        prompts = [p.strip() for p in Path(args.prompts).read_text(encoding="utf-8").splitlines() if p.strip()]
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, prompts, args.max_new_tokens)))
+        return 0
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = sorted(set(modes) - set(PRECISIONS))
+    if unknown:
+        ap.error(f"unknown mode(s): {', '.join(unknown)}")
+    if "fp32" not in modes:
+        modes.insert(0, "fp32")  # the reference for agreement
+
+    env = dict(os.environ)
+    if args.threads:
+        env["OMP_NUM_THREADS"] = str(args.threads)
+    results: List[Dict[str, Any]] = []
+    for mode in modes:
+        print(f"▶ {mode}", file=sys.stderr)
+        cmd = [sys.executable, __file__, "--child", mode, "--max-new-tokens", str(args.max_new_tokens)]
+        if args.prompts:
+            cmd += ["--prompts", args.prompts]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        if proc.returncode != 0:
+            print(proc.stderr, file=sys.stderr)
+            return 1
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    reference = next(r for r in results if r["mode"] == "fp32")
+    for r in results:
+        r.update(agreement(reference["outputs"], r["outputs"]))
+        r["speedup_vs_fp32"] = (
+            round(r["tokens_per_s"] / reference["tokens_per_s"], 2) if reference["tokens_per_s"] else 0.0
+        )
+        r["rss_vs_fp32"] = round(r["peak_rss_mb"] / reference["peak_rss_mb"], 2) if reference["peak_rss_mb"] else 0.0
+        del r["outputs"]
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "prompts": len(prompts),
+            "max_new_tokens": args.max_new_tokens,
+            "threads": args.threads,
+        },
+        "results": results,
+    }
+    doc = json.dumps(report, indent=2)
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(doc + "\n", encoding="utf-8")
+        print(f"Wrote {len(results)} results  →  {out_path}", file=sys.stderr)
+    else:
+        print(doc)
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_prefix_cache.py – cached prefix encoding vs full encoding
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Build the app's contexts for a fixed message set: the routed specialised
+   prompt (or the base prompt) + ``User: …`` / ``Assistant:``.
+2) Decode each context greedily twice with the same loaded model: once with
+   **full** encoding and once with the **prefix cache** (static prompt
+   encoded once, only the tail per request). The cache is warmed first, so
+   the timings are steady state; ``--repeats`` runs are averaged.
+3) Report per-request latency, tokens the encoder sees per request, and the
+   agreement of the cached outputs with full encoding (exact match and
+   positional token agreement) as one JSON document.
+
+Typical usage
+-------------
+$ python scripts/bench_prefix_cache.py
+$ python scripts/bench_prefix_cache.py --max-new-tokens 64 --repeats 3 --out bench/prefix_cache.json
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from config.settings_service import current_settings  # noqa: E402
+from engine.eval_prompts import PROMPTS, agreement, build_contexts  # noqa: E402
+from engine.inference import TorchEngine  # noqa: E402
+from engine.pipeline import load_base_prompt, load_specialized_prompts  # noqa: E402
+from engine.model import runtime_from_settings  # noqa: E402
+from engine.prefix_cache import PrefixCache  # noqa: E402
+
+
+def _timed(engine: TorchEngine, contexts: Sequence[str], repeats: int, gen: Dict[str, Any]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    outputs: List[str] = []
+    for ctx in contexts:
+        runs = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            text = engine.generate(ctx, **gen)
+            runs.append(time.perf_counter() - t0)
+        latencies.append(statistics.mean(runs))
+        outputs.append(text)
+    return {
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 2),
+            "median": round(statistics.median(latencies) * 1000, 2),
+        },
+        "outputs": outputs,
+    }
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="bench_prefix_cache.py",
+        description="Latency and output agreement: cached prefix encoding vs full encoding",
+    )
+    ap.add_argument("--max-new-tokens", type=int, default=48, help="(default: %(default)s)")
+    ap.add_argument("--repeats", type=int, default=2, help="Timed runs per context (default: %(default)s)")
+    ap.add_argument("--out", help="Write JSON here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    cfg = current_settings().section("model")
+    rt = runtime_from_settings(cfg).load()
+    tok = rt.tokenizer
+    contexts = build_contexts(PROMPTS)
+    gen = {"max_new_tokens": args.max_new_tokens, "do_sample": False, "num_beams": 1}
+
+    cache = PrefixCache()
+    cache.register([load_base_prompt(), *load_specialized_prompts().values()])
+    full, cached = TorchEngine(rt), TorchEngine(rt, prefix_cache=cache)
+    for ctx in contexts:  # warm-up: prefix states, allocator, kernels
+        full.generate(ctx, **gen)
+        cached.generate(ctx, **gen)
+
+    results = {"full": _timed(full, contexts, max(1, args.repeats), gen),
+               "prefix_cache": _timed(cached, contexts, max(1, args.repeats), gen)}
+
+    tails = [cache.split(c) for c in contexts]
+    encoded_full = [len(tok(c)["input_ids"]) for c in contexts]
+    encoded_tail = [len(tok(t[1])["input_ids"]) if t else n for t, n in zip(tails, encoded_full)]
+    ids = {mode: [tok(o, add_special_tokens=False)["input_ids"] for o in r.pop("outputs")]
+           for mode, r in results.items()}
+    results["prefix_cache"].update(agreement(ids["full"], ids["prefix_cache"]))
+    full_ms, cached_ms = results["full"]["latency_ms"]["mean"], results["prefix_cache"]["latency_ms"]["mean"]
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "model": rt.model_name,
+            "precision": rt.precision,
+            "contexts": len(contexts),
+            "max_new_tokens": args.max_new_tokens,
+            "repeats": args.repeats,
+        },
+        "encoder_tokens_per_request": {
+            "full": round(statistics.mean(encoded_full), 1),
+            "prefix_cache": round(statistics.mean(encoded_tail), 1),
+        },
+        "results": results,
+        "speedup": round(full_ms / cached_ms, 3) if cached_ms else 0.0,
+        "cache": cache.stats(),
+    }
+    doc = json.dumps(report, indent=2)
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(doc + "\n", encoding="utf-8")
+        print(f"Wrote report  →  {out_path}", file=sys.stderr)
+    else:
+        print(doc)
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_safety.py – compiled safety engine vs. the old regex alternation
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Generate ``--terms`` synthetic moderation terms (a quarter are two-word
+   phrases) and ``--messages`` chat-sized messages, a few of them containing
+   a term.
+2) Time the previous approach – one ``\\b(a|b|…)\\b`` regex, ``search`` for
+   the verdict then ``sub`` for masking – against ``SafetyEngine.scan`` +
+   ``mask`` (one pass, result cache disabled so every call really scans).
+3) Print one JSON row per term count: compile time, µs per message and the
+   speed-up.
+
+Typical usage
+-------------
+$ python scripts/bench_safety.py
+$ python scripts/bench_safety.py --terms 100,1000,5000 --messages 2000 --words 80
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from utils.safety_filters import SafetyEngine  # noqa: E402
+
+
+# ─────────────────────────────────────────── Data ───────────────────
+def _vocab(n: int, rnd: random.Random) -> List[str]:
+    return ["".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(4, 9)))
+            for _ in range(n)]
+
+
+def _corpus(n_terms: int, n_messages: int, words: int, seed: int) -> tuple[List[str], List[str]]:
+    rnd = random.Random(seed)
+    base = _vocab(n_terms, rnd)
+    terms = [f"{w} {base[i - 1]}" if i % 4 == 0 else w for i, w in enumerate(base)]
+    filler = _vocab(2_000, rnd)
+    messages = []
+    for i in range(n_messages):
+        msg = [rnd.choice(filler) for _ in range(words)]
+        if i % 10 == 0:
+            msg[rnd.randrange(words)] = rnd.choice(terms)
+        messages.append(" ".join(msg))
+    return terms, messages
+
+
+# ─────────────────────────────────────────── Timing ─────────────────
+def _bench(n_terms: int, messages_n: int, words: int, seed: int) -> Dict[str, Any]:
+    terms, messages = _corpus(n_terms, messages_n, words, seed)
+
+    t0 = time.perf_counter()
+    regex = re.compile(r"\b(" + "|".join(map(re.escape, sorted(terms))) + r")\b", re.IGNORECASE)
+    regex_compile = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    engine = SafetyEngine(terms, cache_size=0)
+    engine_compile = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    regex_hits = 0
+    for msg in messages:
+        if regex.search(msg):
+            regex_hits += 1
+        regex.sub(lambda m: "*" * len(m.group(0)), msg)
+    regex_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    engine_hits = 0
+    for msg in messages:
+        scan = engine.scan(msg)
+        engine_hits += scan.profane
+        scan.mask(msg)
+    engine_s = time.perf_counter() - t0
+
+    return {
+        "terms": n_terms,
+        "messages": messages_n,
+        "words_per_message": words,
+        "regex_compile_ms": round(regex_compile * 1e3, 2),
+        "engine_compile_ms": round(engine_compile * 1e3, 2),
+        "regex_us_per_msg": round(regex_s / messages_n * 1e6, 2),
+        "engine_us_per_msg": round(engine_s / messages_n * 1e6, 2),
+        "speedup": round(regex_s / engine_s, 2) if engine_s else None,
+        "hits": {"regex": regex_hits, "engine": engine_hits},
+    }
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="bench_safety.py",
+        description="Benchmark the compiled safety engine against a regex alternation",
+    )
+    ap.add_argument("--terms", default="10,100,1000,5000",
+                    help="Comma list of term-list sizes (default: %(default)s)")
+    ap.add_argument("--messages", type=int, default=1_000,
+                    help="Messages per run (default: %(default)s)")
+    ap.add_argument("--words", type=int, default=60,
+                    help="Words per message (default: %(default)s)")
+    ap.add_argument("--seed", type=int, default=0, help="RNG seed (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    for n in (int(x) for x in args.terms.split(",") if x.strip()):
+        print(json.dumps(_bench(n, args.messages, args.words, args.seed)))
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  bench_startup.py – import time & time-to-ready of the engine / app
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Every target runs in a **fresh interpreter** ``--runs`` times:
+   ``import <module>`` then, for boot targets, ``boot(warm=…)``. The child
+   reports import ms, ready ms (import + boot) and which heavy packages
+   (torch, transformers, gradio) ended up in ``sys.modules``.
+2) One extra run per target uses ``python -X importtime`` and keeps the
+   ``--top`` modules with the largest self time – where the milliseconds go.
+3) Median / min / max per target are written as one JSON document. With
+   ``--baseline`` the medians are compared and growth beyond ``--tolerance``
+   is flagged (``--fail-on-regression`` → exit 1, for CI).
+
+Targets
+-------
+• engine   – ``import engine``                (headless pipeline; must stay light)
+• main     – ``import main``                  (entry module, UI not built)
+• headless – ``import engine`` + ``boot(warm=False)``
+• app      – ``import main`` + ``boot(warm=True)`` + UI build (needs the model)
+
+Typical usage
+-------------
+$ python scripts/bench_startup.py
+$ python scripts/bench_startup.py --targets engine,headless,app --runs 5 --out bench/startup.json
+$ python scripts/bench_startup.py --baseline bench/startup.json --fail-on-regression
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+HEAVY: Tuple[str, ...] = ("torch", "transformers", "gradio")
+
+# target → (module, boot code run after the import, or "")
+TARGETS: Dict[str, Tuple[str, str]] = {
+    "engine": ("engine", ""),
+    "main": ("main", ""),
+    "headless": ("engine", "mod.boot(warm=False); mod.SETTINGS_SERVICE.stop()"),
+    "app": ("main", "mod.boot(warm=True); mod.demo"),
+}
+
+# runs inside the child interpreter
+_CHILD = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+mod = importlib.import_module({module!r})
+t1 = time.perf_counter()
+{boot}
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "ready_ms": (t2 - t0) * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+# ─────────────────────────────────────────── Child runs ──────────────
+def _run_child(module: str, boot: str, *, importtime: bool = False) -> Tuple[Dict[str, Any], str]:
+    code = _CHILD.format(module=module, boot=boot or "pass", heavy=HEAVY)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.getenv("PYTHONPATH")])))
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module}: {proc.stderr.strip().splitlines()[-1:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def parse_importtime(stderr: str, top: int) -> List[Dict[str, Any]]:
+    """`-X importtime` lines → the `top` modules by self time (µs)."""
+    rows: List[Dict[str, Any]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+            rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative)})
+        except ValueError:
+            continue
+    rows.sort(key=lambda r: r["self_us"], reverse=True)
+    return rows[:top]
+
+
+def bench_target(name: str, runs: int, top: int) -> Dict[str, Any]:
+    module, boot = TARGETS[name]
+    samples = [_run_child(module, boot)[0] for _ in range(runs)]
+    _, stderr = _run_child(module, boot, importtime=True)
+
+    def stats(field: str) -> Dict[str, float]:
+        vals = [s[field] for s in samples]
+        return {
+            "median": round(statistics.median(vals), 2),
+            "min": round(min(vals), 2),
+            "max": round(max(vals), 2),
+        }
+
+    return {
+        "target": name,
+        "runs": runs,
+        "import_ms": stats("import_ms"),
+        "ready_ms": stats("ready_ms"),
+        "heavy_imports": samples[-1]["heavy"],
+        "modules_loaded": samples[-1]["modules"],
+        "top_imports": parse_importtime(stderr, top),
+    }
+
+
+# ─────────────────────────────────────────── Baseline compare ───────
+def compare(
+    current: List[Dict[str, Any]], baseline: List[Dict[str, Any]], *, tolerance: float
+) -> List[Dict[str, Any]]:
+    """Median import / ready ms per target; `regression` when either grew > tolerance."""
+    base = {r["target"]: r for r in baseline}
+    rows: List[Dict[str, Any]] = []
+    for r in current:
+        old = base.get(r["target"])
+        if old is None:
+            continue
+        row: Dict[str, Any] = {"target": r["target"], "regression": False}
+        for field in ("import_ms", "ready_ms"):
+            was, now = float(old[field]["median"]), float(r[field]["median"])
+            delta = (now - was) / was if was else 0.0
+            row[field] = [was, now]
+            row[f"{field}_delta"] = round(delta, 4)
+            row["regression"] |= delta > tolerance
+        row["regression"] |= bool(set(r["heavy_imports"]) - set(old["heavy_imports"]))
+        rows.append(row)
+    return rows
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="bench_startup.py",
+        description="Import time and time-to-ready of the engine and the app",
+    )
+    ap.add_argument("--targets", default="engine,main,headless",
+                    help=f"Comma list of {', '.join(TARGETS)} (default: %(default)s)")
+    ap.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target (default: %(default)s)")
+    ap.add_argument("--top", type=int, default=10, help="Slowest imports listed (default: %(default)s)")
+    ap.add_argument("--out", help="Write JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="Previous JSON run to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25,
+                    help="Allowed median growth as a fraction (default: %(default)s)")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help="Exit 1 if the baseline comparison flags any regression")
+    args = ap.parse_args(argv)
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = sorted(set(targets) - set(TARGETS))
+    if unknown:
+        ap.error(f"unknown target(s): {', '.join(unknown)}")
+
+    results = []
+    for name in targets:
+        print(f"▶ {name}", file=sys.stderr)
+        results.append(bench_target(name, max(1, args.runs), args.top))
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+
+    regressions = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline_doc: Dict[str, Any] = json.load(fh)
+        rows = compare(results, baseline_doc.get("results", []), tolerance=args.tolerance)
+        regressions = sum(1 for r in rows if r["regression"])
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "tolerance": args.tolerance,
+            "regressions": regressions,
+            "rows": rows,
+        }
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else "ok"
+            print(
+                f"{flag:>10}  {r['target']:<9} import {r['import_ms_delta']:+.1%}  "
+                f"ready {r['ready_ms_delta']:+.1%}",
+                file=sys.stderr,
+            )
+
+    doc = json.dumps(report, indent=2)
+    if args.out:
+        out_path = Path(args.out)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(doc + "\n", encoding="utf-8")
+        print(f"Wrote {len(results)} results  →  {out_path}", file=sys.stderr)
+    else:
+        print(doc)
+
+    return 1 if (args.fail_on_regression and regressions) else 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  compact_sessions.py – summarise & prune the cold prefix of every session
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Open the chosen persistent backend and list every session.
+2) For each session keep the newest ``--keep`` turns; if the rest (the cold
+   prefix) holds at least ``--min-cold`` raw turns, summarise it on a process
+   pool (heuristic bullets, or ``--strategy abstractive`` for the model).
+3) Replace the cold prefix with one ``summary``-role turn, unless
+   ``--dry-run`` is given, and print a throughput report.
+
+Typical usage
+-------------
+$ python scripts/compact_sessions.py --backend sqlite --dry-run
+$ python scripts/compact_sessions.py --backend sharded_sqlite --workers 8 --keep 500
+$ python scripts/compact_sessions.py --backend redis --redis-url redis://localhost/0 --json
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from memory.compaction import STRATEGIES, compact_sessions  # noqa: E402
+from memory.jobs import add_backend_arguments, open_backend  # noqa: E402
+
+
+# ─────────────────────────────────────────── Helpers ─────────────────
+def _model_settings(name: str) -> Dict[str, Any]:
+    """The configured `model` section for `--model` (same store; another model → main revision)."""
+    from config.settings_service import current_settings
+
+    model = dict(current_settings().section("model"))
+    if name != model.get("name"):
+        model.update(name=name, revision="main")
+    return model
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="compact_sessions.py",
+        description="Summarise and prune the cold prefix of every stored session",
+    )
+    add_backend_arguments(ap, purpose="compact")
+    ap.add_argument("--keep", type=int, default=200,
+                    help="Newest turns left untouched per session (default: %(default)s)")
+    ap.add_argument("--min-cold", type=int, default=100,
+                    help="Skip sessions with fewer cold turns (default: %(default)s)")
+    ap.add_argument("--max-read", type=int, default=10_000,
+                    help="Turns read per session (default: %(default)s)")
+    ap.add_argument("--strategy", choices=STRATEGIES, default="heuristic",
+                    help="Summariser (default: %(default)s)")
+    ap.add_argument("--model",
+                    help="Model for --strategy abstractive (default: settings' model.name)")
+    ap.add_argument("--max-chars", type=int, default=512,
+                    help="Summary length cap (default: %(default)s)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Summariser processes; 0 = inline (default: %(default)s)")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="Compute summaries and report, but write nothing")
+    ap.add_argument("--json", action="store_true", help="Print the report as JSON")
+    ap.add_argument("-v", "--verbose", action="store_true",
+                    help="Print one line per compacted session")
+    args = ap.parse_args(argv)
+
+    def progress(cid: str, covered: int, summary: str) -> None:
+        first = summary.splitlines()[0] if summary else ""
+        print(f"  {cid}: {covered} turn(s) → {len(summary)} char(s)  {first[:60]}")
+
+    backend = open_backend(args)
+    try:
+        report = compact_sessions(
+            backend,
+            keep=args.keep,
+            min_cold=args.min_cold,
+            max_read=args.max_read,
+            strategy=args.strategy,
+            max_chars=args.max_chars,
+            model=_model_settings(args.model) if args.model else None,
+            workers=args.workers,
+            dry_run=args.dry_run,
+            progress=progress if args.verbose else None,
+        )
+    finally:
+        close = getattr(backend, "close", None)
+        if close is not None:
+            close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    verb = "Would compact" if args.dry_run else "Compacted"
+    print(
+        f"{verb} {report['compacted']}/{report['sessions']} session(s), "
+        f"pruned {report['turns_pruned']} turn(s) "
+        f"({report['chars_before']} → {report['chars_after']} chars); "
+        f"{report['skipped']} skipped ({report['too_long']} over --max-read), {report['failed']} failed"
+    )
+    print(
+        f"Read {report['turns_read']} turn(s) in {report['elapsed_s']} s  "
+        f"→ {report['sessions_per_s']} sessions/s, {report['turns_per_s']} turns/s"
+    )
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
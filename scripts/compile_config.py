@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  compile_config.py – prebuild the config artefact (image build / deploy)
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Hash the settings, alias, specialised-prompt and template files together
+   with the tokenizer id (``--tokenizer``, optional).
+2) Compile them – validation, alias tables, safety automaton, prompt token
+   ids – into ``<cache-dir>/config-<key>.bin``, unless an artefact with that
+   key already exists (``--force`` rebuilds).
+3) Map it back the way the app does at boot and print key, size and timings.
+
+Run it once when building an image so worker cold starts only ``mmap`` the
+file; the app rebuilds on its own whenever a source changes.
+
+Typical usage
+-------------
+$ python scripts/compile_config.py
+$ python scripts/compile_config.py --tokenizer google/flan-t5-base --cache-dir /srv/cache
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from config.config_artefact import (  # noqa: E402
+    DEFAULT_ARTEFACT_DIR,
+    ConfigSources,
+    get_compiled_config,
+    load_artefact,
+)
+
+
+# ─────────────────────────────────────────── CLI ────────────────────
+def main(argv: Sequence[str] | None = None) -> int:
+    defaults = ConfigSources()
+    ap = argparse.ArgumentParser(
+        prog="compile_config.py",
+        description="Compile prompts, aliases and safety lists into a mmap-able artefact",
+    )
+    ap.add_argument("--settings", default=defaults.settings, help="(default: %(default)s)")
+    ap.add_argument("--aliases", default=defaults.aliases, help="(default: %(default)s)")
+    ap.add_argument("--prompts", default=defaults.prompts, help="(default: %(default)s)")
+    ap.add_argument("--template", default=defaults.template, help="(default: %(default)s)")
+    ap.add_argument("--tokenizer", help="HF tokenizer name/path for prompt token ids")
+    ap.add_argument("--cache-dir", default=DEFAULT_ARTEFACT_DIR,
+                    help="Artefact directory (default: $CONFIG_ARTEFACT_DIR or %(default)s)")
+    ap.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    ap.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = ap.parse_args(argv)
+
+    tokenizer: Any = None
+    if args.tokenizer:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+
+    sources = ConfigSources(args.settings, args.aliases, args.prompts, args.template)
+    t0 = time.perf_counter()
+    cfg = get_compiled_config(sources, tokenizer=tokenizer, cache_dir=args.cache_dir, force=args.force)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    load_artefact(cfg.path, cfg.key)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    summary = {
+        "key": cfg.key,
+        "path": cfg.path,
+        "bytes": os.path.getsize(cfg.path) if cfg.path else 0,
+        "tokenizer": cfg.tokenizer_id,
+        "prompts": len(cfg.specialized_prompts),
+        "aliases": len(cfg.aliases),
+        "safety_terms": cfg.safety_engine.size,
+        "build_ms": round(build_ms, 2),
+        "load_ms": round(load_ms, 2),
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{summary['path']}  ({summary['bytes']} bytes, key {cfg.key[:12]}…)")
+        print(
+            f"{summary['prompts']} prompt(s), {summary['aliases']} alias(es), "
+            f"{summary['safety_terms']} safety term(s), tokenizer '{summary['tokenizer'] or '-'}'"
+        )
+        print(f"build/lookup {summary['build_ms']} ms · mmap load {summary['load_ms']} ms")
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
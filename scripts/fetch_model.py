@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  fetch_model.py – pin a model into the local store (deploy / image build)
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Resolve ``name@revision`` (defaults: ``settings['model']``) to its
+   directory under ``--cache-dir`` and verify it against ``manifest.json``.
+2) If it is missing or damaged, download the safetensors snapshot (``.bin``
+   only repos are converted once) and write a new manifest.
+3) ``--check`` only verifies (exit 1 if unusable – handy before going
+   offline); ``--load`` additionally loads tokenizer + weights and prints the
+   per-phase timings the app will see at cold start; ``--onnx`` exports the
+   ONNX Runtime graph into the model directory now instead of at first use.
+
+Typical usage
+-------------
+$ python scripts/fetch_model.py
+$ python scripts/fetch_model.py google/flan-t5-base --revision <commit-sha> --verify full
+$ MODEL_OFFLINE=1 python scripts/fetch_model.py --check
+$ python scripts/fetch_model.py --onnx
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import sys
+from typing import Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from config.settings_service import current_settings  # noqa: E402
+from engine.inference import export_onnx, onnx_available  # noqa: E402
+from engine.model import ModelRuntime  # noqa: E402
+from engine.model_store import ModelStore, ModelUnavailableError  # noqa: E402
+
+
+# ─────────────────────────────────────────── CLI ────────────────────
+def main(argv: Sequence[str] | None = None) -> int:
+    cfg = current_settings().section("model")
+    ap = argparse.ArgumentParser(
+        prog="fetch_model.py",
+        description="Fetch and verify a model in the local model store",
+    )
+    ap.add_argument("name", nargs="?", default=cfg.get("name", "google/flan-t5-base"),
+                    help="Hub id (default: %(default)s)")
+    ap.add_argument("--revision", default=cfg.get("revision", "main"),
+                    help="Branch, tag or commit (default: %(default)s)")
+    ap.add_argument("--cache-dir", default=cfg.get("cache_dir", ".cache/models"),
+                    help="Store root (default: %(default)s)")
+    ap.add_argument("--verify", choices=("size", "full"), default="size",
+                    help="size check or full SHA-256 (default: %(default)s)")
+    ap.add_argument("--check", action="store_true", help="Verify only, never download")
+    ap.add_argument("--load", action="store_true", help="Also load the model and print timings")
+    ap.add_argument("--onnx", action="store_true", help="Also export the ONNX graph (onnx engine)")
+    args = ap.parse_args(argv)
+
+    store = ModelStore(args.cache_dir, offline=True if args.check else None, verify=args.verify)
+    try:
+        path = store.ensure(args.name, args.revision)
+    except ModelUnavailableError as exc:
+        print(f"✗ {exc}", file=sys.stderr)
+        return 1
+
+    manifest = store.verify(path) or {}
+    size = sum(f["size"] for f in manifest.get("files", {}).values())
+    print(f"✓ {args.name}@{args.revision} → {path}  ({len(manifest.get('files', {}))} files, "
+          f"{size / 1e6:.1f} MB)")
+
+    if args.load:
+        rt = ModelRuntime(args.name, args.revision, store=store, device=cfg.get("device", "auto"))
+        rt.load()
+        print(json.dumps({k: round(v * 1000, 1) for k, v in rt.timings.items()}, indent=2))
+
+    if args.onnx:
+        if not onnx_available():
+            print("✗ --onnx needs `onnxruntime` and `optimum`", file=sys.stderr)
+            return 1
+        print(f"✓ ONNX graph → {export_onnx(str(path))}")
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
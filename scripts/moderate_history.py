@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  moderate_history.py – audit / re-mask stored turns after a policy change
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+1) Load the safety policy from ``--settings`` (``config/settings.json`` by
+   default) and open the chosen persistent backend.
+2) Stream every session through ``evaluate_safety_batch`` on a process pool
+   (``--workers``), ``--batch-turns`` turns per task.
+3) Print what the current term lists flag – turns, sessions, would-be blocks,
+   most frequent terms. With ``--apply`` flagged turns of ``--mask-roles``
+   are rewritten masked in place.
+
+Typical usage
+-------------
+$ python scripts/moderate_history.py --backend sqlite
+$ python scripts/moderate_history.py --backend sharded_sqlite --workers 8 --apply
+$ python scripts/moderate_history.py --backend redis --redis-url redis://localhost/0 --json
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import os
+import sys
+from typing import List, Sequence
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from config.settings_loader import DEFAULT_SETTINGS_PATH, load_settings  # noqa: E402
+from memory.jobs import add_backend_arguments, open_backend  # noqa: E402
+from memory.moderation import MASK_ROLES, Finding, moderate_sessions  # noqa: E402
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="moderate_history.py",
+        description="Re-check (and optionally re-mask) stored turns against the safety policy",
+    )
+    add_backend_arguments(ap, purpose="scan")
+    ap.add_argument("--settings", default=DEFAULT_SETTINGS_PATH,
+                    help="Settings file with the safety policy (default: %(default)s)")
+    ap.add_argument("--max-read", type=int, default=10_000,
+                    help="Turns read per session (default: %(default)s)")
+    ap.add_argument("--mask-roles", default=",".join(MASK_ROLES),
+                    help="Roles rewritten by --apply (default: %(default)s)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Scanner processes; 0 = inline (default: %(default)s)")
+    ap.add_argument("--batch-turns", type=int, default=2_000,
+                    help="Turns per worker task (default: %(default)s)")
+    ap.add_argument("--apply", action="store_true",
+                    help="Rewrite flagged turns masked (default: report only)")
+    ap.add_argument("--json", action="store_true", help="Print the report as JSON")
+    ap.add_argument("-v", "--verbose", action="store_true",
+                    help="Print one line per flagged session")
+    args = ap.parse_args(argv)
+
+    def progress(cid: str, found: List[Finding]) -> None:
+        matched = sorted({t for f in found for t in f[1]})
+        print(f"  {cid}: {len(found)} turn(s) flagged  {', '.join(matched)[:60]}")
+
+    settings = load_settings(args.settings)
+    backend = open_backend(args)
+    try:
+        report = moderate_sessions(
+            backend,
+            settings,
+            max_read=args.max_read,
+            mask_roles=[r.strip() for r in args.mask_roles.split(",") if r.strip()],
+            apply=args.apply,
+            workers=args.workers,
+            batch_turns=args.batch_turns,
+            progress=progress if args.verbose else None,
+        )
+    finally:
+        close = getattr(backend, "close", None)
+        if close is not None:
+            close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(
+        f"Flagged {report['flagged_turns']} turn(s) in "
+        f"{report['flagged_sessions']}/{report['sessions']} session(s); "
+        f"{report['blocked_turns']} would be blocked, {report['strict_turns']} strict"
+    )
+    if args.apply:
+        print(f"Re-masked {report['remasked']} turn(s)")
+    if report["top_terms"]:
+        print("Top terms: " + ", ".join(f"{t} ×{n}" for t, n in report["top_terms"].items()))
+    print(
+        f"Scanned {report['turns_scanned']} turn(s) in {report['elapsed_s']} s  "
+        f"→ {report['sessions_per_s']} sessions/s, {report['turns_per_s']} turns/s"
+    )
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
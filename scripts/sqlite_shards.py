@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# ════════════════════════════════════════════════════════════════════
+#  sqlite_shards.py – inspect, export & re-shard a sharded SQLite store
+# ════════════════════════════════════════════════════════════════════
+"""
+How it works
+============
+• ``stats``   – print the manifest plus sessions / rows per shard.
+• ``export``  – stream every turn across all shards as JSON lines
+                (``{"session", "role", "content"}``, oldest → newest).
+• ``reshard`` – copy every session onto a new shard count *while the app
+                keeps running*, then publish the new manifest (see
+                ``memory.backends.sharded_sqlite_memory_backend.reshard``).
+
+Typical usage
+-------------
+$ python scripts/sqlite_shards.py stats
+$ python scripts/sqlite_shards.py export --out /tmp/turns.jsonl
+$ python scripts/sqlite_shards.py reshard --shards 16 --db-dir data/memory_shards
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Imports ──
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Sequence, TextIO
+
+# ── project imports ─────────────────────────────────────────────────
+sys.path.append(".")  # ensure repo root on PYTHONPATH
+
+from memory.backends.sharded_sqlite_memory_backend import (  # noqa: E402
+    DEFAULT_DB_DIR,
+    ShardedSQLiteMemoryBackend,
+    read_manifest,
+    reshard,
+    shard_path,
+)
+
+
+# ─────────────────────────────────────────── Commands ───────────────
+def _stats(db_dir: Path) -> int:
+    manifest = read_manifest(db_dir)
+    if manifest is None:
+        print(f"No sharded store in {db_dir}")
+        return 1
+    gen, n = manifest["generation"], manifest["shards"]
+    print(f"{db_dir}: generation {gen}, {n} shard(s)")
+    for i in range(n):
+        path = shard_path(db_dir, gen, i)
+        with sqlite3.connect(path) as con:
+            sessions, rows = con.execute(
+                "SELECT COUNT(DISTINCT session), COUNT(*) FROM turns"
+            ).fetchone()
+        print(f"  shard {i:03d}: {sessions:>6} session(s) {rows:>9} row(s)  {path.name}")
+    return 0
+
+
+def _export(db_dir: Path, out: TextIO) -> int:
+    backend = ShardedSQLiteMemoryBackend(db_dir=db_dir)
+    count = 0
+    for cid, turn in backend.iter_turns():
+        out.write(json.dumps({"session": cid, **turn}, ensure_ascii=False) + "\n")
+        count += 1
+    backend.close()
+    print(f"Exported {count} turns from {db_dir}", file=sys.stderr)
+    return 0
+
+
+# ─────────────────────────────────────────────────────────── main() ──
+def main(argv: Sequence[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(
+        prog="sqlite_shards.py",
+        description="Inspect, export and re-shard a sharded SQLite memory store",
+    )
+    ap.add_argument(
+        "--db-dir",
+        default=DEFAULT_DB_DIR,
+        help="Shard directory (default: %(default)s)",
+    )
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="Sessions / rows per shard")
+
+    ex = sub.add_parser("export", help="Dump every turn as JSON lines")
+    ex.add_argument("--out", help="Target file (default: stdout)")
+
+    rs = sub.add_parser("reshard", help="Online re-shard to a new shard count")
+    rs.add_argument("--shards", type=int, required=True, help="New shard count")
+    rs.add_argument("--settle", type=float, default=2.0,
+                    help="Seconds to wait for running apps to switch (default: %(default)s)")
+    rs.add_argument("--max-passes", type=int, default=5,
+                    help="Catch-up passes before publishing (default: %(default)s)")
+    rs.add_argument("--keep-old", action="store_true",
+                    help="Keep the previous generation's files")
+    args = ap.parse_args(argv)
+
+    db_dir = Path(args.db_dir).expanduser()
+
+    if args.cmd == "stats":
+        return _stats(db_dir)
+
+    if args.cmd == "export":
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as fh:
+                return _export(db_dir, fh)
+        return _export(db_dir, sys.stdout)
+
+    stats = reshard(
+        db_dir,
+        args.shards,
+        max_passes=args.max_passes,
+        settle=args.settle,
+        keep_old=args.keep_old,
+        progress=print,
+    )
+    print(
+        f"Resharded {stats['sessions']} session(s), {stats['rows']} row(s) "
+        f"in {stats['passes']} pass(es); {stats['late_rows']} late row(s)  →  {db_dir}"
+    )
+    return 0
+
+
+# ---------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
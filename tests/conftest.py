@@ -17,7 +17,7 @@ def fake_redis_server():
     yield fakeredis.FakeRedis(server=server)
 
 # ── parametrised fixture ────────────────────────────────────────────────────
-@pytest.fixture(params=["in_memory", "redis", "sqlite"])
+@pytest.fixture(params=["in_memory", "redis", "sqlite", "log", "sharded_sqlite"])
 def mem(request, tmp_path, monkeypatch):
     backend = request.param
     logging.debug(f"backend = {backend}")
@@ -51,4 +51,27 @@ def mem(request, tmp_path, monkeypatch):
         # optional: sanity check row-count vs. file on disk
         with sqlite3.connect(db_file) as con:
             assert con.execute("SELECT COUNT(*) FROM turns").fetchone()[0] == 0
-        return
\ No newline at end of file
+        return
+
+    # --- log ---------------------------------------------------------------
+    if backend == "log":
+        monkeypatch.setenv("MEMORY_LOG_DIR", str(tmp_path / "memory_log"))
+        m = Memory(backend=MemoryBackend.LOG)
+        m.clear()
+        yield m
+        m.clear()
+        m._impl.close()
+        Memory._instance = None             # next LOG test gets a fresh dir
+        return
+
+    # --- sharded_sqlite ----------------------------------------------------
+    if backend == "sharded_sqlite":
+        monkeypatch.setenv("MEMORY_DB_DIR", str(tmp_path / "shards"))
+        m = Memory(backend=MemoryBackend.SHARDED_SQLITE)
+        m.clear()
+        yield m
+        m.clear()
+        assert m._impl.list_sessions() == []
+        m._impl.close()
+        Memory._instance = None             # next test gets a fresh dir
+        return
@@ -0,0 +1,88 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_assisted.py – draft-model assisted decoding & its metrics
+# ════════════════════════════════════════════════════════════════════
+from types import SimpleNamespace
+
+from engine.assisted import AssistedDecoding, assisted_from_settings
+from engine.inference import TorchEngine, create_engine
+from engine.model import ModelRuntime
+
+
+class Tok:
+    def __call__(self, text, return_tensors=None, **_):
+        return SimpleNamespace(input_ids=SimpleNamespace(to=lambda device: text))
+
+    def decode(self, out, skip_special_tokens=True):
+        return " ".join(out)
+
+
+class Out(list):
+    @property
+    def shape(self):
+        return (1, len(self[0]) + 1)  # + decoder start token
+
+
+class Hooked:
+    def __init__(self):
+        self.hooks = []
+        self.generation_config = SimpleNamespace()
+
+    def register_forward_hook(self, fn):
+        self.hooks.append(fn)
+
+    def forward(self, n):
+        for _ in range(n):
+            for fn in self.hooks:
+                fn(self, (), None)
+
+
+class MainModel(Hooked):
+    """9 tokens in 3 verification passes; the draft proposed 12 (6 accepted)."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def generate(self, prompt, assistant_model=None, **gen_cfg):
+        self.calls.append({"assisted": assistant_model is not None, **gen_cfg})
+        if assistant_model is not None:
+            assistant_model.forward(12)
+            self.forward(3)
+        else:
+            self.forward(9)
+        return Out([[f"t{i}" for i in range(9)]])
+
+
+def _engine(lookahead=4):
+    main_rt, draft_rt = ModelRuntime("main/model"), ModelRuntime("draft/model")
+    main, draft = MainModel(), Hooked()
+    main_rt.set(Tok(), main, "cpu")
+    draft_rt.set(Tok(), draft, "cpu")
+    assisted = AssistedDecoding(draft_rt, lookahead=lookahead)
+    return TorchEngine(main_rt, assisted=assisted), main, draft, assisted
+
+
+def test_greedy_single_beam_uses_the_draft_and_counts_acceptance():
+    engine, main, draft, assisted = _engine()
+    assert engine.generate("User: hi", max_new_tokens=9, do_sample=False) == " ".join(f"t{i}" for i in range(9))
+    assert main.calls[-1]["assisted"] and draft.generation_config.num_assistant_tokens == 4
+    assert assisted.stats == {"calls": 1, "rounds": 3, "proposed": 12, "accepted": 6, "tokens": 9}
+    assert assisted.acceptance_rate == 0.5 and assisted.tokens_per_round == 3.0
+    assert "50% accepted" in assisted.describe()
+
+
+def test_beam_search_decodes_without_the_draft():
+    engine, main, _, assisted = _engine()
+    engine.generate("User: hi", num_beams=3)
+    assert not main.calls[-1]["assisted"] and assisted.stats["calls"] == 0
+    main.forward(2)  # passes outside a measured call are not counted
+    assert assisted.stats["rounds"] == 0
+
+
+def test_settings_wire_the_draft_into_the_torch_engine():
+    rt = ModelRuntime("google/flan-t5-base")
+    assert assisted_from_settings({"draft_model": ""}, rt) is None
+    eng = create_engine("torch", rt, {"draft_model": "google/flan-t5-small", "draft_lookahead": 7})
+    assert isinstance(eng, TorchEngine) and eng.assisted is not None
+    assert eng.assisted.draft.model_name == "google/flan-t5-small"
+    assert eng.assisted.draft.store is rt.store and eng.assisted.lookahead == 7
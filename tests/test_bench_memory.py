@@ -0,0 +1,82 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_bench_memory.py – smoke tests for scripts/bench_memory.py
+# ════════════════════════════════════════════════════════════════════
+import json
+import subprocess
+import sys
+
+import pytest
+
+# tiny grid so the whole run stays well under a second per backend
+_GRID = [
+    "--sessions", "2",
+    "--turns", "10",
+    "--content-sizes", "16",
+    "--threads", "1,2",
+    "--reads", "5",
+    "--facade-ops", "5",
+]
+
+
+def _run(*extra: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, "scripts/bench_memory.py", *_GRID, *extra],
+        capture_output=True, text=True,
+    )
+
+
+@pytest.mark.parametrize("backend", ["in_memory", "sqlite", "redis", "log", "sharded_sqlite"])
+def test_bench_emits_json(tmp_path, backend):
+    out = tmp_path / "bench.json"
+    r = _run("--backends", backend, "--out", str(out))
+    assert r.returncode == 0, r.stderr
+
+    doc = json.loads(out.read_text())
+    ops = {row["op"] for row in doc["results"]}
+    assert ops == {"add_turn", "get_recent", "save", "load", "flush"}
+
+    for row in doc["results"]:
+        assert row["backend"] == backend
+        assert row["fell_back"] is False
+        lat = row["latency_us"]
+        assert lat["p50"] <= lat["p90"] <= lat["p99"] <= lat["max"]
+        if row["op"] == "add_turn":
+            assert row["count"] == 20       # 2 sessions × 10 turns
+
+
+def test_bench_baseline_compare(tmp_path):
+    base = tmp_path / "base.json"
+    assert _run("--backends", "in_memory", "--out", str(base)).returncode == 0
+
+    cur = tmp_path / "cur.json"
+    # tolerance is huge → timing noise can never flag a regression
+    r = _run("--backends", "in_memory", "--out", str(cur),
+             "--baseline", str(base), "--tolerance", "1000", "--fail-on-regression")
+    assert r.returncode == 0, r.stderr
+
+    cmp = json.loads(cur.read_text())["comparison"]
+    assert cmp["regressions"] == 0
+    assert len(cmp["rows"]) == 10           # 5 ops × 2 thread counts
+
+
+def test_bench_skips_oversized_points(tmp_path):
+    out = tmp_path / "bench.json"
+    r = _run("--backends", "in_memory", "--max-total-turns", "5", "--out", str(out))
+    assert r.returncode == 0, r.stderr
+    doc = json.loads(out.read_text())
+    assert doc["results"] == []
+    assert len(doc["skipped"]) == 2
+
+
+def test_worker_thread_errors_are_raised():
+    from scripts.bench_memory import _run_threads
+
+    def work(tid):
+        if tid == 1:
+            raise RuntimeError("backend broke")
+        return [1, 2]
+
+    with pytest.raises(RuntimeError, match="backend broke"):
+        _run_threads(3, work)
+    latencies, _ = _run_threads(2, lambda tid: [tid])
+    assert latencies == [0, 1]
@@ -0,0 +1,157 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_compact_sessions.py – offline cold-prefix compaction
+# ════════════════════════════════════════════════════════════════════
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from memory.backends import redis_memory_backend
+from memory.backends.log_memory_backend import LogMemoryBackend
+from memory.backends.redis_memory_backend import InMemoryBackend, RedisMemoryBackend
+from memory.backends.sharded_sqlite_memory_backend import ShardedSQLiteMemoryBackend
+from memory.backends.sqlite_memory_backend import SQLiteMemoryBackend
+from memory.compaction import compact_sessions, summarise_cold
+
+
+# ────────────────────────── helpers ──────────────────────────
+@pytest.fixture(params=["in_memory", "sqlite", "redis", "log", "sharded_sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    name = request.param
+    if name == "in_memory":
+        yield InMemoryBackend()
+        return
+    if name == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            redis_memory_backend,
+            "redis",
+            SimpleNamespace(from_url=lambda *_, **kw: fakeredis.FakeRedis(server=server, **kw)),
+        )
+        monkeypatch.setattr(redis_memory_backend, "_redis_available", True)
+        yield RedisMemoryBackend(redis_url="redis://test/0")
+        return
+    b = {
+        "sqlite": lambda: SQLiteMemoryBackend(db_path=tmp_path / "m.sqlite"),
+        "log": lambda: LogMemoryBackend(log_dir=tmp_path / "log", background_compaction=False),
+        "sharded_sqlite": lambda: ShardedSQLiteMemoryBackend(db_dir=tmp_path / "shards"),
+    }[name]()
+    yield b
+    b.close()
+
+
+def _fill(mem, cid, n):
+    for i in range(n):
+        mem.add_turn("user" if i % 2 == 0 else "assistant", f"{cid}-{i}", cid=cid)
+
+
+def _history(mem, cid):
+    return list(reversed(mem.get_recent(limit=1_000, cid=cid)))
+
+
+# ────────────────────────── tests ────────────────────────────
+def test_compact_prefix_keeps_hot_window(backend):
+    _fill(backend, "s", 10)
+    backend.compact_prefix(6, "• gist", cid="s")
+    hist = _history(backend, "s")
+    assert hist[0] == {"role": "summary", "content": "• gist"}
+    assert [t["content"] for t in hist[1:]] == [f"s-{i}" for i in range(6, 10)]
+
+    # later turns land after the summary; a second pass folds the first summary
+    backend.add_turn("user", "late", cid="s")
+    backend.compact_prefix(3, "• gist 2", cid="s")
+    assert [t["content"] for t in _history(backend, "s")] == ["• gist 2", "s-8", "s-9", "late"]
+
+
+def test_job_compacts_long_sessions_only(backend):
+    _fill(backend, "long", 30)
+    _fill(backend, "short", 6)
+    report = compact_sessions(backend, keep=4, min_cold=10)
+
+    assert report["sessions"] == 2
+    assert report["compacted"] == 1
+    assert report["skipped"] == 1
+    assert report["turns_pruned"] == 25
+    hist = _history(backend, "long")
+    assert hist[0]["role"] == "summary"
+    assert "long-24" in hist[0]["content"]          # newest cold user turn
+    assert [t["content"] for t in hist[1:]] == [f"long-{i}" for i in range(26, 30)]
+    assert len(_history(backend, "short")) == 6
+
+
+def test_session_longer_than_max_read_is_left_alone(backend):
+    _fill(backend, "big", 40)
+    _fill(backend, "ok", 20)
+    report = compact_sessions(backend, keep=4, min_cold=10, max_read=30)
+    assert report["too_long"] == 1 and report["compacted"] == 1
+    # the oldest, never-read turns must not be pruned
+    assert [t["content"] for t in _history(backend, "big")] == [f"big-{i}" for i in range(40)]
+    assert _history(backend, "ok")[0]["role"] == "summary"
+
+
+def test_dry_run_writes_nothing(backend):
+    _fill(backend, "s", 30)
+    report = compact_sessions(backend, keep=4, min_cold=10, dry_run=True)
+    assert report["compacted"] == 1
+    assert report["chars_after"] < report["chars_before"]
+    assert len(_history(backend, "s")) == 30
+
+
+def test_rerun_folds_previous_summary():
+    mem = InMemoryBackend()
+    _fill(mem, "s", 30)
+    compact_sessions(mem, keep=4, min_cold=10)
+    _fill(mem, "s", 30)
+    compact_sessions(mem, keep=4, min_cold=10)
+    hist = _history(mem, "s")
+    assert [t["role"] for t in hist].count("summary") == 1
+    assert len(hist) == 5
+
+
+def test_log_summary_survives_restart(tmp_path):
+    log_dir = tmp_path / "log"
+    mem = LogMemoryBackend(log_dir=log_dir, background_compaction=False)
+    _fill(mem, "s", 20)
+    mem.compact_prefix(15, "• gist", cid="s")
+    mem.add_turn("user", "after", cid="s")
+    before = _history(mem, "s")
+    mem.compact(force=True)
+    assert _history(mem, "s") == before
+    mem.close()
+
+    again = LogMemoryBackend(log_dir=log_dir, background_compaction=False)
+    assert _history(again, "s") == before
+    again.close()
+
+
+def test_summaries_run_on_executor():
+    mem = InMemoryBackend()
+    for s in range(6):
+        _fill(mem, f"s{s}", 40)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        report = compact_sessions(mem, keep=4, min_cold=10, workers=2, executor=pool)
+    assert report["compacted"] == 6
+    assert all(_history(mem, f"s{s}")[0]["role"] == "summary" for s in range(6))
+
+
+def test_assistant_only_prefix_is_skipped():
+    cold = [{"role": "assistant", "content": "hi"}] * 5
+    assert summarise_cold(cold) == ""
+
+
+def test_cli_dry_run(tmp_path):
+    db = tmp_path / "m.sqlite"
+    mem = SQLiteMemoryBackend(db_path=db)
+    _fill(mem, "s", 40)
+    mem.close()
+    r = subprocess.run(
+        [sys.executable, "scripts/compact_sessions.py", "--backend", "sqlite",
+         "--db-path", str(db), "--keep", "4", "--min-cold", "10", "--workers", "2",
+         "--dry-run"],
+        capture_output=True, text=True, check=True,
+    )
+    assert "Would compact 1/1 session(s), pruned 35 turn(s)" in r.stdout
+    assert "sessions/s" in r.stdout
@@ -0,0 +1,119 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_config_artefact.py – compiled config artefact
+# ════════════════════════════════════════════════════════════════════
+import json
+import os
+import pickle
+
+import pytest
+
+import config.config_artefact as art
+from config.config_artefact import ConfigSources, get_compiled_config, load_artefact
+from utils.safety_filters import get_safety_engine
+
+
+class FakeTokenizer:
+    name_or_path = "fake/ws"
+
+    def __len__(self):
+        return 1000
+
+    def __call__(self, text, add_special_tokens=True):
+        return {"input_ids": [len(w) for w in text.split()]}
+
+
+@pytest.fixture()
+def sources(tmp_path):
+    (tmp_path / "settings.json").write_text(json.dumps({"safety": {"strict_terms": ["zorp"]}}))
+    (tmp_path / "aliases.json").write_text(json.dumps(
+        {"Fun Fact": "fun_fact", "quote me": "quote", "ghost": "missing"}
+    ))
+    (tmp_path / "prompts.json").write_text(json.dumps(
+        {"fun_fact": "Share a fun fact.", "quote": "Give a famous quote now."}
+    ))
+    (tmp_path / "template.txt").write_text("  You are helpful.\n")
+    art._LOADED.clear()
+    return ConfigSources(*(str(tmp_path / n) for n in
+                           ("settings.json", "aliases.json", "prompts.json", "template.txt")))
+
+
+def test_compile_validate_and_mmap_load(sources, tmp_path):
+    cache = str(tmp_path / "cache")
+    cfg = get_compiled_config(sources, tokenizer=FakeTokenizer(), cache_dir=cache)
+    assert os.path.exists(cfg.path)
+    assert cfg.base_prompt == "You are helpful."
+    assert dict(cfg.aliases) == {"fun fact": "fun_fact", "quote me": "quote"}  # unknown dropped
+    assert cfg.alias_tokens == (("fun", "fact"), ("quote", "me"))
+    assert list(cfg.prompt_ids("quote")) == [4, 1, 6, 5, 4]
+    assert cfg.token_count("base_prompt") == 3
+    assert cfg.prompt_ids("nope") is None
+    assert cfg.safety_engine.scan("say zorp").strict
+
+    again = load_artefact(cfg.path, cfg.key)        # what a fresh worker does
+    assert again is not None and again.specialized_prompts == cfg.specialized_prompts
+    assert list(again.prompt_ids("fun_fact")) == [5, 1, 3, 5]
+    assert load_artefact(cfg.path, "0" * 32) is None  # stale key
+
+
+def test_cached_artefact_is_reused_and_rebuilt_on_change(sources, tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    first = get_compiled_config(sources, cache_dir=cache)
+    art._LOADED.clear()
+
+    calls = []
+    real = art.compile_config
+    monkeypatch.setattr(art, "compile_config", lambda *a: calls.append(1) or real(*a))
+    assert get_compiled_config(sources, cache_dir=cache).key == first.key
+    assert calls == []                                   # mapped, not recompiled
+
+    with open(sources.prompts, "w") as fh:
+        json.dump({"fun_fact": "Changed.", "quote": "Q."}, fh)
+    second = get_compiled_config(sources, cache_dir=cache)
+    assert calls == [1] and second.key != first.key
+    assert second.specialized_prompts["fun_fact"] == "Changed."
+
+
+def test_code_upgrade_forces_a_rebuild(sources, tmp_path, monkeypatch):
+    cache = str(tmp_path / "cache")
+    first = get_compiled_config(sources, cache_dir=cache)
+    art._LOADED.clear()
+
+    calls = []
+    real = art.compile_config
+    monkeypatch.setattr(art, "compile_config", lambda *a: calls.append(1) or real(*a))
+    monkeypatch.setattr(art, "code_fingerprint", lambda: "upgraded")
+    second = get_compiled_config(sources, cache_dir=cache)
+    assert calls == [1] and second.key != first.key     # old pickle never mapped
+    assert load_artefact(first.path, second.key) is None
+
+
+def test_tokenizer_is_part_of_the_key(sources, tmp_path):
+    cache = str(tmp_path / "cache")
+    plain = get_compiled_config(sources, cache_dir=cache)
+    tok = get_compiled_config(sources, tokenizer=FakeTokenizer(), cache_dir=cache)
+    assert plain.key != tok.key
+    assert plain.token_count("quote") is None and tok.token_count("quote") == 5
+
+
+def test_corrupt_artefact_is_rebuilt(sources, tmp_path):
+    cache = str(tmp_path / "cache")
+    cfg = get_compiled_config(sources, cache_dir=cache)
+    art._LOADED.clear()
+    with open(cfg.path, "r+b") as fh:
+        fh.write(b"garbage")
+    assert load_artefact(cfg.path) is None
+    assert get_compiled_config(sources, cache_dir=cache).base_prompt == "You are helpful."
+
+
+def test_invalid_prompts_raise(sources):
+    with open(sources.prompts, "w") as fh:
+        json.dump({"fun_fact": 3}, fh)
+    with pytest.raises(ValueError):
+        art.compile_config(sources)
+
+
+def test_safety_engine_pickles_and_is_preloaded(sources, tmp_path):
+    cfg = get_compiled_config(sources, cache_dir=str(tmp_path / "cache"))
+    clone = pickle.loads(pickle.dumps(cfg.safety_engine))
+    assert clone.scan("oh damn").terms == cfg.safety_engine.scan("oh damn").terms
+    assert get_safety_engine({"safety": {"strict_terms": ["zorp"]}}) is cfg.safety_engine
@@ -0,0 +1,125 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_engine_headless.py – engine imports light, runs without UI
+# ════════════════════════════════════════════════════════════════════
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import engine.pipeline as pipeline
+from config.config_artefact import ConfigSources, get_compiled_config
+from config.request_context import request_context
+from engine.model_store import ModelUnavailableError
+from scripts.bench_startup import parse_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with just enough of the HF call surface."""
+
+    name_or_path = "fake/ws"
+
+    def __len__(self):
+        return 100
+
+    def __call__(self, text, return_tensors=None, add_special_tokens=True):
+        ids = [len(w) for w in text.split()]
+        if return_tensors is None:
+            return {"input_ids": ids}
+        return SimpleNamespace(input_ids=SimpleNamespace(to=lambda device: text))
+
+    def decode(self, out, skip_special_tokens=True):
+        return out
+
+
+class EchoModel:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, prompt, **gen_cfg):
+        self.calls.append(gen_cfg)
+        return [f"echo:{prompt.rsplit('User: ', 1)[-1].split(chr(10))[0]}"]
+
+
+@pytest.fixture()
+def fake_runtime(tmp_path, monkeypatch):
+    tok, mdl = FakeTokenizer(), EchoModel()
+    pipeline.RUNTIME.set(tok, mdl, "cpu")
+    cfg = get_compiled_config(
+        ConfigSources(
+            prompts=os.path.join(ROOT, "config/specialized_prompts.json"),
+            template=os.path.join(ROOT, "config/prompt_template.txt"),
+        ),
+        tokenizer=tok,
+        cache_dir=str(tmp_path),
+    )
+    monkeypatch.setattr(pipeline, "_COMPILED", cfg)
+    yield mdl
+    pipeline.RUNTIME.set(None)
+
+
+def test_import_is_headless():
+    code = (
+        "import sys, engine, main; "
+        "print([m for m in ('torch', 'transformers', 'gradio') if m in sys.modules]); "
+        "print(engine.get_runtime().ready)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout.split("\n")
+    assert out[0] == "[]" and out[1] == "False"
+
+
+def test_handle_request_runs_the_pipeline(fake_runtime):
+    req = request_context(pipeline.SETTINGS_SERVICE.current(), temperature=0.3, max_new_tokens=7)
+    history, src, stop = pipeline.handle_request("tell me a fun fact", [], req)
+    assert history[-1] == {"role": "assistant", "content": "echo:tell me a fun fact"}
+    assert fake_runtime.calls[-1]["temperature"] == 0.3
+    assert fake_runtime.calls[-1]["max_new_tokens"] == 7
+    assert src in pipeline.specialized_prompts() or src == "base_prompt"
+    assert stop in ("eos", "length")
+
+
+def test_blocked_input_never_reaches_the_model(fake_runtime):
+    req = request_context(pipeline.SETTINGS_SERVICE.current(), safety="strict")
+    history, src, stop = pipeline.handle_request("damn it", [], req)
+    assert src == "blocked" and stop is None and fake_runtime.calls == []
+    assert history[-1]["role"] == "assistant"
+
+
+def test_alias_routing_never_loads_the_tokenizer(monkeypatch):
+    class Offline:
+        prefix_cache = None
+
+        @property
+        def tokenizer(self):
+            raise ModelUnavailableError("offline")
+
+    sources = ConfigSources(
+        prompts=os.path.join(ROOT, "config/specialized_prompts.json"),
+        template=os.path.join(ROOT, "config/prompt_template.txt"),
+        aliases=os.path.join(ROOT, "config/prompt_aliases.json"),
+    )
+    monkeypatch.setattr(pipeline, "ENGINE", Offline())
+    monkeypatch.setattr(pipeline, "_COMPILED", None)
+    monkeypatch.setattr(pipeline, "_sources", lambda: sources)
+    assert pipeline.compiled().tokenizer_id == ""
+    fresh = pipeline.SETTINGS_SERVICE.current().with_overrides({"prompt_matching": {"fuzzy_cutoff": 0.69}})
+    prompt, concept, _ = pipeline.get_specialized_prompt(
+        "tell me a fun fact", pipeline.specialized_prompts(), False, fresh)
+    assert concept == "fun_fact" and prompt
+
+
+def test_parse_importtime():
+    err = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      5000 |       9000 | engine\n"
+    )
+    rows = parse_importtime(err, 1)
+    assert rows == [{"module": "engine", "self_us": 5000, "cumulative_us": 9000}]
+    json.dumps(rows)
@@ -29,7 +29,8 @@ context, source = main.prepare_context(
     history,
     base_prompt,
     specialized_prompts,
-    fuzzy_matching_enabled
+    fuzzy_matching_enabled,
+    settings=SETTINGS,
 )
 
 print("\n=== Short History Test ===")
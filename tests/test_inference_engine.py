@@ -0,0 +1,76 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_inference_engine.py – engine interface, factory, fake engine
+# ════════════════════════════════════════════════════════════════════
+import logging
+import os
+
+import pytest
+
+import engine.inference as inference
+import engine.pipeline as pipeline
+from config.config_artefact import ConfigSources, get_compiled_config
+from config.request_context import request_context
+from engine.inference import FakeEngine, InferenceEngine, TorchEngine, create_engine
+from engine.model import ModelRuntime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = "You are helpful.\nUser: how are you today\nAssistant:"
+
+
+@pytest.fixture()
+def fake_engine(tmp_path, monkeypatch):
+    eng = FakeEngine()
+    cfg = get_compiled_config(
+        ConfigSources(
+            prompts=os.path.join(ROOT, "config/specialized_prompts.json"),
+            template=os.path.join(ROOT, "config/prompt_template.txt"),
+        ),
+        tokenizer=eng.tokenizer,
+        cache_dir=str(tmp_path),
+    )
+    monkeypatch.setattr(pipeline, "ENGINE", eng)
+    monkeypatch.setattr(pipeline, "_COMPILED", cfg)
+    return eng
+
+
+def test_fake_engine_is_deterministic():
+    a, b = FakeEngine(), FakeEngine()
+    assert isinstance(a, InferenceEngine)
+    assert a.generate(PROMPT) == b.generate(PROMPT) == "echo: how are you today"
+    assert a.generate(PROMPT, max_new_tokens=2) == "echo: how"
+    assert "".join(a.stream(PROMPT)) == a.generate(PROMPT)
+    assert a.generate_batch([PROMPT, "User: hi"]) == ["echo: how are you today", "echo: hi"]
+    assert a.count_tokens("two words") == b.count_tokens("two words") == 3
+
+
+def test_factory_picks_and_falls_back(monkeypatch, caplog):
+    rt = ModelRuntime("some/model")
+    assert isinstance(create_engine("fake"), FakeEngine)
+    assert isinstance(create_engine("torch", rt), TorchEngine)
+
+    monkeypatch.setattr(inference, "onnx_available", lambda: False)
+    with caplog.at_level(logging.WARNING):
+        eng = create_engine("onnx", rt)
+    assert isinstance(eng, TorchEngine) and eng.runtime is rt
+    assert "onnxruntime" in caplog.text
+    assert isinstance(create_engine("tensorrt", rt), TorchEngine)
+
+
+def test_pipeline_runs_on_the_fake_engine(fake_engine):
+    req = request_context(pipeline.SETTINGS_SERVICE.current(), temperature=0.2, max_new_tokens=50)
+    history, _, _ = pipeline.handle_request("tell me a fun fact", [], req)
+    assert history[-1] == {"role": "assistant", "content": "echo: tell me a fun fact"}
+    assert fake_engine.calls[-1]["temperature"] == 0.2
+    assert "".join(pipeline.generate_stream(PROMPT, {})) == pipeline.generate(PROMPT, {})
+    assert pipeline.count_tokens("a b c") == 4
+
+
+def test_onnx_export_is_reused(tmp_path):
+    pytest.importorskip("optimum.onnxruntime")
+    model_dir = os.getenv("ONNX_TEST_MODEL_DIR")
+    if not model_dir:
+        pytest.skip("set ONNX_TEST_MODEL_DIR to a local seq2seq model directory")
+    first = inference.export_onnx(model_dir)
+    stamp = (first / inference.ONNX_MARKER).stat().st_mtime
+    assert inference.export_onnx(model_dir) == first
+    assert (first / inference.ONNX_MARKER).stat().st_mtime == stamp
@@ -1,5 +1,5 @@
 # experiments/test_memory_toggle.py
-import re, pytest, importlib, copy
+import re, pytest, importlib
 from pathlib import Path
 from typing import Generator
 
@@ -24,23 +24,20 @@ _MAIN.SPECIALIZED_PROMPTS_PATH = str(empty_spec_path)   # type: ignore[attr-defi
 BASE = _MAIN.load_base_prompt()
 SPEC = _MAIN.load_specialized_prompts()
 
-_MAIN.SETTINGS["context"]["max_prompt_tokens"] = 2048
+_MAIN.SETTINGS_SERVICE.patch({"context": {"max_prompt_tokens": 2048}})
 
 # ──────────────────────────────────────────────────────────────
 @pytest.fixture()
 def restore_settings() -> Generator[None, None, None]:
-    # snapshot & restore global SETTINGS so tests don't leak config
-    from config.settings_loader import load_settings
-    clean_settings = load_settings()
-    snap = copy.deepcopy(_MAIN.SETTINGS)
+    # snapshot & restore the published settings so tests don't leak config
+    snap = _MAIN.SETTINGS_SERVICE.current()
     yield
-    _MAIN.SETTINGS.clear()
-    _MAIN.SETTINGS.update(clean_settings)
+    _MAIN.SETTINGS_SERVICE.replace(snap)
 
 @pytest.mark.parametrize("mem_on", [True, False])
 def test_memory_toggle(mem_on, restore_settings):
     set_memory_enabled(mem_on)
-    _MAIN.SETTINGS["memory"]["enabled"] = mem_on  # keep prepare_context in sync
+    assert _MAIN.SETTINGS["memory"]["enabled"] is mem_on  # prepare_context sees it
     _MAIN.memory.clear()
 
     if mem_on:
@@ -0,0 +1,173 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_model_router.py – concept → model tier routing
+# ════════════════════════════════════════════════════════════════════
+import threading
+
+import pytest
+
+import engine.pipeline as pipeline
+from engine.inference import FakeEngine
+from engine.model_router import ModelRouter, policy_from_settings
+from engine.single_flight import SingleFlight
+
+GREEDY = {"max_new_tokens": 20, "do_sample": False}
+MODEL = {"engine": "fake", "name": "big", "revision": "main"}
+ROUTING = {
+    "enabled": True,
+    "tiers": {"small": {"name": "small"}, "mini": {"name": "mini"}, "base": {}},
+    "concepts": {"fun_fact": "small", "funny_response": "mini", "odd": "missing"},
+    "default_tier": "base",
+    "fallback_tier": "small",
+    "max_queue": 1,
+    "max_loaded": 2,
+}
+
+
+class TierEngine(FakeEngine):
+    """Fake engine that is 'loaded' once it generated and can be unloaded."""
+
+    def __init__(self, label):
+        super().__init__(reply=lambda _: label)
+        self.loaded = False
+
+    @property
+    def ready(self):
+        return self.loaded
+
+    def generate(self, prompt, **gen_cfg):
+        self.loaded = True
+        return super().generate(prompt, **gen_cfg)
+
+    def unload(self):
+        loaded, self.loaded = self.loaded, False
+        return loaded
+
+
+@pytest.fixture()
+def router():
+    built = {}
+
+    def factory(cfg):
+        return built.setdefault(cfg["name"], TierEngine(cfg["name"]))
+
+    main = TierEngine("big")
+    return ModelRouter(main, factory=factory), main, built
+
+
+def _run(router, policy, concept):
+    picked = router.route(policy, concept, MODEL)
+    with router.running(picked):
+        return picked, picked.engine.generate("User: hi\nAssistant:")
+
+
+def test_policy_defaults_and_unknown_tiers():
+    assert not policy_from_settings({}).enabled
+    policy = policy_from_settings(ROUTING)
+    assert policy.tier_for("fun_fact") == "small"
+    assert policy.tier_for("odd") == "base" and policy.tier_for(None) == "base"
+    assert policy_from_settings({**ROUTING, "fallback_tier": "nope"}).fallback_tier == ""
+
+
+def test_tiers_share_engines_and_main_is_reused(router):
+    rt, main, built = router
+    policy = policy_from_settings(ROUTING)
+    base, text = _run(rt, policy, "code_explanation")
+    assert base.engine is main and base.key == "main" and text == "big"
+    small, text = _run(rt, policy, "fun_fact")
+    assert small.engine is built["small"] and text == "small"
+    assert rt.route(policy, "fun_fact", MODEL).engine is small.engine
+    assert rt.stats["small"]["requests"] == 1 and rt.stats["base"]["loads"] == 1
+    assert set(rt.latency_ms("small")) == {"mean", "p50", "p95"}
+    assert "small: 1 req" in rt.describe()
+
+
+def test_lru_unloads_idle_tiers_but_never_main(router):
+    rt, main, built = router
+    policy = policy_from_settings(ROUTING)  # max_loaded=2
+    _run(rt, policy, "code_explanation")
+    _run(rt, policy, "fun_fact")
+    assert main.ready and built["small"].ready
+    _run(rt, policy, "funny_response")  # mini needs room → small goes, main stays
+    assert main.ready and built["mini"].ready and not built["small"].ready
+    assert rt.stats["small"]["unloads"] == 1
+    _run(rt, policy, "fun_fact")
+    assert built["small"].ready and not built["mini"].ready
+
+
+def test_concurrent_first_requests_reserve_their_slot(router):
+    rt, main, built = router
+    policy = policy_from_settings({
+        **ROUTING,
+        "tiers": {**ROUTING["tiers"], "tiny": {"name": "tiny"}},
+        "concepts": {**ROUTING["concepts"], "quote": "tiny"},
+        "max_loaded": 3,
+    })
+    _run(rt, policy, "code_explanation")
+    _run(rt, policy, "funny_response")               # main + mini loaded
+    small = rt.route(policy, "fun_fact", MODEL)
+    tiny = rt.route(policy, "quote", MODEL)
+    with rt.running(small):                          # reserved, still loading
+        with rt.running(tiny):                       # must not count on small's slot
+            assert not built["mini"].ready
+            tiny.engine.generate("User: hi\nAssistant:")
+        small.engine.generate("User: hi\nAssistant:")
+    assert len(rt.loaded()) + int(main.ready) == 3
+
+
+def test_engine_unloaded_after_route_is_reloaded_with_room(router):
+    rt, main, built = router
+    policy = policy_from_settings(ROUTING)  # max_loaded=2
+    _run(rt, policy, "code_explanation")
+    _run(rt, policy, "fun_fact")
+    picked = rt.route(policy, "fun_fact", MODEL)     # small handed out …
+    _run(rt, policy, "funny_response")               # … then unloaded for mini
+    assert not picked.engine.ready
+    with rt.running(picked):
+        assert not built["mini"].ready               # room made again on entry
+        picked.engine.generate("User: hi\nAssistant:")
+    assert rt.stats["small"]["loads"] == 2
+
+
+def test_saturated_tier_falls_back(router):
+    rt, _, built = router
+    policy = policy_from_settings(ROUTING)  # max_queue=1
+    first = rt.route(policy, "code_explanation", MODEL)
+    with rt.running(first):
+        assert rt.in_flight("base") == 1
+        second = rt.route(policy, "code_explanation", MODEL)
+        assert second.tier == "small" and second.fallback
+        with rt.running(second):
+            pass
+    assert rt.route(policy, "code_explanation", MODEL).tier == "base"
+    assert rt.stats["small"]["fallbacks"] == 1 and "1 fallback" in rt.describe()
+
+
+def test_pipeline_routes_by_concept(router, monkeypatch):
+    rt, main, built = router
+    monkeypatch.setattr(pipeline, "ENGINE", main)
+    monkeypatch.setattr(pipeline, "ROUTER", rt)
+    monkeypatch.setattr(pipeline, "IN_FLIGHT", SingleFlight())
+    settings = {"model": MODEL, "routing": ROUTING, "response_cache": {"enabled": True}}
+    ctx = "Base\nUser: tell me a fact\nAssistant:"
+
+    assert pipeline.generate(ctx, GREEDY, settings, concept="fun_fact") == "small"
+    assert pipeline.generate(ctx, GREEDY, settings, concept="code_explanation") == "big"
+    # the response cache is keyed per tier: the repeat hits, nothing is regenerated
+    assert pipeline.generate(ctx, GREEDY, settings, concept="fun_fact") == "small"
+    assert len(built["small"].calls) == 1 and len(main.calls) == 1
+    assert "".join(pipeline.generate_stream(ctx, {**GREEDY, "do_sample": True}, settings, "fun_fact")) == "small"
+
+    off = {**settings, "routing": {**ROUTING, "enabled": False}}
+    assert pipeline.route("fun_fact", off) is None
+    assert pipeline.generate(ctx, {**GREEDY, "do_sample": True}, off, concept="fun_fact") == "big"
+
+
+def test_concurrent_tier_accounting(router):
+    rt, _, _ = router
+    policy = policy_from_settings({**ROUTING, "max_queue": 0})
+    threads = [threading.Thread(target=_run, args=(rt, policy, "fun_fact")) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert rt.stats["small"]["requests"] == 8 and rt.in_flight("small") == 0
@@ -0,0 +1,106 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_model_store.py – pinned local model directories
+# ════════════════════════════════════════════════════════════════════
+import json
+
+import pytest
+
+import engine.model_store as ms
+from engine.model import runtime_from_settings
+from engine.model_store import ModelStore, ModelUnavailableError
+
+
+@pytest.fixture()
+def fake_hub(monkeypatch):
+    calls = []
+
+    def download(repo_id, revision, local_dir, allow_patterns):
+        calls.append((repo_id, revision))
+        with open(f"{local_dir}/config.json", "w") as fh:
+            json.dump({"model_type": "t5"}, fh)
+        with open(f"{local_dir}/model.safetensors", "wb") as fh:
+            fh.write(b"\0" * 64)
+
+    monkeypatch.setattr(ms, "_download", download)
+    for name in ms._OFFLINE_ENV:
+        monkeypatch.delenv(name, raising=False)
+    return calls
+
+
+def test_fetch_once_then_verify(tmp_path, fake_hub):
+    store = ModelStore(str(tmp_path))
+    path = store.ensure("org/model", "abc123")
+    assert path == tmp_path / "org--model@abc123"
+    manifest = json.loads((path / "manifest.json").read_text())
+    assert manifest["revision"] == "abc123"
+    assert set(manifest["files"]) == {"config.json", "model.safetensors"}
+    assert "fetch" in store.timings
+
+    again = ModelStore(str(tmp_path))
+    assert again.ensure("org/model", "abc123") == path
+    assert fake_hub == [("org/model", "abc123")]            # no second download
+    assert "fetch" not in again.timings
+
+
+def test_damaged_copy_is_refetched(tmp_path, fake_hub):
+    store = ModelStore(str(tmp_path))
+    path = store.ensure("org/model")
+    (path / "model.safetensors").write_bytes(b"\0" * 10)     # truncated
+    assert store.verify(path) is None
+    store.ensure("org/model")
+    assert len(fake_hub) == 2 and store.verify(path) is not None
+
+
+def test_full_verify_catches_same_size_corruption(tmp_path, fake_hub):
+    store = ModelStore(str(tmp_path), verify="full")
+    path = store.ensure("org/model")
+    (path / "model.safetensors").write_bytes(b"\1" * 64)
+    assert ModelStore(str(tmp_path)).verify(path) is not None  # size check passes
+    assert store.verify(path) is None
+
+
+def test_offline_fails_fast_with_instructions(tmp_path, fake_hub, monkeypatch):
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    with pytest.raises(ModelUnavailableError, match="offline mode.*fetch_model.py org/model"):
+        ModelStore(str(tmp_path)).ensure("org/model", "v1")
+    assert fake_hub == []
+
+
+def test_fetch_errors_are_reported_clearly(tmp_path, monkeypatch):
+    def boom(*_):
+        raise ConnectionError("name resolution failed")
+
+    monkeypatch.setattr(ms, "_download", boom)
+    with pytest.raises(ModelUnavailableError, match="cannot fetch model org/model@main"):
+        ModelStore(str(tmp_path), offline=False).ensure("org/model")
+    assert not any(tmp_path.iterdir())                       # no half-written dirs
+
+
+def test_local_directory_is_used_as_is(tmp_path):
+    assert ModelStore(str(tmp_path / "store"), offline=True).ensure(str(tmp_path)) == tmp_path
+
+
+def test_weights_fingerprint_follows_the_weights(tmp_path, fake_hub):
+    local = tmp_path / "mine"
+    local.mkdir()
+    (local / "model.safetensors").write_bytes(b"\0" * 64)
+    before = ms.weights_fingerprint(str(local))
+    (local / "onnx").mkdir()                                 # derived caches do not count
+    (local / "onnx" / "export.json").write_text("{}")
+    assert ms.weights_fingerprint(str(local)) == before
+    (local / "model.safetensors").write_bytes(b"\1" * 65)   # weights replaced in place
+    assert ms.weights_fingerprint(str(local)) != before
+
+    path = ModelStore(str(tmp_path / "store")).ensure("org/model", "abc123")
+    manifest = json.loads((path / "manifest.json").read_text())
+    pinned = ms.weights_fingerprint(str(path))
+    manifest["files"]["model.safetensors"]["sha256"] = "0" * 64
+    (path / "manifest.json").write_text(json.dumps(manifest))
+    assert ms.weights_fingerprint(str(path)) != pinned
+
+
+def test_runtime_path_resolution_is_lazy(tmp_path, fake_hub):
+    rt = runtime_from_settings({"name": "org/model", "revision": "r1", "cache_dir": str(tmp_path)})
+    assert fake_hub == [] and not rt.ready
+    assert rt.path.endswith("org--model@r1")
+    assert "resolve" in rt.timings
@@ -0,0 +1,148 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_moderate_history.py – batch safety API + history re-masking
+# ════════════════════════════════════════════════════════════════════
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings_loader import FALLBACK_SETTINGS
+from memory.backends import redis_memory_backend
+from memory.backends.log_memory_backend import LogMemoryBackend
+from memory.backends.redis_memory_backend import InMemoryBackend, RedisMemoryBackend
+from memory.backends.sharded_sqlite_memory_backend import ShardedSQLiteMemoryBackend
+from memory.backends.sqlite_memory_backend import SQLiteMemoryBackend
+from memory.moderation import moderate_sessions
+from utils.safety_filters import assess_safety, evaluate_safety_batch
+
+POLICY = {"safety": {"sensitivity_level": "moderate", "strict_terms": ["foobar"],
+                     "extra_phrases": {"zonk": "new term"}}}
+
+
+# ────────────────────────── helpers ──────────────────────────
+@pytest.fixture(params=["in_memory", "sqlite", "redis", "log", "sharded_sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    name = request.param
+    if name == "in_memory":
+        yield InMemoryBackend()
+        return
+    if name == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            redis_memory_backend,
+            "redis",
+            SimpleNamespace(from_url=lambda *_, **kw: fakeredis.FakeRedis(server=server, **kw)),
+        )
+        monkeypatch.setattr(redis_memory_backend, "_redis_available", True)
+        yield RedisMemoryBackend(redis_url="redis://test/0")
+        return
+    b = {
+        "sqlite": lambda: SQLiteMemoryBackend(db_path=tmp_path / "m.sqlite"),
+        "log": lambda: LogMemoryBackend(log_dir=tmp_path / "log", background_compaction=False),
+        "sharded_sqlite": lambda: ShardedSQLiteMemoryBackend(db_dir=tmp_path / "shards"),
+    }[name]()
+    yield b
+    b.close()
+
+
+def _history(mem, cid):
+    return [(t["role"], t["content"]) for t in reversed(mem.get_recent(limit=1_000, cid=cid))]
+
+
+def _fill(mem):
+    mem.add_turn("user", "what a zonk", cid="a")
+    mem.add_turn("assistant", "zonk indeed", cid="a")
+    mem.add_turn("user", "fine", cid="a")
+    mem.add_turn("assistant", "all clean", cid="b")
+    mem.add_turn("assistant", "you foobar", cid="c")
+
+
+# ────────────────────────── batch API ────────────────────────
+def test_batch_matches_single_verdicts():
+    msgs = ["hello", "oh shit", "you foobar", "zonk zonk", "hello", ""]
+    batch = evaluate_safety_batch(msgs, POLICY)
+    assert len(batch) == len(msgs)
+    for msg, v in zip(msgs, batch):
+        single = assess_safety(msg, POLICY)
+        assert (v.allowed, v.blocked_message, v.scan.spans) == (
+            single.allowed, single.blocked_message, single.scan.spans)
+    assert batch[0] is batch[4]                  # duplicates share one verdict
+    assert not batch[2].allowed
+
+
+# ────────────────────────── backends ─────────────────────────
+def test_rewrite_turns_keeps_order_and_roles(backend):
+    _fill(backend)
+    n = backend.rewrite_turns({("assistant", "zonk indeed"): "**** indeed",
+                               ("assistant", "missing"): "x"}, cid="a")
+    assert n == 1
+    assert _history(backend, "a") == [
+        ("user", "what a zonk"), ("assistant", "**** indeed"), ("user", "fine")]
+    assert backend.rewrite_turns({("user", "nope"): "x"}, cid="a") == 0
+
+
+def test_report_then_apply(backend):
+    _fill(backend)
+    report = moderate_sessions(backend, POLICY)
+    assert report["sessions"] == 3
+    assert report["turns_scanned"] == 5
+    assert report["flagged_turns"] == 3
+    assert report["flagged_sessions"] == 2
+    assert report["blocked_turns"] == report["strict_turns"] == 1
+    assert report["top_terms"] == {"zonk": 2, "foobar": 1}
+    assert report["remasked"] == 0
+    assert _history(backend, "a")[1] == ("assistant", "zonk indeed")
+
+    report = moderate_sessions(backend, POLICY, apply=True)
+    assert report["remasked"] == 2
+    assert _history(backend, "a") == [
+        ("user", "what a zonk"), ("assistant", "**** indeed"), ("user", "fine")]
+    assert _history(backend, "c") == [("assistant", "you ******")]
+
+
+def test_log_rewrite_survives_restart(tmp_path):
+    log_dir = tmp_path / "log"
+    mem = LogMemoryBackend(log_dir=log_dir, background_compaction=False)
+    _fill(mem)
+    mem.compact_prefix(1, "• zonk talk", cid="a")
+    moderate_sessions(mem, POLICY, apply=True)
+    before = _history(mem, "a")
+    assert before[0] == ("summary", "• **** talk")
+    mem.compact(force=True)
+    assert _history(mem, "a") == before
+    mem.close()
+
+    again = LogMemoryBackend(log_dir=log_dir, background_compaction=False)
+    assert _history(again, "a") == before
+    again.close()
+
+
+def test_batches_run_on_executor():
+    mem = InMemoryBackend()
+    for s in range(20):
+        mem.add_turn("assistant", f"zonk {s}", cid=f"s{s}")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        report = moderate_sessions(mem, POLICY, apply=True, workers=2,
+                                   batch_turns=3, executor=pool)
+    assert report["remasked"] == 20
+    assert all(_history(mem, f"s{s}")[0][1].startswith("****") for s in range(20))
+
+
+def test_cli_report(tmp_path):
+    db = tmp_path / "m.sqlite"
+    cfg = tmp_path / "settings.json"
+    cfg.write_text(json.dumps({**FALLBACK_SETTINGS, **POLICY}))
+    mem = SQLiteMemoryBackend(db_path=db)
+    _fill(mem)
+    mem.close()
+    r = subprocess.run(
+        [sys.executable, "scripts/moderate_history.py", "--backend", "sqlite",
+         "--db-path", str(db), "--settings", str(cfg), "--workers", "2"],
+        capture_output=True, text=True, check=True,
+    )
+    assert "Flagged 3 turn(s) in 2/3 session(s)" in r.stdout
+    assert "turns/s" in r.stdout
@@ -0,0 +1,60 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_precision.py – fp32 / bf16 / int8 inference modes
+# ════════════════════════════════════════════════════════════════════
+import contextlib
+
+import pytest
+
+from engine.eval_prompts import agreement
+from engine.model import runtime_from_settings
+from engine.precision import inference_context, normalise_precision
+
+
+def test_normalise_precision():
+    assert normalise_precision("INT8") == "int8"
+    assert normalise_precision(None) == "fp32"
+    assert normalise_precision("fp8") == "fp32"
+    assert normalise_precision("int8", device="cuda") == "fp32"   # CPU-only
+    assert normalise_precision("bf16", device="cuda") == "bf16"
+
+
+def test_fp32_and_int8_need_no_autocast():
+    assert isinstance(inference_context("fp32"), contextlib.nullcontext)
+    assert isinstance(inference_context("int8"), contextlib.nullcontext)
+
+
+def test_runtime_reads_precision_from_settings(tmp_path):
+    rt = runtime_from_settings({"precision": "int8", "cache_dir": str(tmp_path)})
+    assert rt.precision == "int8" and not rt.ready
+
+
+def test_agreement_against_reference():
+    ref = [[1, 2, 3], [4, 5]]
+    assert agreement(ref, ref) == {"exact_match": 1.0, "token_agreement": 1.0}
+    got = agreement(ref, [[1, 2, 9], [4, 5, 6]])
+    assert got["exact_match"] == 0.0
+    assert got["token_agreement"] == pytest.approx((2 / 3 + 2 / 3) / 2, abs=1e-4)
+
+
+def test_int8_cache_roundtrip(tmp_path):
+    torch = pytest.importorskip("torch")
+    from engine.precision import apply_precision, load_quantized, quantized_cache_path
+
+    model = torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 2))
+    x = torch.randn(3, 8)
+    q = apply_precision(model, "int8", str(tmp_path))
+    assert quantized_cache_path(str(tmp_path)).exists()
+    again = load_quantized(str(tmp_path))
+    assert again is not None
+    assert torch.allclose(q(x), again(x))
+
+
+def test_int8_cache_is_ignored_after_weights_change(tmp_path):
+    torch = pytest.importorskip("torch")
+    from engine.precision import apply_precision, load_quantized
+
+    (tmp_path / "model.safetensors").write_bytes(b"\0" * 8)
+    apply_precision(torch.nn.Sequential(torch.nn.Linear(4, 4)), "int8", str(tmp_path))
+    assert load_quantized(str(tmp_path)) is not None
+    (tmp_path / "model.safetensors").write_bytes(b"\1" * 16)  # new weights, same dir
+    assert load_quantized(str(tmp_path)) is None
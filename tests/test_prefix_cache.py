@@ -0,0 +1,66 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_prefix_cache.py – static prefix split & cached encoder states
+# ════════════════════════════════════════════════════════════════════
+import pytest
+
+from engine.inference import TorchEngine, create_engine
+from engine.model import ModelRuntime
+from engine.prefix_cache import PrefixCache
+
+BASE = "You are a helpful assistant."
+SPEC = "You are a helpful assistant. You know history."
+
+
+def test_split_uses_longest_registered_prefix():
+    cache = PrefixCache()
+    cache.register([BASE, SPEC, ""])
+    assert cache.prefixes == (SPEC, BASE)
+    assert cache.split(f"{SPEC}\nUser: hi\nAssistant:") == (SPEC, "\nUser: hi\nAssistant:")
+    assert cache.split(f"{BASE}\nUser: hi") == (BASE, "\nUser: hi")
+    assert cache.split("Other prompt\nUser: hi") is None
+    assert cache.split(BASE) is None  # nothing dynamic to encode
+
+
+def test_register_drops_stale_states():
+    cache = PrefixCache()
+    cache.register([BASE, SPEC])
+    cache._states = {BASE: "b", SPEC: "s"}
+    cache.register([BASE])
+    assert cache._states == {BASE: "b"} and cache.prefixes == (BASE,)
+
+
+def test_factory_enables_cache_for_torch_only():
+    rt = ModelRuntime("some/model")
+    assert create_engine("torch", rt).prefix_cache is None
+    eng = create_engine("torch", rt, {"prefix_cache": True})
+    assert isinstance(eng, TorchEngine) and isinstance(eng.prefix_cache, PrefixCache)
+
+
+def test_cached_encoding_matches_shapes_and_reuses_states():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+
+    class Tok:
+        def __call__(self, text, return_tensors=None, add_special_tokens=True):
+            ids = [len(w) for w in text.split()] + ([1] if add_special_tokens else [])
+            return type("Enc", (), {"input_ids": torch.tensor([ids])})()
+
+    class Encoder:
+        calls = 0
+
+        def __call__(self, input_ids):
+            Encoder.calls += 1
+            hidden = input_ids.float().unsqueeze(-1).repeat(1, 1, 4)
+            return type("Out", (), {"last_hidden_state": hidden})()
+
+    class Model:
+        def get_encoder(self):
+            return Encoder()
+
+    cache, model = PrefixCache(), Model()
+    cache.register([BASE])
+    first = cache.encoder_inputs(f"{BASE}\nUser: hi there", Tok(), model, "cpu")
+    second = cache.encoder_inputs(f"{BASE}\nUser: bye", Tok(), model, "cpu")
+    assert first["encoder_outputs"].last_hidden_state.shape == (1, 5 + 3 + 1, 4)
+    assert second["attention_mask"].shape == (1, 5 + 2 + 1)
+    assert Encoder.calls == 3 and cache.stats()["hits"] == 1
@@ -7,7 +7,10 @@ from typing import Any, Dict, Generator, List
 
 import pytest
 
-from main import prepare_context, SETTINGS
+from main import prepare_context
+
+# per-test settings dict, passed explicitly to prepare_context(settings=…)
+SETTINGS: Dict[str, Any] = {}
 
 # ───────────────────────────── Helpers ─────────────────────────────
 
@@ -26,7 +29,7 @@ def restore_settings() -> Generator[None, None, None]:
     # snapshot & restore global SETTINGS so tests don't leak config
     # Load fresh settings instead of using potentially contaminated state
     from config.settings_loader import load_settings
-    clean_settings = load_settings()
+    clean_settings = copy.deepcopy(load_settings())
     # Clear and reset BEFORE the test runs
     SETTINGS.clear()
     SETTINGS.update(clean_settings)
@@ -75,7 +78,7 @@ def test_summary_injected_when_triggered_by_turns(
         long_history.append({"role": role, "content": content})
 
     pre_ctx: str = _build_naive_context(long_history, msg, base_prompt)
-    context, _ = prepare_context(msg, long_history, base_prompt, spec_prompts, fuzzy)
+    context, _ = prepare_context(msg, long_history, base_prompt, spec_prompts, fuzzy, settings=SETTINGS)
 
     # a) summary present (heuristic returns bullet lines)
     assert ("• " in context) or ("Summary" in context)
@@ -115,7 +118,7 @@ def test_no_summary_when_disabled(
     spec_prompts: Dict[str, str] = {}
     fuzzy: bool = False
 
-    context, _ = prepare_context(msg, sample_history, base_prompt, spec_prompts, fuzzy)
+    context, _ = prepare_context(msg, sample_history, base_prompt, spec_prompts, fuzzy, settings=SETTINGS)
 
     # no summary markers when disabled
     assert "• " not in context
@@ -144,7 +147,7 @@ def test_summary_order_and_format(
     spec_prompts: Dict[str, str] = {}
     fuzzy: bool = False
 
-    context, _ = prepare_context(msg, sample_history, base_prompt, spec_prompts, fuzzy)
+    context, _ = prepare_context(msg, sample_history, base_prompt, spec_prompts, fuzzy, settings=SETTINGS)
 
     # expect bullets near the top (after the base prompt line)
     lines = context.splitlines()
@@ -0,0 +1,58 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_request_context.py – per-request settings isolation
+# ════════════════════════════════════════════════════════════════════
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config.request_context import RequestContext, request_context
+from config.settings_loader import FALLBACK_SETTINGS
+from config.settings_service import SettingsService
+from utils.safety_filters import evaluate_safety
+
+
+@pytest.fixture()
+def service(tmp_path):
+    return SettingsService(str(tmp_path / "missing.json"), dotenv=False)
+
+
+def test_overrides_fold_into_request_snapshot(service):
+    base = service.current()
+    req = request_context(base, safety="strict", fuzzy=False, max_new_tokens="64", temperature=1)
+    assert isinstance(req, RequestContext)
+    assert req.safety_level == "strict"
+    assert req.fuzzy is False
+    assert req.generation_kwargs() == {
+        "max_new_tokens": 64,
+        "do_sample": FALLBACK_SETTINGS["generation"]["do_sample"],
+        "temperature": 1.0,
+        "top_p": FALLBACK_SETTINGS["generation"]["top_p"],
+    }
+    assert req.settings["context"] is base["context"]       # untouched → shared
+    assert service.current() is base
+    assert base["safety"]["sensitivity_level"] == "moderate"
+
+
+def test_default_values_keep_shared_sections(service):
+    base = service.current()
+    req = request_context(base, safety="moderate", top_p=base["generation"]["top_p"])
+    assert req.settings is base
+    assert request_context(base).settings is base
+    assert request_context(base).request_id != req.request_id
+
+
+def test_concurrent_requests_do_not_leak(service):
+    base = service.current()
+
+    def run(i):
+        level = ("strict", "relaxed")[i % 2]
+        req = request_context(base, safety=level, temperature=i / 100)
+        allowed, _ = evaluate_safety("well damn it", req.settings)
+        return level, allowed, req.generation_kwargs()["temperature"], i / 100
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(run, range(64)))
+    for level, allowed, temp, want in results:
+        assert allowed is (level == "relaxed")
+        assert temp == want
+    assert service.current() is base
@@ -0,0 +1,87 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_response_cache.py – greedy response cache (LRU, TTL, shared tier)
+# ════════════════════════════════════════════════════════════════════
+import pytest
+
+import engine.pipeline as pipeline
+from engine.inference import FakeEngine
+from engine.response_cache import ResponseCache, cache_from_settings
+from engine.token_context import TokenPrompt
+
+GREEDY = {"max_new_tokens": 20, "do_sample": False, "temperature": 0.5, "top_p": 0.9}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def test_lru_and_ttl_bounds():
+    clock = Clock()
+    cache = ResponseCache(max_entries=2, ttl_s=10, clock=clock)
+    for k in ("a", "b", "c"):
+        cache.put(k, k.upper())
+    assert cache.get("a") is None and cache.get("c") == "C"
+    assert cache.stats["evictions"] == 1
+
+    clock.now = 11
+    assert cache.get("b") is None and cache.get("c") is None
+    assert cache.stats["expired"] == 2 and len(cache) == 0
+
+
+def test_key_covers_model_ids_and_params():
+    ctx = TokenPrompt("hello", (5, 6, 1), header_chars=0, header_tokens=0, source=0)
+    same_text = TokenPrompt("hello", (5, 7, 1), header_chars=0, header_tokens=0, source=0)
+    k = ResponseCache.key("torch|m@main|fp32", ctx, GREEDY)
+    assert k == ResponseCache.key("torch|m@main|fp32", ctx, {**GREEDY, "temperature": 0.1})
+    assert k != ResponseCache.key("torch|m@main|int8", ctx, GREEDY)
+    assert k != ResponseCache.key("torch|m@main|fp32", same_text, GREEDY)
+    assert k != ResponseCache.key("torch|m@main|fp32", ctx, {**GREEDY, "max_new_tokens": 21})
+
+
+def test_shared_tier_fills_other_instances():
+    shared = FakeRedis()
+    a, b = ResponseCache(), ResponseCache()
+    a._redis = b._redis = shared
+    a.put("k", "answer")
+    assert b.get("k") == "answer" and b.stats["shared_hits"] == 1
+    assert b.get("k") == "answer" and b.stats["shared_hits"] == 1  # now local
+    assert cache_from_settings({"enabled": False}) is None
+
+
+@pytest.fixture()
+def fake_engine(monkeypatch):
+    eng = FakeEngine()
+    monkeypatch.setattr(pipeline, "ENGINE", eng)
+    return eng
+
+
+def test_pipeline_caches_greedy_only(fake_engine):
+    cfg = pipeline.SETTINGS_SERVICE.current()
+    ctx = "Base\nUser: what is the capital of France?\nAssistant:"
+    first = pipeline.generate(ctx, GREEDY, cfg)
+    assert pipeline.generate(ctx, {**GREEDY, "temperature": 0.9}, cfg) == first
+    assert len(fake_engine.calls) == 1
+
+    sampled = {**GREEDY, "do_sample": True}
+    pipeline.generate(ctx, sampled, cfg)
+    pipeline.generate(ctx, sampled, cfg)
+    assert len(fake_engine.calls) == 3
+
+    stats = pipeline.response_cache(cfg).stats
+    assert stats["hits"] >= 1 and stats["bypassed"] >= 2
+    assert "hits" in pipeline.response_cache(cfg).describe()
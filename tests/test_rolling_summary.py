@@ -0,0 +1,119 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_rolling_summary.py – incremental per-session summaries
+# ════════════════════════════════════════════════════════════════════
+
+import random
+
+from utils.memory import Memory, MemoryBackend
+from utils.summariser import RollingSummariser, summarise_context
+
+# ──────────────────────────── Helpers ──────────────────────────────
+
+
+def _history(n: int, seed: int = 0) -> list[dict[str, str]]:
+    rnd = random.Random(seed)
+    return [
+        {"role": rnd.choice(["user", "assistant"]), "content": f"turn {i} " * rnd.randint(1, 40)}
+        for i in range(n)
+    ]
+
+# ──────────────────────────── Unit Tests ───────────────────────────
+
+
+def test_matches_full_summary_as_history_grows() -> None:
+    rolling = RollingSummariser()
+    hist = _history(60)
+    for end in range(0, 61, 3):
+        evicted = hist[:end]
+        assert rolling.summarise("s", evicted, max_chars=200) == summarise_context(
+            evicted, max_chars=200
+        )
+
+
+def test_only_new_turns_are_folded() -> None:
+    rolling = RollingSummariser()
+    hist = _history(100)
+    for end in range(1, 101):
+        rolling.summarise("s", hist[:end])
+    # every turn folded exactly once – O(new turns), not O(history) per call
+    assert rolling.stats == {"folded": 100, "rebuilds": 0}
+
+
+def test_front_sliding_window_resumes_from_anchor() -> None:
+    rolling = RollingSummariser()
+    hist = _history(40)
+    rolling.summarise("s", hist[0:20])
+    rolling.summarise("s", hist[5:25])     # 5 dropped at the front, 5 new at the end
+    assert rolling.stats == {"folded": 25, "rebuilds": 0}
+
+
+def test_duplicate_turns_do_not_misplace_the_anchor() -> None:
+    hist = [{"role": "user", "content": f"question {i}"} for i in range(10)]
+    hist[9] = {"role": "user", "content": "ok"}
+    new = [{"role": "user", "content": c} for c in ("fresh", "ok", "last")]
+
+    rolling = RollingSummariser()
+    rolling.summarise("s", hist)
+    # two turns slid out at the front; the last folded turn repeats right
+    # where it used to sit – the new turn before it must still be folded
+    slid = rolling.summarise("s", hist[2:] + new)
+    assert rolling.stats == {"folded": 13, "rebuilds": 0}
+
+    appended = RollingSummariser()
+    appended.summarise("s", hist)
+    assert slid == appended.summarise("s", hist + new)
+
+
+def test_rewritten_history_rebuilds() -> None:
+    rolling = RollingSummariser()
+    rolling.summarise("s", _history(10, seed=1))
+    other = _history(10, seed=2)
+    assert rolling.summarise("s", other) == summarise_context(other)
+    assert rolling.stats["rebuilds"] == 1
+
+
+def test_sessions_and_styles_are_independent() -> None:
+    rolling = RollingSummariser()
+    a, b = _history(12, seed=3), _history(12, seed=4)
+    assert rolling.summarise("a", a) == summarise_context(a)
+    assert rolling.summarise("b", b) == summarise_context(b)
+    assert rolling.summarise("a", a, style="bullet") == summarise_context(a)
+    assert rolling.stats["rebuilds"] == 1   # style switch on "a"
+
+
+def test_memory_clear_invalidates_session() -> None:
+    rolling = RollingSummariser()
+    Memory.add_clear_hook(rolling.invalidate)
+    try:
+        hist = _history(10)
+        rolling.summarise("default", hist)
+        rolling.summarise("other", hist)
+
+        Memory(backend=MemoryBackend.IN_MEMORY).clear("default")
+
+        assert "default" not in rolling._sessions
+        assert "other" in rolling._sessions
+    finally:
+        Memory._clear_hooks.remove(rolling.invalidate)
+
+
+def test_extractive_recomputes_only_when_history_changes() -> None:
+    calls = []
+
+    def count(text: str) -> int:
+        calls.append(text)
+        return len(text.split())
+
+    rolling = RollingSummariser()
+    hist = _history(20)
+    first = rolling.summarise("s", hist, style="extractive", count_tokens=count)
+    n = len(calls)
+    assert rolling.summarise("s", hist, style="extractive", count_tokens=count) == first
+    assert len(calls) == n                  # served from cache
+    assert first == summarise_context(
+        hist, style="extractive", count_tokens=lambda text: len(text.split())
+    )
+    rolling.summarise("s", hist + _history(1, seed=9), style="extractive", count_tokens=count)
+    assert len(calls) > n                   # re-ranked …
+    lines = [c for c in calls if "\n" not in c and c not in (first, "")]
+    assert len(lines) == len(set(lines))    # … without re-tokenising known lines
@@ -0,0 +1,132 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_safety_classifier.py – process-pool classifier stage
+# ════════════════════════════════════════════════════════════════════
+import os
+import threading
+import time
+
+import pytest
+
+from utils.safety_classifier import ClassifierStage, shutdown_classifiers
+from utils.safety_filters import assess_safety
+
+CALLS = []
+
+
+# ────────────────────── scorers (imported by the workers) ──────────────────────
+def keyword_scorer(texts):
+    return [0.99 if "attack" in t else 0.01 for t in texts]
+
+
+def slow_scorer(texts):
+    if texts != ["warm-up"]:
+        time.sleep(0.5)
+    return [0.99] * len(texts)
+
+
+def batch_size_scorer(texts):
+    time.sleep(0.02)
+    return [len(texts) / 100] * len(texts)
+
+
+def crashing_scorer(texts):
+    if "crash" in texts:
+        os._exit(1)
+    return [0.0] * len(texts)
+
+
+def _stage(name, **kw):
+    stage = ClassifierStage(f"{__name__}:{name}", **kw)
+    for _ in range(200):  # workers are spawned and warmed asynchronously
+        if stage.ready:
+            break
+        time.sleep(0.02)
+    assert stage.ready
+    return stage
+
+
+def _settings(name, **clf):
+    return {"safety": {"sensitivity_level": "moderate", "classifier": {
+        "enabled": True, "model": f"{__name__}:{name}", "threshold": 0.5, **clf}}}
+
+
+# ────────────────────────── tests ──────────────────────────
+def test_scores_and_lru():
+    stage = _stage("keyword_scorer", timeout_ms=2_000)
+    try:
+        assert stage.classify("plan an attack") == pytest.approx(0.99)
+        assert stage.classify("hello") == pytest.approx(0.01)
+        assert stage.classify("plan an attack") == pytest.approx(0.99)
+        assert stage.stats["hits"] == 1
+    finally:
+        stage.close()
+
+
+def test_deadline_falls_back_quickly():
+    stage = _stage("slow_scorer", timeout_ms=50)
+    try:
+        t0 = time.perf_counter()
+        assert stage.classify("anything") is None
+        assert time.perf_counter() - t0 < 0.3
+        assert stage.stats["timeouts"] == 1
+    finally:
+        stage.close()
+
+
+def test_concurrent_requests_are_micro_batched():
+    stage = _stage("batch_size_scorer", timeout_ms=3_000, max_batch=32, batch_window_ms=20)
+    try:
+        results = [None] * 24
+        def run(i):
+            results[i] = stage.classify(f"message {i}")
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(24)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert all(r is not None for r in results)
+        assert stage.stats["batches"] < 24
+        assert max(results) > 0.01            # at least one batch held several texts
+    finally:
+        stage.close()
+
+
+def test_worker_crash_recovers():
+    stage = _stage("crashing_scorer", timeout_ms=2_000)
+    try:
+        assert stage.classify("crash") is None
+        for _ in range(200):
+            if stage.ready and stage.classify("fine") == 0.0:
+                break
+            time.sleep(0.02)
+        assert stage.classify("fine") == 0.0
+        assert stage.stats["errors"] >= 1
+    finally:
+        closer = threading.Thread(target=stage.close, daemon=True)
+        closer.start()
+        closer.join(10)
+        assert not closer.is_alive()  # a dead worker must not wedge the stage
+
+
+def test_assess_safety_uses_classifier_and_falls_back():
+    try:
+        cfg = _settings("keyword_scorer", timeout_ms=2_000)
+        assess_safety("warm", cfg)                    # starts the shared stage
+        from utils.safety_classifier import get_classifier_stage
+        stage = get_classifier_stage(cfg)
+        for _ in range(200):
+            if stage.ready:
+                break
+            time.sleep(0.02)
+        blocked = assess_safety("plan an attack", cfg)
+        assert not blocked.allowed and blocked.classifier_score == pytest.approx(0.99)
+        ok = assess_safety("hello", cfg)
+        assert ok.allowed and ok.classifier_score == pytest.approx(0.01)
+
+        # relaxed never consults the model; disabled stage → term lists only
+        relaxed = {"safety": {**cfg["safety"], "sensitivity_level": "relaxed"}}
+        assert assess_safety("plan an attack", relaxed).classifier_score is None
+        off = {"safety": {**cfg["safety"], "classifier": {"enabled": False}}}
+        assert assess_safety("plan an attack", off).allowed
+    finally:
+        shutdown_classifiers()
@@ -0,0 +1,115 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_safety_engine.py – compiled single-pass safety scanner
+# ════════════════════════════════════════════════════════════════════
+import random
+import re
+
+from utils import safety_filters as sf
+from utils.safety_filters import SafetyEngine, get_safety_engine
+
+
+def _settings(**safety) -> dict:
+    return {"safety": {"sensitivity_level": "moderate", **safety}}
+
+
+# ──────────────────────────── matching ─────────────────────────────
+def test_normalisation_case_leet_and_stretching() -> None:
+    eng = SafetyEngine(["shit", "hell"])
+    for text in ("SHIT", "sh1t", "$hit", "shiiiit", "HeLLLL", "h3ll"):
+        assert eng.scan(text).profane, text
+    for text in ("shell", "hello", "sh_it", "shits", "he11o"):
+        assert not eng.scan(text).profane, text
+
+
+def test_mask_spans_cover_original_characters() -> None:
+    eng = SafetyEngine(["damn"])
+    text = "D4MN it, dammmn!"
+    scan = eng.scan(text)
+    assert scan.spans == ((0, 4), (9, 15))
+    assert scan.mask(text) == "**** it, ******!"
+
+
+def test_phrases_and_overlaps_merge() -> None:
+    eng = SafetyEngine(["kick ass", "ass", "bad ass kick"])
+    scan = eng.scan("a bad ass kick ass move")
+    assert scan.mask("a bad ass kick ass move") == "a **************** move"
+    assert set(scan.terms) == {"ass", "bad ass kick", "kick ass"}
+
+
+def test_whitelist_and_strict_flags() -> None:
+    eng = SafetyEngine(["hell", "damn"], strict_terms=["foobar"], whitelist=["hell"])
+    assert not eng.scan("what the hell").profane
+    assert eng.scan("what the hell, damn").terms == ("damn",)
+    assert eng.scan("you foobar").strict
+    assert not eng.scan("damn").strict
+
+
+def test_matches_old_regex_on_plain_text() -> None:
+    terms = ["damn", "hell", "shit", "kick ass", "go away"]
+    old = re.compile(r"\b(" + "|".join(map(re.escape, sorted(terms))) + r")\b", re.IGNORECASE)
+    eng = SafetyEngine(terms)
+    pool = ["Damn", "hell", "shell", "kick", "ass", "go", "away", "hello", "x", "SHIT", "ok"]
+    rnd = random.Random(7)
+    for _ in range(300):
+        text = "".join(rnd.choice(pool) + rnd.choice([" ", ", ", "! "]) for _ in range(12))
+        assert eng.mask(text) == old.sub(lambda m: "*" * len(m.group(0)), text)
+
+
+# ──────────────────────────── caching ──────────────────────────────
+def test_verdicts_cached_by_message() -> None:
+    eng = SafetyEngine(["damn"])
+    first = eng.scan("damn it")
+    assert eng.scan("damn it") is first
+    assert eng.stats == {"scans": 2, "hits": 1}
+
+
+def test_engine_compiled_once_per_settings() -> None:
+    sf.reset_safety_cache()
+    cfg = _settings(strict_terms=["foobar"], extra_phrases={"kick ass": "x"})
+    eng = get_safety_engine(cfg)
+    assert get_safety_engine(cfg) is eng
+    # a freshly loaded but identical settings dict reuses the compiled engine
+    assert get_safety_engine(_settings(strict_terms=["foobar"], extra_phrases={"kick ass": "x"})) is eng
+    assert get_safety_engine(_settings(strict_terms=["other"])) is not eng
+
+
+def test_settings_without_phrases_hit_the_identity_cache(monkeypatch) -> None:
+    sf.reset_safety_cache()
+    cfg = _settings(strict_terms=["foobar"])
+    eng = get_safety_engine(cfg)
+    fingerprints = []
+    real = sf._engine_content
+    monkeypatch.setattr(sf, "_engine_content", lambda lists: fingerprints.append(1) or real(lists))
+    assert get_safety_engine(cfg) is eng
+    assert fingerprints == []
+
+
+def test_thousands_of_phrases() -> None:
+    rnd = random.Random(1)
+    words = ["".join(rnd.choice("abcdefghij") for _ in range(6)) for _ in range(3_000)]
+    phrases = [f"{a} {b}" for a, b in zip(words, reversed(words))]
+    eng = SafetyEngine(words[:2_000] + phrases)
+    assert eng.size == 5_000
+    text = " ".join(["clean"] * 500 + [phrases[-1]])
+    assert eng.scan(text).spans[-1][1] == len(text)
+
+
+def test_assess_safety_returns_verdict_and_spans() -> None:
+    verdict = sf.assess_safety("oh shit", _settings(sensitivity_level="moderate"))
+    assert verdict.allowed
+    assert verdict.masked("oh shit") == "oh ****"
+    blocked = sf.assess_safety("oh shit", _settings(sensitivity_level="strict"))
+    assert not blocked.allowed and blocked.blocked_message
+
+
+def test_bench_script_smoke() -> None:
+    import json
+    import subprocess
+    import sys
+
+    r = subprocess.run(
+        [sys.executable, "scripts/bench_safety.py", "--terms", "20", "--messages", "20"],
+        capture_output=True, text=True, check=True,
+    )
+    row = json.loads(r.stdout.splitlines()[0])
+    assert row["hits"]["regex"] == row["hits"]["engine"]
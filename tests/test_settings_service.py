@@ -0,0 +1,119 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_settings_service.py – versioned snapshots & hot reload
+# ════════════════════════════════════════════════════════════════════
+import json
+import pickle
+import threading
+import time
+
+import pytest
+
+from config.settings_loader import FALLBACK_SETTINGS
+from config.settings_service import SettingsService, as_snapshot
+from utils.safety_filters import get_safety_engine
+
+
+def _write(path, **changes):
+    data = json.loads(json.dumps(FALLBACK_SETTINGS))
+    for section, values in changes.items():
+        data.setdefault(section, {}).update(values)
+    path.write_text(json.dumps(data))
+    return data
+
+
+@pytest.fixture()
+def cfg_file(tmp_path):
+    path = tmp_path / "settings.json"
+    _write(path, safety={"strict_terms": ["foobar"]})
+    return path
+
+
+def test_snapshot_is_read_only_and_picklable(cfg_file):
+    snap = SettingsService(str(cfg_file), dotenv=False).current()
+    assert snap.version == 1
+    assert snap["safety"]["strict_terms"] == ("foobar",)
+    with pytest.raises(TypeError):
+        snap["context"]["max_prompt_tokens"] = 1
+    with pytest.raises(TypeError):
+        snap["memory"].update(enabled=True)
+    assert pickle.loads(pickle.dumps(snap["safety"])) == snap["safety"]
+    assert json.loads(json.dumps(snap.data))["safety"]["strict_terms"] == ["foobar"]
+    thawed = snap.thaw()
+    thawed["context"]["max_prompt_tokens"] = 1          # a private, mutable copy
+    assert snap["context"]["max_prompt_tokens"] != 1
+
+
+def test_reload_publishes_new_version_and_shares_unchanged_sections(cfg_file):
+    svc = SettingsService(str(cfg_file), dotenv=False)
+    v1 = svc.current()
+    seen = []
+    svc.subscribe(lambda old, new, changed: seen.append((old.version, new.version, changed)))
+
+    assert not svc.reload()                              # same content → same snapshot
+    assert svc.current() is v1
+
+    _write(cfg_file, safety={"strict_terms": ["foobar"]}, context={"max_prompt_tokens": 999})
+    assert svc.reload()
+    v2 = svc.current()
+    assert v2.version == 2 and v2["context"]["max_prompt_tokens"] == 999
+    assert v2["safety"] is v1["safety"]                  # untouched section: same object
+    assert seen == [(1, 2, ("context",))]
+
+    cfg_file.write_text("{ not json")
+    assert not svc.reload()
+    assert svc.current() is v2                           # last good snapshot kept
+
+
+def test_derived_artefacts_rebuild_only_on_their_section(cfg_file):
+    svc = SettingsService(str(cfg_file), dotenv=False)
+    builds = []
+
+    def engine(snap):
+        builds.append(snap.version)
+        return get_safety_engine(snap)
+
+    first = svc.derived("safety_engine", engine, sections=("safety",))
+    svc.patch({"context": {"max_prompt_tokens": 1}})
+    assert svc.derived("safety_engine", engine, sections=("safety",)) is first
+    assert get_safety_engine(svc.current()) is first     # identity cache survives too
+    svc.patch({"safety": {"strict_terms": ["other"]}})
+    assert svc.derived("safety_engine", engine, sections=("safety",)) is not first
+    assert builds == [1, 3]
+
+
+def test_overrides_are_per_request(cfg_file):
+    svc = SettingsService(str(cfg_file), dotenv=False)
+    base = svc.current()
+    strict = base.with_overrides({"safety": {"sensitivity_level": "strict"}})
+    assert strict["safety"]["sensitivity_level"] == "strict"
+    assert strict["safety"]["strict_terms"] == ("foobar",)
+    assert strict["context"] is base["context"]
+    assert svc.current()["safety"]["sensitivity_level"] == "moderate"
+    assert as_snapshot(strict) is strict
+    assert as_snapshot({"a": [1]})["a"] == (1,)
+
+
+def test_watcher_swaps_snapshot(cfg_file):
+    svc = SettingsService(str(cfg_file), dotenv=False)
+    swapped = threading.Event()
+    svc.subscribe(lambda *_: swapped.set())
+    svc.watch(interval=0.02)
+    try:
+        time.sleep(0.05)
+        _write(cfg_file, memory={"enabled": True})
+        assert swapped.wait(2.0)
+        assert svc.current()["memory"]["enabled"] is True
+        assert svc.current().version == 2
+    finally:
+        svc.stop()
+
+
+def test_missing_file_uses_defaults(tmp_path):
+    snap = SettingsService(str(tmp_path / "nope.json"), dotenv=False).current()
+    assert snap["context"]["max_prompt_tokens"] == FALLBACK_SETTINGS["context"]["max_prompt_tokens"]
+
+
+def test_model_cache_dir_env_override(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_CACHE_DIR", str(tmp_path / "models"))
+    snap = SettingsService(str(tmp_path / "nope.json"), dotenv=False).current()
+    assert snap["model"]["cache_dir"] == str(tmp_path / "models")
@@ -0,0 +1,184 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests for ShardedSQLiteMemoryBackend + online re-shard
+# ════════════════════════════════════════════════════════════════════
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from memory.backends.sharded_sqlite_memory_backend import (
+    ShardedSQLiteMemoryBackend,
+    read_manifest,
+    reshard,
+    shard_for,
+    shard_path,
+)
+
+
+# ────────────────────────── helpers ──────────────────────────
+@pytest.fixture()
+def mk_sharded(tmp_path):
+    opened = []
+
+    def make(shards=4, **kw):
+        b = ShardedSQLiteMemoryBackend(db_dir=tmp_path / "shards", shards=shards, **kw)
+        opened.append(b)
+        return b
+
+    yield make
+    for b in opened:
+        b.close()
+
+
+def _fill(mem, sessions=12, turns=5):
+    for s in range(sessions):
+        for t in range(turns):
+            mem.add_turn("user", f"s{s}-t{t}", cid=f"s{s}")
+
+
+# ────────────────────────── tests ────────────────────────────
+def test_roundtrip_and_trim(mk_sharded):
+    mem = mk_sharded(max_rows_per_session=3)
+    for i in range(6):
+        mem.add_turn("user", f"msg{i}")
+    rows = mem.get_recent(limit=10)
+    assert [r["content"] for r in rows] == ["msg5", "msg4", "msg3"]
+    mem.flush()
+    assert mem.get_recent() == []
+
+
+def test_sessions_spread_over_files(mk_sharded, tmp_path):
+    mem = mk_sharded(shards=4)
+    _fill(mem)
+    assert mem.shard_count == 4
+    assert read_manifest(tmp_path / "shards") == {"generation": 0, "shards": 4}
+    used = {shard_for(f"s{s}", 4) for s in range(12)}
+    assert len(used) > 1
+    for i in used:
+        assert shard_path(tmp_path / "shards", 0, i).exists()
+
+
+def test_manifest_wins_over_argument(mk_sharded):
+    mk_sharded(shards=3).add_turn("user", "hi")
+    again = mk_sharded(shards=8)
+    assert again.shard_count == 3
+    assert again.get_recent()[0]["content"] == "hi"
+
+
+def test_cross_shard_iteration(mk_sharded):
+    mem = mk_sharded()
+    _fill(mem, sessions=5, turns=3)
+    assert mem.list_sessions() == [f"s{s}" for s in range(5)]
+    turns = list(mem.iter_turns())
+    assert len(turns) == 15
+    assert [t["content"] for cid, t in turns if cid == "s2"] == ["s2-t0", "s2-t1", "s2-t2"]
+
+
+def test_concurrent_writers(mk_sharded):
+    mem = mk_sharded(shards=4)
+
+    def writer(tid):
+        for i in range(100):
+            mem.add_turn("user", f"{tid}:{i}", cid=f"t{tid}")
+
+    pool = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    for t in range(8):
+        assert len(mem.get_recent(limit=200, cid=f"t{t}")) == 100
+
+
+def test_reshard_preserves_turns(mk_sharded, tmp_path):
+    mem = mk_sharded(shards=2, reload_interval=0.0)
+    _fill(mem, sessions=10, turns=4)
+    before = {cid: mem.get_recent(cid=cid) for cid in mem.list_sessions()}
+
+    stats = reshard(tmp_path / "shards", 5, settle=0.0)
+    assert stats["sessions"] == 10
+    assert stats["rows"] == 40
+    assert read_manifest(tmp_path / "shards") == {"generation": 1, "shards": 5}
+    assert not shard_path(tmp_path / "shards", 0, 0).exists()
+
+    # the running backend follows the manifest on its next call
+    assert {cid: mem.get_recent(cid=cid) for cid in mem.list_sessions()} == before
+    assert mem.shard_count == 5
+    mem.add_turn("assistant", "after", cid="s3")
+    assert mem.get_recent(limit=1, cid="s3")[0]["content"] == "after"
+
+
+def test_replaced_generation_closes_after_last_call(mk_sharded, tmp_path):
+    mem = mk_sharded(shards=2, reload_interval=0.0)
+    _fill(mem, sessions=4, turns=2)
+    old = mem._acquire()                     # a call still running on generation 0
+    mem._release(mem._acquire())
+
+    reshard(tmp_path / "shards", 3, settle=0.0)
+    assert len(mem.list_sessions()) == 4     # switches to generation 1
+    assert old.retired
+    assert all(shard._conn is not None for shard, _ in old.shards)
+
+    mem._release(old)
+    assert all(shard._conn is None for shard, _ in old.shards)
+
+
+def test_concurrent_callers_open_one_generation(mk_sharded, tmp_path, monkeypatch):
+    mem = mk_sharded(shards=2, reload_interval=0.0)
+    _fill(mem, sessions=4, turns=2)
+    reshard(tmp_path / "shards", 3, settle=0.0)
+
+    opened = []
+    real = mem._open
+    monkeypatch.setattr(mem, "_open", lambda m: opened.append(m) or real(m))
+    start = threading.Barrier(8)
+
+    def reader():
+        start.wait()
+        mem.get_recent(cid="s1")
+
+    pool = [threading.Thread(target=reader) for _ in range(8)]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    assert len(opened) == 1
+
+
+def test_reshard_picks_up_concurrent_writes(mk_sharded, tmp_path):
+    mem = mk_sharded(shards=2, reload_interval=0.0)
+    _fill(mem, sessions=4, turns=2)
+    calls = []
+
+    def progress(msg):
+        # a write lands between the first pass and publication
+        if not calls:
+            mem.add_turn("user", "late", cid="s1")
+        calls.append(msg)
+
+    reshard(tmp_path / "shards", 3, settle=0.0, progress=progress)
+    assert mem.get_recent(limit=1, cid="s1")[0]["content"] == "late"
+
+
+def test_cli_export_and_stats(mk_sharded, tmp_path):
+    mem = mk_sharded(shards=2)
+    _fill(mem, sessions=3, turns=2)
+    db_dir = tmp_path / "shards"
+
+    out = tmp_path / "turns.jsonl"
+    r = subprocess.run(
+        [sys.executable, "scripts/sqlite_shards.py", "--db-dir", str(db_dir),
+         "export", "--out", str(out)],
+        capture_output=True, text=True, check=True,
+    )
+    assert "Exported 6 turns" in r.stderr
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert rows[0] == {"session": "s0", "role": "user", "content": "s0-t0"}
+
+    r = subprocess.run(
+        [sys.executable, "scripts/sqlite_shards.py", "--db-dir", str(db_dir), "stats"],
+        capture_output=True, text=True, check=True,
+    )
+    assert "generation 0, 2 shard(s)" in r.stdout
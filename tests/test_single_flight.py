@@ -0,0 +1,91 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_single_flight.py – coalescing identical in-flight generations
+# ════════════════════════════════════════════════════════════════════
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine.pipeline as pipeline
+from engine.inference import FakeEngine
+from engine.single_flight import SingleFlight
+
+GREEDY = {"max_new_tokens": 20, "do_sample": False}
+
+
+def _burst(n, fn):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return [f.result() for f in [pool.submit(fn) for _ in range(n)]]
+
+
+def test_do_shares_one_result_and_errors():
+    flights, release, calls = SingleFlight(), threading.Event(), []
+
+    def work():
+        calls.append(1)
+        release.wait(2)
+        return "done"
+
+    threading.Timer(0.2, release.set).start()
+    results = _burst(5, lambda: flights.do("k", work))
+    assert len(calls) == 1 and [r for r, _ in results] == ["done"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert flights.stats == {"leaders": 1, "coalesced": 4, "errors": 0} and flights.in_flight == 0
+
+    def boom():
+        time.sleep(0.1)
+        raise RuntimeError("model crashed")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("bad", boom)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    _burst(3, call)
+    assert errors == ["model crashed"] * 3 and flights.stats["errors"] == 1
+
+
+def test_stream_readers_get_identical_pieces():
+    flights, started = SingleFlight(), []
+
+    def source():
+        started.append(1)
+        for piece in ("a", " b", " c"):
+            time.sleep(0.05)
+            yield piece
+
+    streams = [flights.stream("s", source) for _ in range(3)]
+    assert [list(s) for s in streams] == [["a", " b", " c"]] * 3
+    assert len(started) == 1 and flights.stats["coalesced"] == 2
+
+
+@pytest.fixture()
+def slow_engine(monkeypatch):
+    release = threading.Event()
+    eng = FakeEngine()
+    original = eng.generate
+
+    def generate(prompt, **gen_cfg):
+        release.wait(2)
+        return original(prompt, **gen_cfg)
+
+    monkeypatch.setattr(eng, "generate", generate)
+    monkeypatch.setattr(pipeline, "ENGINE", eng)
+    monkeypatch.setattr(pipeline, "IN_FLIGHT", SingleFlight())
+    return eng, release
+
+
+def test_pipeline_coalesces_greedy_but_not_sampled(slow_engine):
+    eng, release = slow_engine
+    ctx = "Base\nUser: broadcast link question\nAssistant:"
+    threading.Timer(0.2, release.set).start()
+    answers = _burst(6, lambda: pipeline.generate(ctx, GREEDY))
+    assert set(answers) == {"echo: broadcast link question"} and len(eng.calls) == 1
+    assert pipeline.IN_FLIGHT.stats["coalesced"] == 5
+
+    _burst(3, lambda: pipeline.generate(ctx + " ", {**GREEDY, "do_sample": True}))
+    assert len(eng.calls) == 4
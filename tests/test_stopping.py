@@ -0,0 +1,102 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_stopping.py – role-marker and deadline stopping criteria
+# ════════════════════════════════════════════════════════════════════
+import itertools
+
+import pytest
+
+import engine.pipeline as pipeline
+from config.request_context import request_context
+from engine.inference import FakeEngine
+from engine.single_flight import SingleFlight
+from engine.stopping import Generated, StopCondition, StopStats, trim_at_markers
+
+GREEDY = {"max_new_tokens": 20, "do_sample": False}
+
+
+def ticking(step=1.0):
+    """Clock advancing `step` seconds per call."""
+    ticks = itertools.count()
+    return lambda: next(ticks) * step
+
+
+def test_trim_at_markers():
+    markers = ("User:", "Assistant:")
+    assert trim_at_markers("Paris. User: and Spain?", markers) == ("Paris.", True)
+    assert trim_at_markers(" Assistant: Paris.", markers) == ("Paris.", False)
+    assert trim_at_markers("Assistant: Paris.\nAssistant: Also", markers) == ("Paris.", True)
+    assert trim_at_markers("A useful answer", markers) == ("A useful answer", False)
+
+
+def test_stream_filter_holds_back_marker_prefixes():
+    stop = StopCondition()
+    out = list(stop.filter(["Hello", " there", " Us", "er: next", " turn"]))
+    assert "".join(out) == "Hello there" and all("Us" not in p for p in out)
+    assert stop.reason == "marker"
+    assert "".join(StopCondition().filter(["Hi", " Use", "ful"])) == "Hi Useful"
+
+
+class Tok:
+    words = {0: "<pad>", 1: "Sure", 2: "thing", 3: "User:", 4: "more"}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(self.words[i] for i in ids if not (skip_special_tokens and i == 0))
+
+
+def test_criterion_stops_at_marker_and_deadline():
+    (marker,) = StopCondition().criteria(Tok())
+    assert marker([[0, 1, 2]], None) is False
+    assert marker([[0, 1, 2, 3]], None) is True and marker.stop.reason == "marker"
+
+    stop = StopCondition.within(2.0, clock=ticking())  # deadline at t=2
+    (deadline,) = stop.criteria(Tok())
+    assert deadline([[0, 1]], None) is False
+    assert deadline([[0, 1, 2]], None) is True
+    result = stop.finish("Sure thing", 2, 20)
+    assert isinstance(result, Generated) and result.partial and result.stop_reason == "deadline"
+
+
+def test_finish_reasons():
+    assert StopCondition().finish("a b c", 3, 3).stop_reason == "length"
+    assert StopCondition().finish("a b", 2, 3).stop_reason == "eos"
+    assert StopCondition(markers=()).finish("ok User: x").stop_reason == "eos"
+
+
+def test_fake_engine_honours_the_stop_condition():
+    eng = FakeEngine(reply=lambda _: "fine thanks User: and you?")
+    text = eng.generate("User: hi\nAssistant:", stop=StopCondition())
+    assert text == "fine thanks" and text.stop_reason == "marker"
+
+    eng = FakeEngine(reply=lambda _: "one two three four five")
+    text = eng.generate("User: hi\nAssistant:", stop=StopCondition.within(3.0, clock=ticking()))
+    assert text == "one two" and text.partial
+    assert "".join(eng.stream("x", stop=StopCondition())) == "one two three four five"
+
+
+@pytest.fixture()
+def fake_engine(monkeypatch):
+    eng = FakeEngine(reply=lambda _: "Paris. User: and Spain?")
+    monkeypatch.setattr(pipeline, "ENGINE", eng)
+    monkeypatch.setattr(pipeline, "IN_FLIGHT", SingleFlight())
+    monkeypatch.setattr(pipeline, "STOPS", StopStats())
+    return eng
+
+
+def test_pipeline_records_reasons_and_never_caches_partials(fake_engine):
+    ctx = "Base\nUser: capital of France?\nAssistant:"
+    req = request_context(pipeline.SETTINGS_SERVICE.current())
+    assert pipeline.generate(ctx, GREEDY, req).stop_reason == "marker"
+    again = pipeline.generate(ctx, GREEDY, req)
+    assert again == "Paris." and again.stop_reason == "cached"
+    assert len(fake_engine.calls) == 1
+    assert pipeline.STOPS.counts["marker"] == 1 and pipeline.STOPS.counts["cached"] == 1
+
+    late = request_context({**pipeline.SETTINGS_SERVICE.current(),
+                            "generation": {"deadline_s": 1e-9}})
+    assert late.deadline_s == 1e-9
+    ctx2 = ctx.replace("France", "Italy")
+    first = pipeline.generate(ctx2, GREEDY, late)
+    assert first.partial and first.stop_reason == "deadline"
+    pipeline.generate(ctx2, GREEDY, late)
+    assert len(fake_engine.calls) == 3  # the partial answer was not cached
+    assert pipeline.STOPS.describe(first.stop_reason).startswith("deadline – partial answer")
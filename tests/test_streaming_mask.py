@@ -0,0 +1,59 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_streaming_mask.py – chunked masking == whole-text masking
+# ════════════════════════════════════════════════════════════════════
+import random
+
+from utils.safety_filters import SafetyEngine, mask_stream
+
+TERMS = ["damn", "hell", "shit", "kick ass", "ass", "bad ass kick", "go to hell", "σκατά"]
+POOL = ["Damn", "hell", "HELL", "shell", "kick", "ass", "bad", "go", "to", "sh1t",
+        "shiiiiit", "d4mn", "ok", "ΣΚΑΤΆ", "σκατά", "İstanbul", "x", "hello"]
+SEPS = [" ", "  ", ", ", "! ", "\n", "-", ""]
+
+
+def _chunks(text: str, rnd: random.Random) -> list:
+    out, i = [], 0
+    while i < len(text):
+        n = rnd.randint(1, 6)
+        out.append(text[i : i + n])
+        i += n
+    return out
+
+
+def _streamed(eng: SafetyEngine, chunks) -> str:
+    m = eng.stream()
+    return "".join(m.feed(c) for c in chunks) + m.flush()
+
+
+def test_random_chunking_matches_batch() -> None:
+    eng = SafetyEngine(TERMS)
+    rnd = random.Random(3)
+    for _ in range(500):
+        text = "".join(rnd.choice(POOL) + rnd.choice(SEPS) for _ in range(rnd.randint(0, 15)))
+        assert _streamed(eng, _chunks(text, rnd)) == eng.mask(text), text
+
+
+def test_single_characters_and_whole_text() -> None:
+    eng = SafetyEngine(TERMS)
+    text = "a bad ass kick ass move, go to hell!"
+    assert _streamed(eng, list(text)) == eng.mask(text)
+    assert _streamed(eng, [text]) == eng.mask(text)
+
+
+def test_holds_back_only_open_word_and_phrase() -> None:
+    eng = SafetyEngine(["kick ass"])
+    m = eng.stream()
+    assert m.feed("please ") == "please "
+    assert m.feed("ki") == ""              # unfinished word
+    assert m.feed("ck ") == ""             # could become "kick ass"
+    assert m.feed("the ") == "kick the "   # phrase broken → released unmasked
+    assert m.feed("kick as") == ""
+    assert m.feed("s now") == "******** "
+    assert m.pending == len("now")
+    assert m.flush() == "now"
+    assert m.terms == ["kick ass"]
+
+
+def test_mask_stream_uses_settings_terms() -> None:
+    cfg = {"safety": {"sensitivity_level": "moderate", "extra_phrases": {"zonk": "x"}}}
+    assert "".join(mask_stream(["you zo", "nk!"], cfg)) == "you ****!"
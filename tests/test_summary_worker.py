@@ -0,0 +1,157 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_summary_worker.py – background abstractive summaries
+# ════════════════════════════════════════════════════════════════════
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from utils.summary_worker import ProcessModelSummariser, SummaryWorker, build_summary_prompt
+
+# ──────────────────────── Test Data Fixtures ───────────────────────
+
+
+def _turns(n: int, start: int = 0) -> list[dict[str, str]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"msg {i}"}
+        for i in range(start, start + n)
+    ]
+
+
+class FakeModel:
+    """Deterministic stand-in for the seq2seq model; can be held mid-job."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str | None, list[str]]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, prior, turns):
+        self.gate.wait(5)
+        self.calls.append((prior, [t["content"] for t in turns]))
+        return f"• summary of {len(turns)} new turns" + (f" after [{prior}]" if prior else "")
+
+
+def _worker(fake: FakeModel, **kw) -> SummaryWorker:
+    return SummaryWorker(fake, executor=ThreadPoolExecutor(max_workers=1), **kw)
+
+# ──────────────────────────── Unit Tests ───────────────────────────
+
+
+def test_lookup_is_empty_until_job_finishes() -> None:
+    fake = FakeModel()
+    fake.gate.clear()
+    w = _worker(fake)
+    hist = _turns(6)
+
+    assert w.lookup("s", hist) is None
+    assert w.schedule("s", hist) is True
+    assert w.schedule("s", hist) is False          # one job per session in flight
+    assert w.lookup("s", hist) is None             # caller falls back to bullets
+
+    fake.gate.set()
+    w.shutdown()
+    assert w.lookup("s", hist) == ("• summary of 6 new turns", 6)
+    assert w.stats["scheduled"] == 1
+
+
+def test_refresh_sends_prior_summary_and_new_turns_only() -> None:
+    fake = FakeModel()
+    w = _worker(fake, refresh_every=2)
+    hist = _turns(10)
+
+    w.schedule("s", hist[:6])
+    w._pool.submit(lambda: None).result()          # wait for the queue to drain
+    assert w.schedule("s", hist[:7]) is False      # 1 new turn < refresh_every
+    assert w.schedule("s", hist) is True
+    w.shutdown()
+
+    assert fake.calls[-1] == ("• summary of 6 new turns", ["msg 6", "msg 7", "msg 8", "msg 9"])
+    text, covered = w.lookup("s", hist)
+    assert text.endswith("after [• summary of 6 new turns]")
+    assert covered == 10
+
+
+def test_lookup_reports_turns_evicted_since_the_job() -> None:
+    w = _worker(FakeModel())
+    hist = _turns(10)
+    w.schedule("s", hist[:6])
+    w.shutdown()
+    # the caller tops the summary up with hist[6:] itself
+    assert w.lookup("s", hist) == ("• summary of 6 new turns", 6)
+
+
+def test_duplicate_turn_does_not_misplace_the_resume_point() -> None:
+    hist = [{"role": "user", "content": f"question {i}"} for i in range(10)]
+    hist[9] = {"role": "user", "content": "ok"}
+    new = [{"role": "user", "content": c} for c in ("fresh", "ok", "last")]
+
+    fake = FakeModel()
+    w = _worker(fake, refresh_every=3)
+    w.schedule("s", hist)
+    w._pool.submit(lambda: None).result()
+    # two turns slid out at the front; the repeated "ok" sits where the last
+    # covered turn used to – "fresh" before it is still new
+    slid = hist[2:] + new
+    assert w.lookup("s", slid)[1] == 8
+    assert w.schedule("s", slid) is True
+    w.shutdown()
+    assert fake.calls[-1][1] == ["fresh", "ok", "last"]
+
+
+def test_invalidate_discards_in_flight_result() -> None:
+    fake = FakeModel()
+    fake.gate.clear()
+    w = _worker(fake)
+    hist = _turns(6)
+
+    w.schedule("s", hist)
+    w.invalidate("s")                              # e.g. memory.clear("s")
+    fake.gate.set()
+    w.shutdown()
+    assert w.lookup("s", hist) is None
+
+
+def test_rewritten_history_drops_stale_summary() -> None:
+    w = _worker(FakeModel())
+    w.schedule("s", _turns(6))
+    w.shutdown()
+    assert w.lookup("s", _turns(6, start=100)) is None
+
+
+def test_failed_job_keeps_fallback() -> None:
+    def boom(prior, turns):
+        raise RuntimeError("model exploded")
+
+    w = _worker(boom)
+    w.schedule("s", _turns(4))
+    w.shutdown()
+    assert w.lookup("s", _turns(4)) is None
+    assert w.stats["failed"] == 1
+
+
+def test_prompt_skips_summary_turns_and_keeps_tail() -> None:
+    turns = [{"role": "summary", "content": "old"}] + _turns(2)
+    prompt = build_summary_prompt("earlier", turns)
+    assert "Previous summary: earlier" in prompt
+    assert "old" not in prompt
+    assert prompt.endswith("Assistant: msg 1")
+
+
+def test_process_summariser_resolves_model_through_the_store(monkeypatch) -> None:
+    import engine.model
+    import utils.summary_worker as summary_worker
+
+    seen = []
+
+    def runtime(cfg):
+        seen.append(cfg)
+        return SimpleNamespace(tokenizer="tok", model="mdl", device=cfg["device"])
+
+    monkeypatch.setattr(engine.model, "runtime_from_settings", runtime)
+    monkeypatch.setattr(summary_worker, "_PROC_MODEL", {})
+    monkeypatch.setattr(summary_worker, "ModelSummariser",
+                        lambda tok, mdl, dev, **_: lambda prior, turns: f"{tok}/{mdl}/{dev}")
+    summarise = ProcessModelSummariser({"name": "org/m", "revision": "abc", "device": "cuda"})
+    assert summarise(None, _turns(2)) == summarise(None, _turns(3)) == "tok/mdl/cpu"
+    assert seen == [{"name": "org/m", "revision": "abc", "device": "cpu"}]  # loaded once
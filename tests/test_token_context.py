@@ -0,0 +1,100 @@
+# ════════════════════════════════════════════════════════════════════
+#  tests/test_token_context.py – token-id assembly ≡ tokenising the string
+# ════════════════════════════════════════════════════════════════════
+import pytest
+
+import engine.pipeline as pipeline
+from engine.inference import FakeEngine
+from engine.token_context import SegmentTokenizer, TokenPrompt
+
+BASE = "You are a helpful assistant. Keep answers short."
+HISTORY = [
+    {"role": "user", "content": "Who painted the Mona Lisa?"},
+    {"role": "assistant", "content": "Leonardo da Vinci, around 1503–1519."},
+    {"role": "user", "content": "And the ceiling of the Sistine Chapel?"},
+    {"role": "assistant", "content": "Michelangelo."},
+]
+
+
+class SubwordTokenizer:
+    """Whitespace words cut into 3-char pieces, `</s>` (id 1) appended."""
+
+    def __call__(self, text, add_special_tokens=True, **_):
+        ids = [sum(map(ord, w[i:i + 3])) + 2 for w in text.split() for i in range(0, len(w), 3)]
+        return {"input_ids": ids + [1] if add_special_tokens else ids}
+
+
+class BigramTokenizer:
+    """Character bigrams over the whole string – not segment-additive."""
+
+    def __call__(self, text, add_special_tokens=True, **_):
+        return {"input_ids": [ord(text[i]) * 256 + ord(text[i + 1]) for i in range(0, len(text) - 1, 2)]}
+
+
+def _settings(max_tokens=10_000):
+    cfg = pipeline.SETTINGS_SERVICE.current().thaw()
+    cfg["memory"]["enabled"] = False
+    cfg["summarisation"]["enabled"] = False
+    cfg["context"].update({"max_prompt_tokens": max_tokens, "max_history_turns": 20})
+    return cfg
+
+
+@pytest.fixture()
+def engine_with(monkeypatch):
+    def install(tokenizer):
+        eng = FakeEngine()
+        eng._tokenizer = tokenizer
+        monkeypatch.setattr(pipeline, "ENGINE", eng)
+        monkeypatch.setattr(pipeline, "_SEGMENTER", None)
+        return tokenizer
+
+    return install
+
+
+@pytest.mark.parametrize("max_tokens", [10_000, 40, 25])
+def test_assembled_ids_match_the_string_path(engine_with, max_tokens):
+    tok = engine_with(SubwordTokenizer())
+    ctx, _ = pipeline.prepare_context("Which museum?", list(HISTORY), BASE, {}, False, _settings(max_tokens))
+    assert isinstance(ctx, TokenPrompt)
+    assert list(ctx.ids) == tok(str(ctx))["input_ids"]
+    assert ctx[: ctx.header_chars] == BASE
+    assert list(ctx.ids[: ctx.header_tokens]) == tok(BASE, add_special_tokens=False)["input_ids"]
+
+    # same trimming decisions as re-tokenising the whole string
+    pipeline._SEGMENTER = SegmentTokenizer(tok)
+    pipeline._SEGMENTER.equivalent = False
+    plain, _ = pipeline.prepare_context("Which museum?", list(HISTORY), BASE, {}, False, _settings(max_tokens))
+    assert type(plain) is str and plain == str(ctx)
+
+
+def test_segments_are_tokenised_once(engine_with):
+    calls = []
+
+    class Counting(SubwordTokenizer):
+        def __call__(self, text, **kw):
+            calls.append(text)
+            return super().__call__(text, **kw)
+
+    engine_with(Counting())
+    for msg in ("first", "second"):
+        pipeline.prepare_context(msg, list(HISTORY), BASE, {}, False, _settings())
+    turns = [t for t in calls if t.startswith("\nUser: Who painted")]
+    assert len(turns) == 1
+
+
+def test_non_additive_tokenizer_keeps_the_string_path(engine_with):
+    engine_with(BigramTokenizer())
+    ctx, _ = pipeline.prepare_context("hello", list(HISTORY), BASE, {}, False, _settings())
+    assert type(ctx) is str and pipeline.segmenter() is None
+
+
+def test_round_trip_with_the_real_tokenizer():
+    transformers = pytest.importorskip("transformers")
+    try:
+        tok = transformers.AutoTokenizer.from_pretrained("google/flan-t5-base", local_files_only=True)
+    except OSError:
+        pytest.skip("flan-t5-base tokenizer not cached locally")
+    seg = SegmentTokenizer(tok)
+    assert seg.equivalent
+    texts = [BASE, *[f"\n{t['role'].capitalize()}: {t['content']}" for t in HISTORY], "\nUser: why?\nAssistant:"]
+    assert list(seg.assemble([seg.ids(t) for t in texts])) == tok("".join(texts))["input_ids"]
@@ -10,19 +10,20 @@ separate module so future prompt-utility functions stay in one place.
 """
 
 # ───────────────────────────────────────────────────────── Imports ──
-from typing import List
+from typing import List, Sequence, Union
 
 
 # ──────────────────────────────────── Public helpers ──
-def alias_in_message(alias: str, message_tokens: List[str]) -> bool:
+def alias_in_message(alias: Union[str, Sequence[str]], message_tokens: List[str]) -> bool:
     """
     Return **True** if *all* tokens of `alias` appear *in order* inside
     `message_tokens`.
 
     Parameters
     ----------
-    alias : str
-        Multi-word alias string (e.g. "explain like i'm five").
+    alias : str | Sequence[str]
+        Multi-word alias string (e.g. "explain like i'm five"), or its
+        already lower-cased, split tokens (precompiled config artefact).
     message_tokens : List[str]
         Lower-case, whitespace-split tokens of the user message.
 
@@ -31,7 +32,9 @@ def alias_in_message(alias: str, message_tokens: List[str]) -> bool:
     * Matching is **in-order** but not necessarily contiguous.
     * Case-insensitive – `alias` should already be lower-cased by caller.
     """
-    alias_tokens = alias.lower().split()
+    alias_tokens = alias.lower().split() if isinstance(alias, str) else alias
+    if not alias_tokens:
+        return False
     idx = 0  # pointer into alias_tokens
 
     for tok in message_tokens:
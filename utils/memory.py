@@ -9,6 +9,8 @@ Back-ends
 • **IN_MEMORY**  (default, zero deps, oldest→newest order)
 • **REDIS**      (network)        – newest-first → flipped once on load
 • **SQLITE**     (file-based)     – newest-first → flipped once on load
+• **LOG**        (append-only)    – newest-first → flipped once on load
+• **SHARDED_SQLITE** (N files)    – newest-first → flipped once on load
 • “persistent” alias = redis → sqlite → in-memory
 """
 
@@ -68,9 +70,45 @@ def _sqlite_factory() -> Any | None:
         return None
 
 
+def _log_factory() -> Any | None:
+    """
+    Build the append-only log backend.
+
+    • honours $MEMORY_LOG_DIR so tests can point at a tmp dir
+    • falls back to data/memory_log for normal runs
+    """
+    log_dir = os.getenv("MEMORY_LOG_DIR", "data/memory_log")
+    try:
+        LogMB = importlib.import_module(
+            "memory.backends.log_memory_backend"
+        ).LogMemoryBackend
+        return LogMB(log_dir=log_dir)
+    except Exception:
+        return None
+
+
+def _sharded_sqlite_factory() -> Any | None:
+    """
+    Build the sharded SQLite backend.
+
+    • honours $MEMORY_DB_DIR / $MEMORY_SQLITE_SHARDS
+    • falls back to data/memory_shards with 4 shards for normal runs
+    """
+    db_dir = os.getenv("MEMORY_DB_DIR", "data/memory_shards")
+    try:
+        ShardedMB = importlib.import_module(
+            "memory.backends.sharded_sqlite_memory_backend"
+        ).ShardedSQLiteMemoryBackend
+        return ShardedMB(db_dir=db_dir)
+    except Exception:
+        return None
+
+
 _BACKEND_FACTORIES: dict[str, Callable[[], Any | None]] = {
     "redis": _redis_factory,
     "sqlite": _sqlite_factory,
+    "log": _log_factory,
+    "sharded_sqlite": _sharded_sqlite_factory,
     "in_memory": lambda: None,
     "none": lambda: None,
 }
@@ -82,6 +120,8 @@ class MemoryBackend(str, Enum):
     IN_MEMORY = "in_memory"
     REDIS = "redis"
     SQLITE = "sqlite"
+    LOG = "log"
+    SHARDED_SQLITE = "sharded_sqlite"
 
 
 def _normalise(raw: str) -> str:
@@ -144,6 +184,8 @@ class Memory:
     _instance: Optional["Memory"] = None
     _store: Dict[str, List[Dict[str, Any]]] = {}  # in-process store
     _impl: Optional[Any] = None  # real backend instance
+    # called with the session id after every clear() – survives singleton resets
+    _clear_hooks: List[Callable[[str], None]] = []
 
     # ───────────────────────── ctor / (re)configure ─────────────────────────
     def __new__(
@@ -202,10 +244,18 @@ class Memory:
         elif self.backend != MemoryBackend.NONE:
             if self._impl is not None:
                 self._impl.flush(cid=session_id)
+        for hook in self._clear_hooks:
+            hook(session_id)
+
+    @classmethod
+    def add_clear_hook(cls, hook: Callable[[str], None]) -> None:
+        """Register a callback for derived per-session state (e.g. summaries)."""
+        if hook not in cls._clear_hooks:
+            cls._clear_hooks.append(hook)
 
 
 # ───────────────────────── bootstrap default singleton ─────────────────────
-from config.settings_loader import load_settings  # late import to avoid cycles
+from config.settings_service import current_settings  # late import to avoid cycles
 
-DEFAULT_BACKEND = load_settings().get("memory", {}).get("backend", "none")
+DEFAULT_BACKEND = current_settings().section("memory").get("backend", "none")
 memory: Memory = Memory(backend=DEFAULT_BACKEND)
@@ -0,0 +1,386 @@
+# ════════════════════════════════════════════════════════════════════
+#  utils/safety_classifier.py – local model safety stage (process pool)
+# ════════════════════════════════════════════════════════════════════
+"""
+Optional classifier stage behind the term-list check in
+`utils.safety_filters`.
+
+A local model (e.g. a small sequence-classification transformer on disk)
+scores messages in a dedicated process pool, so neither model load nor
+inference competes with the chat loop for the GIL. The stage is built to
+put a hard ceiling on what it adds to a request:
+
+• every `classify()` call has a deadline; when it passes – or the pool is
+  still warming up, or a worker died – the caller gets ``None`` and keeps
+  the term-list verdict;
+• concurrent requests are micro-batched (up to `max_batch`, waiting at most
+  `batch_window_ms` for company) and at most two batches per worker are in
+  flight; requests whose deadline passed while queued are never sent;
+• recent scores live in an LRU keyed by message digest, and identical
+  concurrent messages share one in-flight request.
+
+Model spec
+----------
+``"pkg.module:attr"`` – a callable ``texts -> scores`` imported in each
+worker (custom models, tests); anything else is a path / hub id loaded with
+``AutoModelForSequenceClassification``.
+
+Example
+-------
+>>> stage = ClassifierStage("models/toxicity", timeout_ms=50)
+>>> stage.classify("hello there")     # None while the workers load the model
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import hashlib
+import importlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+# texts → probability that each one is unsafe
+ScoreFn = Callable[[List[str]], List[float]]
+Label = Union[int, str, None]
+
+
+# ─────────────────────────────────────────── Model adapters ──
+class TransformersClassifier:
+    """Sequence-classification model; score = softmax probability of `label`."""
+
+    def __init__(self, model_path: str, *, label: Label = None, max_length: int = 256) -> None:
+        import torch  # heavy imports stay inside the worker process
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self._torch = torch
+        self._tok = AutoTokenizer.from_pretrained(model_path)
+        self._model = AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+        if isinstance(label, str):
+            label = self._model.config.label2id[label]
+        # binary toxicity heads put "unsafe" last by convention
+        self._label = self._model.config.num_labels - 1 if label is None else int(label)
+        self._max_length = max_length
+
+    def __call__(self, texts: List[str]) -> List[float]:
+        enc = self._tok(
+            texts, return_tensors="pt", padding=True, truncation=True, max_length=self._max_length
+        )
+        with self._torch.inference_mode():
+            logits = self._model(**enc).logits
+        return [float(p) for p in logits.softmax(dim=-1)[:, self._label].tolist()]
+
+
+def resolve_scorer(spec: str, label: Label = None) -> ScoreFn:
+    """Turn a model spec into a scoring callable (runs inside the worker)."""
+    module, sep, attr = spec.partition(":")
+    if sep and module and attr and not os.path.exists(spec):
+        fn: ScoreFn = getattr(importlib.import_module(module), attr)
+        return fn
+    return TransformersClassifier(spec, label=label)
+
+
+_PROC_SCORER: Dict[Tuple[str, Label], ScoreFn] = {}  # per worker-process cache
+
+
+def _score_batch(spec: str, label: Label, texts: List[str]) -> List[float]:
+    """Pool task: score `texts` with the worker's (lazily loaded) model."""
+    fn = _PROC_SCORER.get((spec, label))
+    if fn is None:
+        fn = _PROC_SCORER[(spec, label)] = resolve_scorer(spec, label)
+    scores = [float(s) for s in fn(texts)]
+    if len(scores) != len(texts):
+        raise ValueError(f"classifier returned {len(scores)} score(s) for {len(texts)} text(s)")
+    return scores
+
+
+def _warm(spec: str, label: Label) -> int:
+    """Pool task: load the model before the first real request."""
+    _score_batch(spec, label, ["warm-up"])
+    return os.getpid()
+
+
+# ─────────────────────────────────────────────── Stage ──
+@dataclass
+class _Pending:
+    text: str
+    key: bytes
+    deadline: float
+    future: Future[float]
+
+
+class ClassifierStage:
+    """
+    Deadline-bounded, micro-batching front end for a classifier process pool.
+
+    • `classify()` – score in [0, 1], or None when no answer is available
+                     within the deadline (caller falls back).
+    • `close()`    – stop the dispatcher and the pool.
+    """
+
+    def __init__(
+        self,
+        spec: str,
+        *,
+        label: Label = None,
+        workers: int = 1,
+        timeout_ms: float = 50.0,
+        max_batch: int = 16,
+        batch_window_ms: float = 2.0,
+        cache_size: int = 4_096,
+    ) -> None:
+        self._spec = spec
+        self._label = label
+        self._workers = max(1, workers)
+        self._timeout = timeout_ms / 1e3
+        self._max_batch = max(1, max_batch)
+        self._window = batch_window_ms / 1e3
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._cache_size = cache_size
+        self._inflight: Dict[bytes, Future[float]] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self._workers * 2)  # batches in flight
+        self._queue: queue.SimpleQueue[Optional[_Pending]] = queue.SimpleQueue()
+        self._closed = False
+        self._broken = False  # a worker died; the dispatcher swaps the pool
+        self.stats: Dict[str, int] = {
+            "calls": 0, "hits": 0, "cold": 0, "timeouts": 0, "errors": 0,
+            "expired": 0, "batches": 0, "scored": 0,
+        }
+
+        self._pool = self._start_pool()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="safety-classifier", daemon=True
+        )
+        self._dispatcher.start()
+
+    # ─────────────────────────────────────────── internals ──
+    def _start_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(max_workers=self._workers)
+        # one warm-up per worker; the stage opens as soon as the first is done
+        warm = [pool.submit(_warm, self._spec, self._label) for _ in range(self._workers)]
+        self._ready = warm[0]
+        self._ready.add_done_callback(self._warmed)
+        return pool
+
+    def _warmed(self, fut: Future[int]) -> None:
+        exc = fut.exception()
+        if exc is not None:
+            LOGGER.error("[Classifier] loading %s failed (%s) – term lists only", self._spec, exc)
+        else:
+            LOGGER.debug("[Classifier] %s ready", self._spec)
+
+    def _mark_broken(self, pool: ProcessPoolExecutor) -> None:
+        """Flag `pool` for replacement – safe on the pool's own management thread."""
+        with self._lock:
+            if self._pool is pool:
+                self._broken = True
+
+    def _restart_pool(self) -> None:
+        """
+        Replace a broken pool. Dispatcher thread only, and never under
+        `self._lock`: shutting a broken pool down can block.
+        """
+        with self._lock:
+            if self._closed or not self._broken:
+                return
+            self._broken = False
+            broken = self._pool
+        LOGGER.warning("[Classifier] worker died – restarting pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+        pool = self._start_pool()
+        with self._lock:
+            self._pool = pool
+
+    def _dispatch(self) -> None:
+        """Collect queued requests into batches and hand them to the pool."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            until = time.monotonic() + self._window
+            while len(batch) < self._max_batch:
+                remaining = until - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._restart_pool()
+            self._slots.acquire()
+            self._submit(batch)
+            if stop:
+                return
+
+    def _submit(self, batch: List[_Pending]) -> None:
+        now = time.monotonic()
+        live = [p for p in batch if p.deadline > now]
+        for p in batch:
+            if p.deadline <= now:  # nobody is waiting any more
+                self._fail(p, None, count="expired")
+        if not live:
+            self._slots.release()
+            return
+        pool = self._pool
+        try:
+            fut = pool.submit(_score_batch, self._spec, self._label, [p.text for p in live])
+        except Exception as exc:
+            self._slots.release()
+            for p in live:
+                self._fail(p, exc)
+            if isinstance(exc, BrokenProcessPool):
+                self._mark_broken(pool)
+                self._restart_pool()  # we are on the dispatcher thread
+            return
+        self.stats["batches"] += 1
+        fut.add_done_callback(lambda f: self._resolve(pool, live, f))
+
+    def _resolve(self, pool: ProcessPoolExecutor, batch: List[_Pending], fut: Future[List[float]]) -> None:
+        """Done-callback – may run on the pool's management thread, so never restart here."""
+        self._slots.release()
+        try:
+            scores = fut.result()
+        except Exception as exc:
+            if isinstance(exc, BrokenProcessPool):
+                self._mark_broken(pool)
+            for p in batch:
+                self._fail(p, exc)
+            return
+        with self._lock:
+            self.stats["scored"] += len(batch)
+            for p, score in zip(batch, scores):
+                self._cache[p.key] = score
+                self._cache.move_to_end(p.key)
+                if self._inflight.get(p.key) is p.future:
+                    del self._inflight[p.key]
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        for p, score in zip(batch, scores):
+            p.future.set_result(score)
+
+    def _fail(self, p: _Pending, exc: Optional[BaseException], *, count: str = "errors") -> None:
+        """Settle a request without a score (`exc=None` → cancelled)."""
+        with self._lock:
+            self.stats[count] += 1
+            if self._inflight.get(p.key) is p.future:
+                del self._inflight[p.key]
+        if exc is None:
+            p.future.cancel()
+        else:
+            p.future.set_exception(exc)
+
+    # ─────────────────────────────────────────── public API ──
+    @property
+    def ready(self) -> bool:
+        """True once the workers have loaded the model."""
+        return self._ready.done() and self._ready.exception() is None
+
+    def classify(self, text: str, *, timeout_ms: Optional[float] = None) -> Optional[float]:
+        """Unsafe-probability for `text`, or None if not available in time."""
+        timeout = self._timeout if timeout_ms is None else timeout_ms / 1e3
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            self.stats["calls"] += 1
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return score
+            if self._closed or not self.ready:
+                self.stats["cold"] += 1
+                return None
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = self._inflight[key] = Future()
+                self._queue.put(_Pending(text, key, time.monotonic() + timeout, fut))
+        try:
+            return fut.result(timeout=timeout)
+        except TimeoutError:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            return None
+        except Exception:  # incl. CancelledError
+            return None  # already counted where the request was settled
+
+    def close(self) -> None:
+        """Stop accepting work, drain the dispatcher and shut the pool down."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ─────────────────────────────────────── Stage per settings ──
+_STAGES: Dict[Tuple[Any, ...], ClassifierStage] = {}
+_STAGES_LOCK = threading.Lock()
+
+
+def get_classifier_stage(settings: Mapping[str, Any]) -> Optional[ClassifierStage]:
+    """
+    Shared stage for ``settings['safety']['classifier']`` or None when the
+    classifier is disabled. Per-call knobs (`timeout_ms`, `threshold`) are
+    read by the caller; the rest identifies the pool.
+    """
+    cfg = settings.get("safety", {}).get("classifier") or {}
+    if not cfg.get("enabled") or not cfg.get("model"):
+        return None
+    key = (
+        str(cfg["model"]),
+        cfg.get("label"),
+        int(cfg.get("workers", 1)),
+        int(cfg.get("max_batch", 16)),
+        float(cfg.get("batch_window_ms", 2.0)),
+        int(cfg.get("cache_size", 4_096)),
+    )
+    with _STAGES_LOCK:
+        stage = _STAGES.get(key)
+        if stage is None:
+            stage = _STAGES[key] = ClassifierStage(
+                key[0],
+                label=key[1],
+                workers=key[2],
+                timeout_ms=float(cfg.get("timeout_ms", 50.0)),
+                max_batch=key[3],
+                batch_window_ms=key[4],
+                cache_size=key[5],
+            )
+        return stage
+
+
+def shutdown_classifiers() -> None:
+    """Close every shared stage (tests / process exit)."""
+    with _STAGES_LOCK:
+        stages = list(_STAGES.values())
+        _STAGES.clear()
+    for stage in stages:
+        stage.close()
+
+
+__all__ = [
+    "ClassifierStage",
+    "TransformersClassifier",
+    "get_classifier_stage",
+    "resolve_scorer",
+    "shutdown_classifiers",
+]
@@ -6,7 +6,17 @@ Basic profanity detection / masking plus a pre-generation safety check.
 
 The API intentionally stays light-weight so stricter classifiers (e.g.
 OpenAI moderation, Perspective API, custom models) can later replace the
-`evaluate_safety()` stub without changing the main chat flow.
+`evaluate_safety()` stub without changing the main chat flow. A local
+model can already be enabled via ``settings['safety']['classifier']``
+(see `utils.safety_classifier`); it only ever tightens the verdict and is
+skipped whenever it cannot answer within its deadline.
+
+All term lists (defaults, `strict_terms`, `extra_phrases`, whitelist) are
+compiled once per settings version into a `SafetyEngine`: a word-level
+Aho-Corasick automaton that scans a message in a single linear pass and
+yields both the verdict inputs and the mask spans. Matching ignores case,
+common leetspeak (`sh1t`, `$hit`) and letters repeated three or more times
+(`shiiit`, `helllll`).
 """
 
 from __future__ import annotations
@@ -17,61 +27,609 @@ import logging
 LOGGER = logging.getLogger(__name__)  # inherit root config from main
 
 # ───────────────────────────────────────────────────────── Imports ──
+import hashlib
 import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
 from functools import lru_cache
-from typing import Any, Dict, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 # ─────────────────────────────────────────────────────── Static data ──
 _DEFAULT_PROFANITY: Tuple[str, ...] = ("damn", "hell", "shit", "fuck")
 
-from functools import lru_cache
-import re
+_DEFAULT_REFUSAL = "I'm unable to respond to that request due to safety policies."
+
+# ───────────────────────────────────────────────────── Normalisation ──
+# 1:1 character substitutions, so spans in the normalised text are spans in
+# the original text as well
+_LEET = str.maketrans(
+    {"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s",
+     # str.lower() picks final vs. medial sigma from context – fold both so
+     # every character normalises on its own (chunked == whole-text)
+     "ς": "σ"}
+)
+_WORD_RE = re.compile(r"\w+")
+_RUNS_RE = re.compile(r"(.)\1+")
+_STRETCH_RE = re.compile(r"(.)\1\1")  # 3+ repeats → deliberately stretched
+_MEMO_LIMIT = 65_536  # raw word → symbol cache entries per engine
+_NO_SYMBOL = -1
+
+
+def _normalise_text(text: str) -> str:
+    """Lower-case + leetspeak folding that keeps every character offset."""
+    norm = text.lower()
+    if len(norm) != len(text):  # e.g. "İ" lower-cases to two code points
+        norm = "".join(ch.lower()[0] for ch in text)
+    return norm.translate(_LEET)
+
+
+def _squeeze(word: str) -> str:
+    """Collapse every run of a repeated letter ("shiiit" → "shit", "hell" → "hel")."""
+    return _RUNS_RE.sub(r"\1", word)
+
+
+def _term_key(term: str) -> Tuple[str, ...]:
+    """A term / phrase as the sequence of normalised words it matches."""
+    return tuple(_WORD_RE.findall(_normalise_text(str(term))))
+
+
+# ─────────────────────────────────────────────────────── Scan result ──
+@dataclass(frozen=True)
+class SafetyScan:
+    """Outcome of one pass over a message."""
+
+    terms: Tuple[str, ...]  # matched terms, in order of appearance
+    spans: Tuple[Tuple[int, int], ...]  # merged [start, end) mask spans
+    strict: bool  # at least one match is a strict term
+
+    @property
+    def profane(self) -> bool:
+        return bool(self.spans)
+
+    def mask(self, text: str) -> str:
+        """`text` with every span replaced by asterisks of the same length."""
+        if not self.spans:
+            return text
+        parts: List[str] = []
+        pos = 0
+        for start, end in self.spans:
+            parts.append(text[pos:start])
+            parts.append("*" * (end - start))
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+_CLEAN = SafetyScan(terms=(), spans=(), strict=False)
+
+
+# ──────────────────────────────────────────────────────────── Engine ──
+class SafetyEngine:
+    """
+    Compiled matcher for a fixed set of terms.
+
+    Words are the automaton's alphabet: the message is tokenised once with a
+    C-level regex and every token costs one dict lookup plus amortised O(1)
+    failure-link steps, so a scan is linear in the message length whatever
+    the number of terms. Matching whole words only mirrors the old
+    `\\b(term)\\b` regex.
+
+    `scan()` results are cached by a BLAKE2 digest of the message (LRU).
+    """
+
+    def __init__(
+        self,
+        terms: Iterable[str],
+        *,
+        strict_terms: Iterable[str] = (),
+        whitelist: Iterable[str] = (),
+        cache_size: int = 4_096,
+    ) -> None:
+        strict_keys = {_term_key(t) for t in strict_terms}
+        allowed_keys = {_term_key(w) for w in whitelist}
+
+        self._vocab: Dict[str, int] = {}  # normalised term word → symbol
+        self._goto: List[Dict[int, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, int], ...]] = [()]
+        self._depth: List[int] = [0]  # words from the root to each state
+        self._terms: List[str] = []
+        self._strict: List[bool] = []
+
+        seen: set[Tuple[str, ...]] = set()
+        for term in list(terms) + list(strict_terms):
+            key = _term_key(term)
+            if not key or key in seen or key in allowed_keys:
+                continue
+            seen.add(key)
+            self._add(key, str(term).lower(), key in strict_keys)
+        self._link()
+        # stretched words ("heeelll") are looked up by their squeezed form
+        self._squeezed: Dict[str, int] = {}
+        for word, sym in self._vocab.items():
+            self._squeezed.setdefault(_squeeze(word), sym)
+
+        self._memo: Dict[str, int] = {}
+        self._cache: OrderedDict[bytes, SafetyScan] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"scans": 0, "hits": 0}
+
+    # ─────────────────────────────────────────── compile ──
+    def _add(self, key: Tuple[str, ...], label: str, strict: bool) -> None:
+        state = 0
+        for word in key:
+            sym = self._vocab.setdefault(word, len(self._vocab))
+            nxt = self._goto[state].get(sym)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][sym] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._depth.append(self._depth[state] + 1)
+            state = nxt
+        self._out[state] = ((len(key), len(self._terms)),)
+        self._terms.append(label)
+        self._strict.append(strict)
+
+    def _link(self) -> None:
+        """Breadth-first failure links; outputs inherit along them."""
+        # _hold[s]: words a stream must keep back in state s – the depth of
+        # the deepest state on its failure chain that can still be extended
+        self._hold: List[int] = [0] * len(self._goto)
+        queue: Deque[int] = deque(self._goto[0].values())
+        for nxt in queue:
+            self._hold[nxt] = 1 if self._goto[nxt] else 0
+        while queue:
+            state = queue.popleft()
+            for sym, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and sym not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(sym, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                self._hold[nxt] = self._depth[nxt] if self._goto[nxt] else self._hold[self._fail[nxt]]
+
+    @property
+    def size(self) -> int:
+        """Number of compiled terms."""
+        return len(self._terms)
+
+    # ─────────────────────────────────────────── pickling ──
+    # Only the compiled tables travel (config artefacts, process pools);
+    # caches, memo and lock are rebuilt empty on load.
+    _TABLES = ("_vocab", "_goto", "_fail", "_out", "_depth", "_hold", "_terms", "_strict", "_squeezed")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in self._TABLES}
+        state["_cache_size"] = self._cache_size
+        return state
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._memo = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"scans": 0, "hits": 0}
+
+    # ─────────────────────────────────────────── scanning ──
+    def _symbol(self, word: str) -> int:
+        sym = self._memo.get(word)
+        if sym is None:
+            sym = self._vocab.get(word, _NO_SYMBOL)
+            if sym == _NO_SYMBOL and _STRETCH_RE.search(word):
+                sym = self._squeezed.get(_squeeze(word), _NO_SYMBOL)
+            if len(self._memo) < _MEMO_LIMIT:
+                self._memo[word] = sym
+        return sym
+
+    def _scan(self, text: str) -> SafetyScan:
+        goto, fail, out = self._goto, self._fail, self._out
+        starts: List[int] = []
+        hits: List[Tuple[int, int, int]] = []  # (start, end, term id)
+        state = prev_end = 0
+        norm = _normalise_text(text)
+        for m in _WORD_RE.finditer(norm):
+            start = m.start()
+            starts.append(start)
+            sym = self._symbol(m.group())
+            if sym == _NO_SYMBOL:
+                state = 0
+                continue
+            # phrase words may only be separated by whitespace
+            if state and not norm[prev_end:start].isspace():
+                state = 0
+            prev_end = m.end()
+            while state and sym not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(sym, 0)
+            for length, tid in out[state]:
+                hits.append((starts[-length], m.end(), tid))
+        if not hits:
+            return _CLEAN
+
+        hits.sort()
+        spans: List[Tuple[int, int]] = []
+        for start, end, _ in hits:
+            if spans and start <= spans[-1][1]:
+                if end > spans[-1][1]:
+                    spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        return SafetyScan(
+            terms=tuple(self._terms[tid] for _, _, tid in hits),
+            spans=tuple(spans),
+            strict=any(self._strict[tid] for _, _, tid in hits),
+        )
+
+    def scan(self, text: str) -> SafetyScan:
+        """Matches, mask spans and strict flag for `text` (cached)."""
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            self.stats["scans"] += 1
+            hit = self._cache.get(digest)
+            if hit is not None:
+                self._cache.move_to_end(digest)
+                self.stats["hits"] += 1
+                return hit
+        result = self._scan(text)
+        with self._lock:
+            self._cache[digest] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def scan_many(self, texts: Iterable[str]) -> List[SafetyScan]:
+        """
+        `scan` for a batch: identical texts are scanned once and the result
+        cache is bypassed, so bulk jobs never evict live chat verdicts.
+        """
+        texts = list(texts)
+        seen: Dict[str, SafetyScan] = {}
+        for text in texts:
+            if text not in seen:
+                seen[text] = self._scan(text)
+        return [seen[text] for text in texts]
+
+    def mask(self, text: str) -> str:
+        return self.scan(text).mask(text)
+
+    def stream(self) -> "StreamingMasker":
+        """Incremental masker over this engine (one per output stream)."""
+        return StreamingMasker(self)
+
+
+# ─────────────────────────────────────────────────── Streaming mask ──
+class StreamingMasker:
+    """
+    Mask text that arrives in chunks (e.g. generated token by token).
+
+    The automaton runs incrementally over *complete* words, exactly as
+    `SafetyEngine.scan` does over the whole text, so
+    ``"".join(feed(c) for c in chunks) + flush()`` always equals
+    ``engine.mask("".join(chunks))``. What `feed` holds back is only:
+
+    • the trailing word, until a non-word character shows it is complete;
+    • the words of a phrase that is still being matched (at most the
+      longest phrase in words – the current automaton depth).
+
+    Everything before that is final and returned immediately.
+    """
+
+    def __init__(self, engine: SafetyEngine) -> None:
+        self._engine = engine
+        self._buf = ""  # original text not returned yet
+        self._norm = ""  # its normalised twin (same offsets)
+        self._base = 0  # global offset of _buf[0]
+        self._next = 0  # global offset where the next word search starts
+        self._tail: Optional[int] = None  # global start of an unfinished word
+        self._state = 0
+        self._prev_end = 0  # global end of the last word fed to the automaton
+        self._starts: Deque[int] = deque(maxlen=max(engine._depth) + 1)
+        self._spans: List[Tuple[int, int]] = []  # global, not fully emitted yet
+        self.terms: List[str] = []  # every term matched so far
+
+    # ─────────────────────────────────────────── internals ──
+    def _consume(self, final: bool) -> None:
+        eng = self._engine
+        goto, fail, out = eng._goto, eng._fail, eng._out
+        norm, base = self._norm, self._base
+        self._tail = None
+        for m in _WORD_RE.finditer(norm, max(self._next - base, 0)):
+            if not final and m.end() == len(norm):
+                self._tail = base + m.start()  # may continue in the next chunk
+                break
+            start, end = base + m.start(), base + m.end()
+            self._next = end
+            self._starts.append(start)
+            sym = eng._symbol(m.group())
+            if sym == _NO_SYMBOL:
+                self._state = 0
+                continue
+            if self._state and not norm[self._prev_end - base : m.start()].isspace():
+                self._state = 0
+            self._prev_end = end
+            state = self._state
+            while state and sym not in goto[state]:
+                state = fail[state]
+            state = self._state = goto[state].get(sym, 0)
+            for length, tid in out[state]:
+                self._spans.append((self._starts[-length], end))
+                self.terms.append(eng._terms[tid])
+
+    def _safe_point(self) -> int:
+        limit = self._base + len(self._buf) if self._tail is None else self._tail
+        hold = self._engine._hold[self._state]
+        if hold:
+            limit = min(limit, self._starts[-hold])
+        return limit
+
+    def _emit(self, upto: int) -> str:
+        n = upto - self._base
+        if n <= 0:
+            return ""
+        text = self._buf[:n]
+        clipped = sorted(
+            (max(s, self._base) - self._base, min(e, upto) - self._base)
+            for s, e in self._spans
+            if s < upto and e > self._base
+        )
+        if clipped:
+            parts: List[str] = []
+            pos = 0
+            for lo, hi in clipped:
+                lo = max(lo, pos)
+                if hi <= lo:
+                    continue
+                parts.append(text[pos:lo])
+                parts.append("*" * (hi - lo))
+                pos = hi
+            parts.append(text[pos:])
+            text = "".join(parts)
+        self._spans = [(s, e) for s, e in self._spans if e > upto]
+        self._buf, self._norm = self._buf[n:], self._norm[n:]
+        self._base = upto
+        return text
+
+    # ─────────────────────────────────────────── public API ──
+    def feed(self, chunk: str) -> str:
+        """Add `chunk`; return the masked text that can no longer change."""
+        if chunk:
+            self._buf += chunk
+            self._norm += _normalise_text(chunk)
+            self._consume(final=False)
+        return self._emit(self._safe_point())
+
+    def flush(self) -> str:
+        """End of stream: return everything still held back, masked."""
+        self._consume(final=True)
+        return self._emit(self._base + len(self._buf))
+
+    @property
+    def pending(self) -> int:
+        """Characters currently held back."""
+        return len(self._buf)
+
+
+# ─────────────────────────────────────── Engine per settings version ──
 @lru_cache(maxsize=1)
-def _default_regex() -> re.Pattern[str]:
-    """Cached whole-word regex built from _DEFAULT_PROFANITY."""
-    pat = r"\b(" + "|".join(map(re.escape, sorted(_DEFAULT_PROFANITY))) + r")\b"
-    return re.compile(pat, re.IGNORECASE)
+def _default_engine() -> SafetyEngine:
+    """Engine for _DEFAULT_PROFANITY only (no settings involved)."""
+    return SafetyEngine(_DEFAULT_PROFANITY)
+
+
+# shared defaults: a fresh `{}` per call would never hit the identity cache
+_NO_PHRASES: Mapping[str, Any] = MappingProxyType({})
+
+
+def _term_lists(cfg: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    return (
+        cfg.get("strict_terms", ()),
+        cfg.get("extra_phrases", _NO_PHRASES),
+        cfg.get("relaxed_whitelist", ()),
+    )
+
 
+def _engine_content(lists: Tuple[Any, Any, Any]) -> Tuple[Tuple[str, ...], ...]:
+    strict, extra, white = lists
+    extra_terms = extra.keys() if hasattr(extra, "keys") else extra
+    return (
+        tuple(map(str, strict)),
+        tuple(map(str, extra_terms)),
+        tuple(sorted(str(w).lower() for w in white)),
+    )
+
+
+_ENGINE_LOCK = threading.Lock()
+# identity of the list objects → engine: O(1) per call for a settings dict
+# that is reused; the tuple keeps the lists alive so their ids stay unique
+_ENGINES_BY_ID: Dict[Tuple[int, ...], Tuple[Tuple[Any, ...], SafetyEngine]] = {}
+# content fingerprint → engine: reloading identical settings never recompiles
+_ENGINES_BY_CONTENT: OrderedDict[Tuple[Tuple[str, ...], ...], SafetyEngine] = OrderedDict()
+_ENGINE_CACHE_SIZE = 8
+
+
+def get_safety_engine(settings: Mapping[str, Any]) -> SafetyEngine:
+    """
+    Compiled engine for the term lists in ``settings['safety']``.
+
+    Compilation happens once per distinct set of lists; editing a list in
+    place without changing its length needs `reset_safety_cache()`.
+    """
+    lists = _term_lists(settings.get("safety", {}))
+    ident = tuple(x for obj in lists for x in (id(obj), len(obj)))
+    with _ENGINE_LOCK:
+        cached = _ENGINES_BY_ID.get(ident)
+        if cached is not None:
+            return cached[1]
 
-# ─────────────────────────────── Regex builder (cached) ──────────────
-@lru_cache(maxsize=8)
-def _build_profanity_regex(
-    strict_terms: Tuple[str, ...] = (),
-    extra_terms: Tuple[str, ...] = (),
-) -> re.Pattern[str]:
+    content = _engine_content(lists)
+    with _ENGINE_LOCK:
+        engine = _ENGINES_BY_CONTENT.get(content)
+    if engine is None:
+        engine = SafetyEngine(
+            _DEFAULT_PROFANITY + content[1],
+            strict_terms=content[0],
+            whitelist=content[2],
+        )
+        LOGGER.debug("[Safety] compiled %d term(s)", engine.size)
+
+    with _ENGINE_LOCK:
+        _ENGINES_BY_CONTENT[content] = engine
+        _ENGINES_BY_CONTENT.move_to_end(content)
+        while len(_ENGINES_BY_CONTENT) > _ENGINE_CACHE_SIZE:
+            _ENGINES_BY_CONTENT.popitem(last=False)
+        if len(_ENGINES_BY_ID) >= _ENGINE_CACHE_SIZE:
+            _ENGINES_BY_ID.clear()
+        _ENGINES_BY_ID[ident] = (lists, engine)
+    return engine
+
+
+def preload_safety_engine(settings: Mapping[str, Any], engine: SafetyEngine) -> None:
     """
-    Compile  ❱  ( default ∪ strict_terms ∪ extra_terms )  ❰
-    into a single *whole-word* regex. Cached for speed.
+    Register an engine compiled elsewhere (e.g. loaded from a config
+    artefact) for the term lists in `settings` – the next
+    `get_safety_engine()` with the same lists skips compilation.
     """
-    wordlist = set(_DEFAULT_PROFANITY) | set(strict_terms) | set(extra_terms)
-    if not wordlist:
-        # Compile a regex that never matches to keep types simple downstream.
-        return re.compile(r"(?!x)x")
-    pattern = r"\b(" + "|".join(map(re.escape, sorted(wordlist))) + r")\b"
-    return re.compile(pattern, re.IGNORECASE)
+    content = _engine_content(_term_lists(settings.get("safety", {})))
+    with _ENGINE_LOCK:
+        _ENGINES_BY_CONTENT[content] = engine
+        _ENGINES_BY_CONTENT.move_to_end(content)
+        while len(_ENGINES_BY_CONTENT) > _ENGINE_CACHE_SIZE:
+            _ENGINES_BY_CONTENT.popitem(last=False)
+
+
+def reset_safety_cache() -> None:
+    """Forget every compiled engine (after editing term lists in place)."""
+    with _ENGINE_LOCK:
+        _ENGINES_BY_ID.clear()
+        _ENGINES_BY_CONTENT.clear()
 
 
 # ───────────────────────────────────── Profanity masking ─────────────
-def apply_profanity_filter(text: str, regex: re.Pattern[str] | None = None) -> str:
+def apply_profanity_filter(
+    text: str,
+    regex: re.Pattern[str] | None = None,
+    *,
+    settings: Optional[Mapping[str, Any]] = None,
+) -> str:
     """
-    Mask profane words with asterisks. If no regex is provided, use a cached
-    whole-word default compiled from _DEFAULT_PROFANITY.
+    Mask profane words with asterisks. By default the compiled engine for
+    _DEFAULT_PROFANITY is used; pass `settings` to mask with the configured
+    term lists, or a custom `regex` to keep full control.
     """
-    if regex is None:
-        regex = _default_regex()
+    if regex is not None:
+        return regex.sub(lambda m: "*" * len(m.group(0)), text)
+    engine = get_safety_engine(settings) if settings is not None else _default_engine()
+    return engine.mask(text)
 
-    def _mask(match: re.Match[str]) -> str:
-        return "*" * len(match.group(0))
 
-    return regex.sub(_mask, text)
+def mask_stream(
+    chunks: Iterable[str], settings: Optional[Mapping[str, Any]] = None
+) -> Iterator[str]:
+    """
+    Streaming twin of `apply_profanity_filter`: yields masked pieces as soon
+    as they are final (empty pieces are skipped).
+    """
+    engine = get_safety_engine(settings) if settings is not None else _default_engine()
+    masker = engine.stream()
+    for chunk in chunks:
+        piece = masker.feed(chunk)
+        if piece:
+            yield piece
+    tail = masker.flush()
+    if tail:
+        yield tail
 
 
 # ─────────────────────────────── Safety pre-generation ───────────────
+@dataclass(frozen=True)
+class SafetyVerdict:
+    """Block decision plus the scan it was derived from."""
+
+    allowed: bool
+    blocked_message: Optional[str]
+    scan: SafetyScan
+    classifier_score: Optional[float] = None  # None → stage off / no answer in time
+
+    def masked(self, text: str) -> str:
+        return self.scan.mask(text)
+
+
+def _verdict(scan: SafetyScan, cfg: Dict[str, Any], level: str) -> SafetyVerdict:
+    # ── Absolute block: any strict term triggers a block ────────────
+    # ── Sensitivity ladder: strict blocks, moderate / relaxed allow ──
+    if scan.strict or (scan.profane and level == "strict"):
+        refusal = str(cfg.get("blocked_response_template", _DEFAULT_REFUSAL))
+        return SafetyVerdict(False, refusal, scan)
+    return SafetyVerdict(True, None, scan)
+
+
+def assess_safety(message: str, settings: Mapping[str, Any]) -> SafetyVerdict:
+    """
+    One pass over `message`: verdict for the configured sensitivity level and
+    the spans a caller would mask. See `evaluate_safety` for the ladder.
+    """
+    cfg = settings.get("safety", {})
+    level = str(cfg.get("sensitivity_level", "moderate")).lower()
+    scan = get_safety_engine(settings).scan(message)
+
+    if scan.profane and bool(cfg.get("log_triggered_filters", False)):
+        LOGGER.debug(
+            "[Safety] Profanity detected (level=%s, term=%s): %s",
+            level,
+            scan.terms[0],
+            message,
+        )
+    verdict = _verdict(scan, cfg, level)
+    clf = cfg.get("classifier") or {}
+    if verdict.allowed and level != "relaxed" and clf.get("enabled"):
+        verdict = _classify(message, verdict, settings, clf)
+    return verdict
+
+
+def _classify(
+    message: str, verdict: SafetyVerdict, settings: Mapping[str, Any], clf: Dict[str, Any]
+) -> SafetyVerdict:
+    """Second opinion from the local classifier; keeps `verdict` on timeout."""
+    from utils.safety_classifier import get_classifier_stage  # optional stage
+
+    stage = get_classifier_stage(settings)
+    if stage is None:
+        return verdict
+    score = stage.classify(message, timeout_ms=float(clf.get("timeout_ms", 50.0)))
+    if score is None:
+        return verdict
+    if score >= float(clf.get("threshold", 0.8)):
+        refusal = str(settings["safety"].get("blocked_response_template", _DEFAULT_REFUSAL))
+        return SafetyVerdict(False, refusal, verdict.scan, score)
+    return SafetyVerdict(True, None, verdict.scan, score)
+
+
+def evaluate_safety_batch(
+    messages: Iterable[str], settings: Mapping[str, Any]
+) -> List[SafetyVerdict]:
+    """
+    `assess_safety` for many messages at once (audits, history re-checks):
+    settings are resolved and the engine looked up once, duplicate messages
+    are scanned once, and verdicts come back in input order. Nothing is
+    logged per message – callers aggregate the verdicts themselves.
+    """
+    cfg = settings.get("safety", {})
+    level = str(cfg.get("sensitivity_level", "moderate")).lower()
+    scans = get_safety_engine(settings).scan_many(messages)
+    clean = _verdict(_CLEAN, cfg, level)
+    return [clean if scan is _CLEAN else _verdict(scan, cfg, level) for scan in scans]
+
+
 def evaluate_safety(
     message: str,
-    settings: Dict[str, Any],
+    settings: Mapping[str, Any],
 ) -> Tuple[bool, Optional[str]]:
     """
     Light safety gate that checks *input* for profanity before we call the model.
@@ -90,52 +648,5 @@ def evaluate_safety(
     │ relaxed    │ No blocking.                                   │
     └────────────┴───────────────────────────────────────────────┘
     """
-    cfg = settings.get("safety", {})
-    level = str(cfg.get("sensitivity_level", "moderate")).lower()
-    log_triggers = bool(cfg.get("log_triggered_filters", False))
-
-    # Optional lists/dicts in settings; coerce to expected shapes
-    strict_terms: Tuple[str, ...] = tuple(cfg.get("strict_terms", ()))
-    whitelist = {str(w).lower() for w in cfg.get("relaxed_whitelist", ())}
-
-    # `extra_phrases` may be a dict of {phrase: …}; keys become terms
-    extra_terms: Tuple[str, ...] = tuple(
-        getattr(cfg.get("extra_phrases", {}), "keys", lambda: ())()
-    )
-
-    regex = _build_profanity_regex(strict_terms, extra_terms)
-
-    refusal_text: str = str(
-        cfg.get(
-            "blocked_response_template",
-            "I'm unable to respond to that request due to safety policies.",
-        )
-    )
-
-    # ── Detect profanity ────────────────────────────────────────────
-    match = regex.search(message)
-    matched_word = match.group(0).lower() if match else ""
-    profane = bool(match and matched_word not in whitelist)
-
-    if profane and log_triggers:
-        LOGGER.debug(
-            "[Safety] Profanity detected (level=%s, term=%s): %s",
-            level,
-            matched_word,
-            message,
-        )
-
-    # ── Absolute block: any strict term triggers a block ────────────
-    if profane and matched_word in strict_terms:
-        return False, refusal_text
-
-    # ── Sensitivity ladder ──────────────────────────────────────────
-    if not profane:
-        return True, None
-
-    if level == "strict":
-        return False, refusal_text
-    if level == "moderate":
-        return True, None  # caller may apply output masking
-    # relaxed / unknown
-    return True, None
+    verdict = assess_safety(message, settings)
+    return verdict.allowed, verdict.blocked_message
@@ -7,6 +7,10 @@ summariser.py
 Lightweight, deterministic context summariser.
 
 - v0.4.5: Implements first-pass heuristic summarisation for long chat history.
+- Rolling mode: `RollingSummariser` folds only newly evicted turns into a
+  cached per-session summary instead of re-reading the whole history.
+- Extractive mode (`style="extractive"`): picks the most central sentences of
+  the whole history (TF-IDF, NumPy) until a *token* budget is filled.
 - Future: Add LLM-powered compression, topic-aware summarisation, config integration.
 
 Features:
@@ -17,9 +21,237 @@ Features:
 """
 
 from __future__ import annotations
-from typing import List, Dict
 
-__all__ = ["summarise_context"]
+import string
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+__all__ = ["summarise_context", "RollingSummariser", "rolling_summaries", "fold_bullets", "turn_anchor", "resume_index"]
+
+# ────────────────────────────── Tunables ──────────────────────────────
+PLACEHOLDER = "• (no prior context to summarise)\n"
+NO_USER_MSG = "• (no user turns to summarise)\n"
+MAX_BULLETS = 3
+BULLET_CHAR_LIMIT = 120
+# Return placeholder for short histories (not enough context to summarise meaningfully)
+MIN_USER_TURNS = 3
+
+# extractive style
+EXTRACTIVE_MAX_TOKENS = 128  # default budget when settings give none
+ASSISTANT_WEIGHT = 0.7  # assistant sentences rank below user sentences …
+RECENCY_WEIGHT = 0.5  # … and older sentences below newer ones
+MAX_OVERLAP = 0.8  # skip a sentence this similar (cosine) to one already picked
+MAX_MISSES = 16  # stop after this many candidates in a row were rejected
+
+TokenCounter = Callable[[str], int]
+
+
+# ─────────────────────────── Fold / render core ──────────────────────────
+@dataclass
+class _HeuristicState:
+    """Everything the heuristic needs to know about the turns seen so far."""
+
+    turns: int = 0
+    user_turns: int = 0
+    recent_user: Deque[str] = field(default_factory=lambda: deque(maxlen=MAX_BULLETS))
+
+
+def _fold(state: _HeuristicState, turns: Sequence[Dict[str, str]]) -> None:
+    """Absorb `turns` (oldest → newest) into `state` – O(len(turns))."""
+    state.turns += len(turns)
+    for turn in turns:
+        if turn.get("role") == "user":
+            state.user_turns += 1
+            state.recent_user.append(turn["content"])
+
+
+def _render(state: _HeuristicState, max_chars: int) -> str:
+    """Turn a folded state into the bullet block (≤ MAX_BULLETS lines)."""
+    # ────────────────────────────── Edge Cases ──────────────────────────────
+    if not state.turns:
+        return PLACEHOLDER
+    if not state.user_turns:
+        return NO_USER_MSG
+    if state.user_turns < MIN_USER_TURNS:
+        return PLACEHOLDER
+    return _bullets(state, max_chars)
+
+
+def _bullets(state: _HeuristicState, max_chars: int) -> str:
+    """The bullet lines for the recent user turns, capped at `max_chars`."""
+    bullets: List[str] = []
+    for line in state.recent_user:
+        bullet = line.strip().replace("\n", " ")
+        if len(bullet) > BULLET_CHAR_LIMIT:
+            bullet = bullet[: BULLET_CHAR_LIMIT - 1].rstrip() + "…"
+        bullets.append(f"• {bullet}")
+
+    summary = "\n".join(bullets) if bullets else PLACEHOLDER
+
+    # Enforce total max_chars for the whole block
+    if len(summary) > max_chars:
+        summary = summary[: max_chars].rstrip() + "…"
+
+    return summary
+
+
+def fold_bullets(turns: Sequence[Dict[str, str]], max_chars: int = 512) -> str:
+    """
+    Bullets for the user turns in `turns` ("" if there are none) – no
+    short-history placeholder, so a few turns can top up an existing summary.
+    """
+    state = _HeuristicState()
+    _fold(state, turns)
+    return _bullets(state, max_chars) if state.user_turns else ""
+
+
+# ───────────────────────────── Extractive core ───────────────────────────
+# sentence breaks / word separators, applied with C-level str methods over
+# the whole history at once (a per-turn regex costs more than the scoring)
+_TURN_SEP, _SENT_SEP = "\x1e", "\x1f"
+_BREAKS = (("\n", _SENT_SEP), (". ", "." + _SENT_SEP), ("? ", "?" + _SENT_SEP), ("! ", "!" + _SENT_SEP))
+_PUNCT = str.maketrans({c: " " for c in string.punctuation + "•…–—“”‘’«»"})
+_STOPWORDS = frozenset(
+    """
+    about after again all also and any are because been before being but can
+    could did does doing each for from had has have her here hers him his how
+    into its just more most not now off once only other our out over own same
+    she should some such than that the their them then there these they this
+    those too under until very was were what when where which while who whom
+    why will with would you your yours
+    """.split()
+)
+
+
+def _whitespace_tokens(text: str) -> int:
+    """Budget fallback when no tokenizer is supplied: whitespace-separated words."""
+    return len(text.split())
+
+
+def _overlap(row: List[Tuple[int, float]], by_term: Dict[int, List[Tuple[int, float]]]) -> float:
+    """Largest cosine similarity of a sparse (term, weight) row to any pick so far."""
+    sims: Dict[int, float] = {}
+    for c, v in row:
+        for p, w in by_term.get(c, ()):
+            sims[p] = sims.get(p, 0.0) + v * w
+    return max(sims.values(), default=0.0)
+
+
+def _sentences(history: Sequence[Dict[str, str]]) -> Tuple[List[str], List[float]]:
+    """Every user/assistant sentence (oldest → newest) plus its prior weight."""
+    n = len(history)
+    turns = [(i, t) for i, t in enumerate(history) if t.get("role") in ("user", "assistant")]
+    blob = _TURN_SEP.join(
+        t.get("content", "").replace(_TURN_SEP, " ").replace(_SENT_SEP, " ") for _, t in turns
+    )
+    for old, new in _BREAKS:
+        blob = blob.replace(old, new)
+
+    texts: List[str] = []
+    weights: List[float] = []
+    for (i, turn), chunk in zip(turns, blob.split(_TURN_SEP)):
+        weight = (1.0 if turn["role"] == "user" else ASSISTANT_WEIGHT) * (
+            1.0 - RECENCY_WEIGHT + RECENCY_WEIGHT * (i + 1) / n
+        )
+        for sent in chunk.split(_SENT_SEP):
+            sent = sent.strip()
+            if sent:
+                texts.append(sent)
+                weights.append(weight)
+    return texts, weights
+
+
+def _extract(
+    history: Sequence[Dict[str, str]],
+    *,
+    max_chars: int,
+    max_tokens: int,
+    count_tokens: TokenCounter,
+) -> str:
+    """
+    Rank sentences by TF-IDF degree centrality and fill the token budget.
+
+    The sentence × term matrix is kept sparse as flat (row, col, value)
+    arrays, so cost is O(total terms) – the sum of cosine similarities to all
+    other sentences equals the dot product with the column sums, so the
+    S × S similarity matrix is never built.
+    """
+    import numpy as np  # only the extractive style needs it
+
+    texts, prior = _sentences(history)
+    if not texts:
+        return ""
+    words: List[str] = []
+    lengths: List[int] = []
+    for sent in _SENT_SEP.join(texts).lower().translate(_PUNCT).split(_SENT_SEP):
+        terms = sent.split()
+        words.extend(terms)
+        lengths.append(len(terms))
+    vocab = {w: i for i, w in enumerate(dict.fromkeys(words))}
+    ids = np.fromiter(map(vocab.__getitem__, words), np.int64, len(words))
+    useful = np.fromiter((len(w) > 1 and w not in _STOPWORDS for w in vocab), bool, len(vocab))
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    keep = useful[ids]
+    rows, cols = rows[keep], ids[keep]
+    if not cols.size:
+        return ""
+
+    n_sent, n_terms = len(texts), len(vocab)
+    key = rows * n_terms + cols
+    cells, tf = np.unique(key, return_counts=True)  # sorted → grouped by row
+    r_idx, c_idx = np.divmod(cells, n_terms)
+
+    df = np.bincount(c_idx, minlength=n_terms)
+    idf = np.log((1.0 + n_sent) / (1.0 + df)) + 1.0
+    val = (1.0 + np.log(tf)) * idf[c_idx]
+    val /= np.sqrt(np.bincount(r_idx, weights=val * val, minlength=n_sent))[r_idx]
+
+    centroid = np.bincount(c_idx, weights=val, minlength=n_terms)
+    central = np.bincount(r_idx, weights=val * centroid[c_idx], minlength=n_sent)
+    score = central * np.asarray(prior)
+    order = np.lexsort((np.arange(n_sent), -score))  # ties → earlier sentence
+    bounds = np.searchsorted(r_idx, np.arange(n_sent + 1))
+
+    # ── greedy fill: best first, skip near-duplicates and what doesn't fit ──
+    picked: List[int] = []
+    by_term: Dict[int, List[Tuple[int, float]]] = {}  # term → (pick, weight), sparse rows
+    costs: Dict[str, int] = {}
+    tokens = chars = misses = 0
+    for i in order.tolist():
+        if score[i] <= 0.0 or max_tokens - tokens <= 1 or misses >= MAX_MISSES:
+            break
+        line = f"• {texts[i]}"
+        lo, hi = bounds[i], bounds[i + 1]
+        row = list(zip(c_idx[lo:hi].tolist(), val[lo:hi].tolist()))
+        if chars + len(line) > max_chars or _overlap(row, by_term) > MAX_OVERLAP:
+            misses += 1
+            continue
+        cost = costs.get(line)
+        if cost is None:
+            cost = costs[line] = count_tokens(line)
+        if tokens + cost > max_tokens:
+            misses += 1
+            continue
+        misses = 0
+        for c, v in row:
+            by_term.setdefault(c, []).append((len(picked), v))
+        picked.append(i)
+        tokens += cost
+        chars += len(line) + 1
+
+    # per-line costs may not add up exactly (special tokens, merges across
+    # the newline) – drop the weakest pick until the whole block fits
+    def render(ids: List[int]) -> str:
+        return "\n".join(f"• {texts[i]}" for i in sorted(ids))
+
+    summary = render(picked)
+    while len(picked) > 1 and count_tokens(summary) > max_tokens:
+        picked.pop()
+        summary = render(picked)
+    return summary
+
 
 # ─────────────────────────────── Summariser ──────────────────────────────
 
@@ -28,6 +260,8 @@ def summarise_context(
     *,
     style: str = "brief",
     max_chars: int = 512,
+    max_tokens: Optional[int] = None,
+    count_tokens: Optional[TokenCounter] = None,
 ) -> str:
     """
     Returns a simple, deterministic summary (≤ 3 bullet points) of recent user turns.
@@ -38,49 +272,197 @@ def summarise_context(
     history : list[dict]
         Chat turns, e.g. [{"role": "user"|"assistant", "content": str}]
     style : str
-        Reserved for future use.
+        "brief" / "bullet" → heuristic bullets; "extractive" → the most
+        central sentences of the whole history, as many as fit `max_tokens`.
     max_chars : int
         Total char cap for the whole summary.
+    max_tokens : int | None
+        Extractive only – token budget (default EXTRACTIVE_MAX_TOKENS).
+    count_tokens : callable | None
+        Extractive only – tokenizer used for the budget (default: words).
 
     Returns
     -------
     str : summary text
     """
+    state = _HeuristicState()
+    _fold(state, history)
+    if style != "extractive" or state.user_turns < MIN_USER_TURNS:
+        return _render(state, max_chars)
+    summary = _extract(
+        history,
+        max_chars=max_chars,
+        max_tokens=EXTRACTIVE_MAX_TOKENS if max_tokens is None else max_tokens,
+        count_tokens=count_tokens or _whitespace_tokens,
+    )
+    return summary or PLACEHOLDER
 
-    # ────────────────────────────── Tunables ──────────────────────────────
-    PLACEHOLDER = "• (no prior context to summarise)\n"
-    NO_USER_MSG = "• (no user turns to summarise)\n"
-    MAX_BULLETS = 3
-    BULLET_CHAR_LIMIT = 120
 
-    # ────────────────────────────── Edge Cases ──────────────────────────────
-    if not history:
-        return PLACEHOLDER
+# ─────────────────────────── Rolling summaries ───────────────────────────
+@dataclass
+class _Rolling:
+    style: str
+    state: _HeuristicState = field(default_factory=_HeuristicState)
+    covered: int = 0  # turns folded so far
+    anchor: Tuple[int, ...] = ()  # digests of the last folded turns (≤ ANCHOR_TURNS)
+    # extractive style scores the whole history, so it is cached, not folded
+    key: Optional[Tuple[int, ...]] = None
+    text: str = ""
+    # … and re-ranks reuse the line costs of the last one (same counter only)
+    counter: Optional[TokenCounter] = None
+    costs: Dict[str, int] = field(default_factory=dict)
 
-    user_turns = [turn["content"] for turn in history if turn.get("role") == "user"]
-    if not user_turns:
-        return NO_USER_MSG
 
-    # Return placeholder for short histories (not enough context to summarise meaningfully)
-    MIN_USER_TURNS = 3
-    if len(user_turns) < MIN_USER_TURNS:
-        return PLACEHOLDER
+def _digest(turn: Dict[str, str]) -> int:
+    return hash((turn.get("role"), turn.get("content")))
 
-    # ────────────────────────── Heuristic Summary ───────────────────────────
-    # Take the most recent user turns (no MIN_TURNS gate here)
-    recent_user = user_turns[-MAX_BULLETS:]
 
-    bullets: List[str] = []
-    for line in recent_user:
-        bullet = line.strip().replace("\n", " ")
-        if len(bullet) > BULLET_CHAR_LIMIT:
-            bullet = bullet[: BULLET_CHAR_LIMIT - 1].rstrip() + "…"
-        bullets.append(f"• {bullet}")
+ANCHOR_TURNS = 4  # a run this long locates the resume point; one repeated turn cannot
 
-    summary = "\n".join(bullets) if bullets else PLACEHOLDER
 
-    # Enforce total max_chars for the whole block
-    if len(summary) > max_chars:
-        summary = summary[: max_chars].rstrip() + "…"
+def turn_anchor(turns: Sequence[Dict[str, str]]) -> Tuple[int, ...]:
+    """Digests of the last `ANCHOR_TURNS` turns – where a later call resumes."""
+    return tuple(_digest(t) for t in turns[-ANCHOR_TURNS:])
+
+
+def resume_index(
+    covered: int, anchor: Tuple[int, ...], turns: Sequence[Dict[str, str]]
+) -> Optional[int]:
+    """
+    Index just past the anchor run inside `turns` (the first unseen turn),
+    or None when the run is gone (history rewritten). `covered` is where the
+    run ended last time – the O(1) fast path for an append-only history.
+    """
+    if not anchor:
+        return 0 if covered == 0 else None
+    k, n = len(anchor), len(turns)
+
+    def ends_at(i: int) -> bool:  # the anchor run is turns[i - k : i]
+        return (
+            i >= k
+            and _digest(turns[i - 1]) == anchor[-1]
+            and tuple(_digest(t) for t in turns[i - k : i]) == anchor
+        )
+
+    # common case: the evicted prefix only grew at the end
+    if n >= covered and ends_at(covered):
+        return covered
+    # window slid at the front (e.g. memory returns the last N turns):
+    # walk back from the end – costs O(new turns) when the anchor is there
+    for i in range(n, k - 1, -1):
+        if ends_at(i):
+            return i
+    return None
+
+
+class RollingSummariser:
+    """
+    Per-session summary cache that only folds in *newly* evicted turns.
+
+    `summarise(session_id, evicted)` expects the turns that have left the
+    prompt window so far (oldest → newest). If they extend what was folded
+    last time – recognised by the run of the last folded turns' digests, at
+    its old position or, after a front slide, nearest the end – only the new
+    suffix is processed; otherwise (history rewritten, session cleared, style
+    changed) the summary is rebuilt once from scratch.
+
+    For an append-only history the output is identical to
+    `summarise_context(evicted, ...)`; when the window slides at the front the
+    summary keeps what it already absorbed from the dropped turns.
+
+    `style="extractive"` ranks sentences against the whole history and cannot
+    be folded; it is recomputed only when the evicted turns change.
+    """
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, _Rolling] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"folded": 0, "rebuilds": 0}
+
+    def summarise(
+        self,
+        session_id: str,
+        evicted: Sequence[Dict[str, str]],
+        *,
+        style: str = "brief",
+        max_chars: int = 512,
+        max_tokens: Optional[int] = None,
+        count_tokens: Optional[TokenCounter] = None,
+    ) -> str:
+        """Return the summary of `evicted`, folding only turns not seen yet."""
+        if style == "extractive":
+            return self._extractive(session_id, evicted, max_chars, max_tokens, count_tokens)
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            start = None
+            if entry is not None and entry.style == style:
+                start = resume_index(entry.covered, entry.anchor, evicted)
+            if entry is None or start is None:
+                if entry is not None:
+                    self.stats["rebuilds"] += 1
+                entry = self._sessions[session_id] = _Rolling(style=style)
+                start = 0
+
+            new = evicted[start:]
+            if new:
+                _fold(entry.state, new)
+                self.stats["folded"] += len(new)
+                entry.covered = len(evicted)
+                entry.anchor = turn_anchor(evicted)
+            return _render(entry.state, max_chars)
+
+    def _extractive(
+        self,
+        session_id: str,
+        evicted: Sequence[Dict[str, str]],
+        max_chars: int,
+        max_tokens: Optional[int],
+        count_tokens: Optional[TokenCounter],
+    ) -> str:
+        key = (
+            len(evicted),
+            _digest(evicted[0]) if evicted else 0,
+            _digest(evicted[-1]) if evicted else 0,
+            max_chars,
+            -1 if max_tokens is None else max_tokens,
+        )
+        counter = count_tokens or _whitespace_tokens
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry.style == "extractive" and entry.key == key:
+                return entry.text
+            known = entry.costs if entry is not None and entry.counter == counter else {}
+        costs: Dict[str, int] = {}  # only the lines this ranking costed are kept
+
+        def cached(line: str) -> int:
+            if "\n" in line:  # the final whole-block check
+                return counter(line)
+            n = costs.get(line)
+            if n is None:
+                n = costs[line] = known[line] if line in known else counter(line)
+            return n
+
+        text = summarise_context(
+            list(evicted),
+            style="extractive",
+            max_chars=max_chars,
+            max_tokens=max_tokens,
+            count_tokens=cached,
+        )
+        with self._lock:
+            self._sessions[session_id] = _Rolling(
+                style="extractive", key=key, text=text, counter=counter, costs=costs
+            )
+        return text
+
+    def invalidate(self, session_id: Optional[str] = None) -> None:
+        """Forget one session's summary (e.g. on `memory.clear`) or all of them."""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
 
-    return summary
\ No newline at end of file
+# Process-wide cache used by the chat pipeline
+rolling_summaries: RollingSummariser = RollingSummariser()
@@ -0,0 +1,262 @@
+# ════════════════════════════════════════════════════════════════════
+#  utils/summary_worker.py – off-request-path abstractive summaries
+# ════════════════════════════════════════════════════════════════════
+"""
+Background model-based (abstractive) summarisation.
+
+`prepare_context()` never waits for the model here: it asks the worker for
+a *ready* summary and, if none is available yet, keeps using the heuristic
+bullets from `utils.summariser`. When a session crosses the token threshold
+the chat loop calls `schedule()`, a job runs on a thread or process pool, and
+the result is stored per session for the next request.
+
+Jobs are incremental: the previous abstractive summary plus only the turns
+evicted since then are sent to the model.
+
+Example
+-------
+>>> worker = SummaryWorker(ModelSummariser(tokenizer, model, device))
+>>> worker.lookup("default", evicted)      # None until the first job finishes
+>>> # … then (summary, covered): evicted[covered:] is not in the summary yet
+>>> worker.schedule("default", evicted)    # returns immediately
+"""
+
+from __future__ import annotations
+
+# ───────────────────────────────────────────────────────── Logging ──
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# ───────────────────────────────────────────────────────── Imports ──
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from utils.summariser import resume_index, turn_anchor
+
+# (prior summary | None, newly evicted turns) → summary text
+SummariseFn = Callable[[Optional[str], List[Dict[str, str]]], str]
+
+_PROMPT_HEAD = "Summarize the conversation so far in two or three sentences."
+_MAX_INPUT_CHARS = 2_000  # ≈ 512 T5 tokens – keep the most recent part
+
+
+# ─────────────────────────────────────────── Prompt helpers ──
+def build_summary_prompt(prior: Optional[str], turns: Sequence[Dict[str, str]]) -> str:
+    """FLAN-T5 instruction: previous summary (if any) + new transcript tail."""
+    lines = [
+        f"{t['role'].capitalize()}: {t['content']}"
+        for t in turns
+        if t.get("role") != "summary"
+    ]
+    transcript = "\n".join(lines)[-_MAX_INPUT_CHARS:]
+    head = f"{_PROMPT_HEAD}\nPrevious summary: {prior}\n" if prior else f"{_PROMPT_HEAD}\n"
+    return f"{head}{transcript}"
+
+
+def _format(text: str) -> str:
+    """Keep the summary block visually consistent with heuristic bullets."""
+    text = " ".join(text.split())
+    return f"• {text}" if text else ""
+
+
+# ─────────────────────────────────────────── Model adapters ──
+class ModelSummariser:
+    """Run the already-loaded seq2seq model (thread pool – shares weights)."""
+
+    def __init__(self, tokenizer: Any, model: Any, device: str, *, max_new_tokens: int = 96) -> None:
+        self._tok = tokenizer
+        self._model = model
+        self._device = device
+        self._max_new = max_new_tokens
+
+    def __call__(self, prior: Optional[str], turns: List[Dict[str, str]]) -> str:
+        import torch  # heavy import stays off the module import path
+
+        prompt = build_summary_prompt(prior, turns)
+        ids = self._tok(prompt, return_tensors="pt", truncation=True, max_length=512)
+        with torch.no_grad():
+            out = self._model.generate(
+                ids.input_ids.to(self._device),
+                max_new_tokens=self._max_new,
+                do_sample=False,
+                num_beams=2,
+            )
+        return _format(self._tok.decode(out[0], skip_special_tokens=True))
+
+
+_PROC_MODEL: Dict[str, Any] = {}  # per worker-process cache
+
+
+class ProcessModelSummariser:
+    """
+    Picklable variant for a process pool: each worker process loads its own
+    CPU copy of the model once, so summarisation never competes with the
+    request path for the GIL. `model` is a `model` settings section; it is
+    resolved like the chat model (`engine.model.runtime_from_settings` – the
+    pinned, verified local copy, honouring offline mode).
+    """
+
+    def __init__(self, model: Optional[Mapping[str, Any]] = None, *, max_new_tokens: int = 96) -> None:
+        self.model: Dict[str, Any] = {**(model or {}), "device": "cpu"}
+        self.max_new_tokens = max_new_tokens
+
+    def __call__(self, prior: Optional[str], turns: List[Dict[str, str]]) -> str:
+        key = repr(sorted(self.model.items()))
+        if key not in _PROC_MODEL:
+            from engine.model import runtime_from_settings
+
+            rt = runtime_from_settings(self.model)
+            _PROC_MODEL[key] = ModelSummariser(
+                rt.tokenizer, rt.model, rt.device, max_new_tokens=self.max_new_tokens
+            )
+        summarise: ModelSummariser = _PROC_MODEL[key]
+        return summarise(prior, turns)
+
+
+# ─────────────────────────────────────────────── Worker ──
+@dataclass
+class _Ready:
+    text: str
+    covered: int  # evicted turns the summary accounts for
+    anchor: Tuple[int, ...]  # digests of the last covered turns (utils.summariser.turn_anchor)
+
+
+class SummaryWorker:
+    """
+    Per-session abstractive summaries computed off the request path.
+
+    • `lookup()`   – O(new turns); returns the stored summary while it still
+                     describes a prefix of the current evicted turns, with
+                     the position where that prefix ends.
+    • `schedule()` – submits at most one job per session; later calls while a
+                     job is in flight are ignored.
+    • `invalidate()` – drops stored summaries and discards in-flight results
+                     (hooked to `memory.clear`).
+    """
+
+    def __init__(
+        self,
+        summarise: SummariseFn,
+        *,
+        executor: Optional[Executor] = None,
+        refresh_every: int = 4,
+    ) -> None:
+        self._summarise = summarise
+        self._pool: Executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="summary-worker"
+        )
+        self._refresh_every = max(1, refresh_every)
+        self._ready: Dict[str, _Ready] = {}
+        self._pending: Dict[str, Future[str]] = {}
+        self._epoch: Dict[str, int] = {}  # bumped by invalidate()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"scheduled": 0, "completed": 0, "failed": 0, "hits": 0}
+
+    # ─────────────────────────────────────────── internals ──
+    @staticmethod
+    def _position(ready: _Ready, evicted: Sequence[Dict[str, str]]) -> Optional[int]:
+        """Index just past the summary's last turn inside `evicted` (or None)."""
+        return resume_index(ready.covered, ready.anchor, evicted)
+
+    def _done(self, session_id: str, epoch: int, covered: int, anchor: Tuple[int, ...], fut: Future[str]) -> None:
+        with self._lock:
+            if self._pending.get(session_id) is fut:
+                del self._pending[session_id]
+            if self._epoch.get(session_id, 0) != epoch:
+                return  # session cleared while we were running
+            try:
+                text = fut.result()
+            except Exception as exc:
+                self.stats["failed"] += 1
+                LOGGER.warning("[Summary] abstractive job failed for %s (%s)", session_id, exc)
+                return
+            self.stats["completed"] += 1
+            if text:
+                self._ready[session_id] = _Ready(text=text, covered=covered, anchor=anchor)
+
+    # ─────────────────────────────────────────── public API ──
+    def lookup(
+        self, session_id: str, evicted: Sequence[Dict[str, str]]
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Stored summary for `session_id` and the index in `evicted` just past
+        the turns it covers, if it still matches the history. Turns from that
+        index on were evicted after the job ran – the caller summarises them.
+        """
+        with self._lock:
+            ready = self._ready.get(session_id)
+            if ready is None:
+                return None
+            pos = self._position(ready, evicted)
+            if pos is None:
+                del self._ready[session_id]  # history rewritten → stale
+                return None
+            self.stats["hits"] += 1
+            return ready.text, pos
+
+    def schedule(self, session_id: str, evicted: Sequence[Dict[str, str]]) -> bool:
+        """Queue a refresh if enough new turns were evicted; never blocks."""
+        if not evicted:
+            return False
+        with self._lock:
+            if session_id in self._pending:
+                return False
+            ready = self._ready.get(session_id)
+            start = self._position(ready, evicted) if ready else None
+            if ready is not None and start is not None:
+                if len(evicted) - start < self._refresh_every:
+                    return False
+                prior, new = ready.text, list(evicted[start:])
+            else:
+                prior, new = None, list(evicted)
+
+            epoch = self._epoch.get(session_id, 0)
+            fut = self._pool.submit(self._summarise, prior, new)
+            self._pending[session_id] = fut
+            self.stats["scheduled"] += 1
+
+        covered, anchor = len(evicted), turn_anchor(evicted)
+        fut.add_done_callback(
+            lambda f: self._done(session_id, epoch, covered, anchor, f)
+        )
+        return True
+
+    def invalidate(self, session_id: Optional[str] = None) -> None:
+        """Forget stored summaries; results of in-flight jobs are discarded."""
+        with self._lock:
+            targets = list(self._ready) + list(self._pending) if session_id is None else [session_id]
+            for sid in targets:
+                self._ready.pop(sid, None)
+                self._epoch[sid] = self._epoch.get(sid, 0) + 1
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+def create_summary_worker(
+    cfg: Dict[str, Any],
+    *,
+    tokenizer: Any = None,
+    model: Any = None,
+    device: str = "cpu",
+    model_settings: Optional[Mapping[str, Any]] = None,
+) -> SummaryWorker:
+    """
+    Build a worker from the `summarisation` settings block; process workers
+    load the model described by `model_settings` (the `model` section).
+    """
+    max_new = int(cfg.get("abstractive_max_new_tokens", 96))
+    refresh = int(cfg.get("abstractive_refresh_every", 4))
+    if str(cfg.get("worker", "thread")) == "process":
+        return SummaryWorker(
+            ProcessModelSummariser(model_settings, max_new_tokens=max_new),
+            executor=ProcessPoolExecutor(max_workers=int(cfg.get("worker_processes", 1))),
+            refresh_every=refresh,
+        )
+    return SummaryWorker(
+        ModelSummariser(tokenizer, model, device, max_new_tokens=max_new),
+        refresh_every=refresh,
+    )